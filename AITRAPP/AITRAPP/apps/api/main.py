@@ -1,7 +1,6 @@
 """FastAPI main application"""
 import asyncio
 import os
-import re
 from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -12,7 +11,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 from kiteconnect import KiteConnect
 from prometheus_client import make_asgi_app
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel
 
 from apps.api.auth import APIKeyMiddleware
 from packages.core import compliance
@@ -133,7 +132,8 @@ async def lifespan(app: FastAPI):
     # Initialize market data stream
     app_state.market_data_stream = MarketDataStream(
         settings=settings,
-        window_seconds=[1, 5]
+        window_seconds=[1, 5],
+        on_order_update_callback=app_state.execution_engine.on_order_update
     )
 
     # Sync instruments
@@ -335,6 +335,9 @@ async def lifespan(app: FastAPI):
     if app_state.market_data_stream:
         app_state.market_data_stream.stop()
 
+    # Stop backtest worker processes
+    shutdown_backtest_jobs()
+
     logger.info("AITRAPP stopped")
 
 
@@ -382,6 +385,13 @@ from apps.api.routes import kite_auth
 
 app.include_router(kite_auth.router, tags=["auth"])
 
+# Include backtest job router
+from apps.api.routes import backtest
+from apps.api.routes.backtest import BacktestRequest, to_spec
+from packages.core.backtest_jobs import get_backtest_job_manager, shutdown_backtest_jobs
+
+app.include_router(backtest.router, tags=["backtest"])
+
 
 # ===== API Models =====
 
@@ -1015,81 +1025,30 @@ async def reload_strategies():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-class BacktestRequest(BaseModel):
-    """Backtest request model"""
-    symbol: str = "NIFTY"  # NIFTY or BANKNIFTY
-    start_date: str  # YYYY-MM-DD
-    end_date: str  # YYYY-MM-DD
-    initial_capital: float = 1000000
-    strategy: str = "all"  # ORB, TrendPullback, OptionsRanker, or all
-
-    @field_validator('symbol')
-    @classmethod
-    def validate_symbol(cls, v: str) -> str:
-        if not re.match(r"^[a-zA-Z0-9_-]+$", v):
-            raise ValueError('Symbol must be alphanumeric')
-        return v
-
-
 @app.post("/backtest")
 async def run_backtest(request: BacktestRequest):
     """
     Run backtest on historical data.
     
     This endpoint runs strategies on historical NSE options data
-    and returns performance metrics.
+    and returns performance metrics. The backtest runs in the backtest
+    process pool; use /backtest/jobs to queue one without waiting.
     """
     try:
-        from packages.core.backtest import BacktestEngine
-
-        # Parse dates
-        start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
-        end_date = datetime.strptime(request.end_date, "%Y-%m-%d")
-
-        # Initialize strategies
-        strategies = []
-
-        if request.strategy == "all" or request.strategy == "ORB":
-            orb_config = app_config.get_strategy_by_name("ORB")
-            if orb_config:
-                strategies.append(ORBStrategy("ORB", orb_config.params))
-
-        if request.strategy == "all" or request.strategy == "TrendPullback":
-            tp_config = app_config.get_strategy_by_name("TrendPullback")
-            if tp_config:
-                strategies.append(TrendPullbackStrategy("TrendPullback", tp_config.params))
-
-        if request.strategy == "all" or request.strategy == "OptionsRanker":
-            opt_config = app_config.get_strategy_by_name("OptionsRanker")
-            if opt_config:
-                strategies.append(OptionsRankerStrategy("OptionsRanker", opt_config.params))
-
-        if not strategies:
-            raise HTTPException(
-                status_code=400,
-                detail="No strategies configured. Check configs/app.yaml"
-            )
-
-        # Run backtest
-        engine = BacktestEngine(
-            initial_capital=request.initial_capital,
-            data_dir="docs/NSE OPINONS DATA"
-        )
-
-        results = engine.run_backtest(
-            strategies=strategies,
-            symbol=request.symbol,
-            start_date=start_date,
-            end_date=end_date
-        )
+        job = get_backtest_job_manager().submit(to_spec(request))
+        output = await asyncio.wrap_future(job.future)
 
         return {
             "status": "success",
-            "results": results,
-            "trades": engine.closed_trades[:100],  # First 100 trades
+            "job_id": job.job_id,
+            "cached": job.cached,
+            "results": output["results"],
+            "trades": output["trades"],  # First 100 trades
             "timestamp": datetime.now().isoformat()
         }
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {e}")
     except FileNotFoundError as e:
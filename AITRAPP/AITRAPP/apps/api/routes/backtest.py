@@ -0,0 +1,172 @@
+"""Backtest job endpoints"""
+import asyncio
+import json
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, field_validator
+
+from packages.core.backtest_jobs import (
+    BacktestSpec,
+    build_strategies,
+    get_backtest_job_manager,
+)
+from packages.core.config import settings
+
+router = APIRouter()
+
+PROGRESS_POLL_INTERVAL = 0.25  # seconds between SSE progress checks
+
+
+class BacktestRequest(BaseModel):
+    """Backtest request model"""
+    symbol: str = "NIFTY"  # NIFTY or BANKNIFTY
+    start_date: str  # YYYY-MM-DD
+    end_date: str  # YYYY-MM-DD
+    initial_capital: float = 1000000
+    strategy: str = "all"  # ORB, TrendPullback, OptionsRanker, or all
+    params: Dict[str, Any] = {}  # Overrides for the strategy's configured params
+
+    @field_validator('symbol')
+    @classmethod
+    def validate_symbol(cls, v: str) -> str:
+        if not re.match(r"^[a-zA-Z0-9_-]+$", v):
+            raise ValueError('Symbol must be alphanumeric')
+        return v
+
+
+class BacktestSweepRequest(BacktestRequest):
+    """Parameter sweep: one backtest per combination of the grid values"""
+    grid: Dict[str, List[Any]]  # e.g. {"range_minutes": [15, 30], "rr": [1.5, 2.0]}
+
+
+def to_spec(request: BacktestRequest) -> BacktestSpec:
+    """Validate a request into a job spec, raising 400 on bad input"""
+    try:
+        start = datetime.strptime(request.start_date, "%Y-%m-%d")
+        end = datetime.strptime(request.end_date, "%Y-%m-%d")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date format: {e}") from e
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+
+    if request.params and request.strategy == "all":
+        raise HTTPException(status_code=400, detail="params need a single strategy")
+    if not build_strategies(request.strategy):
+        raise HTTPException(
+            status_code=400,
+            detail="No strategies configured. Check configs/app.yaml"
+        )
+
+    return BacktestSpec(
+        symbol=request.symbol,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        initial_capital=request.initial_capital,
+        strategy=request.strategy,
+        params=dict(request.params),
+        data_dir=settings.backtest_data_dir,
+    )
+
+
+def _get_job(job_id: str):
+    job = get_backtest_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Backtest job {job_id} not found")
+    return job
+
+
+@router.post("/backtest/jobs")
+async def submit_backtest_job(request: BacktestRequest):
+    """Queue a backtest and return its job ID without waiting for it"""
+    job = get_backtest_job_manager().submit(to_spec(request))
+    return job.to_dict()
+
+
+@router.post("/backtest/sweeps")
+async def submit_backtest_sweep(request: BacktestSweepRequest):
+    """Queue one backtest per parameter set; they run in parallel in the pool"""
+    if request.strategy == "all":
+        raise HTTPException(status_code=400, detail="A sweep needs a single strategy")
+    spec = to_spec(request)
+    try:
+        jobs = get_backtest_job_manager().submit_sweep(spec, request.grid)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return {"sweep_id": jobs[0].sweep_id, "jobs": [job.to_dict() for job in jobs]}
+
+
+@router.get("/backtest/jobs/{job_id}")
+async def get_backtest_job(job_id: str):
+    """Job status, progress and (once completed) results"""
+    return _get_job(job_id).to_dict(include_result=True)
+
+
+@router.delete("/backtest/jobs/{job_id}")
+async def cancel_backtest_job(job_id: str):
+    """Cancel a job that is still queued"""
+    _get_job(job_id)
+    if not get_backtest_job_manager().cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job already started or finished")
+    return {"job_id": job_id, "status": "CANCELLED"}
+
+
+@router.get("/backtest/jobs/{job_id}/events")
+async def stream_backtest_job(job_id: str):
+    """
+    Server-sent events with the job's progress.
+
+    Sends a "progress" event whenever the progress changes and a final
+    "completed", "failed" or "cancelled" event with the job state.
+    """
+    job = _get_job(job_id)
+
+    async def events():
+        last = None
+        while not job.done:
+            state = (job.status, job.progress)
+            if state != last:
+                last = state
+                yield f"event: progress\ndata: {json.dumps(jsonable_encoder(job.to_dict()))}\n\n"
+            await asyncio.sleep(PROGRESS_POLL_INTERVAL)
+        data = json.dumps(jsonable_encoder(job.to_dict(include_result=True)))
+        yield f"event: {job.status.value.lower()}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/backtest/sweeps/{sweep_id}")
+async def get_backtest_sweep(sweep_id: str, sort_by: Optional[str] = "total_return_pct"):
+    """Sweep progress and finished parameter sets, best first by `sort_by`"""
+    jobs = get_backtest_job_manager().get_sweep(sweep_id)
+    if jobs is None:
+        raise HTTPException(status_code=404, detail=f"Sweep {sweep_id} not found")
+
+    finished = [job for job in jobs if job.result is not None]
+    ranked = sorted(
+        finished,
+        key=lambda job: job.result["results"].get(sort_by) or 0,
+        reverse=True
+    )
+    return {
+        "sweep_id": sweep_id,
+        "total": len(jobs),
+        "done": sum(1 for job in jobs if job.done),
+        "failed": sum(1 for job in jobs if job.error is not None),
+        "results": [
+            {
+                "job_id": job.job_id,
+                "params": job.spec.params,
+                "results": {k: v for k, v in job.result["results"].items() if k != "daily_pnl"},
+            }
+            for job in ranked
+        ],
+    }
@@ -114,6 +114,7 @@ class AppState:
             settings=self.settings,
             window_seconds=[1, 5],
             on_bar_callback=self._on_bar_update,
+            on_order_update_callback=self.execution_engine.on_order_update,
         )
         self.market_data_stream.initialize()
         self.market_data_stream.start()
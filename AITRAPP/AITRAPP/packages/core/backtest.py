@@ -1,7 +1,7 @@
 """Backtesting engine using historical data"""
 import hashlib
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 import pandas as pd
 import structlog
@@ -62,7 +62,8 @@ class BacktestEngine:
         symbol: str,
         start_date: datetime,
         end_date: datetime,
-        strikes: Optional[List[float]] = None
+        strikes: Optional[List[float]] = None,
+        progress_callback: Optional[Callable[[datetime, float], None]] = None
     ) -> Dict:
         """
         Run backtest on historical data.
@@ -73,6 +74,8 @@ class BacktestEngine:
             start_date: Backtest start date
             end_date: Backtest end date
             strikes: Specific strikes to test (None for ATM)
+            progress_callback: Called after each calendar day with the date and
+                the fraction of the range done
         
         Returns:
             Backtest results dictionary
@@ -96,10 +99,17 @@ class BacktestEngine:
 
         logger.info(f"Testing {len(strikes)} strikes: {strikes}")
 
+        total_days = (end_date - start_date).days + 1
+
+        def report_progress():
+            if progress_callback:
+                progress_callback(current_date, ((current_date - start_date).days + 1) / total_days)
+
         # Iterate through dates
         while current_date <= end_date:
             # Skip weekends (simplified - in production, check actual trading days)
             if current_date.weekday() >= 5:  # Saturday = 5, Sunday = 6
+                report_progress()
                 current_date += timedelta(days=1)
                 continue
 
@@ -110,11 +120,13 @@ class BacktestEngine:
                 # If no strikes found for today (e.g. holiday or missing data), skip or use previous?
                 if not current_strikes:
                     logger.debug(f"No strikes found for {current_date}, skipping")
+                    report_progress()
                     current_date += timedelta(days=1)
                     continue
 
             # Process day
             self._process_day(strategies, symbol, current_date, current_strikes)
+            report_progress()
 
             # Move to next day
             current_date += timedelta(days=1)
@@ -0,0 +1,369 @@
+"""Backtest jobs run in a process pool, off the API event loop"""
+import hashlib
+import itertools
+import json
+import multiprocessing
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+from packages.core.config import app_config, settings
+from packages.core.strategies import (
+    OptionsRankerStrategy,
+    ORBStrategy,
+    Strategy,
+    TrendPullbackStrategy,
+)
+
+logger = structlog.get_logger(__name__)
+
+STRATEGY_CLASSES = {
+    "ORB": ORBStrategy,
+    "TrendPullback": TrendPullbackStrategy,
+    "OptionsRanker": OptionsRankerStrategy,
+}
+
+MAX_TRADES_RETURNED = 100
+MAX_SWEEP_SIZE = 256
+
+
+class JobStatus(str, Enum):
+    """Backtest job status"""
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+@dataclass(frozen=True)
+class BacktestSpec:
+    """What to backtest; also the result cache key (with the config SHA)"""
+    symbol: str
+    start_date: str  # YYYY-MM-DD
+    end_date: str  # YYYY-MM-DD
+    initial_capital: float = 1000000
+    strategy: str = "all"  # ORB, TrendPullback, OptionsRanker, or all
+    params: Dict[str, Any] = field(default_factory=dict)  # Overrides for the strategy's params
+    data_dir: str = "docs/NSE OPINONS DATA"
+
+    def cache_key(self, config_sha: str) -> str:
+        spec = json.dumps(asdict(self), sort_keys=True, default=str)
+        return hashlib.sha256(f"{config_sha}:{spec}".encode()).hexdigest()
+
+
+@dataclass
+class BacktestJob:
+    """A queued, running or finished backtest"""
+    job_id: str
+    spec: BacktestSpec
+    status: JobStatus = JobStatus.QUEUED
+    progress: float = 0.0
+    current_date: Optional[str] = None
+    cached: bool = False
+    sweep_id: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+    def to_dict(self, include_result: bool = False) -> Dict:
+        data = {
+            "job_id": self.job_id,
+            "status": self.status.value,
+            "progress": round(self.progress, 4),
+            "current_date": self.current_date,
+            "cached": self.cached,
+            "sweep_id": self.sweep_id,
+            "spec": asdict(self.spec),
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+def build_strategies(name: str, params: Optional[Dict[str, Any]] = None) -> List[Strategy]:
+    """
+    Build configured strategies for a backtest.
+
+    Args:
+        name: Strategy name, or "all" for every configured strategy
+        params: Overrides merged over the configured params
+
+    Returns:
+        Strategies that are configured in configs/app.yaml
+    """
+    strategies = []
+    for strategy_name, strategy_class in STRATEGY_CLASSES.items():
+        if name not in ("all", strategy_name):
+            continue
+        config = app_config.get_strategy_by_name(strategy_name)
+        if config:
+            strategies.append(strategy_class(strategy_name, {**config.params, **(params or {})}))
+    return strategies
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """All parameter combinations of a sweep grid, e.g. {"a": [1, 2], "b": [3]}"""
+    if not grid:
+        return [{}]
+    names = sorted(grid)
+    combinations = itertools.product(*(grid[name] for name in names))
+    return [dict(zip(names, values, strict=True)) for values in combinations]
+
+
+# Set in each pool process by _init_worker
+_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def run_backtest_job(job_id: str, spec: BacktestSpec) -> Dict:
+    """Run one backtest; executes in a pool process"""
+    from packages.core.backtest import BacktestEngine
+
+    def report(day: datetime, fraction: float):
+        if _progress_queue is not None:
+            _progress_queue.put((job_id, fraction, day.strftime("%Y-%m-%d")))
+
+    if _progress_queue is not None:
+        _progress_queue.put((job_id, 0.0, None))  # Started
+
+    strategies = build_strategies(spec.strategy, spec.params)
+    if not strategies:
+        raise ValueError(f"No strategies configured for {spec.strategy}")
+
+    engine = BacktestEngine(initial_capital=spec.initial_capital, data_dir=spec.data_dir)
+    results = engine.run_backtest(
+        strategies=strategies,
+        symbol=spec.symbol,
+        start_date=datetime.strptime(spec.start_date, "%Y-%m-%d"),
+        end_date=datetime.strptime(spec.end_date, "%Y-%m-%d"),
+        progress_callback=report
+    )
+    return {"results": results, "trades": engine.closed_trades[:MAX_TRADES_RETURNED]}
+
+
+class BacktestJobManager:
+    """
+    Queues backtests into a process pool and tracks their progress.
+
+    Features:
+    - Job IDs with status and progress (fed back from the pool processes)
+    - Results cached by (config SHA, spec), so repeated runs return at once
+    - Parameter sweeps fanned out as one job per parameter set
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_jobs: int = 500,
+        max_cached_results: int = 128
+    ):
+        self.max_workers = max_workers or settings.backtest_workers
+        self.max_jobs = max_jobs
+        self.max_cached_results = max_cached_results
+
+        self.jobs: "OrderedDict[str, BacktestJob]" = OrderedDict()
+        self.sweeps: Dict[str, List[str]] = {}
+        self.results_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.RLock()
+
+        # Spawned workers: the API process runs threads and an event loop
+        self._ctx = multiprocessing.get_context("spawn")
+        self._progress_queue = self._ctx.Queue()
+        self.executor = self._create_pool()
+        self._running = True
+        self._progress_thread = threading.Thread(
+            target=self._drain_progress, name="backtest-progress", daemon=True
+        )
+        self._progress_thread.start()
+
+    def submit(self, spec: BacktestSpec, sweep_id: Optional[str] = None) -> BacktestJob:
+        """Queue a backtest, or complete it from the result cache"""
+        job = BacktestJob(job_id=uuid.uuid4().hex[:12], spec=spec, sweep_id=sweep_id)
+        cache_key = spec.cache_key(self._config_sha())
+
+        with self._lock:
+            self._remember(job)
+            cached = self.results_cache.get(cache_key)
+            if cached is not None:
+                self.results_cache.move_to_end(cache_key)
+                job.future = Future()
+                job.future.set_result(cached)
+                self._finish(job, cached, None, cached=True)
+                logger.info("Backtest served from cache", job_id=job.job_id)
+                return job
+
+            try:
+                job.future = self.executor.submit(run_backtest_job, job.job_id, spec)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM on a long run); start a fresh pool
+                logger.warning("Backtest pool broken, restarting it")
+                self.executor = self._create_pool()
+                job.future = self.executor.submit(run_backtest_job, job.job_id, spec)
+
+        job.future.add_done_callback(lambda future: self._on_done(job, cache_key, future))
+        logger.info("Backtest queued", job_id=job.job_id, symbol=spec.symbol, strategy=spec.strategy)
+        return job
+
+    def submit_sweep(self, spec: BacktestSpec, grid: Dict[str, List[Any]]) -> List[BacktestJob]:
+        """Queue one job per parameter set in the grid; they run in parallel"""
+        param_sets = expand_grid(grid)
+        if len(param_sets) > MAX_SWEEP_SIZE:
+            raise ValueError(f"Sweep has {len(param_sets)} parameter sets, limit is {MAX_SWEEP_SIZE}")
+
+        sweep_id = uuid.uuid4().hex[:12]
+        jobs = [
+            self.submit(BacktestSpec(**{**asdict(spec), "params": {**spec.params, **params}}), sweep_id)
+            for params in param_sets
+        ]
+        with self._lock:
+            self.sweeps[sweep_id] = [job.job_id for job in jobs]
+        return jobs
+
+    def get(self, job_id: str) -> Optional[BacktestJob]:
+        return self.jobs.get(job_id)
+
+    def get_sweep(self, sweep_id: str) -> Optional[List[BacktestJob]]:
+        job_ids = self.sweeps.get(sweep_id)
+        if job_ids is None:
+            return None
+        return [self.jobs[job_id] for job_id in job_ids if job_id in self.jobs]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet"""
+        job = self.jobs.get(job_id)
+        if job is None or job.future is None:
+            return False
+        return job.future.cancel()
+
+    def shutdown(self):
+        self._running = False
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self._progress_queue.put(None)
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self._ctx,
+            initializer=_init_worker,
+            initargs=(self._progress_queue,)
+        )
+
+    @staticmethod
+    def _config_sha() -> str:
+        from packages.core.persistence import get_config_sha
+
+        return get_config_sha()
+
+    def _remember(self, job: BacktestJob):
+        self.jobs[job.job_id] = job
+        while len(self.jobs) > self.max_jobs:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if not oldest.done:
+                break
+            del self.jobs[oldest_id]
+
+    def _on_done(self, job: BacktestJob, cache_key: str, future: Future):
+        if future.cancelled():
+            self._finish(job, None, "Cancelled", status=JobStatus.CANCELLED)
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error("Backtest failed", job_id=job.job_id, error=str(error))
+            self._finish(job, None, str(error))
+            return
+
+        result = future.result()
+        with self._lock:
+            self.results_cache[cache_key] = result
+            while len(self.results_cache) > self.max_cached_results:
+                self.results_cache.popitem(last=False)
+        self._finish(job, result, None)
+        logger.info(
+            "Backtest completed",
+            job_id=job.job_id,
+            total_return_pct=result["results"].get("total_return_pct")
+        )
+
+    def _finish(self, job, result, error, status=None, cached=False):
+        with self._lock:
+            job.result = result
+            job.error = error
+            job.cached = cached
+            job.finished_at = datetime.now()
+            if job.started_at is None and status != JobStatus.CANCELLED:
+                # Finished before the progress thread saw it start (or served from cache)
+                job.started_at = job.finished_at
+            if result is not None:
+                # Progress updates still in the queue are dropped once the job is done
+                job.progress = 1.0
+                job.current_date = job.spec.end_date
+            job.status = status or (JobStatus.COMPLETED if error is None else JobStatus.FAILED)
+
+    def _drain_progress(self):
+        """Apply progress reported by pool processes to the jobs"""
+        while self._running:
+            try:
+                item = self._progress_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            if item is None:
+                break
+            job_id, fraction, day = item
+            with self._lock:
+                job = self.jobs.get(job_id)
+                if job is None or job.done:
+                    continue
+                if job.status == JobStatus.QUEUED:
+                    job.status = JobStatus.RUNNING
+                    job.started_at = datetime.now()
+                job.progress = fraction
+                job.current_date = day
+
+
+_manager: Optional[BacktestJobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_backtest_job_manager() -> BacktestJobManager:
+    """Get the process-wide job manager, starting its pool on first use"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = BacktestJobManager()
+    return _manager
+
+
+def shutdown_backtest_jobs():
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.shutdown()
+            _manager = None
@@ -76,6 +76,10 @@ class Settings(BaseSettings):
     api_secret_key: str = Field(alias="API_SECRET_KEY")
     cors_origins: List[str] = Field(default=["*"], alias="CORS_ORIGINS")
 
+    # Backtesting
+    backtest_workers: int = Field(default=2, alias="BACKTEST_WORKERS")
+    backtest_data_dir: str = Field(default="docs/NSE OPINONS DATA", alias="BACKTEST_DATA_DIR")
+
     # WebSocket
     ws_ping_interval: int = Field(default=30, alias="WS_PING_INTERVAL")
     ws_reconnect_delay: int = Field(default=5, alias="WS_RECONNECT_DELAY")
@@ -223,6 +227,8 @@ class ExecutionConfig:
         self.retry_backoff_ms = config.get("retry_backoff_ms", 500)
         self.exchange_algo_id = config.get("exchange_algo_id", None)
         self.tops_cap_per_sec = config.get("tops_cap_per_sec", 8)
+        self.broker_workers = config.get("broker_workers", 4)
+        self.fill_timeout_sec = config.get("fill_timeout_sec", 30)
 
 
 class AppConfig:
@@ -240,6 +246,7 @@ class AppConfig:
         with open(self.config_path, "r") as f:
             config = yaml.safe_load(f)
 
+        self._raw = config
         self.mode = AppMode(config.get("mode", "PAPER"))
         self.timezone = config.get("timezone", "Asia/Kolkata")
 
@@ -261,6 +268,10 @@ class AppConfig:
         self.logging = config.get("logging", {})
         self.monitoring = config.get("monitoring", {})
 
+    def dict(self) -> Dict[str, Any]:
+        """Configuration as loaded from the YAML file"""
+        return self._raw
+
     def get_strategy_by_name(self, name: str) -> Optional[StrategyConfig]:
         """Get strategy configuration by name"""
         for strategy in self.strategies:
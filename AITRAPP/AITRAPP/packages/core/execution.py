@@ -3,9 +3,11 @@ import asyncio
 import hashlib
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
 
 import structlog
 from kiteconnect import KiteConnect
@@ -21,6 +23,20 @@ from packages.core.models import (
 
 logger = structlog.get_logger(__name__)
 
+# Kite order statuses we track; others (MODIFY PENDING, VALIDATION PENDING, ...)
+# only carry fill progress
+KITE_ORDER_STATUS = {
+    "OPEN": OrderStatus.OPEN,
+    "TRIGGER PENDING": OrderStatus.OPEN,
+    "COMPLETE": OrderStatus.COMPLETE,
+    "CANCELLED": OrderStatus.CANCELLED,
+    "REJECTED": OrderStatus.REJECTED,
+}
+TERMINAL_STATUSES = (OrderStatus.COMPLETE, OrderStatus.CANCELLED, OrderStatus.REJECTED)
+
+# Postbacks held for orders whose place_order response hasn't arrived yet
+MAX_EARLY_UPDATES = 1000
+
 
 def plan_client_id(plan) -> str:
     """
@@ -105,6 +121,19 @@ class ExecutionEngine:
         self.paper_orders: Dict[str, Order] = {}
         self.paper_order_counter = 0
 
+        # KiteConnect is blocking: REST calls run on a bounded pool so the
+        # event loop keeps serving other signals during the round trip
+        self.broker_pool = ThreadPoolExecutor(
+            max_workers=config.broker_workers,
+            thread_name_prefix="kite-rest"
+        )
+        self._rate_lock = asyncio.Lock()
+
+        # Fill waits: one future per order, resolved by on_order_update
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._fill_waiters: Dict[str, asyncio.Future] = {}
+        self._early_updates: Dict[str, List[Dict[str, Any]]] = {}
+
     async def execute_signal(
         self,
         signal: Signal,
@@ -142,7 +171,10 @@ class ExecutionEngine:
                 return OrderResult.REJECTED, None
 
             # 2. Wait for entry fill (with timeout)
-            filled = await self._wait_for_fill(entry_order.client_order_id, timeout=30)
+            filled = await self._wait_for_fill(
+                entry_order.client_order_id,
+                timeout=self.config.fill_timeout_sec
+            )
 
             if not filled:
                 logger.warning("Entry order not filled within timeout", order_id=entry_order.client_order_id)
@@ -413,7 +445,7 @@ class ExecutionEngine:
                 # Note: client_order_id is already deterministic; Algo-ID is in tag
 
                 # Place order
-                response = self.kite.place_order(**params)
+                response = await self._broker_call(self.kite.place_order, **params)
                 order_id = response["order_id"]
 
                 # Create Order object
@@ -438,6 +470,10 @@ class ExecutionEngine:
                 self.orders[order_id] = order
                 self.order_id_map[client_order_id] = order_id
 
+                # The postback can beat the REST response
+                for update in self._early_updates.pop(order_id, []):
+                    self._apply_order_update(update)
+
                 logger.info(
                     "Order placed",
                     order_id=order_id,
@@ -539,11 +575,12 @@ class ExecutionEngine:
             return False
 
         try:
-            self.kite.cancel_order(variety="regular", order_id=order_id)
+            await self._broker_call(self.kite.cancel_order, variety="regular", order_id=order_id)
 
             order = self.orders.get(order_id)
             if order:
                 order.status = OrderStatus.CANCELLED
+                self._resolve_waiter(order)
 
             logger.info("Order cancelled", order_id=order_id)
             return True
@@ -594,65 +631,158 @@ class ExecutionEngine:
 
         return order
 
-    async def _wait_for_fill(self, client_order_id: str, timeout: int = 30) -> bool:
-        """Wait for an order to be filled"""
+    async def _wait_for_fill(self, client_order_id: str, timeout: float = 30) -> bool:
+        """
+        Wait for an order to be filled.
+
+        Returns as soon as on_order_update reports a final status: True when
+        filled, False when cancelled or rejected. On timeout the broker's order
+        history is checked once in case a postback was missed.
+        """
         order_id = self.order_id_map.get(client_order_id)
 
         if not order_id:
             return False
 
-        start_time = time.time()
+        # In paper mode, instant fill
+        if self.is_paper_mode:
+            return True
 
-        while time.time() - start_time < timeout:
-            order = self.orders.get(order_id)
+        order = self.orders.get(order_id)
+        if order and order.status in TERMINAL_STATUSES:
+            return order.is_filled
 
-            if order and order.is_filled:
-                return True
+        self._loop = asyncio.get_running_loop()
+        waiter = self._loop.create_future()
+        self._fill_waiters[order_id] = waiter
 
-            # In paper mode, instant fill
-            if self.is_paper_mode:
-                return True
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return await self._refresh_order(order_id)
+        finally:
+            self._fill_waiters.pop(order_id, None)
+
+    async def _refresh_order(self, order_id: str) -> bool:
+        """Apply the broker's latest state of an order; True if it is filled"""
+        try:
+            history = await self._broker_call(self.kite.order_history, order_id)
+            if isinstance(history, list) and history:
+                self._apply_order_update(history[-1])
+        except Exception as e:
+            logger.warning("Order history fetch failed", order_id=order_id, error=str(e))
 
-            await asyncio.sleep(0.5)
+        order = self.orders.get(order_id)
+        return bool(order and order.is_filled)
 
-        return False
+    def on_order_update(self, data: Dict[str, Any]) -> None:
+        """
+        Handle an order update from the broker.
 
-    async def _rate_limit(self) -> None:
-        """Enforce rate limiting between orders (TOPS + minimum interval)"""
-        now = time.time()
+        Takes a Kite order dict (KiteTicker on_order_update postback or an
+        order book row) and may be called from any thread; the update is
+        applied on the event loop that is waiting for fills.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self._apply_order_update(data)
+            return
 
-        # SEBI/NSE: TOPS compliance check (per-second cap)
-        if not self.is_paper_mode:
-            # Remove timestamps older than 1 second
-            self.order_timestamps = [t for t in self.order_timestamps if now - t < 1.0]
-
-            # Check if we're at the cap
-            if len(self.order_timestamps) >= self.tops_cap:
-                # Wait until the oldest order is > 1 second old
-                oldest = min(self.order_timestamps) if self.order_timestamps else now
-                wait_time = 1.0 - (now - oldest) + 0.01  # Small buffer
-                if wait_time > 0:
-                    logger.warning(
-                        "TOPS cap reached, waiting",
-                        current=len(self.order_timestamps),
-                        cap=self.tops_cap,
-                        wait_sec=wait_time
-                    )
-                    await asyncio.sleep(wait_time)
-                    # Re-check after wait
-                    now = time.time()
-                    self.order_timestamps = [t for t in self.order_timestamps if now - t < 1.0]
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            self._apply_order_update(data)
+        else:
+            loop.call_soon_threadsafe(self._apply_order_update, data)
+
+    def _apply_order_update(self, data: Dict[str, Any]) -> None:
+        """Merge a broker order update into the tracked order"""
+        order_id = str(data.get("order_id") or "")
+        if not order_id:
+            return
+
+        order = self.orders.get(order_id)
+        if not order:
+            # Fill arrived before place_order returned (or not our order)
+            if order_id not in self._early_updates and len(self._early_updates) >= MAX_EARLY_UPDATES:
+                self._early_updates.pop(next(iter(self._early_updates)))
+            self._early_updates.setdefault(order_id, []).append(data)
+            return
+
+        # Updates can arrive out of order: final states stick and fills only grow
+        if order.status in TERMINAL_STATUSES:
+            return
+
+        filled_quantity = int(data.get("filled_quantity") or 0)
+        if filled_quantity >= order.filled_quantity:
+            order.filled_quantity = filled_quantity
+            if data.get("average_price"):
+                order.average_price = float(data["average_price"])
+
+        status = KITE_ORDER_STATUS.get(str(data.get("status") or "").upper())
+        if status:
+            order.status = status
+
+        logger.debug(
+            "Order update",
+            order_id=order_id,
+            status=order.status,
+            filled=order.filled_quantity
+        )
+        self._resolve_waiter(order)
 
-        # Minimum interval between orders (legacy)
-        elapsed = now - self.last_order_time
-        if elapsed < self.min_order_interval:
-            await asyncio.sleep(self.min_order_interval - elapsed)
+    def _resolve_waiter(self, order: Order) -> None:
+        """Wake the fill wait of an order that reached a final status"""
+        waiter = self._fill_waiters.get(order.order_id)
+        if waiter and not waiter.done() and order.status in TERMINAL_STATUSES:
+            waiter.set_result(order.is_filled)
 
-        self.last_order_time = time.time()
+    async def _broker_call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking KiteConnect call on the broker pool"""
+        self._loop = asyncio.get_running_loop()
+        return await self._loop.run_in_executor(self.broker_pool, partial(fn, *args, **kwargs))
 
-        # Record this order timestamp for TOPS tracking
-        if not self.is_paper_mode:
-            self.order_timestamps.append(time.time())
+    async def _rate_limit(self) -> None:
+        """Enforce rate limiting between orders (TOPS + minimum interval)"""
+        # Concurrent signals take their slots one at a time
+        async with self._rate_lock:
+            now = time.time()
+
+            # SEBI/NSE: TOPS compliance check (per-second cap)
+            if not self.is_paper_mode:
+                # Remove timestamps older than 1 second
+                self.order_timestamps = [t for t in self.order_timestamps if now - t < 1.0]
+
+                # Check if we're at the cap
+                if len(self.order_timestamps) >= self.tops_cap:
+                    # Wait until the oldest order is > 1 second old
+                    oldest = min(self.order_timestamps) if self.order_timestamps else now
+                    wait_time = 1.0 - (now - oldest) + 0.01  # Small buffer
+                    if wait_time > 0:
+                        logger.warning(
+                            "TOPS cap reached, waiting",
+                            current=len(self.order_timestamps),
+                            cap=self.tops_cap,
+                            wait_sec=wait_time
+                        )
+                        await asyncio.sleep(wait_time)
+                        # Re-check after wait
+                        now = time.time()
+                        self.order_timestamps = [t for t in self.order_timestamps if now - t < 1.0]
+
+            # Minimum interval between orders (legacy)
+            elapsed = now - self.last_order_time
+            if elapsed < self.min_order_interval:
+                await asyncio.sleep(self.min_order_interval - elapsed)
+
+            self.last_order_time = time.time()
+
+            # Record this order timestamp for TOPS tracking
+            if not self.is_paper_mode:
+                self.order_timestamps.append(time.time())
 
     def _generate_client_order_id(
         self,
@@ -1,9 +1,12 @@
 """WebSocket market data streaming and aggregation"""
 import asyncio
-from collections import defaultdict, deque
+import threading
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
 from datetime import datetime
 from typing import Any, Callable, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 import structlog
 from kiteconnect import KiteTicker
@@ -16,19 +19,120 @@ from packages.core.models import Bar, Tick
 logger = structlog.get_logger(__name__)
 
 
+# Columns of the bar ring buffers: bar start (epoch seconds), OHLCV and open
+# interest, then the indicators attached to each bar as it completes.
+# Everything is float64; None is stored as NaN.
+BAR_FIELDS = (
+    "ts", "open", "high", "low", "close", "volume", "oi",
+    "vwap", "atr", "rsi", "adx", "ema_fast", "ema_slow", "supertrend", "supertrend_direction",
+)
+INDICATOR_FIELDS = BAR_FIELDS[7:]
+_COLUMN = {name: i for i, name in enumerate(BAR_FIELDS)}
+_INT_FIELDS = {"volume", "oi", "supertrend_direction"}
+_OI, _VWAP = _COLUMN["oi"], _COLUMN["vwap"]
+
+
+class BarSeries(Sequence):
+    """
+    Ordered, read-only view of a token's completed bars (oldest first).
+
+    Columns are zero-copy numpy views into the aggregator's ring buffer
+    (``bars.close``, ``bars.volume``, ...); indexing and iteration build Bar
+    objects, so code written against List[Bar] keeps working. A view of n bars
+    stays valid for the next (max_bars - n) completed bars; copy it (or
+    ``list(bars)``) to keep it longer.
+    """
+
+    def __init__(self, token: int, rows: np.ndarray):
+        self.token = token
+        self.rows = rows  # (n, len(BAR_FIELDS))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        if name in _COLUMN:
+            return self.rows[:, _COLUMN[name]]
+        raise AttributeError(name)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return BarSeries(self.token, self.rows[index])
+        return self._bar(self.rows[index].tolist())
+
+    def __iter__(self) -> Iterator[Bar]:
+        for row in self.rows.tolist():
+            yield self._bar(row)
+
+    def _bar(self, row: List[float]) -> Bar:
+        bar = Bar(
+            token=self.token,
+            timestamp=datetime.fromtimestamp(row[0]),
+            open=row[1],
+            high=row[2],
+            low=row[3],
+            close=row[4],
+            volume=int(row[5]),
+            oi=None if row[_OI] != row[_OI] else int(row[_OI]),
+        )
+        for name, value in zip(INDICATOR_FIELDS, row[_VWAP:], strict=True):
+            if value == value:  # not NaN
+                setattr(bar, name, int(value) if name in _INT_FIELDS else value)
+        return bar
+
+
 class TickAggregator:
-    """Aggregates ticks into bars with configurable windows"""
+    """
+    Aggregates ticks into bars with configurable windows.
+
+    Completed bars are kept in a fixed-capacity ring buffer with one float64
+    row per bar, written twice (at slot i and i + capacity) so the last n bars
+    are always one contiguous, ordered slice. The buffer starts small and
+    doubles up to max_bars. Bars completed on the ticker thread are staged and
+    written to the buffer in one batch by the next read.
+    """
 
-    def __init__(self, token: int, window_seconds: int = 1):
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, token: int, window_seconds: int = 1, max_bars: int = 500):
         self.token = token
         self.window_seconds = window_seconds
+        self.max_bars = max_bars
 
-        # Current bar being built
-        self.current_bar: Optional[Bar] = None
-        self.current_window_start: Optional[datetime] = None
+        # Current bar being built (window start in epoch seconds)
+        self.current_window_epoch: Optional[float] = None
+        self._open = self._high = self._low = self._close = 0.0
+        self._volume = 0
+        self._oi: Optional[int] = None
 
         # Historical bars
-        self.bars: deque = deque(maxlen=500)  # Keep last 500 bars
+        self._capacity = min(self.INITIAL_CAPACITY, max_bars)
+        self._buffer = np.full((2 * self._capacity, len(BAR_FIELDS)), np.nan)
+        self._count = 0  # Bars written to the buffer so far
+        self._staged: List[tuple] = []
+        self._lock = threading.Lock()
+
+    @property
+    def current_window_start(self) -> Optional[datetime]:
+        if self.current_window_epoch is None:
+            return None
+        return datetime.fromtimestamp(self.current_window_epoch)
+
+    @property
+    def current_bar(self) -> Optional[Bar]:
+        """Bar being built from the ticks of the current window"""
+        if self.current_window_epoch is None:
+            return None
+        return Bar(
+            token=self.token,
+            timestamp=self.current_window_start,
+            open=self._open,
+            high=self._high,
+            low=self._low,
+            close=self._close,
+            volume=self._volume,
+            oi=self._oi
+        )
 
     def add_tick(self, tick: Tick) -> Optional[Bar]:
         """
@@ -37,71 +141,103 @@ class TickAggregator:
         Returns:
             Completed bar if window closed, None otherwise
         """
+        price = tick.last_price
+        epoch = tick.timestamp.timestamp()
+        window_epoch = (epoch // self.window_seconds) * self.window_seconds
+
         # Initialize window if needed
-        if self.current_window_start is None:
-            self.current_window_start = self._floor_timestamp(tick.timestamp)
-            self.current_bar = Bar(
-                token=self.token,
-                timestamp=self.current_window_start,
-                open=tick.last_price,
-                high=tick.last_price,
-                low=tick.last_price,
-                close=tick.last_price,
-                volume=tick.last_quantity,
-                oi=tick.oi
-            )
+        if self.current_window_epoch is None:
+            self._start_bar(window_epoch, tick)
             return None
 
         # Check if we need to close current window
-        expected_window_start = self._floor_timestamp(tick.timestamp)
-
-        if expected_window_start > self.current_window_start:
-            # Close current bar
+        if window_epoch > self.current_window_epoch:
             completed_bar = self.current_bar
-            if completed_bar:
-                self.bars.append(completed_bar)
-
-            # Start new bar
-            self.current_window_start = expected_window_start
-            self.current_bar = Bar(
-                token=self.token,
-                timestamp=self.current_window_start,
-                open=tick.last_price,
-                high=tick.last_price,
-                low=tick.last_price,
-                close=tick.last_price,
-                volume=tick.last_quantity,
-                oi=tick.oi
-            )
-
+            with self._lock:
+                self._staged.append((
+                    self.current_window_epoch, self._open, self._high, self._low, self._close,
+                    self._volume, np.nan if self._oi is None else self._oi,
+                ))
+            self._start_bar(window_epoch, tick)
             return completed_bar
 
         # Update current bar
-        if self.current_bar:
-            self.current_bar.high = max(self.current_bar.high, tick.last_price)
-            self.current_bar.low = min(self.current_bar.low, tick.last_price)
-            self.current_bar.close = tick.last_price
-            self.current_bar.volume += tick.last_quantity
-            self.current_bar.oi = tick.oi
+        if price > self._high:
+            self._high = price
+        if price < self._low:
+            self._low = price
+        self._close = price
+        self._volume += tick.last_quantity
+        self._oi = tick.oi
 
         return None
 
-    def _floor_timestamp(self, timestamp: datetime) -> datetime:
-        """Floor timestamp to window boundary"""
-        epoch = timestamp.timestamp()
-        floored_epoch = (epoch // self.window_seconds) * self.window_seconds
-        return datetime.fromtimestamp(floored_epoch)
-
-    def get_bars(self, n: int = 100) -> List[Bar]:
-        """Get last n bars"""
-        return list(self.bars)[-n:]
+    def _start_bar(self, window_epoch: float, tick: Tick) -> None:
+        self.current_window_epoch = window_epoch
+        self._open = self._high = self._low = self._close = tick.last_price
+        self._volume = tick.last_quantity
+        self._oi = tick.oi
+
+    def _flush(self) -> None:
+        """Write staged bars to the ring buffer (caller holds the lock)"""
+        staged = self._staged[-self.max_bars:]
+        skipped = len(self._staged) - len(staged)
+        self._staged = []
+        self._count += skipped
+        while self._capacity < self.max_bars and self._count + len(staged) > self._capacity:
+            self._grow()
+
+        slots = np.arange(self._count, self._count + len(staged)) % self._capacity
+        rows = np.full((len(staged), len(BAR_FIELDS)), np.nan)
+        rows[:, :_VWAP] = staged
+        self._buffer[slots] = rows
+        self._buffer[slots + self._capacity] = rows
+        self._count += len(staged)
+
+    def _grow(self) -> None:
+        bars = self._last(self._capacity).copy()
+        self._capacity = min(2 * self._capacity, self.max_bars)
+        self._buffer = np.full((2 * self._capacity, len(BAR_FIELDS)), np.nan)
+        slots = np.arange(self._count - len(bars), self._count) % self._capacity
+        self._buffer[slots] = bars
+        self._buffer[slots + self._capacity] = bars
+
+    def _last(self, n: int) -> np.ndarray:
+        n = max(0, min(n, self._count, self._capacity))
+        end = self._count % self._capacity + self._capacity
+        return self._buffer[end - n:end]
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._staged:
+                self._flush()
+            return min(self._count, self._capacity)
+
+    def get_bars(self, n: int = 100) -> BarSeries:
+        """Get last n bars (a view, see BarSeries)"""
+        with self._lock:
+            if self._staged:
+                self._flush()
+            return BarSeries(self.token, self._last(n))
 
     def get_latest_bar(self) -> Optional[Bar]:
         """Get most recent completed bar"""
-        if self.bars:
-            return self.bars[-1]
+        bars = self.get_bars(1)
+        if bars:
+            return bars[0]
         return None
 
+    def attach_indicators(self, indicators: Dict[str, Optional[float]]) -> None:
+        """Store indicator values on the most recent completed bar"""
+        with self._lock:
+            if self._staged:
+                self._flush()
+            if not self._count:
+                return
+            slot = (self._count - 1) % self._capacity
+            row = [np.nan if indicators.get(name) is None else indicators[name] for name in INDICATOR_FIELDS]
+            self._buffer[slot, _VWAP:] = self._buffer[slot + self._capacity, _VWAP:] = row
+
 
 class MarketDataStream:
     """
@@ -113,11 +249,13 @@ class MarketDataStream:
         self,
         settings: Settings,
         window_seconds: List[int] = [1, 5],
-        on_bar_callback: Optional[Callable] = None
+        on_bar_callback: Optional[Callable] = None,
+        on_order_update_callback: Optional[Callable] = None
     ):
         self.settings = settings
         self.window_seconds = window_seconds
         self.on_bar_callback = on_bar_callback
+        self.on_order_update_callback = on_order_update_callback
 
         # Kite WebSocket client
         self.kws: Optional[KiteTicker] = None
@@ -157,6 +295,7 @@ class MarketDataStream:
         self.kws.on_error = self._on_error
         self.kws.on_reconnect = self._on_reconnect
         self.kws.on_noreconnect = self._on_noreconnect
+        self.kws.on_order_update = self._on_order_update
 
     def _on_connect(self, ws: Any, response: Any) -> None:
         """Callback on successful connection"""
@@ -201,23 +340,41 @@ class MarketDataStream:
         except Exception as e:
             logger.error("Error processing ticks", error=str(e))
 
+    def _on_order_update(self, ws: Any, data: Dict) -> None:
+        """Callback on order postback (status change of one of our orders)"""
+        if not self.on_order_update_callback:
+            return
+        try:
+            self.on_order_update_callback(data)
+        except Exception as e:
+            logger.error("Error processing order update", error=str(e), order_id=data.get("order_id"))
+
     def _parse_tick(self, raw_tick: Dict) -> Optional[Tick]:
-        """Parse raw tick data into Tick object"""
+        """
+        Parse raw tick data into Tick object.
+
+        Bars are built on the exchange timestamp of quote/full mode ticks; LTP
+        mode ticks carry none and are stamped with the local clock.
+        """
         try:
+            depth = raw_tick.get("depth")
+            best_bid = depth.get("buy", [{}])[0] if depth else {}
+            best_ask = depth.get("sell", [{}])[0] if depth else {}
+            ohlc = raw_tick.get("ohlc", {})
             return Tick(
                 token=raw_tick["instrument_token"],
-                timestamp=datetime.now(),  # Kite doesn't provide tick timestamp
+                timestamp=raw_tick.get("exchange_timestamp") or datetime.now(),
                 last_price=raw_tick.get("last_price", 0.0),
                 last_quantity=raw_tick.get("last_quantity", 0),
                 volume=raw_tick.get("volume", 0),
-                bid=raw_tick.get("depth", {}).get("buy", [{}])[0].get("price", 0.0) if raw_tick.get("depth") else 0.0,
-                ask=raw_tick.get("depth", {}).get("sell", [{}])[0].get("price", 0.0) if raw_tick.get("depth") else 0.0,
-                bid_quantity=raw_tick.get("depth", {}).get("buy", [{}])[0].get("quantity", 0) if raw_tick.get("depth") else 0,
-                ask_quantity=raw_tick.get("depth", {}).get("sell", [{}])[0].get("quantity", 0) if raw_tick.get("depth") else 0,
-                open=raw_tick.get("ohlc", {}).get("open", 0.0),
-                high=raw_tick.get("ohlc", {}).get("high", 0.0),
-                low=raw_tick.get("ohlc", {}).get("low", 0.0),
-                close=raw_tick.get("ohlc", {}).get("close", 0.0),
+                bid=best_bid.get("price", 0.0),
+                ask=best_ask.get("price", 0.0),
+                bid_quantity=best_bid.get("quantity", 0),
+                ask_quantity=best_ask.get("quantity", 0),
+                open=ohlc.get("open", 0.0),
+                high=ohlc.get("high", 0.0),
+                low=ohlc.get("low", 0.0),
+                close=ohlc.get("close", 0.0),
                 oi=raw_tick.get("oi", 0),
                 oi_day_high=raw_tick.get("oi_day_high", 0),
                 oi_day_low=raw_tick.get("oi_day_low", 0)
@@ -236,31 +393,16 @@ class MarketDataStream:
                 return
 
             # Convert to DataFrame
-            df = pd.DataFrame([
-                {
-                    "open": b.open,
-                    "high": b.high,
-                    "low": b.low,
-                    "close": b.close,
-                    "volume": b.volume
-                }
-                for b in bars
-            ])
-
-            # Compute indicators
-            indicators = self.indicator_calc.compute_all(df)
-
-            # Attach indicators to latest bar
-            if bars:
-                latest_bar = bars[-1]
-                latest_bar.vwap = indicators.get("vwap")
-                latest_bar.atr = indicators.get("atr")
-                latest_bar.rsi = indicators.get("rsi")
-                latest_bar.adx = indicators.get("adx")
-                latest_bar.ema_fast = indicators.get("ema_fast")
-                latest_bar.ema_slow = indicators.get("ema_slow")
-                latest_bar.supertrend = indicators.get("supertrend")
-                latest_bar.supertrend_direction = indicators.get("supertrend_direction")
+            df = pd.DataFrame({
+                "open": bars.open,
+                "high": bars.high,
+                "low": bars.low,
+                "close": bars.close,
+                "volume": bars.volume
+            })
+
+            # Compute indicators and attach them to the latest bar
+            aggregator.attach_indicators(self.indicator_calc.compute_all(df))
 
         except Exception as e:
             logger.error("Failed to compute indicators", token=token, error=str(e))
@@ -341,8 +483,8 @@ class MarketDataStream:
         """Get latest tick for a token"""
         return self.latest_ticks.get(token)
 
-    def get_bars(self, token: int, window_sec: int, n: int = 100) -> List[Bar]:
-        """Get bars for a token and window"""
+    def get_bars(self, token: int, window_sec: int, n: int = 100) -> Sequence[Bar]:
+        """Get bars for a token and window (a BarSeries view, or [] if not aggregated)"""
         if token in self.aggregators and window_sec in self.aggregators[token]:
             return self.aggregators[token][window_sec].get_bars(n)
         return []
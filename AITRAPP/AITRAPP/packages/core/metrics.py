@@ -144,6 +144,27 @@ leader_changes_total = Counter(
     registry=REGISTRY
 )
 
+redis_bus_published_total = Counter(
+    'trader_redis_bus_published_total',
+    'Messages published to the Redis bus',
+    ['channel'],
+    registry=REGISTRY
+)
+
+redis_bus_dropped_total = Counter(
+    'trader_redis_bus_dropped_total',
+    'Redis bus messages dropped or conflated before publishing',
+    ['channel', 'reason'],
+    registry=REGISTRY
+)
+
+redis_bus_queue_depth = Gauge(
+    'trader_redis_bus_queue_depth',
+    'Messages queued for the Redis bus',
+    ['channel'],
+    registry=REGISTRY
+)
+
 # Pre-live gate observability
 prelive_day2_pass = Gauge(
     'trader_prelive_day2_pass',
@@ -172,6 +193,13 @@ order_latency_ms = Histogram(
     registry=REGISTRY
 )
 
+redis_bus_flush_size = Histogram(
+    'trader_redis_bus_flush_size',
+    'Messages sent per Redis bus pipeline',
+    buckets=[1, 5, 10, 50, 100, 250, 500, 1000],
+    registry=REGISTRY
+)
+
 # Legacy aliases for backward compatibility
 signals_generated = signals_total
 
@@ -28,6 +28,7 @@ from packages.core.persistence import (
     persist_decision,
     persist_order,
     persist_signal,
+    persistence_writer,
 )
 from packages.core.ranker import SignalRanker
 from packages.core.redis_bus import RedisBus
@@ -179,6 +180,9 @@ class TradingOrchestrator:
         if self.market_data_stream:
             self.market_data_stream.stop()
 
+        # Drain queued signals and decisions
+        await asyncio.to_thread(persistence_writer.stop)
+
         # Close all positions if in live mode
         if settings.app_mode.value == "LIVE" and self.positions:
             logger.warning("Closing all positions before shutdown")
@@ -456,11 +460,11 @@ class TradingOrchestrator:
 
                 # Publish OCO children created
                 if self.redis_bus:
-                    asyncio.create_task(self.redis_bus.publish_order({
+                    await self.redis_bus.publish_order({
                         "event": "OCO_CHILDREN",
                         "group": oco_group_id,
                         "position_id": position.position_id
-                    }))
+                    })
 
     async def on_child_filled(self, child_event: dict) -> None:
         """Called by OrderWatcher when a STOP or TP order is filled"""
@@ -525,11 +529,11 @@ class TradingOrchestrator:
 
         # Publish OCO close
         if self.redis_bus:
-            asyncio.create_task(self.redis_bus.publish_order({
+            await self.redis_bus.publish_order({
                 "event": "OCO_CLOSE",
                 "group": parent_group,
                 "client_order_id": client_order_id
-            }))
+            })
 
     async def flatten_all(self, reason: str = "manual") -> None:
         """Kill switch - close all positions immediately"""
@@ -750,14 +754,14 @@ class TradingOrchestrator:
         if self.redis_bus:
             for signal in all_signals:
                 record_signal(signal.strategy_name, signal.instrument.symbol)
-                asyncio.create_task(self.redis_bus.publish_signal({
+                await self.redis_bus.publish_signal({
                     "strategy": signal.strategy_name,
                     "symbol": signal.instrument.symbol,
                     "side": signal.side.value,
                     "entry_price": signal.entry_price,
                     "stop_loss": signal.stop_loss,
                     "confidence": signal.confidence
-                }))
+                })
 
         # 2. Rank signals
         market_data_dict = {}
@@ -816,13 +820,7 @@ class TradingOrchestrator:
 
             # Publish decision to Redis
             if self.redis_bus:
-                asyncio.create_task(self.redis_bus.publish_decision({
-                    "decision_id": decision_model.id,
-                    "signal_id": signal_model.id,
-                    "approved": risk_check.approved,
-                    "position_size": risk_check.position_size,
-                    "risk_pct": risk_check.risk_pct
-                }))
+                asyncio.create_task(self._publish_decision(signal_model, decision_model, risk_check))
 
             if not risk_check.approved:
                 record_decision_rejected(signal.strategy_name, signal.instrument.symbol,
@@ -847,6 +845,17 @@ class TradingOrchestrator:
             else:
                 await self._execute_signal(signal, risk_check.position_size, decision_model)
 
+    async def _publish_decision(self, signal_model, decision_model, risk_check) -> None:
+        """Publish a decision once its write-behind batch is committed (ids assigned)"""
+        await asyncio.to_thread(persistence_writer.wait, None, 30)
+        await self.redis_bus.publish_decision({
+            "decision_id": decision_model.id,
+            "signal_id": signal_model.id,
+            "approved": risk_check.approved,
+            "position_size": risk_check.position_size,
+            "risk_pct": risk_check.risk_pct
+        })
+
     async def _execute_signal(self, signal: Signal, quantity: int, decision_model) -> None:
         """Execute a trading signal with persistence"""
         try:
@@ -880,12 +889,12 @@ class TradingOrchestrator:
 
                 # Publish order to Redis
                 if self.redis_bus:
-                    asyncio.create_task(self.redis_bus.publish_order({
+                    await self.redis_bus.publish_order({
                         "event": "ENTRY_PLACED",
                         "client_order_id": order_model.client_order_id,
                         "symbol": signal.instrument.symbol,
                         "qty": quantity
-                    }))
+                    })
 
                 # Create position
                 position = Position(
@@ -1,13 +1,19 @@
 """Persistence helpers for orchestrator"""
+import atexit
 import hashlib
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import structlog
+from sqlalchemy.exc import DisconnectionError, OperationalError
+from sqlalchemy.orm import Session, sessionmaker
 
 from packages.core.config import app_config
 from packages.core.models import Signal as CoreSignal
-from packages.storage.database import get_db_session
+from packages.storage.database import engine, get_db_session
 from packages.storage.models import (
     Decision,
     DecisionStatusEnum,
@@ -28,6 +34,182 @@ def get_config_sha() -> str:
     return hashlib.sha256(config_str.encode()).hexdigest()[:16]
 
 
+class PersistenceWriter:
+    """
+    Write-behind persistence for the scan hot path.
+
+    Rows are queued in-process and a background thread commits them in
+    batches (every flush_interval_ms or max_batch rows), one transaction per
+    batch instead of one per row. A row counts as durable only once flush()
+    (or wait()) has returned True for it.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        flush_interval_ms: int = 50,
+        max_batch: int = 500,
+        retry_backoff_sec: float = 1.0
+    ):
+        # expire_on_commit=False: callers keep reading the rows they queued
+        self.session_factory = session_factory or sessionmaker(bind=engine, expire_on_commit=False)
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.retry_backoff_sec = retry_backoff_sec
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Condition()
+        self._queued = 0  # Ticket of the last queued row
+        self._committed = 0  # Ticket of the last committed row
+        self._watched: Set[int] = set()  # Tickets whose rejection the caller wants to know about
+        self._rejected: Dict[int, Exception] = {}  # Watched ticket -> why the database dropped it
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def add(self, row: Any, watch: bool = False, **links: Any) -> int:
+        """
+        Queue an ORM object for insert; returns its ticket.
+
+        links are relationships (e.g. signal=signal_model) set on the writer
+        thread, so rows still in flight are never mutated concurrently.
+        A row the database rejects is logged and dropped; with watch=True the
+        error is kept for rejection(ticket) instead of being lost.
+        """
+        self.start()
+        with self._lock:
+            self._queued += 1
+            ticket = self._queued
+            if watch:
+                self._watched.add(ticket)
+            self._queue.put((ticket, row, links))
+        return ticket
+
+    def rejection(self, ticket: int) -> Optional[Exception]:
+        """Why the database dropped a watched row (None if it was not); stops watching it"""
+        with self._lock:
+            self._watched.discard(ticket)
+            return self._rejected.pop(ticket, None)
+
+    def wait(self, ticket: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """Block until the row (default: everything queued so far) is committed"""
+        with self._lock:
+            ticket = self._queued if ticket is None else ticket
+            return self._lock.wait_for(lambda: self._committed >= ticket, timeout)
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Barrier: commit everything queued so far now and wait for it"""
+        with self._lock:
+            ticket = self._queued
+            if self._committed >= ticket:
+                return True
+        self._queue.put(None)  # Wake the writer without waiting for the interval
+        return self.wait(ticket, timeout)
+
+    def start(self) -> None:
+        """Start the writer thread (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> bool:
+        """Drain the queue and stop the writer thread"""
+        if not self._thread:
+            return True
+        drained = self.flush(timeout)
+        self._stopping = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        return drained
+
+    @property
+    def pending(self) -> int:
+        """Rows queued but not yet committed"""
+        with self._lock:
+            return self._queued - self._committed
+
+    def _run(self) -> None:
+        batch: List[Tuple[int, Any, dict]] = []
+        while not self._stopping or batch:
+            deadline = time.monotonic() + self.flush_interval
+            barrier = False
+            while len(batch) < self.max_batch and not barrier:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    barrier = True
+                else:
+                    batch.append(item)
+
+            if not batch:
+                if self._stopping:
+                    return
+                continue
+
+            if self._commit(batch):
+                with self._lock:
+                    self._committed = batch[-1][0]
+                    self._lock.notify_all()
+                batch = []
+            else:
+                # Keep the batch (tickets stay in order) and retry after a pause
+                time.sleep(self.retry_backoff_sec)
+
+    def _commit(self, batch: List[Tuple[int, Any, dict]]) -> bool:
+        """Insert a batch in one transaction; False if it should be retried"""
+        rows = []
+        for _, row, links in batch:
+            for name, value in links.items():
+                setattr(row, name, value)
+            rows.append(row)
+
+        session = self.session_factory()
+        try:
+            session.add_all(rows)
+            session.commit()
+            return True
+        except (OperationalError, DisconnectionError) as e:
+            # Connection trouble: nothing of the batch is lost, try again
+            session.rollback()
+            logger.error("Persistence batch failed, will retry", rows=len(rows), error=str(e))
+            return False
+        except Exception as e:
+            # A row the database (or its serialization) rejects: retrying would never succeed
+            session.rollback()
+            logger.error("Persistence batch rejected, committing rows one by one",
+                        rows=len(rows), error=str(e))
+        finally:
+            session.close()
+
+        # A bad row must not block the rows queued with it
+        for (ticket, _, _), row in zip(batch, rows, strict=True):
+            session = self.session_factory()
+            try:
+                session.add(row)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error("Dropping row rejected by database",
+                            table=row.__tablename__, error=str(e))
+                with self._lock:
+                    if ticket in self._watched:
+                        self._rejected[ticket] = e
+            finally:
+                session.close()
+        return True
+
+
+persistence_writer = PersistenceWriter()
+atexit.register(persistence_writer.stop)
+
+
 def persist_signal(
     signal: CoreSignal,
     score: Optional[float] = None,
@@ -36,33 +218,34 @@ def persist_signal(
     feature_scores: Optional[dict] = None,
     penalties: Optional[dict] = None
 ) -> Signal:
-    """Persist a signal to database"""
-    with get_db_session() as db:
-        signal_model = Signal(
-            ts=datetime.utcnow(),
-            symbol=signal.instrument.symbol,
-            instrument_token=signal.instrument.token,
-            side=SideEnum.LONG if signal.side.value == "LONG" else SideEnum.SHORT,
-            strategy=signal.strategy_name,
-            entry_price=signal.entry_price,
-            stop_loss=signal.stop_loss,
-            take_profit_1=signal.take_profit_1,
-            take_profit_2=signal.take_profit_2,
-            score=score,
-            rank=rank,
-            confidence=signal.confidence,
-            features=features or {},
-            feature_scores=feature_scores or {},
-            penalties=penalties or {},
-            rationale=signal.rationale,
-            config_sha=get_config_sha()
-        )
-        db.add(signal_model)
-        db.commit()
-        db.refresh(signal_model)
+    """
+    Queue a signal for the database (write-behind).
+
+    The returned model gets its id once the writer has committed it.
+    """
+    signal_model = Signal(
+        ts=datetime.utcnow(),
+        symbol=signal.instrument.symbol,
+        instrument_token=signal.instrument.token,
+        side=SideEnum.LONG if signal.side.value == "LONG" else SideEnum.SHORT,
+        strategy=signal.strategy_name,
+        entry_price=signal.entry_price,
+        stop_loss=signal.stop_loss,
+        take_profit_1=signal.take_profit_1,
+        take_profit_2=signal.take_profit_2,
+        score=score,
+        rank=rank,
+        confidence=signal.confidence,
+        features=features or {},
+        feature_scores=feature_scores or {},
+        penalties=penalties or {},
+        rationale=signal.rationale,
+        config_sha=get_config_sha()
+    )
+    persistence_writer.add(signal_model)
 
-        logger.debug("Signal persisted", signal_id=signal_model.id, strategy=signal.strategy_name)
-        return signal_model
+    logger.debug("Signal queued", strategy=signal.strategy_name)
+    return signal_model
 
 
 def persist_decision(
@@ -76,34 +259,31 @@ def persist_decision(
     portfolio_heat_after: Optional[float] = None,
     rejection_reasons: Optional[list] = None
 ) -> Decision:
-    """Persist a decision to database"""
-    with get_db_session() as db:
-        # Generate deterministic client_plan_id
-        client_plan_id = f"PLAN_{signal_model.id}_{datetime.utcnow().isoformat()}"
-
-        decision_model = Decision(
-            ts=datetime.utcnow(),
-            signal_id=signal_model.id,
-            client_plan_id=client_plan_id,
-            mode=app_config.mode,
-            status=DecisionStatusEnum.PLANNED if approved else DecisionStatusEnum.REJECTED,
-            risk_perc=risk_pct,
-            risk_amount=risk_amount,
-            rr_expected=rr_expected,
-            position_size=position_size,
-            portfolio_heat_before=portfolio_heat_before,
-            portfolio_heat_after=portfolio_heat_after,
-            rejection_reasons=rejection_reasons or []
-        )
-        db.add(decision_model)
-        db.commit()
-        db.refresh(decision_model)
+    """Queue a decision for the database (write-behind), linked to its signal"""
+    # Generate client_plan_id (the signal id is not known until the batch commits)
+    client_plan_id = (
+        f"PLAN_{signal_model.strategy}_{signal_model.symbol}_{datetime.utcnow().isoformat()}"
+    )
 
-        logger.debug("Decision persisted",
-                    decision_id=decision_model.id,
-                    approved=approved,
-                    client_plan_id=client_plan_id)
-        return decision_model
+    decision_model = Decision(
+        ts=datetime.utcnow(),
+        client_plan_id=client_plan_id,
+        mode=app_config.mode,
+        status=DecisionStatusEnum.PLANNED if approved else DecisionStatusEnum.REJECTED,
+        risk_perc=risk_pct,
+        risk_amount=risk_amount,
+        rr_expected=rr_expected,
+        position_size=position_size,
+        portfolio_heat_before=portfolio_heat_before,
+        portfolio_heat_after=portfolio_heat_after,
+        rejection_reasons=rejection_reasons or []
+    )
+    persistence_writer.add(decision_model, signal=signal_model)
+
+    logger.debug("Decision queued",
+                approved=approved,
+                client_plan_id=client_plan_id)
+    return decision_model
 
 
 def persist_order(
@@ -120,39 +300,53 @@ def persist_order(
     broker_order_id: Optional[str] = None,
     strategy_name: Optional[str] = None
 ) -> Order:
-    """Persist an order to database"""
-    with get_db_session() as db:
-        # Generate deterministic client_order_id
-        client_order_id = f"{decision_model.client_plan_id}_{tag}_{datetime.utcnow().timestamp()}"
-
-        order_model = Order(
-            ts=datetime.utcnow(),
-            decision_id=decision_model.id,
-            client_order_id=client_order_id,
-            broker_order_id=broker_order_id,
-            symbol=symbol,
-            instrument_token=instrument_token,
-            side=OrderSideEnum.BUY if side == "BUY" else OrderSideEnum.SELL,
-            qty=qty,
-            order_type=OrderTypeEnum(order_type),
-            price=price,
-            trigger_price=trigger_price,
-            tag=tag,
-            parent_group=parent_group,
-            is_stop_loss=(tag == "STOP"),
-            is_take_profit=(tag in ["TP1", "TP2"]),
-            strategy_name=strategy_name or decision_model.signal.strategy,
-            status=OrderStatusEnum.PLACED if broker_order_id else OrderStatusEnum.PLACED
-        )
-        db.add(order_model)
-        db.commit()
-        db.refresh(order_model)
+    """
+    Persist an order to database.
 
-        logger.debug("Order persisted",
-                    order_id=order_model.id,
-                    client_order_id=client_order_id,
-                    tag=tag)
-        return order_model
+    Order state must be durable before anyone acts on it, so this is a flush
+    barrier: it returns only once the order (and the signal and decision
+    queued before it) is committed. If the database rejects the order row
+    (e.g. a duplicate client_order_id), that error is raised here.
+    """
+    if not strategy_name:
+        # decision.signal is linked on the writer thread
+        persistence_writer.flush()
+        strategy_name = decision_model.signal.strategy
+
+    # Generate deterministic client_order_id
+    client_order_id = f"{decision_model.client_plan_id}_{tag}_{datetime.utcnow().timestamp()}"
+
+    order_model = Order(
+        ts=datetime.utcnow(),
+        client_order_id=client_order_id,
+        broker_order_id=broker_order_id,
+        symbol=symbol,
+        instrument_token=instrument_token,
+        side=OrderSideEnum.BUY if side == "BUY" else OrderSideEnum.SELL,
+        qty=qty,
+        order_type=OrderTypeEnum(order_type),
+        price=price,
+        trigger_price=trigger_price,
+        tag=tag,
+        parent_group=parent_group,
+        is_stop_loss=(tag == "STOP"),
+        is_take_profit=(tag in ["TP1", "TP2"]),
+        strategy_name=strategy_name,
+        status=OrderStatusEnum.PLACED if broker_order_id else OrderStatusEnum.PLACED
+    )
+    ticket = persistence_writer.add(order_model, watch=True, decision=decision_model)
+    committed = persistence_writer.flush()
+    rejection = persistence_writer.rejection(ticket)
+    if rejection is not None:
+        raise rejection
+    if not committed:
+        raise RuntimeError(f"Order {client_order_id} not persisted")
+
+    logger.debug("Order persisted",
+                order_id=order_model.id,
+                client_order_id=client_order_id,
+                tag=tag)
+    return order_model
 
 
 def update_order_status(
@@ -162,7 +356,10 @@ def update_order_status(
     filled_qty: Optional[int] = None,
     average_price: Optional[float] = None
 ) -> Optional[Order]:
-    """Update order status"""
+    """Update order status (durable on return)"""
+    # The order row may still be in the write-behind queue
+    persistence_writer.flush()
+
     with get_db_session() as db:
         order = db.query(Order).filter_by(client_order_id=client_order_id).first()
         if not order:
@@ -180,6 +377,7 @@ def update_order_status(
 
         db.commit()
         db.refresh(order)
+        db.expunge(order)  # Stays readable after the session's final commit
 
         logger.debug("Order updated",
                     client_order_id=client_order_id,
@@ -10,6 +10,18 @@ from packages.core.models import Bar, RankedOpportunity, Signal, Tick
 
 logger = structlog.get_logger(__name__)
 
+FEATURE_NAMES = ["momentum", "trend", "liquidity", "regime", "rr"]
+
+# Penalty name -> config.penalties multiplier key
+PENALTY_MULTS = {
+    "illiquid": "illiquid_mult",
+    "news_event": "news_event_mult",
+    "far_from_vwap": "far_from_vwap_mult",
+}
+
+# Bars read per signal (ROC, volume average and ATR stability use the last 20)
+ROLLING_BARS = 20
+
 
 @dataclass
 class FeatureVector:
@@ -78,6 +90,10 @@ class SignalRanker:
         """
         Rank signals and return top opportunities.
         
+        All candidates are scored at once: features are computed as a matrix
+        from columnar bar arrays (see _feature_matrix), normalized against the
+        rolling feature history and penalized with vector masks.
+
         Args:
             signals: List of trading signals
             market_data: Dict of token -> (latest_tick, bars)
@@ -92,10 +108,8 @@ class SignalRanker:
         if event_flags is None:
             event_flags = {}
 
-        opportunities = []
-
+        candidates = []
         for signal in signals:
-            # Get market data
             tick_bars = market_data.get(signal.instrument.token)
             if not tick_bars:
                 logger.warning(
@@ -103,65 +117,62 @@ class SignalRanker:
                     instrument=signal.instrument.tradingsymbol
                 )
                 continue
+            candidates.append((signal, tick_bars[0], tick_bars[1]))
 
-            tick, bars = tick_bars
-
-            # Compute features
-            features = self._compute_features(signal, tick, bars)
-
-            # Calculate base score
-            base_score = self._calculate_score(features)
-
-            # Apply penalties
-            penalties = {}
-            final_score = base_score
-
-            # Liquidity penalty
-            if features.liquidity < 0.5:
-                penalty = 1.0 - self.config.penalties["illiquid_mult"]
-                penalties["illiquid"] = penalty
-                final_score *= self.config.penalties["illiquid_mult"]
-
-            # News event penalty
-            if event_flags.get(signal.instrument.token, False):
-                penalty = 1.0 - self.config.penalties["news_event_mult"]
-                penalties["news_event"] = penalty
-                final_score *= self.config.penalties["news_event_mult"]
-
-            # Far from VWAP penalty
-            if bars and bars[-1].vwap:
-                vwap = bars[-1].vwap
-                distance_pct = abs(signal.entry_price - vwap) / vwap * 100
-                if distance_pct > 1.0:  # More than 1% from VWAP
-                    penalty = 1.0 - self.config.penalties["far_from_vwap_mult"]
-                    penalties["far_from_vwap"] = penalty
-                    final_score *= self.config.penalties["far_from_vwap_mult"]
-
-            # Create ranked opportunity
-            opportunity = RankedOpportunity(
-                signal=signal,
-                score=final_score,
-                rank=0,  # Will be assigned after sorting
-                feature_scores=features.to_dict(),
-                penalties_applied=penalties,
-                liquidity_score=features.liquidity,
-                avg_volume=self._calculate_avg_volume(bars) if bars else 0,
-                regime_score=features.regime,
-                iv_percentile=signal.features.get("ivp")
-            )
+        if not candidates:
+            return []
 
-            opportunities.append(opportunity)
+        raw, avg_volume, last_vwap = self._feature_matrix(candidates)
 
-        # Sort by score (descending)
-        opportunities.sort(key=lambda x: x.score, reverse=True)
+        # Normalize each feature column against its rolling history
+        normalized = np.column_stack([
+            self._normalize_batch(name, raw[:, i]) for i, name in enumerate(FEATURE_NAMES)
+        ])
 
-        # Assign ranks
-        for i, opp in enumerate(opportunities):
-            opp.rank = i + 1
+        # Weighted base score
+        weights = np.array([self.config.weights[name] for name in FEATURE_NAMES])
+        scores = normalized @ weights
 
-        # Return top N
-        top_n = self.config.top_n
-        top_opportunities = opportunities[:top_n]
+        # Penalties as masks
+        penalty_masks = {
+            "illiquid": normalized[:, FEATURE_NAMES.index("liquidity")] < 0.5,
+            "news_event": np.array(
+                [event_flags.get(signal.instrument.token, False) for signal, _, _ in candidates],
+                dtype=bool
+            ),
+        }
+        entry = np.array([signal.entry_price for signal, _, _ in candidates])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distance_pct = np.abs(entry - last_vwap) / last_vwap * 100
+        # Only bars with a (truthy) VWAP; more than 1% away
+        has_vwap = (last_vwap != 0) & ~np.isnan(last_vwap)
+        penalty_masks["far_from_vwap"] = has_vwap & (distance_pct > 1.0)
+
+        for name, mask in penalty_masks.items():
+            scores = np.where(mask, scores * self.config.penalties[PENALTY_MULTS[name]], scores)
+
+        # Sort by score (descending, ties keep signal order) and build the top N
+        order = np.argsort(-scores, kind="stable")[:self.config.top_n]
+        top_opportunities = []
+        for rank, i in enumerate(order, start=1):
+            signal = candidates[i][0]
+            penalties = {
+                name: 1.0 - self.config.penalties[PENALTY_MULTS[name]]
+                for name, mask in penalty_masks.items() if mask[i]
+            }
+            top_opportunities.append(RankedOpportunity(
+                signal=signal,
+                score=float(scores[i]),
+                rank=rank,
+                feature_scores={
+                    name: float(normalized[i, j]) for j, name in enumerate(FEATURE_NAMES)
+                },
+                penalties_applied=penalties,
+                liquidity_score=float(normalized[i, FEATURE_NAMES.index("liquidity")]),
+                avg_volume=float(avg_volume[i]),
+                regime_score=float(normalized[i, FEATURE_NAMES.index("regime")]),
+                iv_percentile=signal.features.get("ivp")
+            ))
 
         if top_opportunities:
             logger.info(
@@ -185,6 +196,165 @@ class SignalRanker:
 
         return top_opportunities
 
+    def _feature_matrix(
+        self,
+        candidates: List[tuple[Signal, Tick, List[Bar]]]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Raw feature matrix for all candidates (vectorized _compute_features).
+
+        Only the last ROLLING_BARS bars of each signal are read, into columnar
+        (n, ROLLING_BARS) arrays; the scoring rules are applied as array
+        operations over all signals.
+
+        Returns:
+            (raw features (n, 5) in FEATURE_NAMES order, avg volume, last bar VWAP)
+        """
+        n = len(candidates)
+        nan = np.nan
+
+        def opt(value):
+            return nan if value is None else value
+
+        n_bars = np.array([len(bars) for _, _, bars in candidates])
+        window = np.full((3, n, ROLLING_BARS), nan)  # close, volume, atr of the last bars
+        last = np.full((7, n), nan)  # rsi, adx, ema_fast, ema_slow, st_dir, vwap, volume
+        for i, (_, _, bars) in enumerate(candidates):
+            if not bars:
+                continue
+            recent = bars[-ROLLING_BARS:]
+            offset = ROLLING_BARS - len(recent)
+            window[0, i, offset:] = [b.close for b in recent]
+            window[1, i, offset:] = [b.volume for b in recent]
+            window[2, i, offset:] = [opt(b.atr) for b in recent]
+            bar = bars[-1]
+            last[:, i] = (
+                opt(bar.rsi), opt(bar.adx), opt(bar.ema_fast), opt(bar.ema_slow),
+                opt(bar.supertrend_direction), opt(bar.vwap), bar.volume
+            )
+        closes, volumes, atrs = window
+        rsi, adx, ema_fast, ema_slow, st_dir, vwap, last_volume = last
+
+        signals = [signal for signal, _, _ in candidates]
+        ticks = [tick for _, tick, _ in candidates]
+        confidence = np.array([s.confidence for s in signals], dtype=float)
+        rr = np.array([s.risk_reward_ratio for s in signals], dtype=float)
+        ivp = np.array([opt(s.features.get("ivp")) for s in signals], dtype=float)
+        oi_change = np.array([opt(s.features.get("oi_change_pct")) for s in signals], dtype=float)
+        spread_pct = np.array([t.spread_pct for t in ticks], dtype=float)
+        depth = np.array([t.bid_quantity + t.ask_quantity for t in ticks], dtype=float)
+
+        has_20 = n_bars >= 20
+        with np.errstate(divide="ignore", invalid="ignore"):
+            volume_count = np.minimum(n_bars, ROLLING_BARS)
+            avg_volume = np.where(
+                volume_count > 0, np.nansum(volumes, axis=1) / np.maximum(volume_count, 1), 0.0
+            )
+
+            # 1. Momentum (needs 20 bars)
+            rsi_score = np.select(
+                [(rsi >= 40) & (rsi <= 60), (rsi >= 30) & (rsi < 40), (rsi > 60) & (rsi <= 70)],
+                [0.8, 0.6, 0.6],
+                0.3
+            )
+            roc_abs = np.abs((closes[:, -1] - closes[:, 0]) / closes[:, 0])
+            roc_score = np.select(
+                [(roc_abs >= 0.005) & (roc_abs <= 0.02), roc_abs < 0.005], [0.8, 0.5], 0.6
+            )
+            has_rsi = ~np.isnan(rsi)
+            momentum = (np.where(has_rsi, rsi_score, 0) + roc_score + confidence) / (2 + has_rsi)
+            momentum = np.where(has_20, momentum, 0.5)
+
+            # 2. Trend (needs 50 bars)
+            has_adx = ~np.isnan(adx)
+            adx_score = np.select([adx >= 25, adx >= 20, adx >= 15], [1.0, 0.7, 0.5], 0.3)
+            has_ema = (np.nan_to_num(ema_fast) != 0) & (np.nan_to_num(ema_slow) != 0)
+            separation = np.abs(ema_fast - ema_slow) / ema_slow
+            ema_score = np.select([separation >= 0.01, separation >= 0.005], [1.0, 0.7], 0.4)
+            has_st = ~np.isnan(st_dir)
+            trend_count = has_adx.astype(int) + has_ema + has_st
+            trend_sum = (
+                np.where(has_adx, adx_score, 0)
+                + np.where(has_ema, ema_score, 0)
+                + np.where(has_st, 0.7, 0)
+            )
+            trend = np.where(trend_count > 0, trend_sum / np.maximum(trend_count, 1), 0.5)
+            trend = np.where(n_bars >= 50, trend, 0.5)
+
+            # 3. Liquidity
+            spread_score = np.select(
+                [spread_pct <= 0.1, spread_pct <= 0.3, spread_pct <= 0.5], [1.0, 0.8, 0.6], 0.3
+            )
+            volume_ratio = last_volume / avg_volume
+            has_volume = has_20 & (avg_volume > 0)
+            volume_score = np.select(
+                [volume_ratio >= 1.5, volume_ratio >= 1.0, volume_ratio >= 0.7],
+                [1.0, 0.8, 0.6],
+                0.4
+            )
+            depth_score = np.minimum(depth / 1000, 1.0)
+            liquidity = (
+                spread_score + np.where(has_volume, volume_score, 0) + depth_score
+            ) / (2 + has_volume)
+
+            # 4. Regime
+            has_ivp = ~np.isnan(ivp)
+            ivp_score = np.select(
+                [
+                    (ivp >= 30) & (ivp <= 70),
+                    ((ivp >= 20) & (ivp < 30)) | ((ivp > 70) & (ivp <= 80)),
+                ],
+                [0.9, 0.7],
+                0.5
+            )
+            has_oi = ~np.isnan(oi_change)
+            oi_score = np.select(
+                [oi_change > 10, oi_change > 5, oi_change > 0], [0.9, 0.7, 0.6], 0.4
+            )
+            atr_count = np.sum(~np.isnan(atrs), axis=1)
+            atr_mean = np.nansum(atrs, axis=1) / atr_count
+            atr_std = np.sqrt(np.nansum((atrs - atr_mean[:, None]) ** 2, axis=1) / atr_count)
+            atr_cv = atr_std / atr_mean
+            has_atr = has_20 & (atr_count >= 10) & (atr_mean > 0)
+            atr_score = np.select([atr_cv < 0.2, atr_cv < 0.4], [0.9, 0.7], 0.5)
+            regime_count = has_ivp.astype(int) + has_oi + has_atr
+            regime_sum = (
+                np.where(has_ivp, ivp_score, 0)
+                + np.where(has_oi, oi_score, 0)
+                + np.where(has_atr, atr_score, 0)
+            )
+            regime = np.where(regime_count > 0, regime_sum / np.maximum(regime_count, 1), 0.5)
+
+        raw = np.column_stack([momentum, trend, liquidity, regime, rr])
+        return raw, avg_volume, vwap
+
+    def _normalize_batch(self, feature_name: str, values: np.ndarray) -> np.ndarray:
+        """
+        Vectorized _normalize_feature for a batch of values.
+
+        Each value is normalized against the rolling window that ends at it,
+        exactly as if the values had been normalized one at a time.
+        """
+        history = self.feature_history[feature_name]
+        series = np.concatenate([np.asarray(history, dtype=float), values])
+        self.feature_history[feature_name] = series[-self.history_window:].tolist()
+
+        # Window of up to history_window values ending at each new value
+        padded = np.concatenate([np.full(self.history_window - 1, np.nan), series])
+        windows = np.lib.stride_tricks.sliding_window_view(padded, self.history_window)
+        windows = windows[-len(values):]
+        counts = np.minimum(np.arange(len(history) + 1, len(series) + 1), self.history_window)
+
+        with np.errstate(invalid="ignore", over="ignore"):
+            mean = np.nanmean(windows, axis=1)
+            std = np.nanstd(windows, axis=1)
+            z_score = (values - mean) / np.where(std > 0, std, 1.0)
+            normalized = np.where(std > 0, 1 / (1 + np.exp(-z_score)), 0.5)
+
+        # Need at least 10 samples for normalization; raw value clipped before that
+        normalized = np.where(counts < 10, values, normalized)
+        return np.clip(normalized, 0.0, 1.0)
+
     def _compute_features(
         self,
         signal: Signal,
@@ -1,17 +1,47 @@
 """Redis pub/sub bus for real-time events"""
-import json
-from typing import Any, Callable, Optional
+import asyncio
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
 
+import msgpack
 import redis.asyncio as aioredis
 import structlog
 
 from packages.core.config import settings
+from packages.core.metrics import (
+    redis_bus_dropped_total,
+    redis_bus_flush_size,
+    redis_bus_published_total,
+    redis_bus_queue_depth,
+    retries_total,
+)
 
 logger = structlog.get_logger(__name__)
 
 
+def encode(data: Any) -> bytes:
+    """msgpack payload of a message; unknown types are sent as str"""
+    return msgpack.packb(data, default=str)
+
+
+def decode(payload: bytes) -> Any:
+    return msgpack.unpackb(payload)
+
+
 class RedisBus:
-    """Redis pub/sub bus for decoupling components"""
+    """
+    Redis pub/sub bus for decoupling components.
+
+    publish() only queues the encoded message; a single flusher task sends
+    everything queued through one Redis pipeline every flush_interval_ms.
+
+    - Tick channels are conflated: only the latest message per channel waits to
+      be sent, and new channels beyond max_conflated are dropped.
+    - All other channels are lossless: each has a bounded FIFO queue, and
+      publish() waits for room when it is full. Messages are retried until Redis
+      takes them, and are only dropped (and logged) when no room frees up
+      within put_timeout_sec.
+    """
 
     # Channel names
     CHANNEL_TICKS = "ticks"
@@ -21,10 +51,37 @@ class RedisBus:
     CHANNEL_RISK = "risk"
     CHANNEL_EVENTS = "events"
 
-    def __init__(self, redis_url: Optional[str] = None):
+    CONFLATED_CHANNELS = (CHANNEL_TICKS,)
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        flush_interval_ms: int = 5,
+        max_batch: int = 1000,
+        queue_size: int = 10_000,
+        max_conflated: int = 5000,
+        put_timeout_sec: float = 5.0,
+        retry_backoff_sec: float = 0.5
+    ):
         self.redis_url = redis_url or settings.redis_url
         self.redis: Optional[aioredis.Redis] = None
         self.pubsub: Optional[aioredis.client.PubSub] = None
+        self._subscriber: Optional[aioredis.Redis] = None
+
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.queue_size = queue_size
+        self.max_conflated = max_conflated
+        self.put_timeout_sec = put_timeout_sec
+        self.retry_backoff_sec = retry_backoff_sec
+
+        # Pending messages: FIFO per lossless channel, latest per conflated channel
+        self._queues: Dict[str, Deque[bytes]] = {}
+        self._latest: Dict[str, bytes] = {}
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
 
     async def connect(self):
         """Connect to Redis"""
@@ -34,32 +91,156 @@ class RedisBus:
                 encoding="utf-8",
                 decode_responses=True
             )
-            self.pubsub = self.redis.pubsub()
+            # Payloads are msgpack: subscribers read raw bytes
+            self._subscriber = await aioredis.from_url(self.redis_url)
+            self.pubsub = self._subscriber.pubsub()
+            self.start()
             logger.info("Connected to Redis", url=self.redis_url)
         except Exception as e:
             logger.error("Failed to connect to Redis", error=str(e))
             raise
 
-    async def disconnect(self):
-        """Disconnect from Redis"""
+    def start(self):
+        """Start the flusher task (connect() does this)"""
+        if self._flusher is None or self._flusher.done():
+            self._closing = False
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def disconnect(self, timeout: float = 5.0):
+        """Send what is still queued (up to timeout), then disconnect from Redis"""
+        if self._flusher:
+            self._closing = True
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._flusher, timeout)
+            except asyncio.TimeoutError:
+                logger.error("Redis bus closed with unsent messages", pending=self.pending)
+            self._flusher = None
         if self.pubsub:
             await self.pubsub.unsubscribe()
             await self.pubsub.close()
+        if self._subscriber:
+            await self._subscriber.close()
         if self.redis:
             await self.redis.close()
         logger.info("Disconnected from Redis")
 
-    async def publish(self, channel: str, data: Any):
-        """Publish data to a channel"""
+    @property
+    def pending(self) -> int:
+        """Messages queued and not yet sent"""
+        return len(self._latest) + sum(len(queue) for queue in self._queues.values())
+
+    async def publish(self, channel: str, data: Any) -> bool:
+        """
+        Queue data for a channel.
+
+        Returns False if the message was dropped instead of queued.
+        """
         if not self.redis:
             await self.connect()
 
+        group = channel.split(".", 1)[0]
         try:
-            message = json.dumps(data, default=str)
-            await self.redis.publish(channel, message)
-            logger.debug("Published to channel", channel=channel, data_keys=list(data.keys()) if isinstance(data, dict) else None)
+            payload = encode(data)
         except Exception as e:
-            logger.error("Failed to publish to Redis", channel=channel, error=str(e))
+            logger.error("Failed to encode message", channel=channel, error=str(e))
+            redis_bus_dropped_total.labels(channel=group, reason="encode").inc()
+            return False
+
+        if group in self.CONFLATED_CHANNELS:
+            if channel in self._latest:
+                redis_bus_dropped_total.labels(channel=group, reason="conflated").inc()
+            elif len(self._latest) >= self.max_conflated:
+                redis_bus_dropped_total.labels(channel=group, reason="overflow").inc()
+                return False
+            self._latest[channel] = payload
+        else:
+            queue = self._queues.setdefault(channel, deque())
+            if len(queue) >= self.queue_size and not await self._wait_for_room(queue):
+                logger.error("Redis bus queue full, dropping message", channel=channel)
+                redis_bus_dropped_total.labels(channel=group, reason="overflow").inc()
+                return False
+            queue.append(payload)
+
+        self._wakeup.set()
+        return True
+
+    async def _wait_for_room(self, queue: Deque[bytes]) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.put_timeout_sec
+        while len(queue) >= self.queue_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(self._drained.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def _take_batch(self) -> list:
+        """(channel, payload) pairs to send: lossless channels first, FIFO per channel"""
+        batch = []
+        for channel, queue in self._queues.items():
+            while queue and len(batch) < self.max_batch:
+                batch.append((channel, queue.popleft()))
+        while self._latest and len(batch) < self.max_batch:
+            channel = next(iter(self._latest))
+            batch.append((channel, self._latest.pop(channel)))
+        return batch
+
+    def _requeue(self, batch: list):
+        """Put a failed batch back: lossless messages in front, conflated ones unless superseded"""
+        for channel, payload in reversed(batch):
+            group = channel.split(".", 1)[0]
+            if group in self.CONFLATED_CHANNELS:
+                self._latest.setdefault(channel, payload)
+            else:
+                self._queues[channel].appendleft(payload)
+
+    async def _flush_loop(self):
+        while True:
+            if not self.pending:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            batch = self._take_batch()
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for channel, payload in batch:
+                    pipe.publish(channel, payload)
+                await pipe.execute()
+            except Exception as e:
+                logger.error("Failed to publish to Redis", messages=len(batch), error=str(e))
+                retries_total.labels(type="redis_publish").inc()
+                self._requeue(batch)
+                await asyncio.sleep(self.retry_backoff_sec)
+                continue
+            finally:
+                self._drained.set()
+                self._update_depth()
+
+            redis_bus_flush_size.observe(len(batch))
+            for channel, _ in batch:
+                redis_bus_published_total.labels(channel=channel.split(".", 1)[0]).inc()
+
+            # Let producers queue up more before the next pipeline
+            if not self._closing:
+                await asyncio.sleep(self.flush_interval)
+
+    def _update_depth(self):
+        depth = dict.fromkeys(self.CONFLATED_CHANNELS, 0)
+        for channel in self._latest:
+            depth[channel.split(".", 1)[0]] += 1
+        for channel, queue in self._queues.items():
+            group = channel.split(".", 1)[0]
+            depth[group] = depth.get(group, 0) + len(queue)
+        for group, count in depth.items():
+            redis_bus_queue_depth.labels(channel=group).set(count)
 
     async def subscribe(self, channel: str, callback: Callable[[dict], None]):
         """Subscribe to a channel with a callback"""
@@ -72,7 +253,7 @@ class RedisBus:
         async for message in self.pubsub.listen():
             if message["type"] == "message":
                 try:
-                    data = json.loads(message["data"])
+                    data = decode(message["data"])
                     callback(data)
                 except Exception as e:
                     logger.error("Error processing message", channel=channel, error=str(e))
@@ -101,4 +282,3 @@ class RedisBus:
     async def publish_event(self, event_data: dict):
         """Publish general event"""
         await self.publish(self.CHANNEL_EVENTS, event_data)
-
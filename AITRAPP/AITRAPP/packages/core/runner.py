@@ -270,12 +270,16 @@ class Runner:
             app_config.universe.indices.append("SENSEX")
         await instrument_manager.build_universe()
 
-        # Market Data
-        market_data_stream = MarketDataStream(settings, window_seconds=[1, 5])
-
         # Risk & Execution
         risk_manager = RiskManager(app_config.risk)
         execution_engine = ExecutionEngine(kite, app_config.execution, settings)
+
+        # Market Data (order postbacks resolve the engine's fill waits)
+        market_data_stream = MarketDataStream(
+            settings,
+            window_seconds=[1, 5],
+            on_order_update_callback=execution_engine.on_order_update
+        )
         exit_manager = ExitManager(app_config.exits)
         ranker = SignalRanker(app_config.ranking)
 
@@ -0,0 +1,143 @@
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List, Optional
+
+import numpy as np
+
+from packages.core.market_data import MarketDataStream, TickAggregator
+from packages.core.models import Bar, Tick
+
+OPEN = datetime(2025, 8, 18, 9, 15)
+
+
+class ReferenceAggregator:
+    """The deque-of-Bar aggregator the ring buffer replaces"""
+
+    def __init__(self, token: int, window_seconds: int = 1):
+        self.token = token
+        self.window_seconds = window_seconds
+        self.current_bar: Optional[Bar] = None
+        self.current_window_start: Optional[datetime] = None
+        self.bars: deque = deque(maxlen=500)
+
+    def add_tick(self, tick: Tick) -> Optional[Bar]:
+        window_start = self._floor_timestamp(tick.timestamp)
+        if self.current_window_start is not None and window_start <= self.current_window_start:
+            self.current_bar.high = max(self.current_bar.high, tick.last_price)
+            self.current_bar.low = min(self.current_bar.low, tick.last_price)
+            self.current_bar.close = tick.last_price
+            self.current_bar.volume += tick.last_quantity
+            self.current_bar.oi = tick.oi
+            return None
+
+        completed_bar = self.current_bar
+        if completed_bar:
+            self.bars.append(completed_bar)
+        self.current_window_start = window_start
+        self.current_bar = Bar(
+            token=self.token, timestamp=window_start, open=tick.last_price, high=tick.last_price,
+            low=tick.last_price, close=tick.last_price, volume=tick.last_quantity, oi=tick.oi
+        )
+        return completed_bar
+
+    def _floor_timestamp(self, timestamp: datetime) -> datetime:
+        epoch = timestamp.timestamp()
+        return datetime.fromtimestamp((epoch // self.window_seconds) * self.window_seconds)
+
+    def get_bars(self, n: int = 100) -> List[Bar]:
+        return list(self.bars)[-n:]
+
+
+def make_ticks(rng, token, count, start=OPEN):
+    """Ticks a few hundred ms apart, with gaps and an occasional late tick"""
+    ticks = []
+    now = start
+    price = rng.uniform(100, 1000)
+    for _ in range(count):
+        now += timedelta(milliseconds=rng.choice([50, 200, 700, 1300, 9000]))
+        price = round(price * (1 + rng.gauss(0, 0.001)), 2)
+        stamp = now - timedelta(seconds=2) if rng.random() < 0.02 else now
+        ticks.append(Tick(
+            token=token, timestamp=stamp, last_price=price,
+            last_quantity=rng.randint(1, 500), oi=rng.randint(0, 10**6)
+        ))
+    return ticks
+
+
+def raw_tick(tick):
+    return {
+        "instrument_token": tick.token,
+        "exchange_timestamp": tick.timestamp,
+        "last_price": tick.last_price,
+        "last_quantity": tick.last_quantity,
+        "oi": tick.oi,
+        "ohlc": {"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5},
+        "depth": {"buy": [{"price": 99.0, "quantity": 10}], "sell": [{"price": 101.0, "quantity": 20}]},
+    }
+
+
+def make_stream(tokens, windows=(1, 5)):
+    stream = MarketDataStream(SimpleNamespace(ws_max_reconnect_attempts=5), window_seconds=list(windows))
+    for token in tokens:
+        for window_sec in windows:
+            stream.aggregators[token][window_sec] = TickAggregator(token, window_sec)
+    return stream
+
+
+def ingest(aggregators, ticks):
+    start_time = time.perf_counter()
+    for tick in ticks:
+        for aggregator in aggregators[tick.token]:
+            aggregator.add_tick(tick)
+    return len(ticks) / (time.perf_counter() - start_time)
+
+
+def bars_latency(aggregators, n, to_arrays):
+    start_time = time.perf_counter()
+    for windows in aggregators.values():
+        bars = windows[1].get_bars(n)
+        to_arrays(bars)
+    return (time.perf_counter() - start_time) / len(aggregators)
+
+
+def run_benchmark():
+    # Setup Data
+    N = 2000  # subscribed tokens
+    TICKS = 300  # ticks per token
+    rng = random.Random(42)
+    ticks = sorted(
+        (tick for token in range(N) for tick in make_ticks(rng, token, TICKS)),
+        key=lambda t: t.timestamp
+    )
+
+    print(f"Benchmarking {len(ticks)} ticks over {N} tokens (1s and 5s bars)...")
+
+    deques = {token: [ReferenceAggregator(token, 1), ReferenceAggregator(token, 5)] for token in range(N)}
+    rings = {token: [TickAggregator(token, 1), TickAggregator(token, 5)] for token in range(N)}
+    print(f"Deque ingest:  {ingest(deques, ticks):,.0f} ticks/sec")
+    print(f"Ring ingest:   {ingest(rings, ticks):,.0f} ticks/sec")
+
+    stream = make_stream([])
+    raw = [raw_tick(tick) for tick in ticks]
+    start_time = time.perf_counter()
+    for message in raw:
+        stream._parse_tick(message)
+    print(f"Tick parse:    {len(raw) / (time.perf_counter() - start_time):,.0f} ticks/sec")
+
+    # Bars staged during ingest are written to the ring by the first read
+    start_time = time.perf_counter()
+    for windows in rings.values():
+        len(windows[0]), len(windows[1])
+    print(f"First read (writes staged bars): {(time.perf_counter() - start_time) * 1e6 / N:.1f}us per token")
+
+    for n in (100, 200):
+        # What the indicator path needs: the close column of the last n bars
+        loop_time = bars_latency(deques, n, lambda bars: np.array([b.close for b in bars]))
+        ring_time = bars_latency(rings, n, lambda bars: bars.close)
+        print(f"get_bars({n}) + closes: deque {loop_time * 1e6:.1f}us, ring {ring_time * 1e6:.1f}us per token")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,141 @@
+
+import random
+import time
+from datetime import datetime
+
+from packages.core.config import RankingConfig
+from packages.core.models import Bar, Instrument, InstrumentType, Signal, SignalSide, Tick
+from packages.core.ranker import SignalRanker
+
+NOW = datetime(2025, 8, 18, 10, 0)
+
+
+def maybe(rng, value):
+    return None if rng.random() < 0.2 else value
+
+
+def make_bars(rng, token, count):
+    bars = []
+    price = rng.uniform(100, 1000)
+    for i in range(count):
+        price *= 1 + rng.gauss(0, 0.003)
+        bars.append(Bar(
+            token=token,
+            timestamp=NOW,
+            open=price,
+            high=price * 1.002,
+            low=price * 0.998,
+            close=price,
+            volume=rng.randint(0, 5000),
+            vwap=maybe(rng, price * rng.uniform(0.98, 1.02)) if i == count - 1 else None,
+            atr=maybe(rng, rng.uniform(1, 5)),
+            rsi=maybe(rng, rng.uniform(10, 90)),
+            adx=maybe(rng, rng.uniform(5, 40)),
+            ema_fast=maybe(rng, price * rng.uniform(0.98, 1.02)),
+            ema_slow=maybe(rng, price),
+            supertrend_direction=maybe(rng, rng.choice([-1, 1])),
+        ))
+    return bars
+
+
+def make_batch(rng, size, start_token=1):
+    signals, market_data, event_flags = [], {}, {}
+    for token in range(start_token, start_token + size):
+        bars = make_bars(rng, token, rng.choice([0, 5, 25, 60]))
+        entry = bars[-1].close if bars else 500.0
+        features = {}
+        if rng.random() < 0.5:
+            features["ivp"] = rng.uniform(0, 100)
+        if rng.random() < 0.5:
+            features["oi_change_pct"] = rng.uniform(-20, 20)
+        signal = Signal(
+            strategy_name="ORB",
+            timestamp=NOW,
+            instrument=Instrument(
+                token=token,
+                symbol=f"SYM{token}",
+                tradingsymbol=f"SYM{token}",
+                exchange="NSE",
+                instrument_type=InstrumentType.EQ,
+            ),
+            side=rng.choice([SignalSide.LONG, SignalSide.SHORT]),
+            entry_price=entry,
+            stop_loss=entry * 0.99,
+            confidence=rng.random(),
+            features=features,
+            risk_amount=rng.uniform(0, 10),
+            reward_amount=rng.uniform(0, 30),
+        )
+        tick = Tick(
+            token=token,
+            timestamp=NOW,
+            last_price=entry,
+            bid=entry * 0.999,
+            ask=entry * (1 + rng.uniform(0, 0.01)),
+            bid_quantity=rng.randint(0, 800),
+            ask_quantity=rng.randint(0, 800),
+        )
+        signals.append(signal)
+        if rng.random() < 0.95:
+            market_data[token] = (tick, bars)
+        event_flags[token] = rng.random() < 0.2
+    return signals, market_data, event_flags
+
+
+def reference_rank(ranker, signals, market_data, event_flags):
+    """The per-signal ranking loop the batch path replaces"""
+    penalty_mults = ranker.config.penalties
+    scored = []
+    for signal in signals:
+        if signal.instrument.token not in market_data:
+            continue
+        tick, bars = market_data[signal.instrument.token]
+        features = ranker._compute_features(signal, tick, bars)
+        score = ranker._calculate_score(features)
+        penalties = []
+        if features.liquidity < 0.5:
+            penalties.append("illiquid")
+            score *= penalty_mults["illiquid_mult"]
+        if event_flags.get(signal.instrument.token, False):
+            penalties.append("news_event")
+            score *= penalty_mults["news_event_mult"]
+        if bars and bars[-1].vwap:
+            vwap = bars[-1].vwap
+            if abs(signal.entry_price - vwap) / vwap * 100 > 1.0:
+                penalties.append("far_from_vwap")
+                score *= penalty_mults["far_from_vwap_mult"]
+        avg_volume = ranker._calculate_avg_volume(bars) if bars else 0
+        scored.append((signal, score, features.to_dict(), penalties, avg_volume))
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored[:ranker.config.top_n]
+
+
+def run_benchmark():
+    # Setup Data
+    N = 500  # signals per ranking cycle
+    rng = random.Random(42)
+    signals, market_data, event_flags = make_batch(rng, N)
+    config = RankingConfig({"top_n": 5})
+
+    print(f"Benchmarking ranking of {N} signals...")
+
+    iterations = 20
+
+    ranker = SignalRanker(config)
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        reference_rank(ranker, signals, market_data, event_flags)
+    loop_time = (time.perf_counter() - start_time) / iterations
+
+    ranker = SignalRanker(config)
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        ranked = ranker.rank_signals(signals, market_data, event_flags)
+    batch_time = (time.perf_counter() - start_time) / iterations
+
+    print(f"Per-signal loop: {loop_time * 1000:.2f}ms per cycle")
+    print(f"Batched:         {batch_time * 1000:.2f}ms per cycle")
+    print(f"Best score: {ranked[0].score:.4f}")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.api.main import app
+from packages.core.backtest_jobs import (
+    BacktestJobManager,
+    BacktestSpec,
+    JobStatus,
+    expand_grid,
+    shutdown_backtest_jobs,
+)
+from packages.core.config import settings
+
+FIXTURE_SPEC = BacktestSpec(
+    symbol="NIFTY",
+    start_date="2025-08-15",
+    end_date="2025-08-18",
+    strategy="ORB",
+    data_dir="tests/fixtures",
+)
+HEADERS = {"X-API-Key": settings.api_secret_key}
+
+
+def wait_done(job, timeout=60):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.done
+
+
+@pytest.fixture(scope="module")
+def manager():
+    manager = BacktestJobManager(max_workers=2)
+    yield manager
+    manager.shutdown()
+
+
+@pytest.fixture
+def api(monkeypatch):
+    # Run the API's jobs against the test fixtures
+    monkeypatch.setattr(settings, "backtest_data_dir", "tests/fixtures")
+    yield
+    shutdown_backtest_jobs()
+
+
+def test_job_reports_progress_and_is_cached(manager):
+    job = manager.submit(FIXTURE_SPEC)
+    assert job.status in (JobStatus.QUEUED, JobStatus.RUNNING)
+    wait_done(job)
+
+    assert job.status == JobStatus.COMPLETED
+    assert job.progress == 1.0
+    assert job.current_date == "2025-08-18"
+    assert job.started_at is not None
+    assert "total_trades" in job.result["results"]
+
+    again = manager.submit(FIXTURE_SPEC)
+    assert again.done and again.cached
+    assert again.result is job.result
+    assert again.progress == 1.0 and again.current_date == "2025-08-18"
+    assert again.started_at is not None
+
+
+def test_sweep_runs_one_job_per_parameter_set(manager):
+    jobs = manager.submit_sweep(FIXTURE_SPEC, {"rr_min": [1.5, 2.0], "window_min": [15, 30]})
+    for job in jobs:
+        wait_done(job)
+
+    assert len({job.job_id for job in jobs}) == 4
+    assert {job.spec.params["rr_min"] for job in jobs} == {1.5, 2.0}
+    assert all(job.status == JobStatus.COMPLETED for job in jobs)
+    assert manager.get_sweep(jobs[0].sweep_id) == jobs
+
+
+def test_failed_job_records_the_error(manager):
+    job = manager.submit(BacktestSpec(**{**FIXTURE_SPEC.__dict__, "strategy": "Missing"}))
+    wait_done(job)
+    assert job.status == JobStatus.FAILED
+    assert "No strategies configured" in job.error
+
+
+def test_expand_grid():
+    assert expand_grid({}) == [{}]
+    assert expand_grid({"b": [1, 2], "a": ["x"]}) == [{"a": "x", "b": 1}, {"a": "x", "b": 2}]
+
+
+def test_backtest_endpoint_does_not_block_the_event_loop(api):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            backtest = asyncio.create_task(
+                client.post(
+                    "/backtest",
+                    headers=HEADERS,
+                    json={
+                        "start_date": FIXTURE_SPEC.start_date,
+                        "end_date": FIXTURE_SPEC.end_date,
+                        "strategy": "ORB",
+                    },
+                )
+            )
+            health_checks = 0
+            while not backtest.done():
+                assert (await client.get("/health")).status_code == 200
+                health_checks += 1
+            return await backtest, health_checks
+
+    response, health_checks = asyncio.run(run())
+    assert response.status_code == 200
+    assert response.json()["status"] == "success"
+    assert health_checks > 1
+
+
+def test_job_progress_is_streamed_over_sse(api):
+    client = TestClient(app)
+    submitted = client.post(
+        "/backtest/jobs",
+        headers=HEADERS,
+        json={"start_date": "2025-08-15", "end_date": "2025-08-18", "strategy": "ORB"},
+    )
+    assert submitted.status_code == 200
+    job_id = submitted.json()["job_id"]
+
+    events = []
+    with client.stream("GET", f"/backtest/jobs/{job_id}/events", headers=HEADERS) as stream:
+        for line in stream.iter_lines():
+            if line.startswith("event: "):
+                events.append(line[len("event: "):])
+            elif line.startswith("data: ") and events[-1] == "completed":
+                final = json.loads(line[len("data: "):])
+
+    assert events[0] == "progress" and events[-1] == "completed"
+    assert final["progress"] == 1.0
+    assert "total_trades" in final["result"]["results"]
+
+    status = client.get(f"/backtest/jobs/{job_id}", headers=HEADERS).json()
+    assert status["status"] == "COMPLETED"
+    assert client.get("/backtest/jobs/unknown", headers=HEADERS).status_code == 404
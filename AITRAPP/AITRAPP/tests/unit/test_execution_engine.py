@@ -1,3 +1,6 @@
+import asyncio
+import threading
+import time
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -253,3 +256,140 @@ async def test_place_order_blocked_no_token_live(execution_engine):
     assert order is None
     # Verify place_order was NOT called
     execution_engine.kite.place_order.assert_not_called()
+
+
+class FakeKite:
+    """
+    Kite REST stand-in: place_order blocks for `latency` seconds and the
+    fill postback is delivered from another thread after `fill_delay`.
+    Negative fill_delay sends the postback before place_order returns.
+    """
+
+    def __init__(self, engine_ref, latency=0.2, fill_delay=0.1):
+        self.access_token = "token"
+        self.engine_ref = engine_ref
+        self.latency = latency
+        self.fill_delay = fill_delay
+        self.lock = threading.Lock()
+        self.counter = 0
+        self.cancelled = []
+
+    def _postback(self, delay, updates):
+        def send():
+            time.sleep(max(delay, 0))
+            for update in updates:
+                self.engine_ref[0].on_order_update(update)
+        threading.Thread(target=send, daemon=True).start()
+
+    def place_order(self, **params):
+        with self.lock:
+            self.counter += 1
+            order_id = f"KITE{self.counter}"
+        quantity = params["quantity"]
+        if params["order_type"] == "MARKET":
+            # Stale OPEN update arrives after the fill
+            self._postback(self.latency + self.fill_delay, [
+                {"order_id": order_id, "status": "COMPLETE", "filled_quantity": quantity,
+                 "average_price": 100.5},
+                {"order_id": order_id, "status": "OPEN", "filled_quantity": 0},
+            ])
+        time.sleep(self.latency)
+        return {"order_id": order_id}
+
+    def cancel_order(self, variety, order_id):
+        time.sleep(self.latency)
+        self.cancelled.append(order_id)
+
+    def order_history(self, order_id):
+        return [{"order_id": order_id, "status": "OPEN", "filled_quantity": 0}]
+
+
+def live_engine(mock_settings, latency, fill_delay, default_order_type="MARKET"):
+    config = ExecutionConfig({
+        "default_order_type": default_order_type,
+        "tops_cap_per_sec": 100,
+        "broker_workers": 16,
+        "fill_timeout_sec": 5,
+    })
+    engine_ref = []
+    engine = ExecutionEngine(FakeKite(engine_ref, latency, fill_delay), config, mock_settings)
+    engine_ref.append(engine)
+    engine.is_paper_mode = False
+    engine.min_order_interval = 0
+    return engine
+
+
+def make_signal(symbol, seconds=0):
+    instrument = Instrument(
+        token=hash(symbol) % 10000,
+        symbol=symbol,
+        tradingsymbol=symbol,
+        exchange="NSE",
+        instrument_type=InstrumentType.EQ,
+        lot_size=1
+    )
+    return Signal(
+        strategy_name="TEST_STRAT",
+        timestamp=datetime(2026, 1, 5, 9, 15, seconds),
+        instrument=instrument,
+        side=SignalSide.LONG,
+        entry_price=100.0,
+        stop_loss=90.0,
+        take_profit_1=110.0
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_signals_do_not_serialize(mock_settings):
+    """Broker round trips and fill waits of several signals overlap"""
+    engine = live_engine(mock_settings, latency=0.2, fill_delay=0.1)
+    signals = [make_signal(f"SYM{i}") for i in range(5)]
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(engine.execute_signal(s, 10) for s in signals))
+    elapsed = time.monotonic() - start
+
+    assert [r for r, _ in results] == [OrderResult.SUCCESS] * 5
+    assert all(order.is_filled and order.average_price == 100.5 for _, order in results)
+    # Per signal: entry + fill + SL + TP1 = 0.7s; in sequence (or with a REST call
+    # blocking the event loop) that would be 3.5s
+    assert elapsed < 1.5
+    assert len(engine.oco_groups) == 5
+    assert not engine._fill_waiters
+
+
+@pytest.mark.asyncio
+async def test_fill_before_place_order_returns(mock_settings):
+    """A postback that beats the REST response is applied when the order registers"""
+    engine = live_engine(mock_settings, latency=0.2, fill_delay=-0.15)
+
+    start = time.monotonic()
+    result, order = await engine.execute_signal(make_signal("EARLY"), 10)
+
+    assert result == OrderResult.SUCCESS
+    assert order.filled_quantity == 10
+    assert not engine._early_updates
+    # No polling interval: entry (0.2) + SL and TP1 (0.2 each)
+    assert time.monotonic() - start < 0.9
+
+
+@pytest.mark.asyncio
+async def test_fill_wait_ends_on_rejection_and_timeout(mock_settings):
+    engine = live_engine(mock_settings, latency=0.01, fill_delay=0, default_order_type="LIMIT")
+
+    # Rejection resolves the wait immediately
+    order = await engine._place_entry_order(make_signal("REJ"), 10)
+    asyncio.get_running_loop().call_later(
+        0.05, engine.on_order_update, {"order_id": order.order_id, "status": "REJECTED"}
+    )
+    start = time.monotonic()
+    assert await engine._wait_for_fill(order.client_order_id, timeout=5) is False
+    assert time.monotonic() - start < 1
+    assert order.status == OrderStatus.REJECTED
+
+    # No postback: times out, checks order history, and the entry is cancelled
+    engine.config.fill_timeout_sec = 0.2
+    result, order = await engine.execute_signal(make_signal("SLOW", seconds=1), 10)
+    assert result == OrderResult.TIMEOUT
+    assert engine.kite.cancelled == [order.order_id]
+    assert order.status == OrderStatus.CANCELLED
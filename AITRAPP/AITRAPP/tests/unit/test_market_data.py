@@ -0,0 +1,103 @@
+"""Unit tests for ring-buffer bar aggregation"""
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from packages.core.market_data import BarSeries, TickAggregator
+from scripts.bench_market_data import OPEN, ReferenceAggregator, make_stream, make_ticks, raw_tick
+
+
+def ohlcv(bar):
+    return (bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.oi)
+
+
+@pytest.mark.parametrize("window", [1, 5, 60])
+def test_ring_buffer_matches_deque(window):
+    rng = random.Random(window)
+    aggregator, reference = TickAggregator(7, window), ReferenceAggregator(7, window)
+
+    # Long enough to grow the buffer to capacity and wrap it several times
+    for i, tick in enumerate(make_ticks(rng, 7, 6000)):
+        assert aggregator.add_tick(tick) == reference.add_tick(tick)
+        if i % 97 == 0:
+            n = rng.choice([1, 20, 100, 499, 500, 800])
+            assert list(aggregator.get_bars(n)) == reference.get_bars(n)
+            assert aggregator.current_bar == reference.current_bar
+
+    assert len(aggregator) == len(reference.bars)
+    assert list(aggregator.get_bars(500)) == reference.get_bars(500)
+    assert aggregator.get_latest_bar() == reference.bars[-1]
+
+
+def test_bar_series_views():
+    aggregator = TickAggregator(7, 1)
+    assert len(aggregator.get_bars()) == 0 and not aggregator.get_bars()
+    assert aggregator.get_latest_bar() is None
+
+    # Over max_bars bars staged before the first read
+    reference = ReferenceAggregator(7, 1)
+    for tick in make_ticks(random.Random(1), 7, 3000):
+        aggregator.add_tick(tick)
+        reference.add_tick(tick)
+    bars = aggregator.get_bars(100)
+    listed = list(bars)
+    assert listed == reference.get_bars(100)
+
+    # Columns are ordered views into the ring, not copies
+    assert np.shares_memory(bars.close, aggregator._buffer)
+    assert bars.close.tolist() == [b.close for b in listed]
+    assert bars.ts.tolist() == [b.timestamp.timestamp() for b in listed]
+    assert list(bars[-5:]) == listed[-5:]
+    assert bars[-1] == listed[-1] and bars[0] == listed[0]
+    assert isinstance(bars[10:20], BarSeries)
+    with pytest.raises(AttributeError):
+        _ = bars.no_such_column
+
+
+def test_indicators_attach_to_latest_bar():
+    aggregator = TickAggregator(7, 1)
+    for tick in make_ticks(random.Random(2), 7, 200):
+        aggregator.add_tick(tick)
+    aggregator.attach_indicators({"atr": 1.5, "rsi": None, "supertrend_direction": -1})
+
+    latest = aggregator.get_latest_bar()
+    assert latest.atr == 1.5 and latest.rsi is None
+    assert latest.supertrend_direction == -1 and isinstance(latest.supertrend_direction, int)
+    assert aggregator.get_bars(2)[0].atr is None
+
+    # Kept until the bar falls out of the buffer
+    for tick in make_ticks(random.Random(3), 7, 50, start=OPEN + timedelta(hours=2)):
+        aggregator.add_tick(tick)
+    assert next(b for b in aggregator.get_bars(500) if b.timestamp == latest.timestamp).atr == 1.5
+
+
+def test_stream_builds_bars_on_exchange_time():
+    rng = random.Random(4)
+    stream = make_stream([1, 2])
+    references = {(token, w): ReferenceAggregator(token, w) for token in (1, 2) for w in (1, 5)}
+    ticks = sorted(make_ticks(rng, 1, 400) + make_ticks(rng, 2, 400), key=lambda t: t.timestamp)
+
+    for i in range(0, len(ticks), 25):
+        batch = ticks[i:i + 25]
+        stream._on_ticks(None, [raw_tick(t) for t in batch])
+        for tick in batch:
+            for window in (1, 5):
+                references[tick.token, window].add_tick(tick)
+
+    for (token, window), reference in references.items():
+        bars = stream.get_bars(token, window, n=500)
+        assert [ohlcv(b) for b in bars] == [ohlcv(b) for b in reference.get_bars(500)]
+        # Indicators are computed as each bar completes, once there are enough bars
+        assert bars[-1].atr is not None and bars[0].atr is None
+    assert stream.get_bars(3, 5) == []
+
+    tick = stream.get_latest_tick(2)
+    assert tick.timestamp == [t for t in ticks if t.token == 2][-1].timestamp
+    assert (tick.bid, tick.ask, tick.bid_quantity, tick.ask_quantity) == (99.0, 101.0, 10, 20)
+
+    # LTP mode ticks carry no exchange timestamp or depth
+    before = datetime.now()
+    ltp = stream._parse_tick({"instrument_token": 1, "last_price": 5.0})
+    assert ltp.timestamp >= before and ltp.bid == 0.0 and ltp.ask_quantity == 0
@@ -0,0 +1,240 @@
+import multiprocessing
+import os
+import random
+import signal
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from packages.core import persistence
+from packages.core.models import Instrument, InstrumentType, SignalSide
+from packages.core.models import Signal as CoreSignal
+from packages.core.persistence import (
+    PersistenceWriter,
+    persist_decision,
+    persist_order,
+    persist_signal,
+    update_order_status,
+)
+from packages.storage.models import (
+    Base,
+    Decision,
+    DecisionStatusEnum,
+    Order,
+    OrderStatusEnum,
+    SideEnum,
+    Signal,
+)
+
+
+def sqlite_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def count(engine, model):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model)).scalar()
+
+
+def signal_row(i, **kwargs):
+    return Signal(symbol=f"S{i}", side=SideEnum.LONG, strategy="ORB", **kwargs)
+
+
+def decision_row(i):
+    return Decision(client_plan_id=f"PLAN_{i}", mode="PAPER", status=DecisionStatusEnum.PLANNED)
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = sqlite_engine(tmp_path / "trading.db")
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    writer = PersistenceWriter(
+        sessionmaker(bind=engine, expire_on_commit=False),
+        flush_interval_ms=20,
+        retry_backoff_sec=0.01
+    )
+    yield engine, writer, commits
+    writer.stop()
+
+
+def test_rows_are_committed_in_batches(db):
+    engine, writer, commits = db
+    signals = [signal_row(i) for i in range(300)]
+    for i, signal_model in enumerate(signals):
+        writer.add(signal_model)
+        writer.add(decision_row(i), signal=signal_model)
+
+    assert writer.flush()
+    assert writer.pending == 0
+    assert count(engine, Signal) == 300
+    assert count(engine, Decision) == 300
+    # 600 rows in a handful of transactions instead of 600
+    assert len(commits) <= 5
+    with engine.connect() as conn:
+        pairs = conn.execute(
+            select(Signal.symbol, Decision.client_plan_id).join(Decision, Decision.signal_id == Signal.id)
+        ).all()
+    assert sorted(pairs) == sorted((f"S{i}", f"PLAN_{i}") for i in range(300))
+
+
+def test_transient_failures_are_retried_and_bad_rows_dropped(db):
+    engine, writer, _ = db
+    session_factory = writer.session_factory
+    failures = [2]
+
+    def flaky_session():
+        session = session_factory()
+        if failures[0]:
+            failures[0] -= 1
+
+            def fail():
+                raise OperationalError("COMMIT", {}, Exception("connection reset"))
+            session.commit = fail
+        return session
+
+    writer.session_factory = flaky_session
+    writer.add(signal_row(1))
+    writer.add(Signal(symbol=None, side=SideEnum.LONG, strategy="ORB"))  # NOT NULL violation
+    writer.add(signal_row(2))
+
+    assert writer.flush()
+    assert failures == [0]
+    with engine.connect() as conn:
+        assert sorted(conn.execute(select(Signal.symbol)).scalars()) == ["S1", "S2"]
+
+
+def test_unserializable_row_is_dropped_not_retried(db):
+    engine, writer, _ = db
+    writer.add(signal_row(1, features={"at": object()}))  # JSON can't serialize it
+    writer.add(signal_row(2))
+
+    assert writer.flush(1.0)
+    assert writer.pending == 0
+    with engine.connect() as conn:
+        assert list(conn.execute(select(Signal.symbol)).scalars()) == ["S2"]
+
+
+@pytest.fixture
+def decision_model(db, monkeypatch):
+    """A signal and decision through the persist_* helpers, wired to the test database"""
+    engine, writer, _ = db
+    session_local = sessionmaker(bind=engine)
+
+    @contextmanager
+    def get_db_session():
+        session = session_local()
+        try:
+            yield session
+            session.commit()
+        finally:
+            session.close()
+
+    monkeypatch.setattr(persistence, "persistence_writer", writer)
+    monkeypatch.setattr(persistence, "get_db_session", get_db_session)
+
+    instrument = Instrument(
+        token=256265, symbol="NIFTY", tradingsymbol="NIFTY", exchange="NSE",
+        instrument_type=InstrumentType.EQ, lot_size=1
+    )
+    core_signal = CoreSignal(
+        strategy_name="ORB", timestamp=datetime.now(), instrument=instrument,
+        side=SignalSide.LONG, entry_price=100.0, stop_loss=95.0, take_profit_1=110.0
+    )
+
+    signal_model = persist_signal(core_signal, score=0.8, rank=1)
+    return persist_decision(signal_model, True, 0.5, 500.0, 100)
+
+
+def test_orchestrator_helpers_write_behind(db, decision_model):
+    engine, writer, _ = db
+
+    order_model = persist_order(decision_model, "NIFTY", 256265, "BUY", 100, "MARKET",
+                                broker_order_id="KITE1")
+    # The order is a flush barrier: it and everything queued before it is committed
+    assert writer.pending == 0
+    assert order_model.id and order_model.decision_id == decision_model.id
+    assert decision_model.signal_id == decision_model.signal.id
+    assert order_model.strategy_name == "ORB"
+
+    updated = update_order_status(order_model.client_order_id, status=OrderStatusEnum.FILLED,
+                                  filled_qty=100, average_price=100.5)
+    assert updated.status == OrderStatusEnum.FILLED
+    with engine.connect() as conn:
+        assert conn.execute(select(Order.filled_qty)).scalar() == 100
+
+
+def test_rejected_order_row_raises(db, decision_model, monkeypatch):
+    engine, writer, _ = db
+
+    class FrozenClock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2026, 1, 5, 9, 15)
+
+    # Same plan, tag and timestamp: the second order repeats the unique client_order_id
+    monkeypatch.setattr(persistence, "datetime", FrozenClock)
+    persist_order(decision_model, "NIFTY", 256265, "BUY", 100, "MARKET", strategy_name="ORB")
+    with pytest.raises(IntegrityError):
+        persist_order(decision_model, "NIFTY", 256265, "BUY", 100, "MARKET", strategy_name="ORB")
+
+    # Rows queued with it still go through
+    writer.add(signal_row(1))
+    assert writer.flush()
+    assert count(engine, Order) == 1
+    assert count(engine, Signal) == 2
+
+
+def run_and_get_killed(db_path, ack_path, seed):
+    """Child: queue signals/decisions, durably flush every few rows, log each acknowledgement"""
+    engine = create_engine(f"sqlite:///{db_path}")
+    writer = PersistenceWriter(sessionmaker(bind=engine, expire_on_commit=False), flush_interval_ms=5)
+    rng = random.Random(seed)
+    with open(ack_path, "a") as ack:
+        for i in range(seed * 100_000, seed * 100_000 + 50_000):
+            signal_model = signal_row(i)
+            writer.add(signal_model)
+            writer.add(decision_row(i), signal=signal_model)
+            if rng.random() < 0.1:
+                assert writer.flush(timeout=None)
+                ack.write(f"{i}\n")
+                ack.flush()
+                os.fsync(ack.fileno())
+
+
+def test_acknowledged_rows_survive_kill(tmp_path):
+    db_path = tmp_path / "crash.db"
+    ack_path = tmp_path / "acks.txt"
+    sqlite_engine(db_path).dispose()
+    ctx = multiprocessing.get_context("fork")
+
+    for seed in range(1, 4):
+        child = ctx.Process(target=run_and_get_killed, args=(db_path, ack_path, seed))
+        child.start()
+        time.sleep(random.uniform(0.3, 0.8))
+        os.kill(child.pid, signal.SIGKILL)
+        child.join()
+        assert child.exitcode == -signal.SIGKILL
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as conn:
+        symbols = set(conn.execute(select(Signal.symbol)).scalars())
+        orphans = conn.execute(
+            select(func.count()).select_from(Decision).where(Decision.signal_id.not_in(select(Signal.id)))
+        ).scalar()
+
+    acked = [int(line) for line in ack_path.read_text().split()]
+    assert acked, "child never acknowledged a flush"
+    # Everything queued up to each acknowledged flush is in the database
+    for seed in range(1, 4):
+        last = max((i for i in acked if i // 100_000 == seed), default=None)
+        if last is not None:
+            assert all(f"S{i}" in symbols for i in range(seed * 100_000, last + 1))
+    assert orphans == 0
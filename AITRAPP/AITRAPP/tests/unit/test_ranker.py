@@ -0,0 +1,54 @@
+"""Unit tests for vectorized signal ranking"""
+import random
+
+import pytest
+
+from packages.core.config import RankingConfig
+from packages.core.ranker import SignalRanker
+from scripts.bench_ranker import make_batch, reference_rank
+
+
+@pytest.fixture
+def config():
+    return RankingConfig({"top_n": 500})
+
+
+def assert_matches(ranked, expected):
+    assert len(ranked) == len(expected)
+    for rank, (opportunity, (signal, score, features, penalties, avg_volume)) in enumerate(
+        zip(ranked, expected, strict=True), start=1
+    ):
+        assert opportunity.rank == rank
+        assert opportunity.signal is signal
+        assert opportunity.score == pytest.approx(score, rel=1e-9, abs=1e-12)
+        assert opportunity.feature_scores == pytest.approx(features, rel=1e-9, abs=1e-12)
+        assert sorted(opportunity.penalties_applied) == sorted(penalties)
+        assert opportunity.avg_volume == pytest.approx(avg_volume)
+
+
+def test_batch_ranking_matches_per_signal_ranking(config):
+    rng = random.Random(7)
+    batched = SignalRanker(config)
+    reference = SignalRanker(config)
+
+    # Several cycles, so the rolling history fills, wraps and carries over
+    for cycle in range(4):
+        signals, market_data, event_flags = make_batch(rng, [3, 40, 120, 60][cycle])
+        ranked = batched.rank_signals(signals, market_data, event_flags)
+        expected = reference_rank(reference, signals, market_data, event_flags)
+        assert_matches(ranked, expected)
+
+    assert batched.feature_history == pytest.approx(reference.feature_history)
+
+
+def test_top_n_and_missing_market_data():
+    rng = random.Random(11)
+    ranker = SignalRanker(RankingConfig({"top_n": 3}))
+    signals, market_data, event_flags = make_batch(rng, 20)
+
+    ranked = ranker.rank_signals(signals, market_data, event_flags)
+    assert [opportunity.rank for opportunity in ranked] == [1, 2, 3]
+    assert ranked[0].score >= ranked[1].score >= ranked[2].score
+
+    assert ranker.rank_signals(signals, {}, event_flags) == []
+    assert ranker.rank_signals([], market_data) == []
@@ -0,0 +1,181 @@
+"""Unit tests for the pipelined Redis bus publisher"""
+import asyncio
+from datetime import datetime
+
+import fakeredis
+import pytest
+
+from packages.core.metrics import REGISTRY
+from packages.core.redis_bus import RedisBus, decode
+
+
+class SlowPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def publish(self, channel, payload):
+        self.commands.append((channel, payload))
+
+    async def execute(self):
+        await asyncio.sleep(self.redis.delay)
+        if self.redis.failures:
+            self.redis.failures -= 1
+            raise ConnectionError("connection reset")
+        self.redis.pipelines += 1
+        self.redis.published.extend((channel, decode(payload)) for channel, payload in self.commands)
+
+
+class SlowRedis:
+    """In-memory stand-in for a Redis server that is slow to take (or rejects) pipelines"""
+
+    def __init__(self, delay=0.0, failures=0):
+        self.delay = delay
+        self.failures = failures
+        self.pipelines = 0
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return SlowPipeline(self)
+
+    async def close(self):
+        pass
+
+    def on(self, channel):
+        return [data for name, data in self.published if name == channel]
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def make_bus(redis, **kwargs):
+    bus = RedisBus("redis://unused", **kwargs)
+    bus.redis = redis
+    bus.start()
+    return bus
+
+
+@pytest.mark.asyncio
+async def test_messages_are_pipelined_in_order():
+    redis = SlowRedis(delay=0.002)
+    bus = make_bus(redis)
+
+    for i in range(300):
+        await bus.publish_order({"seq": i, "at": datetime(2025, 8, 18, 9, 15)})
+        await bus.publish_signal({"seq": i})
+    await bus.disconnect()
+
+    assert [m["seq"] for m in redis.on("orders")] == list(range(300))
+    assert [m["seq"] for m in redis.on("signals")] == list(range(300))
+    assert redis.on("orders")[0]["at"] == "2025-08-18 09:15:00"
+    # 600 messages in a handful of round trips
+    assert redis.pipelines <= 5
+    assert bus.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_ticks_are_conflated_orders_are_not():
+    redis = SlowRedis(delay=0.05)
+    bus = make_bus(redis)
+    conflated = sample("trader_redis_bus_dropped_total", channel="ticks", reason="conflated")
+
+    await bus.publish_order({"seq": -1})
+    await asyncio.sleep(0.01)  # The flusher is now stuck in a slow pipeline
+    for i in range(100):
+        for token in range(10):
+            await bus.publish_tick(token, {"seq": i})
+        await bus.publish_order({"seq": i})
+    await bus.disconnect()
+
+    # Only the latest tick of each token was still waiting when the pipeline returned
+    assert sorted(channel for channel, _ in redis.published if channel.startswith("ticks.")) == \
+        sorted(f"ticks.{token}" for token in range(10))
+    assert {m["seq"] for token in range(10) for m in redis.on(f"ticks.{token}")} == {99}
+    assert [m["seq"] for m in redis.on("orders")] == list(range(-1, 100))
+    assert sample("trader_redis_bus_dropped_total", channel="ticks", reason="conflated") - conflated == 990
+
+
+def queued_bytes(bus):
+    return sum(map(len, bus._latest.values())) + sum(len(p) for q in bus._queues.values() for p in q)
+
+
+@pytest.mark.asyncio
+async def test_bounded_memory_under_slow_consumer():
+    redis = SlowRedis(delay=0.02)
+    bus = make_bus(redis, queue_size=50, max_conflated=200)
+    peak_pending = peak_bytes = 0
+
+    async def tick_producer():
+        nonlocal peak_pending, peak_bytes
+        for i in range(20_000):
+            await bus.publish_tick(i % 500, {"seq": i, "payload": "x" * 200})
+            peak_pending = max(peak_pending, bus.pending)
+            if i % 100 == 0:
+                peak_bytes = max(peak_bytes, queued_bytes(bus))
+                await asyncio.sleep(0)
+
+    async def order_producer():
+        for i in range(300):
+            await bus.publish_order({"seq": i})
+
+    await asyncio.gather(tick_producer(), order_producer())
+    await bus.disconnect()
+
+    # Producers outpace the consumer (~4.5MB of ticks published), yet at most
+    # one message per tick channel (200 channels) and 50 orders ever wait
+    assert peak_pending <= 200 + 50
+    assert peak_bytes <= 250 * 250
+    assert sample("trader_redis_bus_dropped_total", channel="ticks", reason="overflow") > 0
+    # Orders waited for room instead of being dropped
+    assert [m["seq"] for m in redis.on("orders")] == list(range(300))
+
+
+@pytest.mark.asyncio
+async def test_failed_pipelines_are_retried():
+    redis = SlowRedis(failures=2)
+    bus = make_bus(redis, retry_backoff_sec=0.01)
+    retries = sample("trader_retries_total", type="redis_publish")
+
+    for i in range(20):
+        await bus.publish_order({"seq": i})
+    await bus.publish_tick(1, {"seq": 0})
+    await bus.disconnect()
+
+    assert [m["seq"] for m in redis.on("orders")] == list(range(20))
+    assert redis.on("ticks.1") == [{"seq": 0}]
+    assert sample("trader_retries_total", type="redis_publish") - retries == 2
+
+
+@pytest.mark.asyncio
+async def test_full_lossless_queue_times_out():
+    bus = RedisBus("redis://unused", queue_size=2, put_timeout_sec=0.05)
+    bus.redis = SlowRedis()  # Flusher never started: nothing drains
+
+    assert await bus.publish("orders", {"seq": 1})
+    assert await bus.publish("orders", {"seq": 2})
+    assert not await bus.publish("orders", {"seq": 3})
+    assert bus.pending == 2
+
+
+@pytest.mark.asyncio
+async def test_round_trip_through_redis():
+    server = fakeredis.FakeServer()
+    bus = make_bus(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+    bus._subscriber = fakeredis.aioredis.FakeRedis(server=server)
+    bus.pubsub = bus._subscriber.pubsub()
+
+    received = []
+    subscriber = asyncio.create_task(bus.subscribe(RedisBus.CHANNEL_DECISIONS, received.append))
+    while not server.connected or not bus.pubsub.subscribed:
+        await asyncio.sleep(0.01)
+
+    await bus.publish_decision({"decision_id": 7, "approved": True, "risk_pct": 0.5})
+    for _ in range(100):
+        if received:
+            break
+        await asyncio.sleep(0.01)
+    subscriber.cancel()
+    await bus.disconnect()
+
+    assert received == [{"decision_id": 7, "approved": True, "risk_pct": 0.5}]
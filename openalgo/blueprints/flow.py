@@ -579,7 +579,7 @@ def _execute_webhook(token, webhook_data=None, url_secret=None):
 
     try:
         logger.info(f"Webhook triggered for workflow {workflow.id}: {workflow.name}")
-        result = execute_workflow(workflow.id, webhook_data=data, api_key=api_key)
+        result = execute_workflow(workflow.id, webhook_data=data, api_key=api_key, wait=False)
         return jsonify(
             {
                 "status": result.get("status", "success"),
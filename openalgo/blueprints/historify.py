@@ -591,6 +591,89 @@ def download_bulk_export():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@historify_bp.route("/api/export/jobs", methods=["POST"])
+@check_session_validity
+def create_export_job():
+    """Start a background export job.
+
+    Progress is reported like download jobs (Socket.IO events, /api/jobs/<job_id>),
+    which also cancel, pause and resume it. ZIP exports are fetched from
+    /api/export/jobs/<job_id>/download once complete.
+    """
+    try:
+        from database.historify_db import parse_interval
+        from services.historify_service import create_export_job as service_create_export_job
+
+        data = request.get_json()
+        format_type = data.get("format", "zip").lower()
+        symbols = data.get("symbols")  # Optional list of {symbol, exchange}
+        intervals = data.get("intervals") or ["D"]
+        start_date = data.get("start_date")
+        end_date = data.get("end_date")
+        compression = data.get("compression", "zstd")  # For Parquet
+
+        if not isinstance(intervals, list):
+            return jsonify({"status": "error", "message": "intervals must be an array"}), 400
+        intervals = list(dict.fromkeys(intervals))  # Remove duplicates, keep order
+        invalid = [i for i in intervals if parse_interval(i) is None]
+        if invalid:
+            return jsonify({"status": "error", "message": f"Invalid intervals: {invalid}"}), 400
+
+        success, response, status_code = service_create_export_job(
+            symbols=symbols,
+            intervals=intervals,
+            start_date=start_date,
+            end_date=end_date,
+            file_format=format_type,
+            compression=compression,
+        )
+        return jsonify(response), status_code
+    except Exception as e:
+        logger.error(f"Error creating export job: {e}")
+        traceback.print_exc()
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@historify_bp.route("/api/export/jobs/<job_id>/download", methods=["GET"])
+@check_session_validity
+def download_export_job(job_id):
+    """Download the ZIP archive of a completed export job."""
+    try:
+        from services.historify_service import get_export_job_file
+
+        success, response, status_code = get_export_job_file(job_id)
+        if not success:
+            return jsonify(response), status_code
+
+        file_path = response["file_path"]
+
+        # Stream file and cleanup after
+        def generate_and_cleanup():
+            try:
+                with open(file_path, "rb") as f:
+                    while True:
+                        chunk = f.read(65536)  # 64KB chunks for binary files
+                        if not chunk:
+                            break
+                        yield chunk
+            finally:
+                try:
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                except Exception:
+                    pass
+
+        return Response(
+            generate_and_cleanup(),
+            mimetype="application/zip",
+            headers={"Content-Disposition": f"attachment; filename={response['filename']}"},
+        )
+    except Exception as e:
+        logger.error(f"Error downloading export job: {e}")
+        traceback.print_exc()
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 # =============================================================================
 # Utility Endpoints
 # =============================================================================
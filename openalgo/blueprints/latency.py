@@ -10,6 +10,7 @@ from sqlalchemy import func
 
 from database.latency_db import OrderLatency, latency_session
 from limiter import limiter
+from utils.broker_book_cache import get_book_cache_metrics
 from utils.logging import get_logger
 from utils.session import check_session_validity
 
@@ -244,6 +245,14 @@ def get_broker_stats(broker):
         return jsonify({"error": str(e)}), 500
 
 
+@latency_bp.route("/api/book-cache", methods=["GET"])
+@check_session_validity
+@limiter.limit("60/minute")
+def get_book_cache_stats():
+    """API endpoint to get broker book cache hit/coalesce counters"""
+    return jsonify(get_book_cache_metrics())
+
+
 @latency_bp.route("/export", methods=["GET"])
 @check_session_validity
 @limiter.limit("10/minute")
@@ -1,6 +1,7 @@
 import threading
 import time as time_module
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from datetime import time as dt_time
 from importlib import import_module
@@ -13,6 +14,12 @@ from flask_cors import cross_origin
 
 from database.auth_db import get_api_key_for_tradingview, get_auth_token
 from services.history_service import get_history
+from services.pnl_curve_service import (
+    Fill,
+    empty_snapshot,
+    follow_symbols,
+    get_pnl_curve_engine,
+)
 from services.tradebook_service import get_tradebook
 from utils.logging import get_logger
 from utils.session import check_session_validity
@@ -126,6 +133,9 @@ class RateLimiter:
 # Global rate limiter instance - 2 calls per second (conservative limit)
 history_rate_limiter = RateLimiter(calls_per_second=2)
 
+# Background top-ups of PnL curve closes (one at a time, under the rate limit)
+backfill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pnl-backfill")
+
 # Define the blueprint
 pnltracker_bp = Blueprint("pnltracker_bp", __name__, url_prefix="/")
 
@@ -189,6 +199,189 @@ def dynamic_import(broker, module_name, function_names):
         return None
 
 
+def tradebook_fills(trades):
+    """
+    Fills for the PnL curve from tradebook rows.
+
+    Rows without a symbol, parsable time or quantity are skipped. Identical
+    rows (several fills of an order in the same second at the same price) are
+    numbered so each one is applied.
+    """
+    fills = []
+    seen = {}
+    for trade in trades:
+        symbol = trade.get("symbol", "")
+        exchange = trade.get("exchange", "")
+        if not symbol or not exchange:
+            logger.warning(f"Trade missing symbol or exchange: {trade}")
+            continue
+
+        # Parse trade time using universal parser
+        trade_timestamp = (
+            trade.get("timestamp") or trade.get("fill_timestamp") or trade.get("fill_time")
+        )
+        trade_time = parse_trade_timestamp(trade_timestamp) if trade_timestamp else None
+        if trade_time is None:
+            logger.warning(f"Could not parse trade time for {symbol}: {trade_timestamp}")
+            continue
+
+        try:
+            executed_price = float(trade.get("average_price", 0))
+
+            # Calculate quantity
+            qty = float(trade.get("quantity", 0))
+            if qty == 0 and executed_price > 0:
+                trade_value = float(trade.get("trade_value", 0))
+                if trade_value == executed_price:
+                    qty = 1
+                elif trade_value > 0:
+                    qty = trade_value / executed_price
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Error parsing trade values: {e}, trade: {trade}")
+            continue
+
+        if qty <= 0:
+            logger.warning(f"Skipping trade with zero/negative quantity: {trade}")
+            continue
+
+        action = "BUY" if trade.get("action", "") == "BUY" else "SELL"
+        fill_id = (
+            f"{trade.get('orderid', '')}|{symbol}|{exchange}|{action}|{qty}|{executed_price}|"
+            f"{trade_timestamp}"
+        )
+        seen[fill_id] = seen.get(fill_id, 0) + 1
+        fills.append(
+            Fill(
+                fill_id=f"{fill_id}#{seen[fill_id]}",
+                symbol=symbol,
+                exchange=exchange,
+                action=action,
+                quantity=qty,
+                price=executed_price,
+                time=trade_time,
+            )
+        )
+    return fills
+
+
+def position_fills(current_positions, trade_date):
+    """Open positions without trades today, as fills at their average price at 09:15"""
+    ist = pytz.timezone("Asia/Kolkata")
+    market_open = ist.localize(datetime.combine(trade_date, dt_time(9, 15)))
+    fills = []
+    for pos_key, pos_data in current_positions.items():
+        # Extract symbol and exchange from the key
+        parts = pos_key.rsplit("_", 1)
+        if len(parts) != 2:
+            logger.warning(f"Could not parse position key: {pos_key}")
+            continue
+        symbol, exchange = parts
+
+        qty = pos_data["quantity"]
+        avg_price = pos_data["average_price"]
+        if qty == 0:
+            continue
+
+        fills.append(
+            Fill(
+                fill_id=f"position|{pos_key}|{qty}|{avg_price}",
+                symbol=symbol,
+                exchange=exchange,
+                action="BUY" if qty > 0 else "SELL",
+                quantity=abs(qty),
+                price=avg_price,
+                time=market_open,
+            )
+        )
+    return fills
+
+
+def fetch_bars(symbol, exchange, date_str, api_key, source="api"):
+    """1m bars of a day as an IST-indexed DataFrame, or None"""
+    if source == "api":
+        # Apply rate limiting before API call (2 calls/sec to stay under broker's 3/sec limit)
+        history_rate_limiter.wait()
+    logger.debug(f"Fetching historical data for {symbol} on {exchange} from {source}")
+
+    success, hist_response, _ = get_history(
+        symbol=symbol,
+        exchange=exchange,
+        interval="1m",
+        start_date=date_str,
+        end_date=date_str,
+        api_key=api_key,
+        source=source,
+    )
+    if not success or "data" not in hist_response:
+        return None
+
+    df_hist = pd.DataFrame(hist_response["data"])
+    if df_hist.empty:
+        return None
+    return convert_timestamp_to_ist(df_hist, symbol)
+
+
+def backfill_symbol(engine, symbol, exchange, date_str, api_key):
+    """Fill a symbol's missing closes from Historify, then broker history if still behind"""
+    before = engine.observed_minute(symbol, exchange)
+    try:
+        for source in ("db", "api"):
+            bars = fetch_bars(symbol, exchange, date_str, api_key, source=source)
+            if bars is not None:
+                engine.update_bars(symbol, exchange, bars)
+            if not engine.needs_bars(symbol, exchange):
+                break
+    except Exception as e:
+        logger.exception(f"Error backfilling bars for {symbol}: {e}")
+    engine.mark_backfilled(symbol, exchange, engine.observed_minute(symbol, exchange) > before)
+
+
+def backfill_bars(engine, api_key, date_str):
+    """
+    Top up closes the feed has not delivered.
+
+    A symbol seen for the first time is fetched before responding (its curve
+    has no prices yet); later top-ups run in the background.
+    """
+    for symbol, exchange, never_fetched in engine.stale_symbols():
+        # Claim the symbol so concurrent refreshes do not fetch it again
+        engine.mark_backfilled(symbol, exchange, True)
+        if never_fetched:
+            backfill_symbol(engine, symbol, exchange, date_str, api_key)
+        else:
+            backfill_executor.submit(backfill_symbol, engine, symbol, exchange, date_str, api_key)
+
+
+def flat_positions_curve(current_positions):
+    """Positions' current PnL as a constant line from 09:00"""
+    ist = pytz.timezone("Asia/Kolkata")
+    current_time = datetime.now(ist)
+    start_time = current_time.replace(hour=9, minute=0, second=0, microsecond=0)
+    end_time = current_time
+
+    if end_time <= start_time:
+        end_time = start_time + timedelta(minutes=1)
+
+    # Use current position P&L as constant value
+    total_pnl = round(sum(pos["pnl"] for pos in current_positions.values()), 2)
+    time_range = pd.date_range(start=start_time, end=end_time, freq="1min", tz=ist)
+    times = [int(ts.timestamp() * 1000) for ts in time_range]
+
+    data = empty_snapshot()
+    data.update(
+        {
+            "current_mtm": total_pnl,
+            "max_mtm": total_pnl,
+            "max_mtm_time": time_range[0].strftime("%H:%M"),
+            "min_mtm": total_pnl,
+            "min_mtm_time": time_range[0].strftime("%H:%M"),
+            "pnl_series": [{"time": t, "value": total_pnl} for t in times],
+            "drawdown_series": [{"time": t, "value": 0.0} for t in times],
+        }
+    )
+    return data
+
+
 # Note: /pnltracker route is now handled by react_bp for React frontend
 # This route is kept for backwards compatibility but renamed
 @pnltracker_bp.route("/pnltracker/legacy")
@@ -234,9 +427,7 @@ def get_pnl_data():
                 }
             ), 401
 
-        # Default to today's date for historical data (will be overridden by trade date if trades exist)
         ist = pytz.timezone("Asia/Kolkata")
-        today_str = datetime.now(ist).date().strftime("%Y-%m-%d")
 
         # Get tradebook data using the service (with API key)
         success, tradebook_response, status_code = get_tradebook(api_key=api_key)
@@ -294,586 +485,38 @@ def get_pnl_data():
 
         if not trades and not current_positions:
             # No trades or positions, return zero PnL
-            return jsonify(
-                {
-                    "status": "success",
-                    "data": {
-                        "current_mtm": 0,
-                        "max_mtm": 0,
-                        "max_mtm_time": None,
-                        "min_mtm": 0,
-                        "min_mtm_time": None,
-                        "max_drawdown": 0,
-                        "pnl_series": [],
-                        "drawdown_series": [],
-                    },
-                }
-            ), 200
-
-        # Process trades to build portfolio MTM
-        portfolio_pnl = None
-        first_trade_time = None
-
-        # Find the earliest trade time
-        for trade in trades:
-            trade_timestamp = (
-                trade.get("timestamp") or trade.get("fill_timestamp") or trade.get("fill_time")
-            )
-            if trade_timestamp:
-                trade_time = parse_trade_timestamp(trade_timestamp)
-                if trade_time:
-                    if first_trade_time is None or trade_time < first_trade_time:
-                        first_trade_time = trade_time
-                        logger.info(
-                            f"Found trade at {trade_time.strftime('%H:%M:%S')} for {trade['symbol']}"
-                        )
-                else:
-                    logger.warning(f"Could not parse trade timestamp {trade_timestamp}")
-
-        # If we couldn't determine first trade time from timestamps, try from fill_time field
-        if first_trade_time is None and trades:
-            for trade in trades:
-                fill_time_str = trade.get("fill_time", "")
-                if fill_time_str:
-                    trade_time = parse_trade_timestamp(fill_time_str)
-                    if trade_time:
-                        if first_trade_time is None or trade_time < first_trade_time:
-                            first_trade_time = trade_time
-                            logger.info(
-                                f"Found trade at {trade_time.strftime('%H:%M:%S')} from fill_time for {trade['symbol']}"
-                            )
-                    else:
-                        logger.warning(f"Could not parse fill_time {fill_time_str}")
-
-        # Log the first trade time
-        if first_trade_time:
-            logger.info(f"First trade time: {first_trade_time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
-        else:
-            logger.warning("Could not determine first trade time, using market open time")
-            ist = pytz.timezone("Asia/Kolkata")
-            first_trade_time = datetime.now(ist).replace(hour=9, minute=15, second=0, microsecond=0)
-
-        # Determine the trading date from first trade time (handles overnight session spanning)
-        # This ensures we query historical data for the correct date when trades are from previous day
-        trade_date = first_trade_time.date()
-        today_str = trade_date.strftime("%Y-%m-%d")
-        logger.info(f"Using trade date for historical data: {today_str}")
-
-        # Group trades by symbol to track entry and exit
-        symbol_trades = {}
-        for trade in trades:
-            try:
-                symbol = trade.get("symbol", "")
-                exchange = trade.get("exchange", "")
-                if not symbol or not exchange:
-                    logger.warning(f"Trade missing symbol or exchange: {trade}")
-                    continue
-
-                symbol_key = f"{symbol}_{exchange}"
-                if symbol_key not in symbol_trades:
-                    symbol_trades[symbol_key] = []
-
-                # Parse trade time using universal parser
-                trade_timestamp = (
-                    trade.get("timestamp") or trade.get("fill_timestamp") or trade.get("fill_time")
-                )
-                trade_time = parse_trade_timestamp(trade_timestamp) if trade_timestamp else None
-                if trade_timestamp and trade_time is None:
-                    logger.warning(
-                        f"Could not parse trade time for {trade['symbol']}: {trade_timestamp}"
-                    )
-
-                trade["parsed_time"] = trade_time
-                symbol_trades[symbol_key].append(trade)
-            except Exception as e:
-                logger.exception(f"Error processing trade: {e}, trade: {trade}")
-                continue
-
-        # Process each symbol's trades
-        for symbol_key, trades_list in symbol_trades.items():
-            if not trades_list:
-                logger.warning(f"No trades found for {symbol_key}")
-                continue
-
-            # Sort trades by time
-            trades_list.sort(
-                key=lambda x: x.get("parsed_time") or datetime.min.replace(tzinfo=pytz.UTC)
-            )
-
-            symbol = trades_list[0].get("symbol", "")
-            exchange = trades_list[0].get("exchange", "")
-
-            if not symbol or not exchange:
-                logger.warning(f"Missing symbol or exchange for {symbol_key}")
-                continue
-
-            # Track net position and time windows
-            net_position = 0
-            position_windows = []  # List of (start_time, end_time, qty, price, action)
-
-            for trade in trades_list:
-                try:
-                    executed_price = float(trade.get("average_price", 0))
-                    action = trade.get("action", "")
-                    trade_time = trade.get("parsed_time")
-
-                    # Calculate quantity
-                    qty = float(trade.get("quantity", 0))
-                    if qty == 0 and executed_price > 0:
-                        trade_value = float(trade.get("trade_value", 0))
-                        if trade_value == executed_price:
-                            qty = 1
-                        elif trade_value > 0:
-                            qty = trade_value / executed_price
-
-                    if qty <= 0:
-                        logger.warning(f"Skipping trade with zero/negative quantity: {trade}")
-                        continue
-                except (TypeError, ValueError) as e:
-                    logger.warning(f"Error parsing trade values: {e}, trade: {trade}")
-                    continue
-
-                # Track position windows
-                if action == "BUY":
-                    position_windows.append(
-                        {
-                            "start_time": trade_time,
-                            "end_time": None,  # Will be filled when position is closed
-                            "qty": qty,
-                            "price": executed_price,
-                            "action": "BUY",
-                            "exit_price": None,  # Will be filled when position is closed
-                        }
-                    )
-                    net_position += qty
-                else:  # SELL
-                    # Check if this closes a position
-                    if net_position > 0:
-                        # This is closing a long position
-                        remaining_qty = qty
-                        for window in position_windows:
-                            if (
-                                window["action"] == "BUY"
-                                and window["end_time"] is None
-                                and remaining_qty > 0
-                            ):
-                                # Close this position window
-                                close_qty = min(window["qty"], remaining_qty)
-                                if close_qty == window["qty"]:
-                                    window["end_time"] = trade_time
-                                    window["exit_price"] = (
-                                        executed_price  # Store the actual exit price
-                                    )
-                                else:
-                                    # Partial close - split the window
-                                    window["qty"] -= close_qty
-                                    # Create a closed window for the partial
-                                    closed_window = window.copy()
-                                    closed_window["qty"] = close_qty
-                                    closed_window["end_time"] = trade_time
-                                    closed_window["exit_price"] = (
-                                        executed_price  # Store the actual exit price
-                                    )
-                                    position_windows.append(closed_window)
-                                remaining_qty -= close_qty
-                        net_position -= qty
-                    else:
-                        # This is a short position
-                        position_windows.append(
-                            {
-                                "start_time": trade_time,
-                                "end_time": None,
-                                "qty": qty,
-                                "price": executed_price,
-                                "action": "SELL",
-                                "exit_price": None,
-                            }
-                        )
-                        net_position -= qty
-
-            # Now get historical data and calculate PnL for each position window
-            try:
-                # Apply rate limiting before API call (2 calls/sec to stay under broker's 3/sec limit)
-                history_rate_limiter.wait()
-                logger.debug(f"Fetching historical data for {symbol} on {exchange}")
-
-                success, hist_response, _ = get_history(
-                    symbol=symbol,
-                    exchange=exchange,
-                    interval="1m",
-                    start_date=today_str,
-                    end_date=today_str,
-                    api_key=api_key,
-                )
-
-                if success and "data" in hist_response:
-                    df_hist = pd.DataFrame(hist_response["data"])
-                    if not df_hist.empty:
-                        df_hist = convert_timestamp_to_ist(df_hist, symbol)
-
-                        if df_hist is not None:
-                            ist = pytz.timezone("Asia/Kolkata")
-                            current_time = datetime.now(ist)
-
-                            # Filter to trading hours
-                            if first_trade_time:
-                                df_hist = df_hist[df_hist.index >= first_trade_time]
-                            df_hist = df_hist[df_hist.index <= current_time]
-
-                            df_hist = df_hist[["close"]].copy()
-                            df_hist.rename(columns={"close": f"{symbol}_price"}, inplace=True)
-
-                            # Initialize PnL column
-                            df_hist[f"{symbol}_pnl"] = 0.0
-
-                            # Track cumulative realized PnL
-                            cumulative_realized_pnl = 0.0
-
-                            # Sort position windows by start time
-                            position_windows_sorted = sorted(
-                                position_windows,
-                                key=lambda x: x["start_time"]
-                                if x["start_time"]
-                                else datetime.min.replace(tzinfo=pytz.UTC),
-                            )
-
-                            # Calculate PnL for each position window
-                            for window in position_windows_sorted:
-                                if window["start_time"] is None:
-                                    continue
-
-                                # Determine the time range for this position
-                                start = window["start_time"]
-                                end = window["end_time"] if window["end_time"] else current_time
-
-                                # Create mask for this time window
-                                mask = (df_hist.index >= start) & (df_hist.index <= end)
-
-                                # Handle sub-minute trades: if position is closed with entry/exit prices,
-                                # calculate realized PnL even if no historical data points exist in the window
-                                has_data_points = mask.any()
-                                is_closed_position = (
-                                    window["end_time"] is not None
-                                    and window.get("exit_price") is not None
-                                )
-
-                                if not has_data_points and not is_closed_position:
-                                    # Skip only if no data points AND position is still open
-                                    logger.warning(
-                                        f"No data points found for open position window from {start} to {end}"
-                                    )
-                                    continue
-
-                                # Calculate mark-to-market PnL for this window (only if we have data points)
-                                if has_data_points:
-                                    if window["action"] == "BUY":
-                                        position_pnl = (
-                                            df_hist.loc[mask, f"{symbol}_price"] - window["price"]
-                                        ) * window["qty"]
-                                        df_hist.loc[mask, f"{symbol}_pnl"] += position_pnl
-                                    else:  # SELL
-                                        position_pnl = (
-                                            window["price"] - df_hist.loc[mask, f"{symbol}_price"]
-                                        ) * window["qty"]
-                                        df_hist.loc[mask, f"{symbol}_pnl"] += position_pnl
-
-                                # Calculate realized PnL for closed positions using actual entry/exit prices
-                                # This works even for sub-minute trades without historical data points
-                                if is_closed_position:
-                                    if window["action"] == "BUY":
-                                        realized = (
-                                            window["exit_price"] - window["price"]
-                                        ) * window["qty"]
-                                    else:  # SELL
-                                        realized = (
-                                            window["price"] - window["exit_price"]
-                                        ) * window["qty"]
-
-                                    cumulative_realized_pnl += realized
-                                    logger.info(
-                                        f"Closed {window['action']} position: entry={window['price']}, exit={window['exit_price']}, "
-                                        f"qty={window['qty']}, realized PnL={realized}"
-                                        f"{' (sub-minute trade)' if not has_data_points else ''}"
-                                    )
-
-                                # After a position is closed, set the cumulative realized PnL for all future timestamps
-                                # IMPORTANT: Always update even when cumulative is 0 (e.g., when +225 and -225 cancel out)
-                                # Otherwise the previous non-zero value remains in the dataframe
-                                if window["end_time"] is not None:
-                                    future_mask = df_hist.index > window["end_time"]
-                                    if future_mask.any():
-                                        df_hist.loc[future_mask, f"{symbol}_pnl"] = (
-                                            cumulative_realized_pnl
-                                        )
-                                    elif cumulative_realized_pnl != 0:
-                                        # Edge case: trade closed at/after last candle (e.g., near market close)
-                                        # Add realized PnL to the last available candle (only if non-zero)
-                                        if len(df_hist) > 0:
-                                            last_idx = df_hist.index[-1]
-                                            df_hist.loc[last_idx, f"{symbol}_pnl"] = (
-                                                cumulative_realized_pnl
-                                            )
-                                            logger.info(
-                                                f"Sub-minute trade near market close: added realized PnL to last candle {last_idx}"
-                                            )
-
-                                logger.info(
-                                    f"Position window for {symbol}: {window['action']} {window['qty']} @ {window['price']}, "
-                                    f"from {start.strftime('%H:%M:%S') if start else 'None'} "
-                                    f"to {end.strftime('%H:%M:%S') if end else 'current'}"
-                                    f"{' (no historical data in window)' if not has_data_points else ''}"
-                                )
-
-                            # Add to portfolio
-                            if portfolio_pnl is None:
-                                portfolio_pnl = df_hist[[f"{symbol}_pnl"]].copy()
-                            else:
-                                portfolio_pnl = portfolio_pnl.join(
-                                    df_hist[[f"{symbol}_pnl"]], how="outer"
-                                )
-
-                            logger.info(f"Added PnL for {symbol}: {len(df_hist)} data points")
-                        else:
-                            logger.warning(f"Timestamp conversion failed for {symbol}")
-                else:
-                    logger.warning(f"Could not get historical data for {symbol}")
-
-            except Exception as e:
-                logger.exception(f"Error processing trades for {symbol}: {e}")
-                continue
-
-        # If we have no portfolio data but have positions, fetch historical data for positions
-        if portfolio_pnl is None and current_positions:
-            logger.info(
-                "No trades found, but positions exist. Fetching historical data for positions."
-            )
-
-            # Process each position and get its historical data
-            for pos_key, pos_data in current_positions.items():
-                # Extract symbol and exchange from the key
-                parts = pos_key.rsplit("_", 1)
-                if len(parts) == 2:
-                    symbol, exchange = parts
-                else:
-                    logger.warning(f"Could not parse position key: {pos_key}")
-                    continue
-
-                qty = pos_data["quantity"]
-                avg_price = pos_data["average_price"]
-
-                if qty == 0:
-                    continue
+            return jsonify({"status": "success", "data": empty_snapshot()}), 200
 
-                try:
-                    # Apply rate limiting before API call (2 calls/sec to stay under broker's 3/sec limit)
-                    history_rate_limiter.wait()
-                    logger.debug(f"Fetching historical data for position {symbol} on {exchange}")
-
-                    # Get historical data for this position
-                    success, hist_response, _ = get_history(
-                        symbol=symbol,
-                        exchange=exchange,
-                        interval="1m",
-                        start_date=today_str,
-                        end_date=today_str,
-                        api_key=api_key,
-                    )
-
-                    if success and "data" in hist_response:
-                        df_hist = pd.DataFrame(hist_response["data"])
-                        if not df_hist.empty:
-                            # Convert timestamp to IST with robust handling
-                            df_hist = convert_timestamp_to_ist(df_hist, symbol)
-
-                            if df_hist is not None:
-                                # Filter to show data from first trade time onwards
-                                ist = pytz.timezone("Asia/Kolkata")
-                                current_time = datetime.now(ist)
-
-                                # For positions without trades, we still need to determine when to start
-                                # Use market open time as default
-                                today_915am = df_hist.index[0].replace(
-                                    hour=9, minute=15, second=0, microsecond=0
-                                )
-                                df_hist = df_hist[df_hist.index >= today_915am]
-                                df_hist = df_hist[df_hist.index <= current_time]
-                            else:
-                                logger.warning(
-                                    f"Timestamp conversion failed for position {symbol}, skipping"
-                                )
-                                continue
-
-                            df_hist = df_hist[["close"]].copy()
-                            df_hist.rename(columns={"close": f"{symbol}_price"}, inplace=True)
-
-                            # Calculate MTM PnL for this position
-                            # For positions, we use the average price from the position data
-                            if qty > 0:  # Long position
-                                df_hist[f"{symbol}_pnl"] = (
-                                    df_hist[f"{symbol}_price"] - avg_price
-                                ) * qty
-                            else:  # Short position
-                                df_hist[f"{symbol}_pnl"] = (
-                                    avg_price - df_hist[f"{symbol}_price"]
-                                ) * abs(qty)
-
-                            # Combine into portfolio
-                            if portfolio_pnl is None:
-                                portfolio_pnl = df_hist[[f"{symbol}_pnl"]].copy()
-                            else:
-                                portfolio_pnl = portfolio_pnl.join(
-                                    df_hist[[f"{symbol}_pnl"]], how="outer"
-                                )
-
-                            logger.info(
-                                f"Added PnL for position {symbol}: {len(df_hist)} data points"
-                            )
-                    else:
-                        logger.warning(f"Could not get historical data for position {symbol}")
-
-                except Exception as e:
-                    logger.exception(f"Error processing position for {symbol}: {e}")
-                    continue
-
-            # If we still couldn't get any historical data, create a simple flat line
-            if portfolio_pnl is None:
-                ist = pytz.timezone("Asia/Kolkata")
-                current_time = datetime.now(ist)
-                start_time = current_time.replace(hour=9, minute=0, second=0, microsecond=0)
-                end_time = current_time
-
-                if end_time <= start_time:
-                    end_time = start_time + timedelta(minutes=1)
-
-                time_range = pd.date_range(start=start_time, end=end_time, freq="1min", tz=ist)
-                portfolio_pnl = pd.DataFrame(index=time_range)
-
-                # Use current position P&L as constant value
-                total_pnl = sum(pos["pnl"] for pos in current_positions.values())
-                portfolio_pnl["Total_PnL"] = total_pnl
-        elif portfolio_pnl is not None:
-            # Add zero PnL data from market open to first trade if needed
-            if first_trade_time and trades:
-                ist = pytz.timezone("Asia/Kolkata")
-                market_open = first_trade_time.replace(hour=9, minute=15, second=0, microsecond=0)
-
-                # Only add pre-trade data if first trade is after market open
-                if first_trade_time > market_open:
-                    # Create a zero PnL series from market open to first trade
-                    pre_trade_index = pd.date_range(
-                        start=market_open, end=first_trade_time, freq="1min", tz=ist
-                    )[:-1]  # Exclude the first trade time itself
-
-                    if len(pre_trade_index) > 0:
-                        # Create zero PnL dataframe for pre-trade period
-                        pre_trade_df = pd.DataFrame(index=pre_trade_index)
-                        for col in portfolio_pnl.columns:
-                            pre_trade_df[col] = 0
-
-                        # Combine pre-trade zeros with actual PnL data
-                        portfolio_pnl = pd.concat([pre_trade_df, portfolio_pnl]).sort_index()
-                        logger.info(
-                            f"Added {len(pre_trade_index)} minutes of zero PnL before first trade"
-                        )
-
-            # Calculate total MTM and drawdown
-            # Use ffill() instead of fillna(method='ffill') for pandas 2.x compatibility
-            portfolio_pnl = portfolio_pnl.ffill().fillna(0)
-            portfolio_pnl["Total_PnL"] = portfolio_pnl.sum(axis=1)
+        fills = tradebook_fills(trades)
+        if fills:
+            # Trading date of the first fill (handles overnight sessions spanning midnight)
+            trade_date = min(fill.time for fill in fills).date()
         else:
-            # No data at all
-            return jsonify(
-                {
-                    "status": "success",
-                    "data": {
-                        "current_mtm": 0,
-                        "max_mtm": 0,
-                        "max_mtm_time": None,
-                        "min_mtm": 0,
-                        "min_mtm_time": None,
-                        "max_drawdown": 0,
-                        "pnl_series": [],
-                        "drawdown_series": [],
-                    },
-                }
-            ), 200
-
-        # Calculate drawdown
-        portfolio_pnl["Peak"] = portfolio_pnl["Total_PnL"].cummax()
-        portfolio_pnl["Drawdown"] = portfolio_pnl["Total_PnL"] - portfolio_pnl["Peak"]
-
-        # Calculate metrics
-        latest_mtm = portfolio_pnl["Total_PnL"].iloc[-1] if not portfolio_pnl.empty else 0
-        max_mtm = portfolio_pnl["Total_PnL"].max() if not portfolio_pnl.empty else 0
-        min_mtm = portfolio_pnl["Total_PnL"].min() if not portfolio_pnl.empty else 0
-        max_drawdown = portfolio_pnl["Drawdown"].min() if not portfolio_pnl.empty else 0
-
-        try:
-            max_mtm_time = (
-                portfolio_pnl["Total_PnL"].idxmax().strftime("%H:%M")
-                if not portfolio_pnl.empty
-                else None
-            )
-            min_mtm_time = (
-                portfolio_pnl["Total_PnL"].idxmin().strftime("%H:%M")
-                if not portfolio_pnl.empty
-                else None
-            )
-        except:
-            max_mtm_time = None
-            min_mtm_time = None
-
-        # Convert to series format for frontend
-        pnl_series = []
-        drawdown_series = []
-
-        if not portfolio_pnl.empty:
-            for idx, row in portfolio_pnl.iterrows():
-                try:
-                    # Convert to timestamp - handle timezone-aware datetime
-                    if hasattr(idx, "tz") and idx.tz is not None:
-                        # Already timezone-aware, convert to UTC then to timestamp
-                        timestamp_ms = int(idx.tz_convert("UTC").timestamp() * 1000)
-                    else:
-                        # Naive datetime, assume it's already in local time
-                        timestamp_ms = int(idx.timestamp() * 1000)
-                    pnl_value = row.get("Total_PnL", 0)
-                    drawdown_value = row.get("Drawdown", 0)
-
-                    # Handle NaN values
-                    if pd.isna(pnl_value):
-                        pnl_value = 0
-                    if pd.isna(drawdown_value):
-                        drawdown_value = 0
-
-                    pnl_series.append({"time": timestamp_ms, "value": round(float(pnl_value), 2)})
-                    drawdown_series.append(
-                        {"time": timestamp_ms, "value": round(float(drawdown_value), 2)}
-                    )
-                except Exception as e:
-                    logger.warning(f"Error processing row {idx}: {e}")
-                    continue
+            # No trades today: carried positions, marked from market open
+            trade_date = datetime.now(ist).date()
+            fills = position_fills(current_positions, trade_date)
+        logger.info(f"Using trade date for PnL curve: {trade_date}")
+
+        engine = get_pnl_curve_engine(login_username)
+        engine.set_trade_date(trade_date)
+        applied = engine.sync_fills(fills)
+        if applied:
+            logger.info(f"Applied {applied} new fills to the PnL curve")
+
+        follow_symbols(login_username, broker, engine.symbols())
+        backfill_bars(engine, api_key, trade_date.strftime("%Y-%m-%d"))
+
+        data = engine.snapshot()
+        if not data["pnl_series"] and current_positions and not trades:
+            # No prices at all: show the positions' current PnL as a flat line
+            data = flat_positions_curve(current_positions)
+        engine.save()
 
         logger.info(
-            f"Final metrics - Current: {latest_mtm}, Max: {max_mtm}, Min: {min_mtm}, Drawdown: {max_drawdown}"
+            f"Final metrics - Current: {data['current_mtm']}, Max: {data['max_mtm']}, "
+            f"Min: {data['min_mtm']}, Drawdown: {data['max_drawdown']}"
         )
-        logger.info(f"PnL series length: {len(pnl_series)}")
-
-        return jsonify(
-            {
-                "status": "success",
-                "data": {
-                    "current_mtm": round(latest_mtm, 2),
-                    "max_mtm": round(max_mtm, 2),
-                    "max_mtm_time": max_mtm_time,
-                    "min_mtm": round(min_mtm, 2),
-                    "min_mtm_time": min_mtm_time,
-                    "max_drawdown": round(max_drawdown, 2),
-                    "pnl_series": pnl_series,
-                    "drawdown_series": drawdown_series,
-                },
-            }
-        ), 200
+        return jsonify({"status": "success", "data": data}), 200
 
     except Exception as e:
         logger.error(f"Error calculating intraday PnL: {e}")
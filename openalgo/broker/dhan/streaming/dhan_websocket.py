@@ -16,6 +16,26 @@ from urllib.parse import urlencode
 
 import websocket
 
+from websocket_proxy.feed_recorder import get_feed_recorder
+
+# Precompiled little-endian layouts for Dhan binary packets. Unpacking through
+# these with unpack_from over a memoryview avoids a bytes copy and a format
+# parse for every field of every packet.
+_REGULAR_HEADER = struct.Struct("<BHBI")  # code, length, segment, security_id
+_DEPTH_20_HEADER = struct.Struct("<HBBI4x")  # length, code, segment, security_id, seq
+_TICKER = struct.Struct("<fI")
+_QUOTE = struct.Struct("<fHIfIIIffff")
+_OI = struct.Struct("<I")
+_PREV_CLOSE = struct.Struct("<fI")
+_FULL = struct.Struct("<fHIfIIIIIIffff")
+_FULL_DEPTH_LEVEL = struct.Struct("<IIHHff")
+_DEPTH_20_LEVEL = struct.Struct("<dII")
+_DISCONNECT = struct.Struct("<H")
+
+_FULL_DEPTH_OFFSET = _FULL.size  # 54
+_FULL_DEPTH_SIZE = 5 * _FULL_DEPTH_LEVEL.size  # 100
+_DEPTH_20_SIZE = 20 * _DEPTH_20_LEVEL.size  # 320
+
 
 class DhanWebSocket:
     """
@@ -76,6 +96,8 @@ class DhanWebSocket:
 
         # Logging
         self.logger = logging.getLogger(f"dhan_websocket_{'20depth' if is_20_depth else '5depth'}")
+        self._feed_recorder = get_feed_recorder()
+        self._feed_source = "dhan_20depth" if is_20_depth else "dhan"
 
         # Build WebSocket URL
         self._build_url()
@@ -327,6 +349,9 @@ class DhanWebSocket:
     def _on_message(self, ws, message):
         """Handle incoming WebSocket messages"""
         try:
+            if self._feed_recorder:
+                self._feed_recorder.record_frame(self._feed_source, message)
+
             # All Dhan responses are binary
             if isinstance(message, (bytes, bytearray)):
                 self.logger.debug(f"Received binary message of length: {len(message)} bytes")
@@ -346,103 +371,92 @@ class DhanWebSocket:
 
     def _parse_regular_message(self, data: bytes):
         """Parse regular (5-depth) binary message"""
+        view = memoryview(data)
+        size = len(view)
         offset = 0
 
-        while offset < len(data):
-            if offset + 8 > len(data):
+        while offset < size:
+            if offset + 8 > size:
                 break
 
             # Parse header (8 bytes)
-            feed_response_code = struct.unpack("<B", data[offset : offset + 1])[0]
-            message_length = struct.unpack("<H", data[offset + 1 : offset + 3])[0]
-            exchange_segment = struct.unpack("<B", data[offset + 3 : offset + 4])[0]
-            security_id = struct.unpack("<I", data[offset + 4 : offset + 8])[0]
-
-            self.logger.debug(
-                f"Parsed header - Code: {feed_response_code}, Length: {message_length}, Exchange: {exchange_segment}, Security: {security_id}"
+            feed_response_code, message_length, exchange_segment, security_id = (
+                _REGULAR_HEADER.unpack_from(view, offset)
             )
 
             # Parse payload based on response code
             payload_start = offset + 8
             payload_end = offset + message_length
 
-            if payload_end > len(data):
+            if payload_end > size:
                 self.logger.warning("Incomplete message received")
                 break
 
-            payload = data[payload_start:payload_end]
+            # Zero-copy slice of the frame
+            payload = view[payload_start:payload_end]
 
             # Parse based on feed response code
             parsed_data = None
 
             if feed_response_code == 2:  # Ticker
-                self.logger.debug("Parsing TICKER packet")
                 parsed_data = self._parse_ticker_packet(payload, exchange_segment, security_id)
             elif feed_response_code == 4:  # Quote
-                self.logger.debug("Parsing QUOTE packet")
                 parsed_data = self._parse_quote_packet(payload, exchange_segment, security_id)
             elif feed_response_code == 5:  # OI
-                self.logger.debug("Parsing OI packet")
                 parsed_data = self._parse_oi_packet(payload, exchange_segment, security_id)
             elif feed_response_code == 6:  # Prev Close
-                self.logger.debug("Parsing PREV_CLOSE packet")
                 parsed_data = self._parse_prev_close_packet(payload, exchange_segment, security_id)
             elif feed_response_code == 8:  # Full
-                self.logger.debug("Parsing FULL packet")
                 parsed_data = self._parse_full_packet(payload, exchange_segment, security_id)
             elif feed_response_code == 50:  # Disconnect
-                self.logger.debug("Parsing DISCONNECT packet")
                 self._handle_disconnect_packet(payload)
             else:
                 self.logger.warning(f"Unknown feed response code: {feed_response_code}")
 
             if parsed_data and self.on_data:
-                self.logger.debug(f"Sending parsed data to callback: {parsed_data.get('type')}")
                 self.on_data(self, parsed_data)
             elif parsed_data:
                 self.logger.warning("Parsed data available but no callback set")
 
             # Move to next message
+            if message_length == 0:
+                break
             offset = payload_end
 
     def _parse_20_depth_message(self, data: bytes):
         """Parse 20-level depth binary message"""
+        view = memoryview(data)
+        size = len(view)
         offset = 0
 
-        # self.logger.info(f"Parsing 20-depth message with {len(data)} bytes")
-
-        while offset < len(data):
-            if offset + 12 > len(data):
+        while offset < size:
+            if offset + 12 > size:
                 break
 
-            # Parse header (12 bytes for 20-depth)
-            message_length = struct.unpack("<H", data[offset : offset + 2])[0]
-            feed_response_code = struct.unpack("<B", data[offset + 2 : offset + 3])[0]
-            exchange_segment = struct.unpack("<B", data[offset + 3 : offset + 4])[0]
-            security_id = struct.unpack("<I", data[offset + 4 : offset + 8])[0]
-            # Skip message sequence (4 bytes)
+            # Parse header (12 bytes for 20-depth, trailing 4 bytes are the sequence)
+            message_length, feed_response_code, exchange_segment, security_id = (
+                _DEPTH_20_HEADER.unpack_from(view, offset)
+            )
 
             # Parse payload
             payload_start = offset + 12
             payload_end = offset + message_length
 
-            if payload_end > len(data):
+            if payload_end > size:
                 self.logger.warning("Incomplete 20-depth message received")
                 break
 
-            payload = data[payload_start:payload_end]
+            payload = view[payload_start:payload_end]
 
             # Parse based on feed response code
             if feed_response_code in [41, 51]:  # 20-depth bid/ask
                 side = "BID" if feed_response_code == 41 else "ASK"
-                # self.logger.info(f"Parsing 20-depth {side} packet for security {security_id}")
 
                 parsed_data = self._parse_20_depth_packet(
                     payload, exchange_segment, security_id, is_bid=(feed_response_code == 41)
                 )
 
                 if parsed_data and self.on_data:
-                    # self.logger.info(f"Sending 20-depth {side} data to callback")
                     self.on_data(self, parsed_data)
                 else:
                     self.logger.warning(f"Failed to parse 20-depth {side} data")
@@ -450,17 +464,18 @@ class DhanWebSocket:
                 self.logger.warning(f"Unknown 20-depth response code: {feed_response_code}")
 
             # Move to next message
+            if message_length == 0:
+                break
             offset = payload_end
 
     def _parse_ticker_packet(
         self, payload: bytes, exchange_segment: int, security_id: int
     ) -> dict[str, Any]:
         """Parse ticker packet (LTP and LTT)"""
-        if len(payload) < 8:
+        if len(payload) < _TICKER.size:
             return None
 
-        ltp = struct.unpack("<f", payload[0:4])[0]
-        ltt = struct.unpack("<I", payload[4:8])[0]
+        ltp, ltt = _TICKER.unpack_from(payload)
 
         return {
             "type": "ticker",
@@ -474,53 +489,69 @@ class DhanWebSocket:
         self, payload: bytes, exchange_segment: int, security_id: int
     ) -> dict[str, Any]:
         """Parse quote packet"""
-        if len(payload) < 42:
+        if len(payload) < _QUOTE.size:
             return None
 
+        (
+            ltp,
+            ltq,
+            ltt,
+            atp,
+            volume,
+            total_sell_quantity,
+            total_buy_quantity,
+            open_,
+            close,
+            high,
+            low,
+        ) = _QUOTE.unpack_from(payload)
+
         return {
             "type": "quote",
             "exchange_segment": exchange_segment,
             "security_id": str(security_id),
-            "ltp": struct.unpack("<f", payload[0:4])[0],
-            "ltq": struct.unpack("<H", payload[4:6])[0],
-            "ltt": struct.unpack("<I", payload[6:10])[0],
-            "atp": struct.unpack("<f", payload[10:14])[0],
-            "volume": struct.unpack("<I", payload[14:18])[0],
-            "total_sell_quantity": struct.unpack("<I", payload[18:22])[0],
-            "total_buy_quantity": struct.unpack("<I", payload[22:26])[0],
-            "open": struct.unpack("<f", payload[26:30])[0],
-            "close": struct.unpack("<f", payload[30:34])[0],
-            "high": struct.unpack("<f", payload[34:38])[0],
-            "low": struct.unpack("<f", payload[38:42])[0],
+            "ltp": ltp,
+            "ltq": ltq,
+            "ltt": ltt,
+            "atp": atp,
+            "volume": volume,
+            "total_sell_quantity": total_sell_quantity,
+            "total_buy_quantity": total_buy_quantity,
+            "open": open_,
+            "close": close,
+            "high": high,
+            "low": low,
         }
 
     def _parse_oi_packet(
         self, payload: bytes, exchange_segment: int, security_id: int
     ) -> dict[str, Any]:
         """Parse OI packet"""
-        if len(payload) < 4:
+        if len(payload) < _OI.size:
             return None
 
         return {
             "type": "oi",
             "exchange_segment": exchange_segment,
             "security_id": str(security_id),
-            "oi": struct.unpack("<I", payload[0:4])[0],
+            "oi": _OI.unpack_from(payload)[0],
         }
 
     def _parse_prev_close_packet(
         self, payload: bytes, exchange_segment: int, security_id: int
     ) -> dict[str, Any]:
         """Parse previous close packet"""
-        if len(payload) < 8:
+        if len(payload) < _PREV_CLOSE.size:
             return None
 
+        prev_close, prev_oi = _PREV_CLOSE.unpack_from(payload)
+
         return {
             "type": "prev_close",
             "exchange_segment": exchange_segment,
             "security_id": str(security_id),
-            "prev_close": struct.unpack("<f", payload[0:4])[0],
-            "prev_oi": struct.unpack("<I", payload[4:8])[0],
+            "prev_close": prev_close,
+            "prev_oi": prev_oi,
         }
 
     def _parse_full_packet(
@@ -528,75 +559,76 @@ class DhanWebSocket:
     ) -> dict[str, Any]:
         """Parse full packet (includes 5-level depth)"""
         # Payload should be 154 bytes (162 total - 8 byte header)
-        if len(payload) < 154:
+        if len(payload) < _FULL_DEPTH_OFFSET + _FULL_DEPTH_SIZE:
             self.logger.warning(
                 f"FULL packet payload too short: {len(payload)} bytes, expected 154"
             )
             return None
 
-        self.logger.debug(f"Parsing FULL packet with payload length: {len(payload)}")
+        (
+            ltp,
+            ltq,
+            ltt,
+            atp,
+            volume,
+            total_sell_quantity,
+            total_buy_quantity,
+            oi,
+            oi_high,
+            oi_low,
+            open_,
+            close,
+            high,
+            low,
+        ) = _FULL.unpack_from(payload)
+
+        # 5-level depth (100 bytes starting at offset 54), one pass over the block
+        buy = []
+        sell = []
+        depth_block = payload[_FULL_DEPTH_OFFSET : _FULL_DEPTH_OFFSET + _FULL_DEPTH_SIZE]
+        for (
+            bid_qty,
+            ask_qty,
+            bid_orders,
+            ask_orders,
+            bid_price,
+            ask_price,
+        ) in _FULL_DEPTH_LEVEL.iter_unpack(depth_block):
+            buy.append({"price": bid_price, "quantity": bid_qty, "orders": bid_orders})
+            sell.append({"price": ask_price, "quantity": ask_qty, "orders": ask_orders})
 
-        result = {
+        return {
             "type": "full",
             "exchange_segment": exchange_segment,
             "security_id": str(security_id),
-            "ltp": struct.unpack("<f", payload[0:4])[0],
-            "ltq": struct.unpack("<H", payload[4:6])[0],
-            "ltt": struct.unpack("<I", payload[6:10])[0],
-            "atp": struct.unpack("<f", payload[10:14])[0],
-            "volume": struct.unpack("<I", payload[14:18])[0],
-            "total_sell_quantity": struct.unpack("<I", payload[18:22])[0],
-            "total_buy_quantity": struct.unpack("<I", payload[22:26])[0],
-            "oi": struct.unpack("<I", payload[26:30])[0],
-            "oi_high": struct.unpack("<I", payload[30:34])[0],
-            "oi_low": struct.unpack("<I", payload[34:38])[0],
-            "open": struct.unpack("<f", payload[38:42])[0],
-            "close": struct.unpack("<f", payload[42:46])[0],
-            "high": struct.unpack("<f", payload[46:50])[0],
-            "low": struct.unpack("<f", payload[50:54])[0],
-            "depth": {"buy": [], "sell": []},
+            "ltp": ltp,
+            "ltq": ltq,
+            "ltt": ltt,
+            "atp": atp,
+            "volume": volume,
+            "total_sell_quantity": total_sell_quantity,
+            "total_buy_quantity": total_buy_quantity,
+            "oi": oi,
+            "oi_high": oi_high,
+            "oi_low": oi_low,
+            "open": open_,
+            "close": close,
+            "high": high,
+            "low": low,
+            "depth": {"buy": buy, "sell": sell},
         }
 
-        # Parse 5-level depth (100 bytes starting at offset 54)
-        depth_offset = 54
-        for i in range(5):
-            packet_offset = depth_offset + (i * 20)
-
-            bid_qty = struct.unpack("<I", payload[packet_offset : packet_offset + 4])[0]
-            ask_qty = struct.unpack("<I", payload[packet_offset + 4 : packet_offset + 8])[0]
-            bid_orders = struct.unpack("<H", payload[packet_offset + 8 : packet_offset + 10])[0]
-            ask_orders = struct.unpack("<H", payload[packet_offset + 10 : packet_offset + 12])[0]
-            bid_price = struct.unpack("<f", payload[packet_offset + 12 : packet_offset + 16])[0]
-            ask_price = struct.unpack("<f", payload[packet_offset + 16 : packet_offset + 20])[0]
-
-            result["depth"]["buy"].append(
-                {"price": bid_price, "quantity": bid_qty, "orders": bid_orders}
-            )
-
-            result["depth"]["sell"].append(
-                {"price": ask_price, "quantity": ask_qty, "orders": ask_orders}
-            )
-
-        self.logger.debug(
-            f"FULL packet parsed successfully: LTP={result.get('ltp')}, Volume={result.get('volume')}"
-        )
-        return result
-
     def _parse_20_depth_packet(
         self, payload: bytes, exchange_segment: int, security_id: int, is_bid: bool
     ) -> dict[str, Any]:
         """Parse 20-level depth packet"""
-        if len(payload) < 320:  # 20 levels * 16 bytes
+        if len(payload) < _DEPTH_20_SIZE:  # 20 levels * 16 bytes
             return None
 
-        levels = []
-        for i in range(20):
-            offset = i * 16
-            price = struct.unpack("<d", payload[offset : offset + 8])[0]
-            quantity = struct.unpack("<I", payload[offset + 8 : offset + 12])[0]
-            orders = struct.unpack("<I", payload[offset + 12 : offset + 16])[0]
-
-            levels.append({"price": price, "quantity": quantity, "orders": orders})
+        levels = [
+            {"price": price, "quantity": quantity, "orders": orders}
+            for price, quantity, orders in _DEPTH_20_LEVEL.iter_unpack(payload[:_DEPTH_20_SIZE])
+        ]
 
         return {
             "type": "depth_20",
@@ -608,8 +640,8 @@ class DhanWebSocket:
 
     def _handle_disconnect_packet(self, payload: bytes):
         """Handle disconnect packet"""
-        if len(payload) >= 2:
-            disconnect_code = struct.unpack("<H", payload[0:2])[0]
+        if len(payload) >= _DISCONNECT.size:
+            disconnect_code = _DISCONNECT.unpack_from(payload)[0]
             self.logger.warning(f"Received disconnect packet with code: {disconnect_code}")
 
             # Common disconnect codes
@@ -13,10 +13,22 @@ import threading
 import time
 from collections.abc import Callable
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
 import websocket
 
+# Sentinel the HSM feed uses for "field not present"
+NULL_FIELD_VALUE = -2147483648
+
+_TOPIC_ID = struct.Struct("H")
+
+
+@lru_cache(maxsize=64)
+def _field_block(count: int) -> struct.Struct:
+    """Precompiled layout for a block of `count` big-endian int32 field values"""
+    return struct.Struct(f">{count}i")
+
 
 class FyersHSMWebSocket:
     """
@@ -361,7 +373,7 @@ class FyersHSMWebSocket:
                     break
 
                 # Get data type
-                data_type = struct.unpack("B", data[offset : offset + 1])[0]
+                data_type = data[offset]
                 offset += 1
 
                 self.logger.debug(f"Processing scrip {i + 1}/{scrip_count}, data_type: {data_type}")
@@ -393,7 +405,7 @@ class FyersHSMWebSocket:
                 return offset
 
             # Get topic ID
-            topic_id = struct.unpack("H", data[offset : offset + 2])[0]
+            topic_id = _TOPIC_ID.unpack_from(data, offset)[0]
             offset += 2
 
             # Get topic name length
@@ -432,21 +444,16 @@ class FyersHSMWebSocket:
             if offset + 1 > len(data):
                 return offset
 
-            field_count = struct.unpack("B", data[offset : offset + 1])[0]
+            field_count = data[offset]
             offset += 1
 
             scrip_data = {"type": "sf"}
 
-            # Parse field values
-            for index in range(field_count):
-                if offset + 4 > len(data):
-                    break
-
-                value = struct.unpack(">i", data[offset : offset + 4])[0]
-                offset += 4
-
-                if value != -2147483648 and index < len(self.DATA_FIELDS):
-                    scrip_data[self.DATA_FIELDS[index]] = value
+            # Parse field values (one unpack for the whole block)
+            values, offset = self._read_field_block(data, offset, field_count)
+            for name, value in zip(self.DATA_FIELDS, values, strict=False):
+                if value != NULL_FIELD_VALUE:
+                    scrip_data[name] = value
 
             # Skip 2 bytes
             offset += 2
@@ -523,21 +530,16 @@ class FyersHSMWebSocket:
             if offset + 1 > len(data):
                 return offset
 
-            field_count = struct.unpack("B", data[offset : offset + 1])[0]
+            field_count = data[offset]
             offset += 1
 
             index_data = {"type": "if"}
 
-            # Parse field values
-            for index in range(field_count):
-                if offset + 4 > len(data):
-                    break
-
-                value = struct.unpack(">i", data[offset : offset + 4])[0]
-                offset += 4
-
-                if value != -2147483648 and index < len(self.INDEX_FIELDS):
-                    index_data[self.INDEX_FIELDS[index]] = value
+            # Parse field values (one unpack for the whole block)
+            values, offset = self._read_field_block(data, offset, field_count)
+            for name, value in zip(self.INDEX_FIELDS, values, strict=False):
+                if value != NULL_FIELD_VALUE:
+                    index_data[name] = value
 
             # Add original symbol mapping and HSM token
             if topic_name in self.symbol_mappings:
@@ -566,21 +568,16 @@ class FyersHSMWebSocket:
             if offset + 1 > len(data):
                 return offset
 
-            field_count = struct.unpack("B", data[offset : offset + 1])[0]
+            field_count = data[offset]
             offset += 1
 
             depth_data = {"type": "dp"}
 
-            # Parse field values
-            for index in range(field_count):
-                if offset + 4 > len(data):
-                    break
-
-                value = struct.unpack(">i", data[offset : offset + 4])[0]
-                offset += 4
-
-                if value != -2147483648 and index < len(self.DEPTH_FIELDS):
-                    depth_data[self.DEPTH_FIELDS[index]] = value
+            # Parse field values (one unpack for the whole block)
+            values, offset = self._read_field_block(data, offset, field_count)
+            for name, value in zip(self.DEPTH_FIELDS, values, strict=False):
+                if value != NULL_FIELD_VALUE:
+                    depth_data[name] = value
 
             # Skip 2 bytes (similar to scrip snapshot)
             offset += 2
@@ -639,10 +636,27 @@ class FyersHSMWebSocket:
 
         return offset
 
+    def _read_field_block(self, data: bytearray, offset: int, field_count: int) -> tuple:
+        """
+        Unpack a block of big-endian int32 field values in a single call.
+
+        Returns:
+            (values, new_offset). A truncated block yields only the complete values.
+            The server's field count need not match our field list, so callers
+            zip the two with strict=False.
+        """
+        count = min(field_count, (len(data) - offset) // 4)
+        if count <= 0:
+            return (), offset
+        return _field_block(count).unpack_from(data, offset), offset + count * 4
+
     def _parse_update_data(self, data: bytearray, offset: int) -> int:
         """
         Parse update data (data_type = 85)
 
+        All changed fields of a topic are applied first and a single update is
+        emitted per topic, rather than one callback (and dict copy) per field.
+
         Args:
             data: Binary data
             offset: Current offset
@@ -655,85 +669,44 @@ class FyersHSMWebSocket:
                 return offset
 
             # Get topic ID
-            topic_id = struct.unpack("H", data[offset : offset + 2])[0]
+            topic_id = _TOPIC_ID.unpack_from(data, offset)[0]
             offset += 2
 
             # Get field count
-            field_count = struct.unpack("B", data[offset : offset + 1])[0]
+            field_count = data[offset]
             offset += 1
 
-            # Determine data type based on topic ID
-            if topic_id in self.subscriptions:
-                topic_name = self.subscriptions[topic_id]
-
-                if topic_name.startswith("sf|") and topic_id in self.scrips_data:
-                    # Update scrip data
-                    for index in range(field_count):
-                        if offset + 4 > len(data):
-                            break
-
-                        value = struct.unpack(">i", data[offset : offset + 4])[0]
-                        offset += 4
-
-                        if value != -2147483648 and index < len(self.DATA_FIELDS):
-                            old_value = self.scrips_data[topic_id].get(self.DATA_FIELDS[index])
-                            if old_value != value:
-                                self.scrips_data[topic_id][self.DATA_FIELDS[index]] = value
-
-                                # Send update to callback
-                                if self.on_message_callback:
-                                    update_data = self.scrips_data[topic_id].copy()
-                                    update_data["update_type"] = "live"
-                                    self.logger.debug(
-                                        f"Sending live update: {update_data.get('symbol', 'Unknown')} LTP={update_data.get('ltp', 'N/A')}"
-                                    )
-                                    self.on_message_callback(update_data)
-
-                elif topic_name.startswith("if|") and topic_id in self.index_data:
-                    # Update index data
-                    for index in range(field_count):
-                        if offset + 4 > len(data):
-                            break
-
-                        value = struct.unpack(">i", data[offset : offset + 4])[0]
-                        offset += 4
-
-                        if value != -2147483648 and index < len(self.INDEX_FIELDS):
-                            old_value = self.index_data[topic_id].get(self.INDEX_FIELDS[index])
-                            if old_value != value:
-                                self.index_data[topic_id][self.INDEX_FIELDS[index]] = value
-
-                                # Send update to callback
-                                if self.on_message_callback:
-                                    update_data = self.index_data[topic_id].copy()
-                                    update_data["update_type"] = "live"
-                                    self.on_message_callback(update_data)
-
-                elif topic_name.startswith("dp|") and topic_id in self.depth_data:
-                    # Update depth data
-                    for index in range(field_count):
-                        if offset + 4 > len(data):
-                            break
-
-                        value = struct.unpack(">i", data[offset : offset + 4])[0]
-                        offset += 4
-
-                        if value != -2147483648 and index < len(self.DEPTH_FIELDS):
-                            old_value = self.depth_data[topic_id].get(self.DEPTH_FIELDS[index])
-                            if old_value != value:
-                                self.depth_data[topic_id][self.DEPTH_FIELDS[index]] = value
-
-                                # Send update to callback
-                                if self.on_message_callback:
-                                    update_data = self.depth_data[topic_id].copy()
-                                    update_data["update_type"] = "live"
-                                    self.logger.debug(
-                                        f"Sending live depth update: {update_data.get('symbol', 'Unknown')}"
-                                    )
-                                    self.on_message_callback(update_data)
-            else:
+            topic_name = self.subscriptions.get(topic_id)
+            if topic_name is None:
                 # Skip unknown data
-                offset += field_count * 4
+                return offset + field_count * 4
+
+            if topic_name.startswith("sf|"):
+                store, fields = self.scrips_data, self.DATA_FIELDS
+            elif topic_name.startswith("if|"):
+                store, fields = self.index_data, self.INDEX_FIELDS
+            elif topic_name.startswith("dp|"):
+                store, fields = self.depth_data, self.DEPTH_FIELDS
+            else:
+                return offset
+
+            values, offset = self._read_field_block(data, offset, field_count)
+
+            topic_data = store.get(topic_id)
+            if topic_data is None:
+                return offset
+
+            changed = False
+            for name, value in zip(fields, values, strict=False):
+                if value != NULL_FIELD_VALUE and topic_data.get(name) != value:
+                    topic_data[name] = value
+                    changed = True
+
+            # Send update to callback
+            if changed and self.on_message_callback:
+                update_data = topic_data.copy()
+                update_data["update_type"] = "live"
+                self.on_message_callback(update_data)
 
         except Exception as e:
             self.logger.error(f"Error parsing update data: {e}")
@@ -1,6 +1,8 @@
 import datetime
 import json
 import ssl
+import struct
+from functools import lru_cache
 
 import websocket
 
@@ -669,13 +671,21 @@ def send_json_arr_resp(a):
 
 
 def buf2long(a):
-    b = bytearray(a)
-    val = 0
-    leng = len(b)
-    for i in range(leng):
-        j = leng - 1 - i
-        val += b[j] << (i * 8)
-    return val
+    return int.from_bytes(a, "big")
+
+
+@lru_cache(maxsize=64)
+def _long_block(count):
+    """Precompiled layout for a block of `count` big-endian uint32 field values"""
+    return struct.Struct(f">{count}I")
+
+
+def read_long_block(e, pos, fcount):
+    """Unpack `fcount` consecutive 4-byte field values starting at pos in one call"""
+    count = min(fcount, (len(e) - pos) // 4)
+    if count <= 0:
+        return ()
+    return _long_block(count).unpack_from(e, pos)
 
 
 def buf2string(a):
@@ -917,10 +927,9 @@ class HSWrapper:
                             fcount = buf2long(e[pos : pos + 1])
                             pos += 1
                             # logger.info(f"fcount1: {fcount}")
-                            for index in range(fcount):
-                                fvalue = buf2long(e[pos : pos + 4])
+                            for index, fvalue in enumerate(read_long_block(e, pos, fcount)):
                                 d.setLongValues(index, fvalue)
-                                pos += 4
+                            pos += 4 * fcount
                             # logger.info("Able to set ")
                             d.setMultiplierAndPrec()
                             fcount = buf2long(e[pos : pos + 1])
@@ -952,12 +961,9 @@ class HSWrapper:
                                 fcount = buf2long(e[pos : pos + 1])
                                 pos += 1
                                 # logger.info(f"fcount1: {fcount}")
-                                for index in range(fcount):
-                                    fvalue = buf2long(e[pos : pos + 4])
+                                for index, fvalue in enumerate(read_long_block(e, pos, fcount)):
                                     d.setLongValues(index, fvalue)
-                                    # d[index] = fvalue
-                                    # logger.info(f"index: {index} val: {fvalue}")
-                                    pos += 4
+                                pos += 4 * fcount
                             h.append(d.prepareData())
                         else:
                             logger.info(f"Invalid ResponseType: {c}")
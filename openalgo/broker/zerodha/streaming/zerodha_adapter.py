@@ -14,10 +14,20 @@ import time
 from collections.abc import Callable
 from typing import Any, Dict, List, Optional, Set
 
+import numpy as np
+
 from database.auth_db import get_auth_token
 from database.token_db import get_token
 from websocket_proxy.base_adapter import BaseBrokerWebSocketAdapter
 
+from .zerodha_decoder import (
+    EXTENDED_PACKET_LENGTH,
+    MODE_FULL,
+    MODE_LTP,
+    MODE_NAMES,
+    depth_levels,
+)
+
 # Import the WebSocket client
 from .zerodha_websocket import ZerodhaWebSocket
 
@@ -97,7 +107,7 @@ class ZerodhaWebSocketAdapter(BaseBrokerWebSocketAdapter):
 
             # Initialize WebSocket client
             self.ws_client = ZerodhaWebSocket(
-                api_key=self.api_key, access_token=self.access_token, on_ticks=self._handle_ticks
+                api_key=self.api_key, access_token=self.access_token, on_frame=self._handle_frame
             )
 
             # Set up WebSocket callbacks
@@ -501,6 +511,133 @@ class ZerodhaWebSocketAdapter(BaseBrokerWebSocketAdapter):
         except Exception as e:
             self.logger.error(f"Error handling ticks: {e}")
 
+    def _handle_frame(self, ticks: np.ndarray):
+        """
+        Publish a decoded binary frame (see zerodha_decoder.TICK_DTYPE).
+
+        Columns are converted to Python lists once per frame and every message
+        is built directly in OpenAlgo format, so there is no intermediate Kite
+        tick dict and no separate transform pass per packet.
+        """
+        if len(ticks) == 0:
+            return
+
+        try:
+            columns = {name: ticks[name].tolist() for name in ticks.dtype.names}
+            # Dict lookups are atomic, so the maps are read without the lock
+            token_to_symbol = self.token_to_symbol
+            subscribed_symbols = self.subscribed_symbols
+
+            for i, token in enumerate(columns["token"]):
+                symbol_info = token_to_symbol.get(token)
+                if not symbol_info:
+                    self.logger.warning(f"No symbol mapping for token: {token}")
+                    continue
+
+                symbol, exchange = symbol_info
+                sub_info = subscribed_symbols.get(f"{exchange}:{symbol}")
+                if not sub_info:
+                    self.logger.warning(f"No subscription info found for token: {token}")
+                    continue
+
+                subscription_exchange = sub_info["exchange"]
+                data_exchange = self._map_data_exchange(subscription_exchange)
+                mode = columns["mode"][i]
+                message = self._build_frame_message(columns, i, symbol, data_exchange, mode)
+
+                if mode != MODE_FULL:
+                    mode_str = "LTP" if mode == MODE_LTP else "QUOTE"
+                    topic = self._generate_topic(symbol, subscription_exchange, mode_str)
+                    self.publish_market_data(topic, message)
+                    continue
+
+                # Full tick: always publish depth, plus the lower modes subscribed
+                self.publish_market_data(
+                    self._generate_topic(symbol, subscription_exchange, "DEPTH"), message
+                )
+                subscribed_mode = sub_info["mode"]
+                if subscribed_mode == 2:
+                    quote_message = {k: v for k, v in message.items() if k != "depth"}
+                    quote_message["mode"] = "quote"
+                    self.publish_market_data(
+                        self._generate_topic(symbol, subscription_exchange, "QUOTE"), quote_message
+                    )
+                elif subscribed_mode == 1:
+                    ltp_message = {
+                        "symbol": symbol,
+                        "exchange": data_exchange,
+                        "mode": "ltp",
+                        "ltp": message["ltp"],
+                        "timestamp": message["timestamp"],
+                    }
+                    self.publish_market_data(
+                        self._generate_topic(symbol, subscription_exchange, "LTP"), ltp_message
+                    )
+
+        except Exception as e:
+            self.logger.error(f"Error handling frame: {e}")
+
+    def _build_frame_message(
+        self, columns: dict[str, list], i: int, symbol: str, exchange: str, mode: int
+    ) -> dict:
+        """Build the OpenAlgo market data message for row i of a decoded frame"""
+        timestamp = columns["timestamp"][i]
+        exchange_ts = columns["exchange_ts"][i]
+        ltp = columns["ltp"][i]
+        message = {
+            "symbol": symbol,
+            "exchange": exchange,
+            "mode": MODE_NAMES[mode],
+            "ltp": ltp,
+            "ltt": exchange_ts or timestamp,
+            "timestamp": timestamp,
+        }
+        if mode == MODE_LTP:
+            return message
+
+        close = columns["close"][i]
+        message.update(
+            {
+                "volume": columns["volume"][i],
+                "open": columns["open"][i],
+                "high": columns["high"][i],
+                "low": columns["low"][i],
+                "close": close,
+            }
+        )
+
+        if columns["is_index"][i]:
+            message["price_change"] = ltp - close if close else 0
+            message["price_change_percent"] = columns["change"][i]
+            if exchange_ts:
+                message["exchange_timestamp"] = exchange_ts
+            return message
+
+        message.update(
+            {
+                "last_quantity": columns["ltq"][i],
+                "average_price": columns["atp"][i],
+                "total_buy_quantity": columns["tbq"][i],
+                "total_sell_quantity": columns["tsq"][i],
+            }
+        )
+
+        if columns["length"][i] >= EXTENDED_PACKET_LENGTH:
+            message["oi"] = columns["oi"][i]
+            message["open_interest"] = columns["oi"][i]
+
+        if mode == MODE_FULL and columns["has_depth"][i]:
+            message["depth"] = {
+                "buy": depth_levels(
+                    columns["bid_price"][i], columns["bid_qty"][i], columns["bid_orders"][i]
+                ),
+                "sell": depth_levels(
+                    columns["ask_price"][i], columns["ask_qty"][i], columns["ask_orders"][i]
+                ),
+            }
+
+        return message
+
     def _transform_tick(self, tick: dict) -> dict | None:
         """Transform Zerodha tick to OpenAlgo format with index support"""
         try:
@@ -13,7 +13,6 @@ Implements:
 """
 import asyncio
 import json
-import struct
 import threading
 import time
 from collections import deque
@@ -21,9 +20,14 @@ from collections.abc import Callable
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Set
 
+import numpy as np
 import websockets.client
 import websockets.exceptions
 
+from websocket_proxy.feed_recorder import get_feed_recorder
+
+from .zerodha_decoder import decode_frame, to_tick_dicts
+
 
 class ZerodhaWebSocket:
     """
@@ -53,18 +57,32 @@ class ZerodhaWebSocket:
     RECONNECT_MAX_TRIES = 50  # Maximum number of reconnection attempts
 
     def __init__(
-        self, api_key: str, access_token: str, on_ticks: Callable[[list[dict]], None] = None
+        self,
+        api_key: str,
+        access_token: str,
+        on_ticks: Callable[[list[dict]], None] = None,
+        on_frame: Callable[[np.ndarray], None] = None,
     ):
-        """Initialize the Zerodha WebSocket client"""
+        """
+        Initialize the Zerodha WebSocket client
+
+        Args:
+            on_ticks: Callback receiving a list of tick dicts per frame
+            on_frame: Callback receiving the decoded frame as a ``TICK_DTYPE``
+                array. Takes precedence over on_ticks and skips the per-packet
+                dict conversion entirely.
+        """
         self.api_key = api_key
         self.access_token = access_token
         self.on_ticks = on_ticks
+        self.on_frame = on_frame
         self.websocket = None
         self.connected = False
         self.running = False
         self.loop = None
         self.ws_thread = None
         self.logger = get_logger(__name__)
+        self._feed_recorder = get_feed_recorder()
         self.lock = threading.Lock()
 
         # Subscription management
@@ -681,6 +699,9 @@ class ZerodhaWebSocket:
         try:
             self.message_count += 1
 
+            if self._feed_recorder:
+                self._feed_recorder.record_frame("zerodha", message)
+
             if isinstance(message, bytes):
                 # Handle binary market data
                 if len(message) == 1:
@@ -689,6 +710,10 @@ class ZerodhaWebSocket:
                     self.logger.debug("💓 Zerodha heartbeat received")
                     return
 
+                if self.on_frame:
+                    self._dispatch_frame(message)
+                    return
+
                 # Parse binary data
                 ticks = self._parse_binary_message(message)
                 if ticks:
@@ -735,187 +760,38 @@ class ZerodhaWebSocket:
             self.logger.error(f"❌ Error processing message: {e}")
             self.error_count += 1
 
-    def _parse_binary_message(self, data: bytes) -> list[dict]:
-        """Parse binary message according to Zerodha specification"""
+    def _dispatch_frame(self, message: bytes):
+        """Decode a binary frame in one pass and hand the array to on_frame"""
         try:
-            if len(data) < 4:
-                return []
-
-            # Parse header: first 2 bytes = number of packets
-            num_packets = struct.unpack(">H", data[0:2])[0]
-
-            packets = []
-            offset = 2
-
-            for packet_idx in range(num_packets):
-                if offset + 2 > len(data):
-                    break
-
-                # Next 2 bytes: packet length
-                packet_length = struct.unpack(">H", data[offset : offset + 2])[0]
-                offset += 2
-
-                if offset + packet_length > len(data):
-                    break
-
-                # Extract and parse packet
-                packet_data = data[offset : offset + packet_length]
-                tick = self._parse_packet(packet_data)
-                if tick:
-                    packets.append(tick)
-
-                offset += packet_length
-
-            return packets
-
+            ticks = decode_frame(message)
         except Exception as e:
-            self.logger.error(f"❌ Error parsing binary message: {e}")
-            return []
-
-    def _parse_packet(self, packet: bytes) -> dict | None:
-        """
-        Parse individual packet with improved error handling.
-        ✅ ENHANCED: Adds exchange information to tick data.
-        """
-        try:
-            if len(packet) < 8:
-                return None
-
-            # Extract instrument token and last price
-            instrument_token = struct.unpack(">I", packet[0:4])[0]
-            last_price_paise = struct.unpack(">i", packet[4:8])[0]
-            last_price = last_price_paise / 100.0
-
-            # Determine mode based on packet length
-            if len(packet) == 8:
-                mode = self.MODE_LTP
-            elif len(packet) == 44:
-                mode = self.MODE_QUOTE
-            elif len(packet) >= 184:
-                mode = self.MODE_FULL
-            else:
-                mode = self.mode_map.get(instrument_token, self.MODE_QUOTE)
-
-            # ✅ NEW: Get exchange information for this token
-            exchange = None
-            with self.lock:
-                exchange = self.token_exchange_map.get(instrument_token)
-
-            # Basic tick structure
-            tick = {
-                "instrument_token": instrument_token,
-                "last_traded_price": last_price,
-                "last_price": last_price,
-                "mode": mode,
-                "timestamp": int(time.time() * 1000),
-            }
-
-            # ✅ NEW: Add exchange information if available
-            if exchange:
-                tick["source_exchange"] = exchange  # Add source exchange from mapping
-
-            # Parse additional fields for quote mode (44 bytes)
-            if len(packet) >= 44:
-                try:
-                    # Only unpack exactly 44 bytes for quote mode
-                    fields = struct.unpack(">11i", packet[0:44])  # 11 integers * 4 bytes = 44 bytes
-
-                    tick.update(
-                        {
-                            "instrument_token": fields[0],
-                            "last_traded_price": fields[1] / 100.0,
-                            "last_price": fields[1] / 100.0,
-                            "last_traded_quantity": fields[2],
-                            "average_traded_price": fields[3] / 100.0,
-                            "average_price": fields[3] / 100.0,
-                            "volume_traded": fields[4],
-                            "volume": fields[4],
-                            "total_buy_quantity": fields[5],
-                            "total_sell_quantity": fields[6],
-                            "open_price": fields[7] / 100.0,
-                            "high_price": fields[8] / 100.0,
-                            "low_price": fields[9] / 100.0,
-                            "close_price": fields[10] / 100.0,
-                            "ohlc": {
-                                "open": fields[7] / 100.0,
-                                "high": fields[8] / 100.0,
-                                "low": fields[9] / 100.0,
-                                "close": fields[10] / 100.0,
-                            },
-                        }
-                    )
-                except struct.error as e:
-                    self.logger.debug(f"⚠️ Quote parsing issue (packet length: {len(packet)}): {e}")
-                    # Fallback - just use LTP data
-                    pass
-
-            # Parse full mode fields if available (64+ bytes)
-            if len(packet) >= 64:
-                try:
-                    extended_fields = struct.unpack(">iiiii", packet[44:64])
-                    tick.update(
-                        {
-                            "last_traded_timestamp": extended_fields[0],
-                            "open_interest": extended_fields[1],
-                            "oi": extended_fields[1],
-                            "exchange_timestamp": extended_fields[4],
-                        }
-                    )
-                except struct.error:
-                    pass
-
-            # Parse market depth for full mode (184+ bytes)
-            if len(packet) >= 184:
-                try:
-                    depth = self._parse_market_depth(packet[64:184])
-                    if depth:
-                        tick["depth"] = depth
-                except Exception:
-                    pass
+            self.logger.error(f"❌ Error decoding binary frame: {e}")
+            self.error_count += 1
+            return
 
-            return tick
+        if len(ticks) == 0:
+            self.logger.debug("⚠️ No ticks parsed from binary message")
+            return
 
+        self.tick_count += len(ticks)
+        try:
+            self.on_frame(ticks)
         except Exception as e:
-            self.logger.error(f"❌ Error parsing packet: {e}")
-            return None
+            self.logger.error(f"❌ Error in on_frame callback: {e}")
 
-    def _parse_market_depth(self, depth_data: bytes) -> dict | None:
-        """Parse market depth data"""
+    def _parse_binary_message(self, data: bytes) -> list[dict]:
+        """Parse binary message according to Zerodha specification"""
         try:
-            if len(depth_data) < 120:
-                return None
-
-            depth = {"buy": [], "sell": []}
-
-            # Parse buy side (first 5 entries)
-            for i in range(5):
-                offset = i * 12
-                if offset + 10 <= len(depth_data):
-                    quantity, price, orders = struct.unpack(
-                        ">iih", depth_data[offset : offset + 10]
-                    )
-                    if price > 0:  # Only add valid prices
-                        depth["buy"].append(
-                            {"quantity": quantity, "price": price / 100.0, "orders": orders}
-                        )
-
-            # Parse sell side (next 5 entries)
-            for i in range(5):
-                offset = 60 + (i * 12)
-                if offset + 10 <= len(depth_data):
-                    quantity, price, orders = struct.unpack(
-                        ">iih", depth_data[offset : offset + 10]
-                    )
-                    if price > 0:  # Only add valid prices
-                        depth["sell"].append(
-                            {"quantity": quantity, "price": price / 100.0, "orders": orders}
-                        )
+            ticks = decode_frame(data)
+            if len(ticks) == 0:
+                return []
 
-            return depth if (depth["buy"] or depth["sell"]) else None
+            # Plain dict reads are atomic; no need to take self.lock per packet
+            return to_tick_dicts(ticks, self.token_exchange_map)
 
         except Exception as e:
-            self.logger.error(f"❌ Error parsing market depth: {e}")
-            return None
+            self.logger.error(f"❌ Error parsing binary message: {e}")
+            return []
 
     def is_connected(self) -> bool:
         """Check if WebSocket is connected"""
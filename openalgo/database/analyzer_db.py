@@ -6,29 +6,29 @@ from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import pytz
-from sqlalchemy import Column, DateTime, Index, Integer, String, Text, create_engine
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
-from sqlalchemy.pool import NullPool
 from sqlalchemy.sql import func
 
+from database.engine_factory import create_db_engine, create_log_write_engine
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Conditionally create engine based on DB type
-if DATABASE_URL and "sqlite" in DATABASE_URL:
-    # SQLite: Use NullPool to prevent connection pool exhaustion
-    engine = create_engine(
-        DATABASE_URL, poolclass=NullPool, connect_args={"check_same_thread": False}
-    )
-else:
-    # For other databases like PostgreSQL, use connection pooling
-    engine = create_engine(DATABASE_URL, pool_size=50, max_overflow=100, pool_timeout=10)
+engine = create_db_engine(DATABASE_URL, pool_size=50, max_overflow=100, pool_timeout=10)
 
 db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+
+# Log inserts go through a dedicated single-connection writer (see engine_factory)
+log_write_session = scoped_session(
+    sessionmaker(
+        autocommit=False, autoflush=False, bind=create_log_write_engine(DATABASE_URL, engine)
+    )
+)
+
 Base = declarative_base()
 Base.query = db_session.query_property()
 
@@ -106,10 +106,10 @@ def async_log_analyzer(request_data, response_data, api_type="placeorder"):
             response_data=response_json,
             created_at=now_ist,
         )
-        db_session.add(analyzer_log)
-        db_session.commit()
+        log_write_session.add(analyzer_log)
+        log_write_session.commit()
     except Exception as e:
         logger.exception(f"Error saving analyzer log: {e}")
-        db_session.rollback()
+        log_write_session.rollback()
     finally:
-        db_session.remove()
+        log_write_session.remove()
@@ -1,7 +1,10 @@
 # database/auth_db.py
 
 import base64
+import hashlib
+import hmac
 import os
+from datetime import datetime, timedelta
 
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
@@ -18,13 +21,12 @@ from sqlalchemy import (
     String,
     Text,
     UniqueConstraint,
-    create_engine,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
-from sqlalchemy.pool import NullPool
 from sqlalchemy.sql import func
 
+from database.engine_factory import create_db_engine
 from utils.logging import get_logger
 
 # Initialize logger
@@ -124,22 +126,12 @@ broker_cache = TTLCache(maxsize=1024, ttl=3000)
 # Define a cache for verified API keys with 24-hour TTL
 # Security: Only caches user_id (not sensitive), invalidated on key regeneration
 # Long TTL is safe because cache is invalidated when keys are regenerated
-verified_api_key_cache = TTLCache(maxsize=1024, ttl=36000)  # 10 hours
+API_KEY_VERIFIED_TTL = 36000  # 10 hours
+verified_api_key_cache = TTLCache(maxsize=1024, ttl=API_KEY_VERIFIED_TTL)
 # Define a cache for invalid API keys with shorter 5-minute TTL (prevent cache poisoning)
 invalid_api_key_cache = TTLCache(maxsize=512, ttl=300)  # 5 minutes
 
-# Conditionally create engine based on DB type
-if DATABASE_URL and "sqlite" in DATABASE_URL:
-    # SQLite: Use NullPool to prevent connection pool exhaustion
-    # NullPool creates a new connection for each request and closes it when done
-    engine = create_engine(
-        DATABASE_URL, poolclass=NullPool, connect_args={"check_same_thread": False}
-    )
-else:
-    # For other databases like PostgreSQL, use connection pooling
-    engine = create_engine(
-        DATABASE_URL, pool_size=50, max_overflow=100, pool_timeout=10
-    )
+engine = create_db_engine(DATABASE_URL, pool_size=50, max_overflow=100, pool_timeout=10)
 
 db_session = scoped_session(
     sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -174,6 +166,12 @@ class ApiKeys(Base):
     user_id = Column(String, nullable=False, unique=True)
     api_key_hash = Column(Text, nullable=False)  # For verification
     api_key_encrypted = Column(Text, nullable=False)  # For retrieval
+    # Peppered HMAC of the key, so verification looks up one row instead of
+    # running Argon2 against every stored hash
+    api_key_fingerprint = Column(String(64), nullable=True, unique=True)
+    # Last successful Argon2 verification; shared by all processes on the database
+    # so each one does not pay for its own verification after a restart
+    api_key_verified_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime(timezone=True), default=func.now())
     order_mode = Column(String(20), default="auto")  # 'auto' or 'semi_auto'
 
@@ -419,6 +417,17 @@ def get_user_id(name):
         return None
 
 
+def invalidate_api_key_cache(user_id):
+    """
+    Drop a user's verified API keys from this process's cache.
+    Invalid keys are all dropped since a rejected key may belong to the user now.
+    """
+    for cache_key, cached_user_id in list(verified_api_key_cache.items()):
+        if cached_user_id == user_id:
+            verified_api_key_cache.pop(cache_key, None)
+    invalid_api_key_cache.clear()
+
+
 def invalidate_user_cache(user_id):
     """
     Invalidate all cached data for a user when their credentials change.
@@ -428,11 +437,15 @@ def invalidate_user_cache(user_id):
     auth_cache.clear()
     broker_cache.clear()
     feed_token_cache.clear()
-    verified_api_key_cache.clear()
-    invalid_api_key_cache.clear()
+    invalidate_api_key_cache(user_id)
     logger.info(f"Cleared all caches for user_id: {user_id}")
 
 
+def api_key_fingerprint(api_key):
+    """Peppered HMAC-SHA256 of an API key, used as its lookup key and cache key"""
+    return hmac.new(PEPPER.encode(), api_key.encode(), hashlib.sha256).hexdigest()
+
+
 def upsert_api_key(user_id, api_key):
     """Store both hashed and encrypted API key"""
     # Hash with Argon2 for verification
@@ -441,14 +454,20 @@ def upsert_api_key(user_id, api_key):
 
     # Encrypt for retrieval
     encrypted_key = encrypt_token(api_key)
+    fingerprint = api_key_fingerprint(api_key)
 
     api_key_obj = ApiKeys.query.filter_by(user_id=user_id).first()
     if api_key_obj:
         api_key_obj.api_key_hash = hashed_key
         api_key_obj.api_key_encrypted = encrypted_key
+        api_key_obj.api_key_fingerprint = fingerprint
+        api_key_obj.api_key_verified_at = None
     else:
         api_key_obj = ApiKeys(
-            user_id=user_id, api_key_hash=hashed_key, api_key_encrypted=encrypted_key
+            user_id=user_id,
+            api_key_hash=hashed_key,
+            api_key_encrypted=encrypted_key,
+            api_key_fingerprint=fingerprint,
         )
         db_session.add(api_key_obj)
     db_session.commit()
@@ -456,6 +475,14 @@ def upsert_api_key(user_id, api_key):
     # Security: Invalidate all caches when API key changes
     invalidate_user_cache(user_id)
 
+    # Other processes (WebSocket proxy) drop the old key from their caches too
+    try:
+        from database.cache_invalidation import publish_all_cache_invalidation
+
+        publish_all_cache_invalidation(user_id)
+    except Exception as e:
+        logger.warning(f"Failed to publish cache invalidation for user {user_id}: {e}")
+
     return api_key_obj.id
 
 
@@ -496,27 +523,59 @@ def get_first_available_api_key():
         return None
 
 
+def _find_api_key(fingerprint, peppered_key):
+    """
+    Return the ApiKeys row a key belongs to: one indexed lookup, then at most
+    one Argon2 verify unless another process verified the same row recently.
+    """
+    api_key_obj = ApiKeys.query.filter_by(api_key_fingerprint=fingerprint).first()
+    if api_key_obj is None:
+        # Rows stored before fingerprints existed (upgrade/migrate_api_key_fingerprint.py)
+        for legacy in ApiKeys.query.filter(ApiKeys.api_key_fingerprint.is_(None)).all():
+            try:
+                ph.verify(legacy.api_key_hash, peppered_key)
+            except VerifyMismatchError:
+                continue
+            legacy.api_key_fingerprint = fingerprint
+            legacy.api_key_verified_at = datetime.utcnow()
+            db_session.commit()
+            return legacy
+        return None
+
+    verified_at = api_key_obj.api_key_verified_at
+    if verified_at and datetime.utcnow() - verified_at < timedelta(seconds=API_KEY_VERIFIED_TTL):
+        logger.debug(f"API key verified by another process for user: {api_key_obj.user_id}")
+        return api_key_obj
+
+    try:
+        ph.verify(api_key_obj.api_key_hash, peppered_key)
+    except VerifyMismatchError:
+        logger.warning(f"API key fingerprint matched but hash did not for: {api_key_obj.user_id}")
+        return None
+    api_key_obj.api_key_verified_at = datetime.utcnow()
+    db_session.commit()
+    return api_key_obj
+
+
 def verify_api_key(provided_api_key):
     """
     Verify an API key using Argon2 with intelligent caching.
 
     Security measures:
     - Only caches user_id (not sensitive data)
-    - Uses SHA256 hash as cache key (never stores plaintext)
+    - Uses a peppered HMAC of the key as cache and lookup key (never stores plaintext)
     - Invalid keys cached for 5min (prevents brute force)
-    - Valid keys cached for 1hr (balances security vs performance)
-    - Cache invalidated on key regeneration
+    - Valid keys cached for 10hrs, and the last verification is shared through
+      the api_keys row so other processes skip Argon2 as well
+    - Cache invalidated on key regeneration, across processes via cache_invalidation
     """
-    import hashlib
-
-    from flask import has_request_context, request
+    from flask import has_request_context
 
     from database.traffic_db import InvalidAPIKeyTracker
     from utils.ip_helper import get_real_ip
 
-    # Generate secure cache key (SHA256 hash of API key)
     # Security: Never store plaintext API key in cache
-    cache_key = hashlib.sha256(provided_api_key.encode()).hexdigest()
+    cache_key = api_key_fingerprint(provided_api_key)
 
     # Step 1: Check invalid cache first (fast rejection of known bad keys)
     if cache_key in invalid_api_key_cache:
@@ -529,29 +588,17 @@ def verify_api_key(provided_api_key):
         logger.debug(f"API key verified from cache for user_id: {user_id}")
         return user_id
 
-    # Step 3: Cache miss - perform expensive Argon2 verification
+    # Step 3: Cache miss - look up the key's row and verify it with Argon2
     peppered_key = provided_api_key + PEPPER
     try:
-        # Query all API keys
-        api_keys = ApiKeys.query.all()
-
-        # Try to verify against each stored hash
-        for api_key_obj in api_keys:
-            try:
-                logger.debug(f"Verifying against hash for user: {api_key_obj.user_id}")
-                ph.verify(api_key_obj.api_key_hash, peppered_key)
-                # Valid key found - cache it
-                verified_api_key_cache[cache_key] = api_key_obj.user_id
-                logger.debug(
-                    f"API key verified and cached for user_id: {api_key_obj.user_id}"
-                )
-                return api_key_obj.user_id
-            except VerifyMismatchError:
-                logger.debug(f"Mismatch for user: {api_key_obj.user_id}")
-                continue
+        api_key_obj = _find_api_key(cache_key, peppered_key)
+        if api_key_obj is not None:
+            verified_api_key_cache[cache_key] = api_key_obj.user_id
+            logger.debug(f"API key verified and cached for user_id: {api_key_obj.user_id}")
+            return api_key_obj.user_id
 
         # If we reach here, the API key is invalid
-        # Cache the invalid result to prevent repeated expensive verifications
+        # Cache the invalid result to prevent repeated lookups
         invalid_api_key_cache[cache_key] = True
         logger.debug("Invalid API key cached")
 
@@ -574,6 +621,7 @@ def verify_api_key(provided_api_key):
 
         return None
     except Exception as e:
+        db_session.rollback()
         logger.exception(f"Error verifying API key: {e}")
         return None
 
@@ -0,0 +1,129 @@
+"""
+Shared SQLAlchemy engine factory for the database modules
+
+SQLite databases used to get one NullPool engine per module, so every scoped
+session opened (and closed) a fresh file connection, and the default rollback
+journal made readers block writers. SQLite URLs now get a single pooled engine
+per database file, shared by every module that points at it, with each
+connection configured for WAL and tuned pragmas.
+
+Append-heavy log tables (API logs, analyzer logs, latency, traffic) write
+through a separate single-connection engine so concurrent log writers queue on
+the pool instead of contending for the SQLite write lock with request traffic.
+
+Other databases (PostgreSQL etc.) keep the pool settings each module passes.
+"""
+
+import os
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool, QueuePool
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# SQLite tuning (per database file)
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "10"))
+SQLITE_MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", "20"))
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))  # seconds
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))  # per connection
+SQLITE_STATEMENT_CACHE = int(os.getenv("SQLITE_STATEMENT_CACHE", "256"))
+
+_engines: dict[str, Engine] = {}
+_write_engines: dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def is_sqlite_url(url: str | None) -> bool:
+    return bool(url) and "sqlite" in url
+
+
+def _is_memory_url(url: str) -> bool:
+    return ":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite+pysqlite:")
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configure every new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT * 1000}")
+    finally:
+        cursor.close()
+
+
+def _create_sqlite_engine(url: str, pool_size: int, max_overflow: int) -> Engine:
+    engine = create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=SQLITE_BUSY_TIMEOUT,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": SQLITE_BUSY_TIMEOUT,
+            "cached_statements": SQLITE_STATEMENT_CACHE,
+        },
+    )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+def create_db_engine(url: str, **pool_kwargs) -> Engine:
+    """
+    Create (or reuse) the engine for a database URL.
+
+    Args:
+        url: SQLAlchemy database URL
+        **pool_kwargs: Engine options for non-SQLite databases (pool_size,
+            max_overflow, pool_timeout, ...). Ignored for SQLite.
+
+    Returns:
+        Engine: the shared pooled engine for SQLite files, a new engine otherwise
+    """
+    if not is_sqlite_url(url):
+        return create_engine(url, **pool_kwargs)
+
+    if _is_memory_url(url):
+        # Every connection to :memory: is a separate database, so pooling and
+        # WAL do not apply; keep the per-connection behaviour
+        return create_engine(url, poolclass=NullPool, connect_args={"check_same_thread": False})
+
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = _create_sqlite_engine(url, SQLITE_POOL_SIZE, SQLITE_MAX_OVERFLOW)
+            _engines[url] = engine
+            logger.debug(f"Created pooled SQLite engine for {url}")
+        return engine
+
+
+def create_log_write_engine(url: str, engine: Engine) -> Engine:
+    """
+    Engine for append-heavy log writes.
+
+    For SQLite files this is one dedicated connection per database file, so log
+    inserts are serialized on the pool. For anything else the regular engine
+    is returned.
+
+    Args:
+        url: SQLAlchemy database URL
+        engine: The module's regular engine (used when no separate writer applies)
+    """
+    if not is_sqlite_url(url) or _is_memory_url(url):
+        return engine
+
+    with _engines_lock:
+        write_engine = _write_engines.get(url)
+        if write_engine is None:
+            write_engine = _create_sqlite_engine(url, pool_size=1, max_overflow=0)
+            _write_engines[url] = write_engine
+        return write_engine
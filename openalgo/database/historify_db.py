@@ -2144,6 +2144,149 @@ def get_catalog_grouped(group_by: str = "underlying") -> dict[str, list[dict[str
 # Advanced Export Operations
 # =============================================================================
 
+# Rows pulled from DuckDB per round trip while streaming a ZIP entry
+EXPORT_FETCH_ROWS = 50_000
+
+EXPORT_CSV_HEADER = "date,time,open,high,low,close,volume,oi\n"
+
+# DuckDB memory limit while an export runs (see _export_connection)
+EXPORT_MEMORY_LIMIT = os.getenv("HISTORIFY_EXPORT_MEMORY_LIMIT", "512MB")
+
+# Parquet codecs accepted by the export API, as DuckDB names them
+PARQUET_COMPRESSION = {"zstd": "zstd", "snappy": "snappy", "gzip": "gzip", "none": "uncompressed"}
+
+
+def _export_path(output_path: str) -> str | None:
+    """Absolute output path, or None if it is outside the temp directory"""
+    import tempfile
+
+    abs_output = os.path.abspath(output_path)
+    if not abs_output.startswith(os.path.abspath(tempfile.gettempdir())):
+        return None
+    return abs_output
+
+
+def _export_filter(
+    symbols: list[dict[str, str]] | None = None,
+    intervals: list[str] | None = None,
+    start_timestamp: int | None = None,
+    end_timestamp: int | None = None,
+) -> tuple[str, list]:
+    """
+    WHERE clause and parameters selecting the rows of an export.
+
+    The filter is part of the query DuckDB scans with, so rows outside the
+    symbols, intervals and time range are never read into Python.
+    """
+    conditions = []
+    params = []
+
+    if symbols:
+        symbol_conditions = []
+        for sym in symbols:
+            symbol_conditions.append("(symbol = ? AND exchange = ?)")
+            params.extend([sym["symbol"].upper(), sym["exchange"].upper()])
+        conditions.append(f"({' OR '.join(symbol_conditions)})")
+
+    if intervals:
+        conditions.append(f"interval IN ({', '.join('?' * len(intervals))})")
+        params.extend(intervals)
+    if start_timestamp:
+        conditions.append("timestamp >= ?")
+        params.append(start_timestamp)
+    if end_timestamp:
+        conditions.append("timestamp <= ?")
+        params.append(end_timestamp)
+
+    return " AND ".join(conditions) if conditions else "1=1", params
+
+
+@contextmanager
+def _export_connection():
+    """
+    get_connection() for long-running exports.
+
+    Caps DuckDB's memory while the export runs: its block cache otherwise grows
+    with every symbol read (up to 80% of RAM by default), and with it the peak
+    RSS of large exports. Sorts beyond the cap spill to disk. Also turns off
+    the progress bar DuckDB prints on stdout for long queries.
+    """
+    with get_connection() as conn:
+        conn.execute("SET enable_progress_bar = false")
+        conn.execute(f"SET memory_limit = '{EXPORT_MEMORY_LIMIT}'")
+        try:
+            yield conn
+        finally:
+            conn.execute("RESET memory_limit")
+
+
+def _copy_to(conn, query: str, params: list, target: str, options: str) -> int:
+    """
+    Write a query's rows with DuckDB's COPY ... TO.
+
+    DuckDB streams the rows straight into the file(s); nothing is materialized
+    in Python. Returns the number of rows written.
+    """
+    target = target.replace("'", "''")
+    return conn.execute(f"COPY ({query}) TO '{target}' ({options})", params).fetchone()[0]
+
+
+def _csv_line(datetime_expr: str) -> str:
+    """Select expression rendering a bar as an export CSV line (see EXPORT_CSV_HEADER)"""
+    values = ", ".join(
+        f"COALESCE(CAST({column} AS VARCHAR), '')"
+        for column in ("open", "high", "low", "close", "volume", "oi")
+    )
+    return f"concat_ws(',', strftime({datetime_expr}, '%Y-%m-%d,%H:%M:%S'), {values}) AS line"
+
+
+def _stream_csv_entry(zf, filename: str, cursor) -> int:
+    """
+    Stream a query result of CSV lines into a new ZIP entry.
+
+    Rows are fetched EXPORT_FETCH_ROWS at a time and compressed as they
+    arrive, so memory stays flat however large the entry is. No entry is
+    created for an empty result. Returns the number of rows written.
+    """
+    rows = cursor.fetchmany(EXPORT_FETCH_ROWS)
+    if not rows:
+        return 0
+
+    record_count = 0
+    with zf.open(filename, "w", force_zip64=True) as entry:
+        entry.write(EXPORT_CSV_HEADER.encode())
+        while rows:
+            entry.write(("\n".join(row[0] for row in rows) + "\n").encode())
+            record_count += len(rows)
+            rows = cursor.fetchmany(EXPORT_FETCH_ROWS)
+    return record_count
+
+
+def _resolve_export_symbols(conn, symbols: list[dict[str, str]] | None) -> list[tuple[str, str]]:
+    """(symbol, exchange) pairs to export: the given ones, or everything in the catalog"""
+    if symbols:
+        return [(s["symbol"].upper(), s["exchange"].upper()) for s in symbols]
+    return conn.execute("""
+        SELECT DISTINCT symbol, exchange FROM data_catalog
+        ORDER BY symbol, exchange
+    """).fetchall()
+
+
+def _has_export_data(
+    conn,
+    symbol: str,
+    exchange: str,
+    interval: str,
+    start_timestamp: int | None = None,
+    end_timestamp: int | None = None,
+) -> bool:
+    """Check whether a symbol has stored rows of an interval in the export range"""
+    where_clause, params = _export_filter(
+        [{"symbol": symbol, "exchange": exchange}], [interval], start_timestamp, end_timestamp
+    )
+    query = f"SELECT 1 FROM market_data WHERE {where_clause} LIMIT 1"
+    return conn.execute(query, params).fetchone() is not None
+
 
 def export_to_parquet(
     output_path: str,
@@ -2170,90 +2313,38 @@ def export_to_parquet(
     Returns:
         Tuple of (success, message, record_count)
     """
-    import tempfile
-
+    abs_output = None
     try:
-        # Build WHERE clause
-        conditions = []
-        params = []
-
-        if symbols and len(symbols) > 0:
-            symbol_conditions = []
-            for sym in symbols:
-                symbol_conditions.append("(symbol = ? AND exchange = ?)")
-                params.extend([sym["symbol"].upper(), sym["exchange"].upper()])
-            conditions.append(f"({' OR '.join(symbol_conditions)})")
-
-        if interval:
-            conditions.append("interval = ?")
-            params.append(interval)
-        if start_timestamp:
-            conditions.append("timestamp >= ?")
-            params.append(start_timestamp)
-        if end_timestamp:
-            conditions.append("timestamp <= ?")
-            params.append(end_timestamp)
-
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
-
         # Validate output path - must be within temp directory
-        temp_dir = tempfile.gettempdir()
-        abs_output = os.path.abspath(output_path)
-        if not abs_output.startswith(os.path.abspath(temp_dir)):
+        abs_output = _export_path(output_path)
+        if not abs_output:
             return False, "Invalid output path: must be within temp directory", 0
 
-        # Get record count first
-        count_query = f"SELECT COUNT(*) FROM market_data WHERE {where_clause}"
+        codec = PARQUET_COMPRESSION.get(compression)
+        if not codec:
+            return False, f"Unsupported compression: {compression}", 0
 
-        with get_connection() as conn:
-            record_count = conn.execute(count_query, params).fetchone()[0]
+        where_clause, params = _export_filter(
+            symbols, [interval] if interval else None, start_timestamp, end_timestamp
+        )
+        query = f"""
+            SELECT
+                symbol, exchange, interval, timestamp,
+                open, high, low, close, volume, oi,
+                to_timestamp(timestamp) as datetime
+            FROM market_data
+            WHERE {where_clause}
+            ORDER BY symbol, exchange, interval, timestamp
+        """
 
-            if record_count == 0:
-                return False, "No data matching the criteria", 0
+        with _export_connection() as conn:
+            record_count = _copy_to(
+                conn, query, params, abs_output, f"FORMAT PARQUET, COMPRESSION '{codec}'"
+            )
 
-            # Export using DuckDB's native COPY TO PARQUET
-            # Build the query string for COPY - need to embed values for COPY command
-            export_query = f"""
-                COPY (
-                    SELECT
-                        symbol, exchange, interval, timestamp,
-                        open, high, low, close, volume, oi,
-                        to_timestamp(timestamp) as datetime
-                    FROM market_data
-                    WHERE {where_clause}
-                    ORDER BY symbol, exchange, interval, timestamp
-                ) TO '{abs_output}'
-                (FORMAT PARQUET, COMPRESSION '{compression}')
-            """
-
-            # For COPY command, we need to execute without parameters
-            # Build the full query with values embedded safely
-            if params:
-                # Re-execute with DataFrame approach for safety
-                select_query = f"""
-                    SELECT
-                        symbol, exchange, interval, timestamp,
-                        open, high, low, close, volume, oi
-                    FROM market_data
-                    WHERE {where_clause}
-                    ORDER BY symbol, exchange, interval, timestamp
-                """
-                df = conn.execute(select_query, params).fetchdf()
-                df["datetime"] = pd.to_datetime(df["timestamp"], unit="s")
-                df.to_parquet(abs_output, compression=compression, index=False)
-            else:
-                # No params - can use COPY directly
-                conn.execute(f"""
-                    COPY (
-                        SELECT
-                            symbol, exchange, interval, timestamp,
-                            open, high, low, close, volume, oi,
-                            to_timestamp(timestamp) as datetime
-                        FROM market_data
-                        ORDER BY symbol, exchange, interval, timestamp
-                    ) TO '{abs_output}'
-                    (FORMAT PARQUET, COMPRESSION '{compression}')
-                """)
+        if record_count == 0:
+            os.remove(abs_output)
+            return False, "No data matching the criteria", 0
 
         file_size = os.path.getsize(abs_output) / (1024 * 1024)  # MB
         logger.info(f"Exported {record_count} records to Parquet ({file_size:.2f} MB)")
@@ -2261,6 +2352,8 @@ def export_to_parquet(
 
     except Exception as e:
         logger.exception(f"Error exporting to Parquet: {e}")
+        if abs_output and os.path.exists(abs_output):
+            os.remove(abs_output)
         return False, str(e), 0
 
 
@@ -2286,38 +2379,16 @@ def export_to_txt(
     Returns:
         Tuple of (success, message, record_count)
     """
-    import tempfile
-
+    abs_output = None
     try:
-        # Build WHERE clause
-        conditions = []
-        params = []
-
-        if symbols and len(symbols) > 0:
-            symbol_conditions = []
-            for sym in symbols:
-                symbol_conditions.append("(symbol = ? AND exchange = ?)")
-                params.extend([sym["symbol"].upper(), sym["exchange"].upper()])
-            conditions.append(f"({' OR '.join(symbol_conditions)})")
-
-        if interval:
-            conditions.append("interval = ?")
-            params.append(interval)
-        if start_timestamp:
-            conditions.append("timestamp >= ?")
-            params.append(start_timestamp)
-        if end_timestamp:
-            conditions.append("timestamp <= ?")
-            params.append(end_timestamp)
-
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
-
         # Validate output path
-        temp_dir = tempfile.gettempdir()
-        abs_output = os.path.abspath(output_path)
-        if not abs_output.startswith(os.path.abspath(temp_dir)):
+        abs_output = _export_path(output_path)
+        if not abs_output:
             return False, "Invalid output path: must be within temp directory", 0
 
+        where_clause, params = _export_filter(
+            symbols, [interval] if interval else None, start_timestamp, end_timestamp
+        )
         query = f"""
             SELECT
                 symbol, exchange, interval,
@@ -2328,21 +2399,24 @@ def export_to_txt(
             WHERE {where_clause}
             ORDER BY symbol, exchange, interval, timestamp
         """
+        delimiter = delimiter.replace("'", "''")
 
-        with get_connection() as conn:
-            df = conn.execute(query, params).fetchdf()
-
-            if df.empty:
-                return False, "No data matching the criteria", 0
+        with _export_connection() as conn:
+            record_count = _copy_to(
+                conn, query, params, abs_output, f"FORMAT CSV, HEADER, DELIMITER '{delimiter}'"
+            )
 
-            df.to_csv(output_path, index=False, sep=delimiter)
-            record_count = len(df)
+        if record_count == 0:
+            os.remove(abs_output)
+            return False, "No data matching the criteria", 0
 
         logger.info(f"Exported {record_count} records to TXT")
         return True, f"Exported {record_count} records", record_count
 
     except Exception as e:
         logger.exception(f"Error exporting to TXT: {e}")
+        if abs_output and os.path.exists(abs_output):
+            os.remove(abs_output)
         return False, str(e), 0
 
 
@@ -2364,6 +2438,7 @@ def export_to_zip(
     start_timestamp: int | None = None,
     end_timestamp: int | None = None,
     split_by: str = "symbol",
+    progress_callback=None,
 ) -> tuple[bool, str, int]:
     """
     Export market data to ZIP archive containing CSVs.
@@ -2372,6 +2447,10 @@ def export_to_zip(
     - Intraday (from 1m): 5m, 15m, 30m, 1h, 25m, 2h, etc.
     - Daily-based (from D): W, M, Q, Y
 
+    Stored and intraday intervals are formatted into CSV lines by DuckDB and
+    streamed into the archive batch by batch (see _stream_csv_entry), so no
+    symbol's data is ever held in memory or written to a temp file whole.
+
     Args:
         output_path: Path to save the ZIP file
         symbols: List of dicts with 'symbol' and 'exchange' keys (optional)
@@ -2379,40 +2458,33 @@ def export_to_zip(
         start_timestamp: Start epoch timestamp (optional)
         end_timestamp: End epoch timestamp (optional)
         split_by: 'symbol' to create one CSV per symbol/interval, 'none' for combined
+        progress_callback: Called after each symbol as
+            progress_callback(done, total, symbol, exchange, records);
+            returning False cancels the export (optional)
 
     Returns:
         Tuple of (success, message, record_count)
     """
-    import tempfile
     import zipfile
 
+    abs_output = None
     try:
         # Validate output path
-        temp_dir = tempfile.gettempdir()
-        abs_output = os.path.abspath(output_path)
-        if not abs_output.startswith(os.path.abspath(temp_dir)):
+        abs_output = _export_path(output_path)
+        if not abs_output:
             return False, "Invalid output path: must be within temp directory", 0
 
         total_records = 0
         skipped_intervals = []  # Track computed intervals with missing 1m data
+        cancelled = False
 
         # IST timezone offset from UTC (5 hours 30 minutes = 19800 seconds)
         ist_offset = 19800
 
         with zipfile.ZipFile(abs_output, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
-            with get_connection() as conn:
+            with _export_connection() as conn:
                 # Get symbols to export
-                if symbols and len(symbols) > 0:
-                    symbols_list = [(s["symbol"].upper(), s["exchange"].upper()) for s in symbols]
-                else:
-                    # Get all symbols from catalog
-                    symbols_df = conn.execute("""
-                        SELECT DISTINCT symbol, exchange FROM data_catalog
-                        ORDER BY symbol, exchange
-                    """).fetchdf()
-                    symbols_list = [
-                        (row["symbol"], row["exchange"]) for _, row in symbols_df.iterrows()
-                    ]
+                symbols_list = _resolve_export_symbols(conn, symbols)
 
                 if not symbols_list:
                     return False, "No symbols found to export", 0
@@ -2420,10 +2492,14 @@ def export_to_zip(
                 # Determine intervals to export
                 intervals_to_export = intervals if intervals else ["D"]
 
-                for sym, exch in symbols_list:
+                for done, (sym, exch) in enumerate(symbols_list, 1):
                     market_open_seconds = _get_market_open_seconds(exch)
+                    symbol_records = 0
 
                     for interval in intervals_to_export:
+                        # Sanitize filename to prevent path traversal
+                        filename = f"{_sanitize_filename(sym)}_{_sanitize_filename(exch)}_{_sanitize_filename(interval)}.csv"
+
                         # Determine if this is a daily-aggregated interval (W, MO, Q, Y)
                         is_daily_agg = is_daily_aggregated_interval(interval)
 
@@ -2434,27 +2510,16 @@ def export_to_zip(
 
                         if is_daily_agg:
                             # Check if D data exists before attempting aggregation
-                            check_query = """
-                                SELECT COUNT(*) FROM market_data
-                                WHERE symbol = ? AND exchange = ? AND interval = 'D'
-                            """
-                            check_params = [sym, exch]
-                            if start_timestamp:
-                                check_query += " AND timestamp >= ?"
-                                check_params.append(start_timestamp)
-                            if end_timestamp:
-                                check_query += " AND timestamp <= ?"
-                                check_params.append(end_timestamp)
-
-                            count = conn.execute(check_query, check_params).fetchone()[0]
-                            if count == 0:
+                            if not _has_export_data(
+                                conn, sym, exch, "D", start_timestamp, end_timestamp
+                            ):
                                 logger.warning(
                                     f"No D data for {sym}:{exch}, skipping daily-aggregated interval {interval}"
                                 )
                                 skipped_intervals.append(f"{sym}:{exch}:{interval}")
                                 continue
 
-                            # Use get_ohlcv which handles daily aggregation
+                            # A few hundred bars per symbol at most: aggregated in pandas
                             df = _get_daily_aggregated_ohlcv(
                                 symbol=sym,
                                 exchange=exch,
@@ -2475,34 +2540,15 @@ def export_to_zip(
                                     ["date", "time", "open", "high", "low", "close", "volume", "oi"]
                                 ]
 
-                                # Create CSV content
-                                csv_buffer = df.to_csv(index=False)
-
-                                # Sanitize filename
-                                safe_sym = _sanitize_filename(sym)
-                                safe_exch = _sanitize_filename(exch)
-                                safe_int = _sanitize_filename(interval)
-                                filename = f"{safe_sym}_{safe_exch}_{safe_int}.csv"
+                                zf.writestr(filename, df.to_csv(index=False))
+                                symbol_records += len(df)
+                            continue
 
-                                zf.writestr(filename, csv_buffer)
-                                total_records += len(df)
-
-                        elif is_intraday_computed:
+                        if is_intraday_computed:
                             # Check if 1m data exists before attempting aggregation
-                            check_query = """
-                                SELECT COUNT(*) FROM market_data
-                                WHERE symbol = ? AND exchange = ? AND interval = '1m'
-                            """
-                            check_params = [sym, exch]
-                            if start_timestamp:
-                                check_query += " AND timestamp >= ?"
-                                check_params.append(start_timestamp)
-                            if end_timestamp:
-                                check_query += " AND timestamp <= ?"
-                                check_params.append(end_timestamp)
-
-                            count = conn.execute(check_query, check_params).fetchone()[0]
-                            if count == 0:
+                            if not _has_export_data(
+                                conn, sym, exch, "1m", start_timestamp, end_timestamp
+                            ):
                                 logger.warning(
                                     f"No 1m data for {sym}:{exch}, skipping computed interval {interval}"
                                 )
@@ -2556,28 +2602,15 @@ def export_to_zip(
                                 ORDER BY ts ASC
                             """
 
-                            df = conn.execute(query, params).fetchdf()
-
-                            if not df.empty:
-                                # Format timestamp as date and time columns
-                                # Add IST offset (19800 seconds) for display since aggregated timestamps are UTC
-                                df["date"] = pd.to_datetime(
-                                    df["ts"] + ist_offset, unit="s"
-                                ).dt.strftime("%Y-%m-%d")
-                                df["time"] = pd.to_datetime(
-                                    df["ts"] + ist_offset, unit="s"
-                                ).dt.strftime("%H:%M:%S")
-                                df = df[
-                                    ["date", "time", "open", "high", "low", "close", "volume", "oi"]
-                                ]
+                            # Aggregated timestamps are UTC: shift by the IST offset for display
+                            datetime_expr = (
+                                f"make_timestamp(CAST(ts + {ist_offset} AS BIGINT) * 1000000)"
+                            )
 
                         else:
                             # Direct query for stored intervals (1m, D)
                             query = """
-                                SELECT
-                                    strftime(to_timestamp(timestamp), '%Y-%m-%d') as date,
-                                    strftime(to_timestamp(timestamp), '%H:%M:%S') as time,
-                                    open, high, low, close, volume, oi
+                                SELECT timestamp, open, high, low, close, volume, oi
                                 FROM market_data
                                 WHERE symbol = ? AND exchange = ? AND interval = ?
                             """
@@ -2592,15 +2625,27 @@ def export_to_zip(
                                 params.append(end_timestamp)
 
                             query += " ORDER BY timestamp"
+                            datetime_expr = "to_timestamp(timestamp)"
+
+                        # Format outside the sort, so DuckDB sorts the bars rather than the CSV lines
+                        query = f"SELECT {_csv_line(datetime_expr)} FROM ({query})"
+                        symbol_records += _stream_csv_entry(
+                            zf, filename, conn.execute(query, params)
+                        )
 
-                            df = conn.execute(query, params).fetchdf()
+                    total_records += symbol_records
+                    if (
+                        progress_callback
+                        and progress_callback(done, len(symbols_list), sym, exch, symbol_records)
+                        is False
+                    ):
+                        cancelled = True
+                        break
 
-                        if not df.empty:
-                            csv_content = df.to_csv(index=False)
-                            # Sanitize filename to prevent path traversal
-                            filename = f"{_sanitize_filename(sym)}_{_sanitize_filename(exch)}_{_sanitize_filename(interval)}.csv"
-                            zf.writestr(filename, csv_content)
-                            total_records += len(df)
+        if cancelled:
+            os.remove(abs_output)
+            logger.info(f"ZIP export cancelled after {total_records} records")
+            return False, "Export cancelled", total_records
 
         if total_records == 0:
             if os.path.exists(abs_output):
@@ -2623,7 +2668,7 @@ def export_to_zip(
     except Exception as e:
         logger.exception(f"Error exporting to ZIP: {e}")
         # Clean up partial file on error
-        if os.path.exists(abs_output):
+        if abs_output and os.path.exists(abs_output):
             try:
                 os.remove(abs_output)
             except Exception:
@@ -2631,6 +2676,107 @@ def export_to_zip(
         return False, str(e), 0
 
 
+def export_to_partitioned_files(
+    output_dir: str,
+    symbols: list[dict[str, str]] | None = None,
+    intervals: list[str] | None = None,
+    start_timestamp: int | None = None,
+    end_timestamp: int | None = None,
+    file_format: str = "parquet",
+    compression: str = "zstd",
+    progress_callback=None,
+) -> tuple[bool, str, int]:
+    """
+    Export market data to a Hive-partitioned directory of Parquet or CSV files.
+
+    Each symbol is written by one DuckDB COPY, partitioned by exchange, symbol
+    and interval:
+
+        output_dir/exchange=NSE/symbol=SBIN/interval=1m/data_<id>.parquet
+
+    which DuckDB, pandas/pyarrow and Spark read back as a single dataset
+    (e.g. read_parquet('output_dir/**/*.parquet', hive_partitioning=true)).
+    Partition values are URL-escaped (M&M -> symbol=M%26M).
+
+    Only stored intervals (1m, D) are supported; computed ones need the ZIP export.
+
+    Args:
+        output_dir: Directory to write into (created if missing)
+        symbols: List of dicts with 'symbol' and 'exchange' keys (optional - all if None)
+        intervals: Intervals to export (optional - all stored intervals if None)
+        start_timestamp: Start epoch timestamp (optional)
+        end_timestamp: End epoch timestamp (optional)
+        file_format: 'parquet' or 'csv'
+        compression: Parquet compression codec ('zstd', 'snappy', 'gzip', 'none')
+        progress_callback: Same as for export_to_zip (optional)
+
+    Returns:
+        Tuple of (success, message, record_count)
+    """
+    try:
+        abs_output = _export_path(output_dir)
+        if not abs_output:
+            return False, "Invalid output path: must be within temp directory", 0
+
+        if intervals:
+            unsupported = [i for i in intervals if i not in STORAGE_INTERVALS]
+            if unsupported:
+                return False, f"Only stored intervals can be partitioned: {unsupported}", 0
+
+        if file_format == "parquet":
+            codec = PARQUET_COMPRESSION.get(compression)
+            if not codec:
+                return False, f"Unsupported compression: {compression}", 0
+            options = f"FORMAT PARQUET, COMPRESSION '{codec}'"
+        elif file_format == "csv":
+            options = "FORMAT CSV, HEADER"
+        else:
+            return False, f"Unsupported format: {file_format}", 0
+        # APPEND adds uniquely named files, so each symbol's COPY keeps the others' output
+        options += ", PARTITION_BY (exchange, symbol, interval), APPEND"
+
+        os.makedirs(abs_output, exist_ok=True)
+        total_records = 0
+
+        with _export_connection() as conn:
+            symbols_list = _resolve_export_symbols(conn, symbols)
+            if not symbols_list:
+                return False, "No symbols found to export", 0
+
+            for done, (sym, exch) in enumerate(symbols_list, 1):
+                where_clause, params = _export_filter(
+                    [{"symbol": sym, "exchange": exch}], intervals, start_timestamp, end_timestamp
+                )
+                query = f"""
+                    SELECT
+                        symbol, exchange, interval, timestamp,
+                        open, high, low, close, volume, oi,
+                        to_timestamp(timestamp) as datetime
+                    FROM market_data
+                    WHERE {where_clause}
+                    ORDER BY interval, timestamp
+                """
+                records = _copy_to(conn, query, params, abs_output, options)
+                total_records += records
+
+                if (
+                    progress_callback
+                    and progress_callback(done, len(symbols_list), sym, exch, records) is False
+                ):
+                    logger.info(f"Partitioned export cancelled after {total_records} records")
+                    return False, "Export cancelled", total_records
+
+        if total_records == 0:
+            return False, "No data matching the criteria", 0
+
+        logger.info(f"Exported {total_records} records to {abs_output}")
+        return True, f"Exported {total_records} records", total_records
+
+    except Exception as e:
+        logger.exception(f"Error exporting partitioned files: {e}")
+        return False, str(e), 0
+
+
 def export_bulk_csv(
     output_path: str,
     symbols: list[dict[str, str]],
@@ -2651,40 +2797,17 @@ def export_bulk_csv(
     Returns:
         Tuple of (success, message, record_count)
     """
-    import tempfile
-
+    abs_output = None
     try:
-        # Build symbol filter
-        conditions = []
-        params = []
-
-        if symbols and len(symbols) > 0:
-            # Export specific symbols
-            symbol_conditions = []
-            for sym in symbols:
-                symbol_conditions.append("(symbol = ? AND exchange = ?)")
-                params.extend([sym["symbol"].upper(), sym["exchange"].upper()])
-            conditions.append(f"({' OR '.join(symbol_conditions)})")
-        # If no symbols specified, export all (no symbol filter needed)
-
-        if interval:
-            conditions.append("interval = ?")
-            params.append(interval)
-        if start_timestamp:
-            conditions.append("timestamp >= ?")
-            params.append(start_timestamp)
-        if end_timestamp:
-            conditions.append("timestamp <= ?")
-            params.append(end_timestamp)
-
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
-
         # Validate output path
-        temp_dir = tempfile.gettempdir()
-        abs_output = os.path.abspath(output_path)
-        if not abs_output.startswith(os.path.abspath(temp_dir)):
+        abs_output = _export_path(output_path)
+        if not abs_output:
             return False, "Invalid output path: must be within temp directory", 0
 
+        # If no symbols specified, export all (no symbol filter needed)
+        where_clause, params = _export_filter(
+            symbols, [interval] if interval else None, start_timestamp, end_timestamp
+        )
         query = f"""
             SELECT
                 symbol, exchange, interval,
@@ -2696,20 +2819,20 @@ def export_bulk_csv(
             ORDER BY symbol, exchange, interval, timestamp
         """
 
-        with get_connection() as conn:
-            df = conn.execute(query, params).fetchdf()
+        with _export_connection() as conn:
+            record_count = _copy_to(conn, query, params, abs_output, "FORMAT CSV, HEADER")
 
-            if df.empty:
-                return False, "No data matching the criteria", 0
-
-            df.to_csv(output_path, index=False)
-            record_count = len(df)
+        if record_count == 0:
+            os.remove(abs_output)
+            return False, "No data matching the criteria", 0
 
         logger.info(f"Exported {record_count} records to CSV")
         return True, f"Exported {record_count} records", record_count
 
     except Exception as e:
         logger.exception(f"Error exporting bulk CSV: {e}")
+        if abs_output and os.path.exists(abs_output):
+            os.remove(abs_output)
         return False, str(e), 0
 
 
@@ -16,11 +16,11 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import pytz
 from cachetools import TTLCache
-from sqlalchemy import BigInteger, Boolean, Column, Date, Index, Integer, String, create_engine
+from sqlalchemy import BigInteger, Boolean, Column, Date, Index, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
-from sqlalchemy.pool import NullPool
 
+from database.engine_factory import create_db_engine
 from utils.logging import get_logger
 
 # IST Timezone
@@ -34,13 +34,7 @@ _holidays_cache = TTLCache(maxsize=50, ttl=3600)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Conditionally create engine based on DB type
-if DATABASE_URL and "sqlite" in DATABASE_URL:
-    engine = create_engine(
-        DATABASE_URL, poolclass=NullPool, connect_args={"check_same_thread": False}
-    )
-else:
-    engine = create_engine(DATABASE_URL, pool_size=50, max_overflow=100, pool_timeout=10)
+engine = create_db_engine(DATABASE_URL, pool_size=50, max_overflow=100, pool_timeout=10)
 
 db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
 Base = declarative_base()
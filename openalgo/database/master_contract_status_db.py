@@ -2,10 +2,11 @@ import logging
 import os
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, String, create_engine, text
+from sqlalchemy import Boolean, Column, DateTime, String, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+
+from database.engine_factory import create_db_engine
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +17,7 @@ DB_PATH = os.getenv("DATABASE_URL", "sqlite:///db/openalgo.db")
 os.makedirs(os.path.dirname(DB_PATH.replace("sqlite:///", "")), exist_ok=True)
 
 # Create the engine and session
-# Conditionally create engine based on DB type
-if DB_PATH and "sqlite" in DB_PATH:
-    # SQLite: Use NullPool to prevent connection pool exhaustion
-    engine = create_engine(
-        DB_PATH,
-        echo=False,
-        poolclass=NullPool,
-        connect_args={"check_same_thread": False, "timeout": 30},
-    )
-else:
-    # For other databases like PostgreSQL, use connection pooling
-    engine = create_engine(DB_PATH, echo=False, pool_size=50, max_overflow=100, pool_timeout=10)
+engine = create_db_engine(DB_PATH, echo=False, pool_size=50, max_overflow=100, pool_timeout=10)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
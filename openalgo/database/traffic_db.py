@@ -13,13 +13,12 @@ from sqlalchemy import (
     Integer,
     String,
     Text,
-    create_engine,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
-from sqlalchemy.pool import NullPool
 from sqlalchemy.sql import func
 
+from database.engine_factory import create_db_engine, create_log_write_engine
 from database.settings_db import get_security_settings
 
 logger = logging.getLogger(__name__)
@@ -27,17 +26,17 @@ logger = logging.getLogger(__name__)
 # Use a separate database for logs
 LOGS_DATABASE_URL = os.getenv("LOGS_DATABASE_URL", "sqlite:///db/logs.db")
 
-# Conditionally create engine based on DB type
-if LOGS_DATABASE_URL and "sqlite" in LOGS_DATABASE_URL:
-    # SQLite: Use NullPool to prevent connection pool exhaustion
-    logs_engine = create_engine(
-        LOGS_DATABASE_URL, poolclass=NullPool, connect_args={"check_same_thread": False}
-    )
-else:
-    # For other databases like PostgreSQL, use connection pooling
-    logs_engine = create_engine(LOGS_DATABASE_URL, pool_size=50, max_overflow=100, pool_timeout=10)
+logs_engine = create_db_engine(LOGS_DATABASE_URL, pool_size=50, max_overflow=100, pool_timeout=10)
 
 logs_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=logs_engine))
+# Log inserts go through a dedicated single-connection writer (see engine_factory)
+logs_write_session = scoped_session(
+    sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=create_log_write_engine(LOGS_DATABASE_URL, logs_engine),
+    )
+)
 LogBase = declarative_base()
 LogBase.query = logs_session.query_property()
 
@@ -87,12 +86,12 @@ class TrafficLog(LogBase):
                 error=error,
                 user_id=user_id,
             )
-            logs_session.add(log)
-            logs_session.commit()
+            logs_write_session.add(log)
+            logs_write_session.commit()
             return True
         except Exception as e:
             logger.exception(f"Error logging traffic: {str(e)}")
-            logs_session.rollback()
+            logs_write_session.rollback()
             return False
 
     @staticmethod
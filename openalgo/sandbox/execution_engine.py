@@ -27,6 +27,7 @@ from database.auth_db import get_auth_token_broker
 from database.sandbox_db import SandboxOrders, SandboxPositions, SandboxTrades, db_session
 from sandbox.fund_manager import FundManager, reconcile_margin, validate_margin_consistency
 from services.quotes_service import get_multiquotes, get_quotes
+from strategies.utils.trade_journal import FILL, get_trade_journal
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -345,6 +346,21 @@ class ExecutionEngine:
 
             db_session.commit()
 
+            # Journal the fill; the order ID links it to the strategy's signal
+            get_trade_journal().record(
+                FILL,
+                order.strategy,
+                symbol=order.symbol,
+                exchange=order.exchange,
+                action=order.action,
+                quantity=order.quantity,
+                price=execution_price,
+                order_id=order.orderid,
+                source="sandbox",
+                ts=trade.trade_timestamp,
+                tradeid=tradeid,
+            )
+
             # Update position
             self._update_position(order, execution_price)
 
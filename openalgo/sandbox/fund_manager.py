@@ -7,6 +7,8 @@ Features:
 - Automatic reset via APScheduler on configured day/time (default: Sunday 00:00 IST)
 - Leverage-based margin calculations
 - Real-time available balance tracking
+- Fund state lives in the sandbox ledger (sandbox/ledger.py): mutations are
+  applied in memory under a per-user lock and written behind to the database
 
 Auto-Reset:
 - Runs as APScheduler background job (see squareoff_thread.py)
@@ -17,7 +19,6 @@ Auto-Reset:
 
 import os
 import sys
-import threading
 from datetime import datetime, timedelta
 from decimal import Decimal
 
@@ -34,6 +35,7 @@ from database.sandbox_db import (
     get_config,
 )
 from database.token_db import get_symbol_info
+from sandbox.ledger import get_ledger
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -56,20 +58,19 @@ def is_future(symbol, exchange):
 class FundManager:
     """Manages virtual funds for sandbox mode"""
 
-    # Class-level lock for thread safety across all fund operations
-    # This prevents race conditions when multiple threads modify funds simultaneously
-    _lock = threading.Lock()
-
     def __init__(self, user_id):
         self.user_id = user_id
         self.starting_capital = Decimal(get_config("starting_capital", "10000000.00"))
+        self._ledger = get_ledger()
+        # Per-user lock: fund operations of different users no longer serialize
+        self._lock = self._ledger.lock(user_id)
 
     def initialize_funds(self):
         """Initialize funds for a new user"""
         with self._lock:
             try:
                 # Check if user already has funds
-                funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+                funds = self._ledger.funds(self.user_id)
 
                 if not funds:
                     # Create new fund account
@@ -103,7 +104,7 @@ class FundManager:
     def get_funds(self):
         """Get current fund status for user"""
         try:
-            funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+            funds = self._ledger.funds(self.user_id)
 
             if not funds:
                 # Initialize funds if not exists
@@ -111,7 +112,7 @@ class FundManager:
                 if not success:
                     return None
 
-                funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+                funds = self._ledger.funds(self.user_id)
 
             # Check if reset is needed
             self._check_and_reset_funds(funds)
@@ -171,10 +172,10 @@ class FundManager:
 
     def _reset_funds(self, funds):
         """Reset funds to starting capital"""
-        with self._lock:
-            try:
-                logger.info(f"Resetting funds for user {self.user_id}")
+        try:
+            logger.info(f"Resetting funds for user {self.user_id}")
 
+            with self._lock:
                 # Reset all fund values
                 funds.total_capital = self.starting_capital
                 funds.available_balance = self.starting_capital
@@ -186,25 +187,26 @@ class FundManager:
                 funds.last_reset_date = datetime.now(pytz.timezone("Asia/Kolkata"))
                 funds.reset_count += 1
 
-                db_session.commit()
+                self._ledger.update_funds(funds)
 
-                # Clear all positions and holdings
-                SandboxPositions.query.filter_by(user_id=self.user_id).delete()
-                SandboxHoldings.query.filter_by(user_id=self.user_id).delete()
-                db_session.commit()
+            # Clear all positions and holdings (outside the ledger lock, these
+            # statements wait on the database)
+            SandboxPositions.query.filter_by(user_id=self.user_id).delete()
+            SandboxHoldings.query.filter_by(user_id=self.user_id).delete()
+            db_session.commit()
 
-                logger.info(
-                    f"Funds reset successfully for user {self.user_id} (Reset #{funds.reset_count})"
-                )
+            logger.info(
+                f"Funds reset successfully for user {self.user_id} (Reset #{funds.reset_count})"
+            )
 
-            except Exception as e:
-                db_session.rollback()
-                logger.exception(f"Error resetting funds for user {self.user_id}: {e}")
+        except Exception as e:
+            db_session.rollback()
+            logger.exception(f"Error resetting funds for user {self.user_id}: {e}")
 
     def check_margin_available(self, required_margin):
         """Check if user has sufficient margin available"""
         try:
-            funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+            funds = self._ledger.funds(self.user_id)
 
             if not funds:
                 return False, "Funds not initialized"
@@ -228,7 +230,7 @@ class FundManager:
         """Block margin for a trade"""
         with self._lock:
             try:
-                funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+                funds = self._ledger.funds(self.user_id)
 
                 if not funds:
                     return False, "Funds not initialized"
@@ -245,13 +247,12 @@ class FundManager:
                 funds.available_balance -= amount
                 funds.used_margin += amount
 
-                db_session.commit()
+                self._ledger.update_funds(funds, "available_balance", "used_margin")
 
                 logger.info(f"Blocked ₹{amount} margin for user {self.user_id}. {description}")
                 return True, f"Margin blocked: ₹{amount}"
 
             except Exception as e:
-                db_session.rollback()
                 logger.exception(f"Error blocking margin for user {self.user_id}: {e}")
                 return False, f"Error blocking margin: {str(e)}"
 
@@ -259,7 +260,7 @@ class FundManager:
         """Release blocked margin and update P&L"""
         with self._lock:
             try:
-                funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+                funds = self._ledger.funds(self.user_id)
 
                 if not funds:
                     return False, "Funds not initialized"
@@ -280,7 +281,14 @@ class FundManager:
                 ) + realized_pnl
                 funds.total_pnl = funds.realized_pnl + funds.unrealized_pnl
 
-                db_session.commit()
+                self._ledger.update_funds(
+                    funds,
+                    "available_balance",
+                    "used_margin",
+                    "realized_pnl",
+                    "today_realized_pnl",
+                    "total_pnl",
+                )
 
                 logger.info(
                     f"Released ₹{amount} margin for user {self.user_id}. Realized P&L: ₹{realized_pnl}. {description}"
@@ -288,7 +296,6 @@ class FundManager:
                 return True, f"Margin released: ₹{amount}, P&L: ₹{realized_pnl}"
 
             except Exception as e:
-                db_session.rollback()
                 logger.exception(f"Error releasing margin for user {self.user_id}: {e}")
                 return False, f"Error releasing margin: {str(e)}"
 
@@ -300,7 +307,7 @@ class FundManager:
         """
         with self._lock:
             try:
-                funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+                funds = self._ledger.funds(self.user_id)
 
                 if not funds:
                     return False, "Funds not initialized"
@@ -311,7 +318,7 @@ class FundManager:
                 # But do NOT credit available_balance - money is now in holdings
                 funds.used_margin -= amount
 
-                db_session.commit()
+                self._ledger.update_funds(funds, "used_margin")
 
                 logger.debug(
                     f"Transferred ₹{amount} margin to holdings for user {self.user_id}. {description}"
@@ -319,8 +326,9 @@ class FundManager:
                 return True, f"Margin transferred to holdings: ₹{amount}"
 
             except Exception as e:
-                db_session.rollback()
-                logger.exception(f"Error transferring margin to holdings for user {self.user_id}: {e}")
+                logger.exception(
+                    f"Error transferring margin to holdings for user {self.user_id}: {e}"
+                )
                 return False, f"Error transferring margin to holdings: {str(e)}"
 
     def credit_sale_proceeds(self, amount, description=""):
@@ -330,7 +338,7 @@ class FundManager:
         """
         with self._lock:
             try:
-                funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+                funds = self._ledger.funds(self.user_id)
 
                 if not funds:
                     return False, "Funds not initialized"
@@ -340,7 +348,7 @@ class FundManager:
                 # Credit sale proceeds to available balance
                 funds.available_balance += amount
 
-                db_session.commit()
+                self._ledger.update_funds(funds, "available_balance")
 
                 logger.info(
                     f"Credited ₹{amount} sale proceeds for user {self.user_id}. {description}"
@@ -348,7 +356,6 @@ class FundManager:
                 return True, f"Sale proceeds credited: ₹{amount}"
 
             except Exception as e:
-                db_session.rollback()
                 logger.exception(f"Error crediting sale proceeds for user {self.user_id}: {e}")
                 return False, f"Error crediting sale proceeds: {str(e)}"
 
@@ -356,7 +363,7 @@ class FundManager:
         """Update unrealized P&L from open positions"""
         with self._lock:
             try:
-                funds = SandboxFunds.query.filter_by(user_id=self.user_id).first()
+                funds = self._ledger.funds(self.user_id)
 
                 if not funds:
                     return False, "Funds not initialized"
@@ -366,12 +373,11 @@ class FundManager:
                 funds.unrealized_pnl = unrealized_pnl
                 funds.total_pnl = funds.realized_pnl + funds.unrealized_pnl
 
-                db_session.commit()
+                self._ledger.update_funds(funds, "unrealized_pnl", "total_pnl")
 
                 return True, "Unrealized P&L updated"
 
             except Exception as e:
-                db_session.rollback()
                 logger.exception(f"Error updating unrealized P&L for user {self.user_id}: {e}")
                 return False, f"Error updating unrealized P&L: {str(e)}"
 
@@ -470,17 +476,17 @@ def reset_all_user_funds():
             return
 
         reset_count = 0
-        for fund in all_funds:
+        for user_id in [fund.user_id for fund in all_funds]:
             try:
                 # Create FundManager for this user
-                fm = FundManager(fund.user_id)
+                fm = FundManager(user_id)
 
-                # Call the internal reset function
-                fm._reset_funds(fund)
+                # Call the internal reset function on the user's ledger funds
+                fm._reset_funds(fm._ledger.funds(user_id))
                 reset_count += 1
 
             except Exception as e:
-                logger.exception(f"Error resetting funds for user {fund.user_id}: {e}")
+                logger.exception(f"Error resetting funds for user {user_id}: {e}")
                 continue
 
         logger.info(f"=== AUTO-RESET: Successfully reset {reset_count} user fund accounts ===")
@@ -503,58 +509,59 @@ def reconcile_margin(user_id, auto_fix=True):
     Returns:
         tuple: (has_discrepancy: bool, discrepancy_amount: Decimal, message: str)
     """
+    ledger = get_ledger()
     try:
-        # Calculate total margin blocked across all open positions
-        positions = SandboxPositions.query.filter_by(user_id=user_id).all()
-        total_position_margin = sum(
-            Decimal(str(pos.margin_blocked or 0))
-            for pos in positions
-            if pos.quantity != 0  # Only count open positions
-        )
+        with ledger.lock(user_id):
+            # Calculate total margin blocked across all open positions
+            positions = ledger.positions(user_id)
+            total_position_margin = sum(
+                Decimal(str(pos.margin_blocked or 0))
+                for pos in positions
+                if pos.quantity != 0  # Only count open positions
+            )
 
-        # Get current used_margin from funds
-        funds = SandboxFunds.query.filter_by(user_id=user_id).first()
-        if not funds:
-            return False, Decimal("0"), "No funds record found for user"
+            # Get current used_margin from funds
+            funds = ledger.funds(user_id)
+            if not funds:
+                return False, Decimal("0"), "No funds record found for user"
 
-        current_used_margin = Decimal(str(funds.used_margin or 0))
+            current_used_margin = Decimal(str(funds.used_margin or 0))
 
-        # Calculate discrepancy
-        discrepancy = current_used_margin - total_position_margin
+            # Calculate discrepancy
+            discrepancy = current_used_margin - total_position_margin
 
-        if discrepancy == 0:
-            return False, Decimal("0"), "No margin discrepancy detected"
+            if discrepancy == 0:
+                return False, Decimal("0"), "No margin discrepancy detected"
 
-        # Log the discrepancy
-        logger.warning(
-            f"Margin discrepancy detected for user {user_id}: "
-            f"used_margin={current_used_margin}, position_margin={total_position_margin}, "
-            f"discrepancy={discrepancy}"
-        )
+            # Log the discrepancy
+            logger.warning(
+                f"Margin discrepancy detected for user {user_id}: "
+                f"used_margin={current_used_margin}, position_margin={total_position_margin}, "
+                f"discrepancy={discrepancy}"
+            )
 
-        if auto_fix:
-            # Fix the discrepancy by adjusting used_margin and available_balance
-            funds.used_margin = total_position_margin
-            funds.available_balance += discrepancy  # Release the stuck margin
-            db_session.commit()
+            if auto_fix:
+                # Fix the discrepancy by adjusting used_margin and available_balance
+                funds.used_margin = total_position_margin
+                funds.available_balance += discrepancy  # Release the stuck margin
+                ledger.update_funds(funds, "used_margin", "available_balance")
 
-            logger.info(
-                f"Margin reconciled for user {user_id}: "
-                f"Released {discrepancy} stuck margin, "
-                f"new used_margin={total_position_margin}"
-            )
+                logger.info(
+                    f"Margin reconciled for user {user_id}: "
+                    f"Released {discrepancy} stuck margin, "
+                    f"new used_margin={total_position_margin}"
+                )
 
-            return True, discrepancy, f"Margin reconciled. Released {discrepancy} stuck margin."
-        else:
-            return (
-                True,
-                discrepancy,
-                f"Discrepancy of {discrepancy} detected but not fixed (auto_fix=False)",
-            )
+                return True, discrepancy, f"Margin reconciled. Released {discrepancy} stuck margin."
+            else:
+                return (
+                    True,
+                    discrepancy,
+                    f"Discrepancy of {discrepancy} detected but not fixed (auto_fix=False)",
+                )
 
     except Exception as e:
         logger.exception(f"Error reconciling margin for user {user_id}: {e}")
-        db_session.rollback()
         return False, Decimal("0"), f"Error during reconciliation: {str(e)}"
 
 
@@ -613,8 +620,10 @@ def validate_margin_consistency(user_id):
         tuple: (is_consistent: bool, discrepancy: Decimal)
     """
     try:
+        ledger = get_ledger()
+
         # Calculate total margin blocked across all open positions
-        positions = SandboxPositions.query.filter_by(user_id=user_id).all()
+        positions = ledger.positions(user_id)
         total_position_margin = sum(
             Decimal(str(pos.margin_blocked or 0))
             for pos in positions
@@ -622,7 +631,7 @@ def validate_margin_consistency(user_id):
         )
 
         # Get current used_margin from funds
-        funds = SandboxFunds.query.filter_by(user_id=user_id).first()
+        funds = ledger.funds(user_id)
         if not funds:
             return True, Decimal("0")  # No funds = no discrepancy to report
 
@@ -0,0 +1,562 @@
+# sandbox/ledger.py
+"""
+Sandbox Ledger - In-memory funds, positions and holdings with write-behind persistence
+
+Features:
+- Per-user in-memory state (funds row, positions and holdings snapshots) guarded
+  by a per-user lock instead of one global fund lock
+- Fund mutations and position MTM updates are applied in memory, appended to a
+  write-ahead journal and flushed to the sandbox database in coalesced batches
+- Crash recovery: journal entries that never reached the database are replayed
+  into it when the ledger starts
+- Coherence with code that still talks to the database directly:
+  - pending ledger writes are flushed before any db_session statement that
+    touches a ledger table
+  - ORM changes, bulk updates/deletes and raw SQL on ledger tables invalidate
+    the cached state when their transaction commits
+
+Orders and trades are not cached here; they are written synchronously by the
+order manager and execution engine.
+
+Configuration (.env):
+- SANDBOX_LEDGER_JOURNAL: journal path (default: db/sandbox_ledger.journal)
+- SANDBOX_LEDGER_FLUSH_INTERVAL: seconds between background flushes (default: 0.5)
+- SANDBOX_LEDGER_FLUSH_BATCH: pending rows that trigger an early flush (default: 500)
+- SANDBOX_LEDGER_FSYNC: fsync every journal append (default: FALSE)
+"""
+
+import atexit
+import glob
+import json
+import os
+import re
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+from sqlalchemy import bindparam, event, select, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql.elements import TextClause
+
+from database.sandbox_db import (
+    SandboxFunds,
+    SandboxHoldings,
+    SandboxPositions,
+    db_session,
+    engine,
+)
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+LEDGER_JOURNAL = os.getenv("SANDBOX_LEDGER_JOURNAL", "db/sandbox_ledger.journal")
+LEDGER_FLUSH_INTERVAL = float(os.getenv("SANDBOX_LEDGER_FLUSH_INTERVAL", "0.5"))
+LEDGER_FLUSH_BATCH = int(os.getenv("SANDBOX_LEDGER_FLUSH_BATCH", "500"))
+LEDGER_FSYNC = os.getenv("SANDBOX_LEDGER_FSYNC", "FALSE").upper() == "TRUE"
+
+FUNDS = SandboxFunds.__table__
+POSITIONS = SandboxPositions.__table__
+HOLDINGS = SandboxHoldings.__table__
+
+LEDGER_TABLES = (FUNDS.name, POSITIONS.name, HOLDINGS.name)
+
+# Tables the ledger writes, and the column each pending write is keyed on
+WRITE_KEYS = {FUNDS.name: "user_id", POSITIONS.name: "id"}
+
+FUND_COLUMNS = (
+    "total_capital",
+    "available_balance",
+    "used_margin",
+    "realized_pnl",
+    "today_realized_pnl",
+    "unrealized_pnl",
+    "total_pnl",
+    "last_reset_date",
+    "reset_count",
+)
+MTM_COLUMNS = ("ltp", "pnl", "pnl_percent")
+
+_TABLE_PATTERN = re.compile("|".join(LEDGER_TABLES))
+_FLUSH_OPTION = "sandbox_ledger_flush"
+
+
+def _quantize(column, value):
+    """Round a Decimal to its column scale, as a database round trip would"""
+    scale = getattr(column.type, "scale", None)
+    if scale is None or value is None:
+        return value
+    return Decimal(str(value)).quantize(Decimal(1).scaleb(-scale))
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return value
+
+
+class LedgerJournal:
+    """Append-only JSON lines journal of pending ledger writes"""
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def append(self, seq, table, key, values):
+        line = json.dumps(
+            {"s": seq, "t": table, "k": key, "v": {c: _encode(v) for c, v in values.items()}},
+            separators=(",", ":"),
+        )
+        self._file.write(line + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self):
+        """Close the active journal as a numbered segment and start a new one"""
+        self._file.close()
+        segment = f"{self.path}.{time.time_ns():020d}"
+        os.replace(self.path, segment)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return segment
+
+    def segments(self):
+        """Rotated segments (oldest first) followed by the active journal"""
+        return sorted(glob.glob(f"{glob.escape(self.path)}.*")) + [self.path]
+
+    def close(self):
+        self._file.close()
+
+
+def read_journal(paths):
+    """Coalesce journal files into {(table, key): {column: value}}, later entries winning"""
+    pending = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-append
+                    break
+                table = FUNDS if entry["t"] == FUNDS.name else POSITIONS
+                values = {c: _decode(table.c[c], v) for c, v in entry["v"].items()}
+                pending.setdefault((entry["t"], entry["k"]), {}).update(values)
+    return pending
+
+
+class UserBook:
+    """Cached ledger state of one user"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.lock = threading.RLock()
+        self.funds = None
+        self.positions = None
+        self.holdings = None
+
+
+class SandboxLedger:
+    """Authoritative in-memory sandbox state with a write-behind journal"""
+
+    def __init__(
+        self,
+        journal_path=LEDGER_JOURNAL,
+        flush_interval=LEDGER_FLUSH_INTERVAL,
+        flush_batch=LEDGER_FLUSH_BATCH,
+        fsync=LEDGER_FSYNC,
+        bind=engine,
+    ):
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=bind)
+        self._is_sqlite = bind.dialect.name == "sqlite"
+        self._books = {}
+        self._books_lock = threading.Lock()
+
+        # Pending writes: (table, key) -> (seq, {column: value})
+        self._dirty = {}
+        self._seq = 0
+        self._state_lock = threading.Lock()
+        # Serializes flushes that run in the ledger's own transaction
+        self._write_lock = threading.Lock()
+        # Writes flushed through caller sessions that have not committed yet
+        self._claims = 0
+        self._segments = []
+
+        self._journal = LedgerJournal(journal_path, fsync)
+        self.recover()
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="SandboxLedgerFlusher", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------ state
+
+    def book(self, user_id):
+        book = self._books.get(user_id)
+        if book is None:
+            with self._books_lock:
+                book = self._books.setdefault(user_id, UserBook(user_id))
+        return book
+
+    def lock(self, user_id):
+        """Per-user lock; hold it around read-modify-write of ledger state"""
+        return self.book(user_id).lock
+
+    def funds(self, user_id):
+        """Cached funds row of a user (None if the user has no funds yet)"""
+        book = self.book(user_id)
+        with book.lock:
+            if book.funds is None:
+                book.funds = self._load_funds(user_id)
+            return book.funds
+
+    def positions(self, user_id):
+        """All position rows of a user, ordered by id"""
+        book = self.book(user_id)
+        with book.lock:
+            if book.positions is None:
+                book.positions = self._load_positions(user_id)
+            return list(book.positions.values())
+
+    def position(self, user_id, symbol, exchange, product):
+        book = self.book(user_id)
+        with book.lock:
+            if book.positions is None:
+                book.positions = self._load_positions(user_id)
+            return book.positions.get((symbol, exchange, product))
+
+    def holding(self, user_id, symbol, exchange):
+        book = self.book(user_id)
+        with book.lock:
+            if book.holdings is None:
+                book.holdings = self._load_holdings(user_id)
+            return book.holdings.get((symbol, exchange))
+
+    def update_funds(self, funds, *columns):
+        """Record changed fund columns (after mutating the cached row in place)"""
+        self._record(FUNDS, funds, funds.user_id, columns or FUND_COLUMNS)
+
+    def update_position(self, position, *columns):
+        """Record changed position columns (after mutating the cached row in place)"""
+        self._record(POSITIONS, position, position.id, columns or MTM_COLUMNS)
+
+    def _record(self, table, row, key, columns):
+        values = {}
+        for column in columns:
+            value = _quantize(table.c[column], getattr(row, column))
+            setattr(row, column, value)
+            values[column] = value
+
+        with self._state_lock:
+            self._seq += 1
+            self._journal.append(self._seq, table.name, key, values)
+            entry = self._dirty.get((table.name, key))
+            if entry:
+                entry[1].update(values)
+                self._dirty[(table.name, key)] = (self._seq, entry[1])
+            else:
+                self._dirty[(table.name, key)] = (self._seq, values)
+            pending = len(self._dirty)
+
+        if pending >= self.flush_batch:
+            self._wake.set()
+
+    def invalidate(self, table_name, user_ids=None):
+        """Drop cached state for a table (for the given users, or everyone)"""
+        attr = {FUNDS.name: "funds", POSITIONS.name: "positions", HOLDINGS.name: "holdings"}[
+            table_name
+        ]
+        if user_ids is None:
+            books = list(self._books.values())
+        else:
+            books = [self._books[u] for u in user_ids if u in self._books]
+        for book in books:
+            with book.lock:
+                setattr(book, attr, None)
+
+    def _overlay(self, table_name, key, row):
+        """Apply pending (unflushed) writes to a freshly loaded row"""
+        with self._state_lock:
+            entry = self._dirty.get((table_name, key))
+            if entry:
+                for column, value in entry[1].items():
+                    setattr(row, column, value)
+        return row
+
+    def _load_funds(self, user_id):
+        with self._session_factory() as session:
+            row = (
+                session.execute(select(FUNDS).where(FUNDS.c.user_id == user_id)).mappings().first()
+            )
+        if row is None:
+            return None
+        return self._overlay(FUNDS.name, user_id, SimpleNamespace(**row))
+
+    def _load_positions(self, user_id):
+        with self._session_factory() as session:
+            rows = session.execute(
+                select(POSITIONS).where(POSITIONS.c.user_id == user_id).order_by(POSITIONS.c.id)
+            ).mappings()
+            positions = {}
+            for row in rows:
+                position = self._overlay(POSITIONS.name, row["id"], SimpleNamespace(**row))
+                positions[(position.symbol, position.exchange, position.product)] = position
+        return positions
+
+    def _load_holdings(self, user_id):
+        with self._session_factory() as session:
+            rows = session.execute(
+                select(HOLDINGS).where(HOLDINGS.c.user_id == user_id).order_by(HOLDINGS.c.id)
+            ).mappings()
+            return {(row["symbol"], row["exchange"]): SimpleNamespace(**row) for row in rows}
+
+    # ------------------------------------------------------------ persistence
+
+    def _take(self, tables=None):
+        """Remove pending writes (optionally only for some tables) under the state lock"""
+        if tables is None:
+            batch, self._dirty = self._dirty, {}
+            return batch
+        batch = {key: entry for key, entry in self._dirty.items() if key[0] in tables}
+        for key in batch:
+            del self._dirty[key]
+        return batch
+
+    def _requeue(self, batch):
+        """Put back writes whose transaction failed, without overriding newer values"""
+        with self._state_lock:
+            for key, (seq, values) in batch.items():
+                entry = self._dirty.get(key)
+                if entry:
+                    merged = dict(values)
+                    merged.update(entry[1])
+                    self._dirty[key] = (entry[0], merged)
+                else:
+                    self._dirty[key] = (seq, values)
+
+    @staticmethod
+    def _apply(session, batch):
+        """Write a batch as one executemany UPDATE per (table, column set)"""
+        groups = {}
+        for (table_name, key), (_, values) in batch.items():
+            groups.setdefault((table_name, tuple(sorted(values))), []).append((key, values))
+
+        for (table_name, columns), rows in groups.items():
+            table = FUNDS if table_name == FUNDS.name else POSITIONS
+            stmt = (
+                update(table)
+                .where(table.c[WRITE_KEYS[table_name]] == bindparam("_key"))
+                .values({c: bindparam(f"_v_{c}") for c in columns})
+            )
+            params = [
+                {"_key": key, **{f"_v_{c}": values[c] for c in columns}} for key, values in rows
+            ]
+            session.execute(stmt, params, execution_options={_FLUSH_OPTION: True})
+
+    def flush(self, tables=None):
+        """
+        Write pending ledger writes in the ledger's own transaction.
+
+        Args:
+            tables: Only flush writes for these table names (default: everything,
+                and checkpoint the journal)
+
+        Returns:
+            int: number of rows written
+        """
+        with self._write_lock:
+            if not self._dirty or (
+                tables is not None and not any(key[0] in tables for key in self._dirty)
+            ):
+                return 0
+
+            with self._session_factory() as session:
+                if self._is_sqlite:
+                    # Take the write lock before picking the batch, so a caller
+                    # session that holds the lock (and flushes newer writes
+                    # itself) always commits before this batch is chosen
+                    session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+
+                with self._state_lock:
+                    batch = self._take(tables)
+                    checkpoint = tables is None and self._claims == 0
+                    if checkpoint:
+                        self._segments.append(self._journal.rotate())
+
+                try:
+                    self._apply(session, batch)
+                    session.commit()
+                except Exception:
+                    session.rollback()
+                    self._requeue(batch)
+                    raise
+
+            if checkpoint:
+                for segment in self._segments:
+                    os.remove(segment)
+                self._segments = []
+            return len(batch)
+
+    def recover(self):
+        """Replay journal entries left by a previous process into the database"""
+        paths = self._journal.segments()
+        pending = read_journal(paths)
+        if pending:
+            with self._session_factory() as session:
+                self._apply(session, {key: (0, values) for key, values in pending.items()})
+                session.commit()
+            logger.info(f"Sandbox ledger recovered {len(pending)} pending row(s) from journal")
+
+        self._journal.close()
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self._journal = LedgerJournal(self._journal.path, self._journal.fsync)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception(f"Error flushing sandbox ledger: {e}")
+
+    def close(self):
+        """Stop the background flusher and write everything out"""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.exception(f"Error flushing sandbox ledger on shutdown: {e}")
+        self._journal.close()
+
+    # ---------------------------------------------------------- session hooks
+
+    def _flush_for_statement(self, session, tables):
+        """Make pending writes for these tables visible to a db_session statement"""
+        if not self._dirty:
+            return
+        if not session.info.get("sandbox_ledger_writes"):
+            self.flush(tables)
+            return
+
+        # The session already holds the database write lock, so the ledger's
+        # own transaction would wait on it; write through the caller instead
+        with self._state_lock:
+            batch = self._take(tables)
+            if not batch:
+                return
+            self._claims += 1
+        session.info.setdefault("sandbox_ledger_claims", []).append(batch)
+        self._apply(session, batch)
+
+    def on_orm_execute(self, state):
+        if state.execution_options.get(_FLUSH_OPTION):
+            return
+
+        statement = state.statement
+        if isinstance(statement, TextClause):
+            tables = set(_TABLE_PATTERN.findall(statement.text))
+            is_write = not statement.text.lstrip().lower().startswith("select")
+        else:
+            tables = {m.local_table.name for m in state.all_mappers} & set(LEDGER_TABLES)
+            is_write = not state.is_select
+
+        if tables:
+            self._flush_for_statement(state.session, tables & set(WRITE_KEYS))
+            if is_write:
+                state.session.info.setdefault("sandbox_ledger_invalidate", set()).update(
+                    (table, None) for table in tables
+                )
+        if is_write:
+            state.session.info["sandbox_ledger_writes"] = True
+
+    def on_after_flush(self, session, flush_context):
+        changed = session.info.setdefault("sandbox_ledger_invalidate", set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, (SandboxFunds, SandboxPositions, SandboxHoldings)):
+                # Read user_id without triggering a load (None = every user)
+                changed.add((obj.__table__.name, obj.__dict__.get("user_id")))
+        session.info["sandbox_ledger_writes"] = True
+
+    def on_after_commit(self, session):
+        claims = session.info.pop("sandbox_ledger_claims", None)
+        if claims:
+            with self._state_lock:
+                self._claims -= len(claims)
+        self._end_transaction(session)
+
+    def on_after_rollback(self, session):
+        claims = session.info.pop("sandbox_ledger_claims", None)
+        if claims:
+            for batch in claims:
+                self._requeue(batch)
+            with self._state_lock:
+                self._claims -= len(claims)
+        self._end_transaction(session)
+
+    def _end_transaction(self, session):
+        session.info.pop("sandbox_ledger_writes", None)
+        changed = session.info.pop("sandbox_ledger_invalidate", None)
+        if not changed:
+            return
+        whole_tables = {table for table, user_id in changed if user_id is None}
+        for table in whole_tables:
+            self.invalidate(table)
+        users = {}
+        for table, user_id in changed:
+            if table not in whole_tables:
+                users.setdefault(table, set()).add(user_id)
+        for table, user_ids in users.items():
+            self.invalidate(table, user_ids)
+
+    def attach(self, scoped_session):
+        event.listen(scoped_session, "do_orm_execute", self.on_orm_execute)
+        event.listen(scoped_session, "after_flush", self.on_after_flush)
+        event.listen(scoped_session, "after_commit", self.on_after_commit)
+        event.listen(scoped_session, "after_rollback", self.on_after_rollback)
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger():
+    """Process-wide sandbox ledger (recovers the journal on first use)"""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                ledger = SandboxLedger()
+                ledger.attach(db_session)
+                atexit.register(ledger.close)
+                _ledger = ledger
+    return _ledger
@@ -26,6 +26,7 @@ from database.sandbox_db import SandboxOrders, SandboxPositions, SandboxTrades,
 from database.symbol import SymToken
 from database.token_db import get_symbol_info
 from sandbox.fund_manager import FundManager
+from sandbox.ledger import get_ledger
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -51,6 +52,7 @@ class OrderManager:
     def __init__(self, user_id):
         self.user_id = user_id
         self.fund_manager = FundManager(user_id)
+        self.ledger = get_ledger()
 
     def place_order(self, order_data):
         """
@@ -119,6 +121,10 @@ class OrderManager:
                         400,
                     )
 
+            # Existing position from the ledger snapshot (one lookup serves the square-off,
+            # CNC SELL, fallback pricing and margin checks below)
+            existing_position = self.ledger.position(self.user_id, symbol, exchange, product)
+
             # Validate MIS orders - reject if after square-off time but before market open
             # Exception: Allow orders that reduce/close existing positions
             if product == "MIS":
@@ -151,17 +157,6 @@ class OrderManager:
 
                     if is_blocked:
                         # Check if this order will reduce/close an existing OPEN position
-                        existing_position = (
-                            SandboxPositions.query.filter_by(
-                                user_id=self.user_id,
-                                symbol=symbol,
-                                exchange=exchange,
-                                product=product,
-                            )
-                            .filter(SandboxPositions.quantity != 0)
-                            .first()
-                        )
-
                         # Allow if reducing existing position
                         # BUY reduces short position (negative qty), SELL reduces long position (positive qty)
                         is_reducing = False
@@ -191,17 +186,8 @@ class OrderManager:
             if action == "SELL":
                 if product == "CNC":
                     # CNC SELL orders require existing long positions or holdings
-                    # Check existing position
-                    existing_position = SandboxPositions.query.filter_by(
-                        user_id=self.user_id, symbol=symbol, exchange=exchange, product=product
-                    ).first()
-
                     # Check holdings (T+1 settled positions)
-                    from database.sandbox_db import SandboxHoldings
-
-                    existing_holdings = SandboxHoldings.query.filter_by(
-                        user_id=self.user_id, symbol=symbol, exchange=exchange
-                    ).first()
+                    existing_holdings = self.ledger.holding(self.user_id, symbol, exchange)
 
                     # Calculate total available quantity
                     position_qty = (
@@ -233,11 +219,6 @@ class OrderManager:
             margin_calculation_price = None
             cached_quote = None  # Cache quote for reuse in immediate execution
 
-            # Check for existing position early (needed for fallback pricing)
-            temp_existing_position = SandboxPositions.query.filter_by(
-                user_id=self.user_id, symbol=symbol, exchange=exchange, product=product
-            ).first()
-
             if price_type == "MARKET":
                 # For MARKET orders, fetch current LTP for margin calculation
                 # We need a valid price - reject order if unavailable (no hardcoded fallback)
@@ -267,12 +248,8 @@ class OrderManager:
 
                 # Attempt 2: Use position's last known LTP as fallback
                 if not quote_fetch_success:
-                    if (
-                        temp_existing_position
-                        and temp_existing_position.ltp
-                        and temp_existing_position.ltp > 0
-                    ):
-                        margin_calculation_price = temp_existing_position.ltp
+                    if existing_position and existing_position.ltp and existing_position.ltp > 0:
+                        margin_calculation_price = existing_position.ltp
                         logger.warning(
                             f"Quote fetch failed, using last known price {margin_calculation_price} for {symbol}"
                         )
@@ -335,10 +312,6 @@ class OrderManager:
                 )
 
             # Check if this order will close/reduce/reverse an existing position
-            existing_position = SandboxPositions.query.filter_by(
-                user_id=self.user_id, symbol=symbol, exchange=exchange, product=product
-            ).first()
-
             # Calculate margin to block based on position impact
             actual_margin_to_block = margin_required
 
@@ -24,6 +24,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.sandbox_db import SandboxPositions, SandboxTrades, db_session, get_config
 from sandbox.fund_manager import FundManager
 from sandbox.holdings_manager import HoldingsManager
+from sandbox.ledger import get_ledger
 from services.market_data_service import get_market_data_service
 from services.quotes_service import get_multiquotes, get_quotes
 from utils.logging import get_logger
@@ -172,6 +173,7 @@ class PositionManager:
     def __init__(self, user_id):
         self.user_id = user_id
         self.fund_manager = FundManager(user_id)
+        self.ledger = get_ledger()
 
     def _check_and_close_expired_positions(self, positions):
         """
@@ -188,7 +190,7 @@ class PositionManager:
         already happened in get_open_positions).
 
         Args:
-            positions: List of SandboxPositions objects to check
+            positions: List of ledger position rows to check
 
         Returns:
             list: All positions (expired ones settled, others unchanged)
@@ -226,6 +228,8 @@ class PositionManager:
                 )
 
                 try:
+                    # Settle on the ORM row (ledger rows are read-only snapshots)
+                    position = db_session.get(SandboxPositions, position.id) or position
                     self._settle_expired_position(position)
                     expired_count += 1
                     # Add to valid_positions - it's now closed but still show it
@@ -371,14 +375,12 @@ class PositionManager:
                 last_session_expiry = datetime.combine(today, session_expiry_time)
 
             # Get all positions (including zero quantity ones from current session)
-            positions_query = SandboxPositions.query.filter(
-                SandboxPositions.user_id == self.user_id
-            )
+            # from the ledger snapshot, which is only reloaded after position writes
+            all_positions = self.ledger.positions(self.user_id)
 
             # Check if we need to filter positions based on product type
             # If position was created before last session expiry and it's not NRML,
             # it should have been settled
-            all_positions = positions_query.all()
             positions = []
 
             for position in all_positions:
@@ -418,11 +420,9 @@ class PositionManager:
                         {"pos_id": position.id},
                     )
                     db_session.commit()
-                    # Refresh from database instead of setting directly
-                    # Setting position.today_realized_pnl = X would mark the ORM object as "dirty"
-                    # which causes it to be committed later in _update_positions_mtm, triggering
-                    # onupdate=func.now() and bringing old closed positions back into view
-                    db_session.refresh(position)
+                    # Ledger rows are plain snapshots, so updating the field here does not
+                    # write anything back (and cannot bump updated_at)
+                    position.today_realized_pnl = Decimal("0.00")
 
                 # If position was updated after last session expiry, include it
                 if position.updated_at >= last_session_expiry:
@@ -597,36 +597,35 @@ class PositionManager:
             else:
                 logger.debug(f"Positions MTM: All {ws_count} symbols from WebSocket (no API calls)")
 
-            # Update MTM for each position
-            for position in positions:
-                # Skip MTM update for closed positions (quantity = 0)
-                # They already have today's realized P&L stored in position.pnl
-                if position.quantity == 0:
-                    continue
-
-                quote = quote_cache.get((position.symbol, position.exchange))
-                if quote:
-                    ltp = Decimal(str(quote.get("ltp", 0)))
-                    if ltp > 0:
-                        position.ltp = ltp
+            # Update MTM for each position in the ledger (written behind to the database)
+            with self.ledger.lock(self.user_id):
+                for position in positions:
+                    # Skip MTM update for closed positions (quantity = 0)
+                    # They already have today's realized P&L stored in position.pnl
+                    if position.quantity == 0:
+                        continue
 
-                        # Calculate current unrealized P&L for open position
-                        current_unrealized_pnl = self._calculate_position_pnl(
-                            position.quantity, position.average_price, ltp
-                        )
+                    quote = quote_cache.get((position.symbol, position.exchange))
+                    if quote:
+                        ltp = Decimal(str(quote.get("ltp", 0)))
+                        if ltp > 0:
+                            position.ltp = ltp
 
-                        # pnl = unrealized only (broker standard - Zerodha Kite style)
-                        # This is the primary P&L field for open positions
-                        position.pnl = current_unrealized_pnl
+                            # Calculate current unrealized P&L for open position
+                            current_unrealized_pnl = self._calculate_position_pnl(
+                                position.quantity, position.average_price, ltp
+                            )
 
-                        position.pnl_percent = self._calculate_pnl_percent(
-                            position.average_price, ltp, position.quantity
-                        )
+                            # pnl = unrealized only (broker standard - Zerodha Kite style)
+                            # This is the primary P&L field for open positions
+                            position.pnl = current_unrealized_pnl
 
-            db_session.commit()
+                            position.pnl_percent = self._calculate_pnl_percent(
+                                position.average_price, ltp, position.quantity
+                            )
+                            self.ledger.update_position(position, "ltp", "pnl", "pnl_percent")
 
         except Exception as e:
-            db_session.rollback()
             logger.exception(f"Error updating positions MTM: {e}")
 
     def _update_single_position_mtm(self, position):
@@ -99,6 +99,42 @@ def load_strategy_module(filepath):
         logger.error(f"Failed to load strategy {filepath}: {e}")
         return None
 
+def leaderboard_row(name, params, metrics, trades):
+    """One leaderboard entry from a backtest's metrics."""
+    return {
+        "strategy": name,
+        "params": params,
+        "total_return": metrics.get('total_return_pct', 0),
+        "sharpe": metrics.get('sharpe_ratio', 0),
+        "drawdown": metrics.get('max_drawdown_pct', 0),
+        "win_rate": metrics.get('win_rate', 0),
+        "trades": trades,
+        "profit_factor": metrics.get('profit_factor', 0)
+    }
+
+def write_leaderboard(results, output_dir="."):
+    """Rank leaderboard rows and write leaderboard.json and LEADERBOARD.md to output_dir."""
+    # Sort by Sharpe Ratio (Primary) then Return
+    results.sort(key=lambda x: (x['sharpe'], x['total_return']), reverse=True)
+
+    # Save JSON
+    with open(os.path.join(output_dir, "leaderboard.json"), "w") as f:
+        json.dump(results, f, indent=4, default=str)
+
+    # Generate Markdown
+    md = "# Strategy Leaderboard\n\n"
+    md += f"**Date:** {datetime.now().strftime('%Y-%m-%d')}\n\n"
+    md += "| Rank | Strategy | Sharpe | Return % | Drawdown % | Win Rate % | Profit Factor | Trades |\n"
+    md += "|---|---|---|---|---|---|---|---|\n"
+
+    for i, r in enumerate(results):
+        md += f"| {i+1} | {r['strategy']} | {r['sharpe']:.2f} | {r['total_return']:.2f}% | {r['drawdown']:.2f}% | {r['win_rate']:.2f}% | {r['profit_factor']:.2f} | {r['trades']} |\n"
+
+    with open(os.path.join(output_dir, "LEADERBOARD.md"), "w") as f:
+        f.write(md)
+
+    logger.info(f"Leaderboard generated: {os.path.join(output_dir, 'LEADERBOARD.md')}")
+
 def run_leaderboard():
     engine = SimpleBacktestEngine(initial_capital=100000.0)
 
@@ -168,41 +204,12 @@ def run_leaderboard():
                     logger.error(f"Backtest failed for {run['name']}: {res['error']}")
                     continue
 
-                metrics = res.get('metrics', {})
-                results.append({
-                    "strategy": run['name'],
-                    "params": run['params'],
-                    "total_return": metrics.get('total_return_pct', 0),
-                    "sharpe": metrics.get('sharpe_ratio', 0),
-                    "drawdown": metrics.get('max_drawdown_pct', 0),
-                    "win_rate": metrics.get('win_rate', 0),
-                    "trades": res.get('total_trades', 0),
-                    "profit_factor": metrics.get('profit_factor', 0)
-                })
+                results.append(leaderboard_row(run['name'], run['params'], res.get('metrics', {}), res.get('total_trades', 0)))
 
             except Exception as e:
                 logger.error(f"Error backtesting {run['name']}: {e}", exc_info=True)
 
-    # Sort by Sharpe Ratio (Primary) then Return
-    results.sort(key=lambda x: (x['sharpe'], x['total_return']), reverse=True)
-
-    # Save JSON
-    with open("leaderboard.json", "w") as f:
-        json.dump(results, f, indent=4)
-
-    # Generate Markdown
-    md = "# Strategy Leaderboard\n\n"
-    md += f"**Date:** {datetime.now().strftime('%Y-%m-%d')}\n\n"
-    md += "| Rank | Strategy | Sharpe | Return % | Drawdown % | Win Rate % | Profit Factor | Trades |\n"
-    md += "|---|---|---|---|---|---|---|---|\n"
-
-    for i, r in enumerate(results):
-        md += f"| {i+1} | {r['strategy']} | {r['sharpe']:.2f} | {r['total_return']:.2f}% | {r['drawdown']:.2f}% | {r['win_rate']:.2f}% | {r['profit_factor']:.2f} | {r['trades']} |\n"
-
-    with open("LEADERBOARD.md", "w") as f:
-        f.write(md)
-
-    logger.info("Leaderboard generated: LEADERBOARD.md")
+    write_leaderboard(results)
 
 if __name__ == "__main__":
     run_leaderboard()
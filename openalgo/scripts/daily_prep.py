@@ -21,7 +21,11 @@ openalgo_dir = os.path.join(repo_root, 'openalgo')
 if openalgo_dir not in sys.path:
     sys.path.append(openalgo_dir)
 
-from openalgo.strategies.utils.symbol_resolver import SymbolResolver
+from openalgo.strategies.utils.symbol_resolver import (
+    SymbolResolver,
+    build_instrument_index,
+    default_index_path,
+)
 from openalgo.strategies.utils.trading_utils import APIClient
 
 # Configure Logging
@@ -76,6 +80,13 @@ def purge_stale_state():
             logger.info("Deleted cached instruments.csv")
         except Exception as e:
             logger.error(f"Failed to delete instruments.csv: {e}")
+    index_dir = default_index_path(inst_file)
+    if os.path.exists(index_dir):
+        try:
+            shutil.rmtree(index_dir)
+            logger.info("Deleted cached instrument index")
+        except Exception as e:
+            logger.error(f"Failed to delete instrument index: {e}")
 
     # 3. Clear Auth/Sessions
     if os.path.exists(SESSION_DIR):
@@ -192,6 +203,12 @@ def fetch_instruments():
             logger.error(f"Failed to save mock instruments: {e}")
             sys.exit(1)
 
+    # Strategies open this instead of parsing the CSV
+    try:
+        build_instrument_index(csv_path)
+    except Exception as e:
+        logger.error(f"Failed to build instrument index, strategies will read the CSV: {e}")
+
 def validate_symbols():
     logger.info("Validating Strategy Symbols...")
     if not os.path.exists(CONFIG_FILE):
@@ -214,6 +231,7 @@ def validate_symbols():
          return
 
     resolver = SymbolResolver(os.path.join(DATA_DIR, 'instruments.csv'))
+    results = resolver.resolve_all(configs)
 
     valid_count = 0
     invalid_count = 0
@@ -222,37 +240,27 @@ def validate_symbols():
     print(f"{'STRATEGY':<25} | {'TYPE':<8} | {'INPUT':<15} | {'RESOLVED':<30} | {'STATUS'}")
     print("-" * 95)
 
-    for strat_id, config in configs.items():
-        try:
-            resolved = resolver.resolve(config)
-
-            status = "✅ Valid"
-            resolved_str = "Unknown"
-
-            if resolved is None:
-                status = "🔴 Invalid"
-                invalid_count += 1
-                resolved_str = "None"
-            elif isinstance(resolved, dict):
-                # Options return dict
-                if resolved.get('status') == 'valid':
-                    resolved_str = f"Expiry: {resolved.get('expiry')}"
-                    valid_count += 1
-                else:
-                    status = "🔴 Invalid"
-                    invalid_count += 1
-                    resolved_str = "Invalid"
-            else:
-                # String result
-                resolved_str = str(resolved)
-                valid_count += 1
-
-            print(f"{strat_id:<25} | {config.get('type', ''):<8} | {config.get('underlying', ''):<15} | {resolved_str[:30]:<30} | {status}")
+    for strat_id, result in results.items():
+        config = configs[strat_id]
+        resolved = result['resolved']
 
-        except Exception as e:
-            logger.error(f"Error validating {strat_id}: {e}")
+        if result['status'] == 'error':
+            logger.error(f"Error validating {strat_id}: {result['error']}")
             invalid_count += 1
             print(f"{strat_id:<25} | {config.get('type', ''):<8} | {config.get('underlying', ''):<15} | {'ERROR':<30} | 🔴 Error")
+            continue
+
+        if result['status'] == 'valid':
+            status = "✅ Valid"
+            valid_count += 1
+            # Options return dict
+            resolved_str = f"Expiry: {resolved.get('expiry')}" if isinstance(resolved, dict) else str(resolved)
+        else:
+            status = "🔴 Invalid"
+            invalid_count += 1
+            resolved_str = "None" if resolved is None else "Invalid"
+
+        print(f"{strat_id:<25} | {config.get('type', ''):<8} | {config.get('underlying', ''):<15} | {resolved_str[:30]:<30} | {status}")
 
     print("-" * 95)
     if invalid_count > 0:
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
 import importlib
+import itertools
 import json
 import logging
 import os
-import random
 import sys
+import zlib
 from datetime import datetime, timedelta
 
 import numpy as np
@@ -15,6 +17,14 @@ import pandas as pd
 repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
 sys.path.append(repo_root)
 
+from openalgo.scripts.daily_backtest_leaderboard import leaderboard_row, write_leaderboard
+from openalgo.strategies.utils.backtest_farm import (
+    DatasetCache,
+    FarmTask,
+    TaskLedger,
+    frame_key,
+    run_farm,
+)
 from openalgo.strategies.utils.simple_backtest_engine import SimpleBacktestEngine
 from openalgo.strategies.utils.symbol_resolver import SymbolResolver
 from openalgo.strategies.utils.trading_utils import APIClient
@@ -25,6 +35,8 @@ logger = logging.getLogger("DailyBacktest")
 
 CONFIG_FILE = os.path.join(repo_root, 'openalgo/strategies/active_strategies.json')
 DATA_DIR = os.path.join(repo_root, 'openalgo/data')
+FARM_DIR = os.path.join(DATA_DIR, 'backtest_farm')
+INTERVAL = "15m" # Default backtest interval
 
 class BenchmarkManager:
     """Manages fetching and calculating benchmark returns (NIFTY 50)."""
@@ -73,7 +85,8 @@ class BenchmarkManager:
         return ((end_price - start_price) / start_price) * 100
 
 class DailyBacktester:
-    def __init__(self, source='mock', days=90, api_key=None, host="http://127.0.0.1:5001", optimize=False):
+    def __init__(self, source='mock', days=90, api_key=None, host="http://127.0.0.1:5001", optimize=False,
+                 workers=None, run_id=None, offline=False):
         self.resolver = SymbolResolver()
         self.results = []
         self.source = source
@@ -82,8 +95,17 @@ class DailyBacktester:
         self.api_key = api_key or os.getenv('OPENALGO_APIKEY', "dummy_key")
         self.host = host
         self.api_client = None
+        self.workers = workers
+        self.offline = offline
 
-        if self.source == 'api':
+        # A run keeps its dataset and task ledger: rerunning the same id resumes it,
+        # --offline replays it without fetching or generating data
+        self.run_id = run_id or f"{datetime.now():%Y%m%d}_{source}_{days}d"
+        self.run_dir = os.path.join(FARM_DIR, self.run_id)
+        self.dataset = DatasetCache(os.path.join(self.run_dir, 'dataset'))
+        self.ledger = TaskLedger(os.path.join(self.run_dir, 'ledger.jsonl'))
+
+        if self.source == 'api' and not self.offline:
             self.api_client = APIClient(self.api_key, self.host)
             self.benchmark_manager = BenchmarkManager(self.api_client)
         else:
@@ -117,21 +139,17 @@ class DailyBacktester:
             return None
 
     def generate_mock_data(self, symbol, days=30):
-        # Generate slightly realistic data with trends
-        dates = pd.date_range(end=datetime.now(), periods=days*75, freq='15min') # Reduced freq for Mock
-        price = 10000
-        opens = []
-        for _ in range(len(dates)):
-            change = random.normalvariate(0, 5)
-            price += change
-            opens.append(price)
+        # Generate slightly realistic data with trends, seeded by symbol so reruns match
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        dates = pd.date_range(end=pd.Timestamp.now().floor('15min'), periods=days*75, freq='15min') # Reduced freq for Mock
+        n = len(dates)
 
         df = pd.DataFrame({
             'datetime': dates,
-            'open': opens,
-            'volume': [random.randint(100, 1000) for _ in range(len(dates))]
+            'open': 10000 + np.cumsum(rng.normal(0, 5, n)),
+            'volume': rng.integers(100, 1001, n)
         })
-        df['close'] = df['open'] + [random.normalvariate(0, 2) for _ in range(len(dates))]
+        df['close'] = df['open'] + rng.normal(0, 2, n)
         df['high'] = df[['open', 'close']].max(axis=1) + 2
         df['low'] = df[['open', 'close']].min(axis=1) - 2
 
@@ -140,7 +158,78 @@ class DailyBacktester:
         df.set_index('datetime', inplace=True)
         return df
 
-    def run_strategy_simulation(self, name, config, symbol, override_params=None):
+    def load_frame(self, symbol, exchange):
+        """Price data for one symbol: from the run's dataset, else generated/fetched once and stored."""
+        key = frame_key(symbol, exchange, INTERVAL)
+        df = self.dataset.load(key)
+        if df is not None:
+            return key, df
+        if self.offline:
+            logger.error(f"{key} is not in the dataset at {self.dataset.root}")
+            return key, None
+
+        if self.source == 'mock':
+            df = self.generate_mock_data(symbol, self.days)
+        else:
+            start_date = (datetime.now() - timedelta(days=self.days)).strftime("%Y-%m-%d")
+            end_date = datetime.now().strftime("%Y-%m-%d")
+            engine = SimpleBacktestEngine(api_key=self.api_key, host=self.host)
+            df = engine.load_historical_data(symbol, exchange, start_date, end_date, INTERVAL)
+            if df.empty:
+                return key, None
+
+        self.dataset.save(key, df)
+        return key, self.dataset.load(key)
+
+    def param_variants(self, name, config):
+        """(label, override_params) pairs: the configured params, plus the TUNABLE_PARAMS grid when optimizing."""
+        variants = [(name, None)]
+        if not self.optimize:
+            return variants
+
+        strategy_module = self.load_strategy_module(config.get('strategy'))
+        if not strategy_module or not hasattr(strategy_module, 'TUNABLE_PARAMS'):
+             logger.info(f"No tunable params for {name}")
+             return variants
+
+        tunable = strategy_module.TUNABLE_PARAMS
+        keys = list(tunable.keys())
+        for i, combo in enumerate(itertools.product(*tunable.values())):
+            variants.append((f"{name}_v{i+1}", dict(zip(keys, combo, strict=True))))
+        return variants
+
+    def build_tasks(self, configs, variants=None):
+        """One farm task per (strategy, symbol, params); frames are loaded once per symbol."""
+        tasks = []
+        frames = {}
+        for name, config in configs.items():
+            resolved = self.resolver.resolve(config)
+            if not resolved:
+                logger.error(f"Could not resolve a symbol for {name}")
+                continue
+            symbol = resolved if isinstance(resolved, str) else resolved.get('sample_symbol', 'UNKNOWN')
+
+            key = frame_key(symbol, config.get('exchange', 'NSE'), INTERVAL)
+            if key not in frames:
+                key, frame = self.load_frame(symbol, config.get('exchange', 'NSE'))
+                if frame is None:
+                    logger.error(f"No data for {name} ({symbol})")
+                    continue
+                frames[key] = frame
+
+            for label, params in (variants or self.param_variants)(name, config):
+                task_id = hashlib.sha1(
+                    json.dumps([label, config, symbol, params, key], sort_keys=True, default=str).encode()
+                ).hexdigest()[:16]
+                payload = {
+                    'name': label, 'config': config, 'symbol': symbol, 'params': params,
+                    'source': self.source, 'days': self.days, 'api_key': self.api_key, 'host': self.host,
+                }
+                # Bars are the best cost estimate we have: longest backtests start first
+                tasks.append(FarmTask(task_id, key, payload, cost=len(frames[key])))
+        return tasks, frames
+
+    def run_strategy_simulation(self, name, config, symbol, override_params=None, data=None):
         logger.info(f"Backtesting {name} ({symbol})...")
 
         # Initialize Engine
@@ -192,7 +281,12 @@ class DailyBacktester:
         start_date = (datetime.now() - timedelta(days=self.days)).strftime("%Y-%m-%d")
         end_date = datetime.now().strftime("%Y-%m-%d")
 
-        if self.source == 'mock':
+        if data is not None:
+            # Preloaded frame (backtest farm): served the same way as mock data
+            engine.client.history = lambda **kwargs: data
+            validation_valid = True
+            validation_issues = []
+        elif self.source == 'mock':
             # Mock Data Injection
             # SimpleBacktestEngine loads data via APIClient.history
             # We can monkey patch client.history for this engine instance
@@ -212,7 +306,7 @@ class DailyBacktester:
                 exchange=config.get('exchange', 'NSE'),
                 start_date=start_date,
                 end_date=end_date,
-                interval="15m" # Default backtest interval
+                interval=INTERVAL
             )
         except Exception as e:
             logger.error(f"Backtest Failed: {e}", exc_info=True)
@@ -226,20 +320,19 @@ class DailyBacktester:
         metrics['symbol'] = symbol
         metrics['params'] = params
         metrics['data_source'] = self.source
-
-        # Benchmark Comparison
-        if self.benchmark_manager and self.source == 'api':
-             # Approximate start/end from actual data
-             if res['closed_trades']:
-                  first_trade = res['closed_trades'][0]['entry_time'] # datetime
-                  last_trade = res['closed_trades'][-1]['exit_time']
-                  # Use string dates passed to backtest for simpler benchmark calc
-                  b_return = self.benchmark_manager.calculate_return(start_date, end_date)
-                  metrics['benchmark_return_pct'] = b_return
-                  metrics['alpha'] = metrics['total_return_pct'] - b_return
-             else:
-                  metrics['benchmark_return_pct'] = 0.0
-                  metrics['alpha'] = 0.0
+        metrics['total_trades'] = res.get('total_trades', 0)
+
+        return self.apply_benchmark(metrics)
+
+    def apply_benchmark(self, metrics):
+        """Benchmark Comparison"""
+        if self.benchmark_manager and self.source == 'api' and metrics.get('total_trades'):
+             # Use the backtest window dates for simpler benchmark calc
+             start_date = (datetime.now() - timedelta(days=self.days)).strftime("%Y-%m-%d")
+             end_date = datetime.now().strftime("%Y-%m-%d")
+             b_return = self.benchmark_manager.calculate_return(start_date, end_date)
+             metrics['benchmark_return_pct'] = b_return
+             metrics['alpha'] = metrics['total_return_pct'] - b_return
         else:
              metrics['benchmark_return_pct'] = 0.0
              metrics['alpha'] = 0.0
@@ -263,28 +356,24 @@ class DailyBacktester:
     def optimize_strategy(self, name, config, symbol):
         logger.info(f"Optimizing {name}...")
 
-        strategy_module = self.load_strategy_module(config.get('strategy'))
-        if not strategy_module or not hasattr(strategy_module, 'TUNABLE_PARAMS'):
-             logger.info(f"No tunable params for {name}")
+        optimize, self.optimize = self.optimize, True
+        try:
+            variants = self.param_variants(name, config)[1:]
+        finally:
+            self.optimize = optimize
+        if not variants:
              return
 
-        import itertools
-        tunable = strategy_module.TUNABLE_PARAMS
-        keys = list(tunable.keys())
-        values = list(tunable.values())
-        combinations = list(itertools.product(*values))
+        # The whole grid runs on the farm against one shared copy of the data
+        tasks, frames = self.build_tasks({name: {**config, 'symbol': symbol}}, variants=lambda *_: variants)
+        results = run_farm(tasks, frames, simulate_task, self.ledger, self.workers)
 
         best_sharpe = -999
         best_params = None
-
-        for combo in combinations:
-             params = dict(zip(keys, combo))
-             # Merge with base params logic handled in run_strategy_simulation via override_params
-
-             metrics = self.run_strategy_simulation(name, config, symbol, override_params=params)
+        for metrics in results:
              if metrics.get('sharpe_ratio', -999) > best_sharpe:
                   best_sharpe = metrics['sharpe_ratio']
-                  best_params = params
+                  best_params = metrics['params']
 
         logger.info(f"🏆 Best Params for {name}: {best_params} (Sharpe: {best_sharpe:.2f})")
         return best_params
@@ -295,18 +384,15 @@ class DailyBacktester:
         if self.source == 'api' and self.benchmark_manager:
             self.benchmark_manager.fetch_data(self.days)
 
-        print(f"\n🚀 STARTING DAILY BACKTESTS (Source: {self.source}, Days: {self.days})")
-
-        for name, config in configs.items():
-            resolved = self.resolver.resolve(config)
-            symbol = resolved if isinstance(resolved, str) else resolved.get('sample_symbol', 'UNKNOWN')
+        print(f"\n🚀 STARTING DAILY BACKTESTS (Source: {self.source}, Days: {self.days}, Run: {self.run_id})")
 
-            metrics = self.run_strategy_simulation(name, config, symbol)
+        tasks, frames = self.build_tasks(configs)
+        for task, metrics in zip(tasks, run_farm(tasks, frames, simulate_task, self.ledger, self.workers), strict=True):
             if 'error' in metrics:
-                logger.error(f"Error in {name}: {metrics['error']}")
+                logger.error(f"Error in {task.payload['name']}: {metrics['error']}")
                 continue
 
-            metrics = self.validate_risk(metrics)
+            metrics = self.validate_risk(self.apply_benchmark(metrics))
             self.results.append(metrics)
 
         self.generate_report()
@@ -332,12 +418,32 @@ class DailyBacktester:
                   print(f"- {row['strategy']}: {', '.join(row['risk_failures'])}")
 
     def generate_leaderboard(self):
-        output_file = os.path.join(repo_root, 'leaderboard.json')
-        # Serialize params/failures (ensure list/dict)
-        with open(output_file, 'w') as f:
-            # Convert failures list to string for easier JSON reading if needed, or keep structure
+        rows = [
+            {**leaderboard_row(m['strategy'], m['params'], m, m.get('total_trades', 0)),
+             'symbol': m['symbol'], 'risk_passed': m['risk_passed']}
+            for m in self.results
+        ]
+        write_leaderboard(rows, output_dir=repo_root)
+
+        # Full metrics stay with the run
+        os.makedirs(self.run_dir, exist_ok=True)
+        with open(os.path.join(self.run_dir, 'results.json'), 'w') as f:
             json.dump(self.results, f, indent=4, default=str)
-        logger.info(f"Leaderboard saved to {output_file}")
+        logger.info(f"Leaderboard saved to {os.path.join(repo_root, 'leaderboard.json')}")
+
+_task_backtester = None
+
+def simulate_task(payload, frame):
+    """Backtest farm task: one strategy/params run over a shared price frame."""
+    global _task_backtester
+    if _task_backtester is None or _task_backtester.source != payload['source']:
+        _task_backtester = DailyBacktester(source=payload['source'], days=payload['days'],
+                                           api_key=payload['api_key'], host=payload['host'], offline=True)
+    # Some strategies check the timestamp column
+    data = frame.assign(timestamp=frame.index)
+    return _task_backtester.run_strategy_simulation(
+        payload['name'], payload['config'], payload['symbol'], override_params=payload['params'], data=data
+    )
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run daily backtests")
@@ -346,8 +452,12 @@ if __name__ == "__main__":
     parser.add_argument("--api-key", type=str, default=None, help="API Key for real data")
     parser.add_argument("--host", type=str, default="http://127.0.0.1:5001", help="Broker API Host")
     parser.add_argument("--optimize", action="store_true", help="Enable parameter optimization")
+    parser.add_argument("--workers", type=int, default=None, help="Backtest processes (Default: CPU count, 1 = in process)")
+    parser.add_argument("--run-id", type=str, default=None, help="Run to create or resume (Default: <date>_<source>_<days>d)")
+    parser.add_argument("--offline", action="store_true", help="Replay the run's cached dataset without fetching data")
 
     args = parser.parse_args()
 
-    runner = DailyBacktester(source=args.source, days=args.days, api_key=args.api_key, host=args.host, optimize=args.optimize)
+    runner = DailyBacktester(source=args.source, days=args.days, api_key=args.api_key, host=args.host, optimize=args.optimize,
+                             workers=args.workers, run_id=args.run_id, offline=args.offline)
     runner.run()
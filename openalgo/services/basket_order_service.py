@@ -14,6 +14,7 @@ from database.settings_db import get_analyze_mode
 from extensions import socketio
 from services.telegram_alert_service import telegram_alert_service
 from utils.api_analyzer import analyze_request, generate_order_id
+from utils.broker_book_cache import invalidate_books
 from utils.constants import (
     REQUIRED_ORDER_FIELDS,
     VALID_ACTIONS,
@@ -134,6 +135,7 @@ def place_single_order(
     auth_token: str,
     total_orders: int,
     order_index: int,
+    broker: str,
 ) -> dict[str, Any]:
     """
     Place a single order (no per-order event emission - summary event emitted at end)
@@ -144,6 +146,7 @@ def place_single_order(
         auth_token: Authentication token
         total_orders: Total number of orders in the basket
         order_index: Index of the current order
+        broker: Broker name (for invalidating the cached books)
 
     Returns:
         Order result dictionary
@@ -170,6 +173,9 @@ def place_single_order(
             "status": "error",
             "message": "Failed to place order due to internal error",
         }
+    finally:
+        # Orders changed (or may have): the next book read goes to the broker
+        invalidate_books(auth_token, broker)
 
 
 def process_basket_order_with_auth(
@@ -307,7 +313,9 @@ def process_basket_order_with_auth(
             time.sleep(order_delay)  # Rate limit delay between orders
         # Create order with authentication fields without modifying original
         order_with_auth = {**order, "apikey": api_key, "strategy": basket_data["strategy"]}
-        result = place_single_order(order_with_auth, broker_module, auth_token, total_orders, i)
+        result = place_single_order(
+            order_with_auth, broker_module, auth_token, total_orders, i, broker
+        )
         if result:
             results.append(result)
         order_count += 1
@@ -318,7 +326,9 @@ def process_basket_order_with_auth(
             time.sleep(order_delay)  # Rate limit delay between orders
         # Create order with authentication fields without modifying original
         order_with_auth = {**order, "apikey": api_key, "strategy": basket_data["strategy"]}
-        result = place_single_order(order_with_auth, broker_module, auth_token, total_orders, i)
+        result = place_single_order(
+            order_with_auth, broker_module, auth_token, total_orders, i, broker
+        )
         if result:
             results.append(result)
         order_count += 1
@@ -10,6 +10,7 @@ from database.settings_db import get_analyze_mode
 from extensions import socketio
 from services.telegram_alert_service import telegram_alert_service
 from utils.api_analyzer import analyze_request
+from utils.broker_book_cache import invalidate_books
 from utils.logging import get_logger
 
 # Initialize logger
@@ -148,6 +149,9 @@ def cancel_all_orders_with_auth(
         }
         executor.submit(async_log_order, "cancelallorder", original_data, error_response)
         return False, error_response, 500
+    finally:
+        # Orders changed (or may have): the next book read goes to the broker
+        invalidate_books(auth_token, broker)
 
     # Prepare response data
     response_data = {
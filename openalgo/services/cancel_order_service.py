@@ -9,6 +9,7 @@ from database.auth_db import get_auth_token_broker
 from database.settings_db import get_analyze_mode
 from extensions import socketio
 from services.telegram_alert_service import telegram_alert_service
+from utils.broker_book_cache import invalidate_books
 from utils.logging import get_logger
 
 # Initialize logger
@@ -122,6 +123,9 @@ def cancel_order_with_auth(
         }
         executor.submit(async_log_order, "cancelorder", original_data, error_response)
         return False, error_response, 500
+    finally:
+        # Orders changed (or may have): the next book read goes to the broker
+        invalidate_books(auth_token, broker)
 
     if status_code == 200:
         # Emit SocketIO event asynchronously (non-blocking)
@@ -0,0 +1,479 @@
+"""
+Chart rendering for the Telegram bot
+
+Three parts keep repeated /chart requests cheap:
+
+- Bar store: history per (symbol, exchange, interval) kept in process. It is
+  seeded from Historify and only the bars after the last stored one are
+  fetched from the broker, through history_service rather than a REST round
+  trip to our own API.
+- PNG cache: rendered images keyed by (chart kind, symbol, exchange, interval,
+  days, last bar timestamp, theme) with LRU eviction. A new bar changes the
+  key, so cached images are never stale. Concurrent requests for the same key
+  share one render.
+- Renderer pool: worker processes that each start Kaleido's headless browser
+  once and keep it warm, instead of Plotly launching a browser per image.
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import pytz
+from plotly.subplots import make_subplots
+
+from utils.logging import get_logger
+
+# The bot runs in a real OS thread; keep the pool's locks out of eventlet's hub
+if "eventlet" in sys.modules:
+    import eventlet
+
+    original_threading = eventlet.patcher.original("threading")
+else:
+    import threading as original_threading
+
+logger = get_logger(__name__)
+
+IST = pytz.timezone("Asia/Kolkata")
+
+RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "2"))
+RENDER_TIMEOUT = 30  # Seconds to wait for one render
+PNG_CACHE_SIZE = int(os.getenv("CHART_PNG_CACHE_SIZE", "128"))
+BAR_STORE_SIZE = 256  # Series kept in the bar store
+BAR_REFRESH_SECONDS = 30  # Serve stored bars without a top-up for this long
+
+THEMES = {"light": "plotly_white", "dark": "plotly_dark"}
+
+# Per chart kind: title, x-axis label format, approximate number of ticks
+CHART_KINDS = {
+    "intraday": ("{symbol} - {days} Day Intraday ({interval})", "%d %b %H:%M", 8),
+    "daily": ("{symbol} - Daily Chart ({days} Days)", "%d %b", 10),
+}
+
+
+def build_chart_figure(
+    df: pd.DataFrame, kind: str, symbol: str, interval: str, days: int, theme: str = "light"
+) -> go.Figure:
+    """
+    Candlestick chart with volume.
+
+    Args:
+        df: Bars with timestamp (IST datetime), open, high, low, close, volume
+        kind: "intraday" or "daily"
+    """
+    title, tick_format, tick_count = CHART_KINDS[kind]
+
+    fig = make_subplots(
+        rows=2,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        subplot_titles=(title.format(symbol=symbol, days=days, interval=interval), None),
+        row_heights=[0.7, 0.3],
+    )
+
+    fig.add_trace(
+        go.Candlestick(
+            x=df["timestamp"],
+            open=df["open"],
+            high=df["high"],
+            low=df["low"],
+            close=df["close"],
+            name="Price",
+            increasing_line_color="green",
+            decreasing_line_color="red",
+        ),
+        row=1,
+        col=1,
+    )
+
+    colors = [
+        "red" if close < open else "green"
+        for close, open in zip(df["close"], df["open"], strict=True)
+    ]
+    fig.add_trace(
+        go.Bar(
+            x=df["timestamp"],
+            y=df["volume"],
+            marker_color=colors,
+            name="Volume",
+            showlegend=False,
+        ),
+        row=2,
+        col=1,
+    )
+
+    fig.update_layout(
+        xaxis_rangeslider_visible=False,
+        height=600,
+        template=THEMES.get(theme, THEMES["light"]),
+        showlegend=False,
+        hovermode="x unified",
+    )
+
+    # Category axes avoid gaps for non-trading time; label only every Nth bar
+    tick_spacing = max(1, len(df) // tick_count)
+    tick_labels = []
+    for i in range(0, len(df), tick_spacing):
+        ts = df["timestamp"].iloc[i]
+        tick_labels.append(pd.Timestamp(ts).strftime(tick_format).upper() if pd.notna(ts) else "")
+
+    fig.update_xaxes(
+        type="category",
+        row=2,
+        col=1,
+        tickmode="array",
+        tickvals=list(range(0, len(df), tick_spacing)),
+        ticktext=tick_labels,
+        tickangle=45,
+    )
+    fig.update_xaxes(type="category", row=1, col=1, showticklabels=False)
+    fig.update_yaxes(title_text="")
+    return fig
+
+
+def _renderer_main(conn):
+    """Renderer process: one warm Kaleido browser, figures in over the pipe, PNGs out"""
+    warnings.filterwarnings("ignore", message="The kopts argument is ignored")
+    try:
+        import kaleido
+
+        # A one-shot render first: it fails fast if Chrome is missing, where
+        # a server would hang
+        pio.to_image(go.Figure(), format="png")
+        if hasattr(kaleido, "start_sync_server"):
+            kaleido.start_sync_server(n=1, silence_warnings=True)
+            pio.to_image(go.Figure(), format="png")  # Launch the server's browser now
+    except Exception as e:
+        logger.warning(f"Chart renderer warm-up failed: {e}")
+
+    while True:
+        try:
+            fig_json = conn.recv()
+        except (EOFError, OSError):
+            break
+        if fig_json is None:
+            break
+        try:
+            conn.send((True, pio.from_json(fig_json, skip_invalid=True).to_image(format="png")))
+        except Exception as e:
+            conn.send((False, str(e)))
+
+
+class ChartRenderer:
+    """
+    Pool of warm renderer processes.
+
+    Workers are started on demand (or all at once by warm()) and reused; a
+    worker that fails or times out is replaced.
+    """
+
+    def __init__(self, workers: int = RENDER_WORKERS, timeout: float = RENDER_TIMEOUT):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle = []  # (process, connection)
+        self._started = 0
+        self._cond = original_threading.Condition()
+
+    def warm(self):
+        """Start all workers so the first charts don't pay the browser start-up"""
+        with self._cond:
+            missing = self.workers - self._started
+            self._started += missing
+        for _ in range(missing):
+            worker = self._spawn()
+            with self._cond:
+                self._idle.append(worker)
+                self._cond.notify()
+
+    def render(self, fig: go.Figure) -> bytes:
+        """Render a figure to PNG in a pool worker"""
+        fig_json = fig.to_json()
+        worker = self._checkout()
+        healthy = False
+        try:
+            process, conn = worker
+            conn.send(fig_json)
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"Chart render took longer than {self.timeout}s")
+            ok, payload = conn.recv()
+            healthy = process.is_alive()
+            if not ok:
+                raise RuntimeError(f"Chart render failed: {payload}")
+            return payload
+        finally:
+            self._checkin(worker, healthy)
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._started -= len(idle)
+        for process, conn in idle:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+
+    def _spawn(self):
+        try:
+            parent, child = self._ctx.Pipe()
+            process = self._ctx.Process(
+                target=_renderer_main, args=(child,), name="chart-renderer", daemon=True
+            )
+            process.start()
+            child.close()
+            return process, parent
+        except Exception:
+            with self._cond:
+                self._started -= 1
+                self._cond.notify()
+            raise
+
+    def _checkout(self):
+        with self._cond:
+            while not self._idle and self._started >= self.workers:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+        return self._spawn()
+
+    def _checkin(self, worker, healthy: bool):
+        if not healthy:
+            process, conn = worker
+            conn.close()
+            process.kill()
+        with self._cond:
+            if healthy:
+                self._idle.append(worker)
+            else:
+                self._started -= 1
+            self._cond.notify()
+
+
+class PngCache:
+    """LRU cache of rendered charts; concurrent misses on one key render once"""
+
+    def __init__(self, max_entries: int = PNG_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self._pending: dict[tuple, original_threading.Event] = {}
+        self._lock = original_threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: tuple, render: Callable[[], bytes]) -> bytes:
+        while True:
+            with self._lock:
+                png = self._entries.get(key)
+                if png is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return png
+                pending = self._pending.get(key)
+                if pending is None:
+                    self._pending[key] = original_threading.Event()
+                    self.misses += 1
+                    break
+            # Another request is rendering this chart; use its image
+            pending.wait(RENDER_TIMEOUT)
+
+        try:
+            png = render()
+            with self._lock:
+                self._entries[key] = png
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return png
+        finally:
+            with self._lock:
+                self._pending.pop(key).set()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def normalize_bars(df: pd.DataFrame) -> pd.DataFrame:
+    """Bars with an epoch-seconds timestamp column, sorted and de-duplicated"""
+    df = df.reset_index()
+    if "timestamp" not in df.columns:
+        df = df.rename(columns={"index": "timestamp"})
+    ts = df["timestamp"]
+    if not pd.api.types.is_numeric_dtype(ts):
+        ts = pd.to_datetime(ts)
+        if ts.dt.tz is None:
+            ts = ts.dt.tz_localize(IST)
+        ts = (ts - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+    df["timestamp"] = ts.astype("int64")
+    df = df[["timestamp", "open", "high", "low", "close", "volume"]]
+    return df.drop_duplicates("timestamp", keep="last").sort_values("timestamp", ignore_index=True)
+
+
+class BarStore:
+    """
+    In-process history per (symbol, exchange, interval).
+
+    The first request for a series reads Historify and fetches only the
+    missing tail from the broker; later requests top up from the last stored
+    bar, at most every `refresh_seconds`.
+    """
+
+    def __init__(
+        self, refresh_seconds: float = BAR_REFRESH_SECONDS, max_series: int = BAR_STORE_SIZE
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.max_series = max_series
+        self._series: OrderedDict[tuple, dict] = OrderedDict()
+        self._lock = original_threading.Lock()
+
+    def get_bars(
+        self,
+        symbol: str,
+        exchange: str,
+        interval: str,
+        start: date,
+        api_key: str,
+        fallback: Callable[[date, date], pd.DataFrame | None] | None = None,
+    ) -> pd.DataFrame | None:
+        """
+        Bars from `start` to now, or None if no source has any.
+
+        Args:
+            fallback: Called with (start, end) when neither Historify nor the
+                broker returns bars, e.g. an SDK client for a remote host
+        """
+        key = (symbol, exchange, interval)
+        today = datetime.now(IST).date()
+        with self._lock:
+            entry = self._series.get(key)
+
+        if entry is not None and entry["start"] <= start:
+            bars, start_covered = entry["bars"], entry["start"]
+            if time.monotonic() - entry["refreshed"] >= self.refresh_seconds:
+                bars = self._top_up(bars, symbol, exchange, interval, today, api_key)
+        else:
+            bars = self._fetch(symbol, exchange, interval, start, today, api_key, source="db")
+            if bars is None:
+                bars = self._fetch(symbol, exchange, interval, start, today, api_key)
+            else:
+                bars = self._top_up(bars, symbol, exchange, interval, today, api_key)
+            if bars is None and fallback is not None:
+                history = fallback(start, today)
+                if history is not None and not history.empty:
+                    bars = normalize_bars(history)
+            if bars is None:
+                return None
+            start_covered = start
+
+        with self._lock:
+            self._series[key] = {
+                "bars": bars,
+                "start": start_covered,
+                "refreshed": time.monotonic(),
+            }
+            self._series.move_to_end(key)
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+
+        since = int(IST.localize(datetime.combine(start, datetime.min.time())).timestamp())
+        return bars[bars["timestamp"] >= since].reset_index(drop=True)
+
+    def _top_up(self, bars, symbol, exchange, interval, today, api_key):
+        """Fetch bars from the day of the last stored bar onwards and merge them"""
+        last_day = datetime.fromtimestamp(int(bars["timestamp"].iloc[-1]), IST).date()
+        fresh = self._fetch(symbol, exchange, interval, last_day, today, api_key)
+        if fresh is None:
+            return bars
+        return normalize_bars(pd.concat([bars, fresh], ignore_index=True))
+
+    @staticmethod
+    def _fetch(symbol, exchange, interval, start, end, api_key, source="api"):
+        from services.history_service import get_history
+
+        try:
+            success, response, _ = get_history(
+                symbol=symbol,
+                exchange=exchange,
+                interval=interval,
+                start_date=start.strftime("%Y-%m-%d"),
+                end_date=end.strftime("%Y-%m-%d"),
+                api_key=api_key,
+                source=source,
+            )
+        except Exception as e:
+            logger.warning(f"History fetch from {source} failed for {symbol}: {e}")
+            return None
+        if not success or not response.get("data"):
+            return None
+        return normalize_bars(pd.DataFrame(response["data"]))
+
+
+_renderer: ChartRenderer | None = None
+_png_cache = PngCache()
+_bar_store = BarStore()
+_renderer_lock = original_threading.Lock()
+
+
+def get_chart_renderer() -> ChartRenderer:
+    """Process-wide renderer pool"""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ChartRenderer()
+        return _renderer
+
+
+def render_chart(
+    kind: str,
+    symbol: str,
+    exchange: str,
+    interval: str,
+    days: int,
+    api_key: str,
+    theme: str = "light",
+    fallback: Callable[[date, date], pd.DataFrame | None] | None = None,
+) -> bytes | None:
+    """
+    PNG chart for the Telegram bot, from cache when the bars haven't changed.
+
+    Args:
+        kind: "intraday" (last `days` calendar days) or "daily" (last `days` bars)
+        fallback: History source used when Historify and the broker have no bars
+
+    Returns:
+        PNG bytes, or None if there is no data
+    """
+    today = datetime.now(IST).date()
+    lookback = days if kind == "intraday" else int(days * 1.5)  # Daily: room for holidays
+    bars = _bar_store.get_bars(
+        symbol, exchange, interval, today - timedelta(days=lookback), api_key, fallback
+    )
+    if bars is None or bars.empty:
+        logger.error(f"No data available for {symbol} {exchange} {interval} chart")
+        return None
+    if kind == "daily":
+        bars = bars.tail(days)
+
+    key = (kind, symbol, exchange, interval, days, int(bars["timestamp"].iloc[-1]), theme)
+
+    def render():
+        df = bars.assign(
+            timestamp=pd.to_datetime(bars["timestamp"], unit="s", utc=True).dt.tz_convert(IST)
+        )
+        fig = build_chart_figure(df, kind, symbol, interval, days, theme)
+        return get_chart_renderer().render(fig)
+
+    return _png_cache.get_or_render(key, render)
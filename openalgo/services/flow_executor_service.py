@@ -2,14 +2,30 @@
 """
 Flow Workflow Executor Service
 Executes workflow nodes using internal OpenAlgo services (synchronous Flask version)
+
+Saved workflows are compiled once into a cached WorkflowPlan (id-indexed
+nodes and edges, branch independence, pre-parsed {{variable}} templates).
+A run executes as tasks on a shared worker pool:
+- Fan-outs whose branches reach disjoint sets of nodes run concurrently;
+  branches that meet again (e.g. at a logic gate) keep the sequential order
+- Delay and Wait Until nodes park the run on a timer wheel instead of
+  sleeping a worker
+- Runs of the same workflow queue and start one after another
 """
 
+import hashlib
 import json
 import logging
+import math
+import os
 import re
 import threading
 import time as time_module
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, time
+from functools import lru_cache, partial
 from typing import Any, Dict, List, Optional, Tuple
 
 from database.flow_db import (
@@ -27,17 +43,13 @@ logger = logging.getLogger(__name__)
 MAX_NODE_DEPTH = 100
 MAX_NODE_VISITS = 500
 
-# Execution locks to prevent concurrent execution
-_workflow_locks: dict[int, threading.Lock] = {}
-_locks_mutex = threading.Lock()
-
+# Runtime
+FLOW_WORKERS = int(os.getenv("FLOW_WORKERS", "8"))
+FLOW_RUN_QUEUE_SIZE = int(os.getenv("FLOW_RUN_QUEUE_SIZE", "16"))  # Waiting runs per workflow
+TIMER_TICK_SECONDS = 0.05
+TIMER_SLOTS = 512
 
-def get_workflow_lock(workflow_id: int) -> threading.Lock:
-    """Get or create a lock for a workflow"""
-    with _locks_mutex:
-        if workflow_id not in _workflow_locks:
-            _workflow_locks[workflow_id] = threading.Lock()
-        return _workflow_locks[workflow_id]
+TRIGGER_TYPES = ("start", "webhookTrigger", "priceAlert")
 
 
 def parse_time_string(
@@ -65,6 +77,49 @@ def parse_time_string(
         return (default_hour, default_minute, 0)
 
 
+BUILTIN_VARIABLES = {
+    "timestamp": "%Y-%m-%d %H:%M:%S",
+    "date": "%Y-%m-%d",
+    "time": "%H:%M:%S",
+    "year": "%Y",
+    "month": "%m",
+    "day": "%d",
+    "hour": "%H",
+    "minute": "%M",
+    "second": "%S",
+    "weekday": "%A",
+    "iso_timestamp": None,
+}
+
+_TEMPLATE_PATTERN = re.compile(r"\{\{([^}]+)\}\}")
+
+
+def _format_builtin(name: str, now: datetime) -> str:
+    fmt = BUILTIN_VARIABLES[name]
+    return now.isoformat() if fmt is None else now.strftime(fmt)
+
+
+@lru_cache(maxsize=8192)
+def compile_template(text: str) -> tuple:
+    """
+    Parse a {{variable}} template once.
+
+    Returns:
+        Literal strings and (var_path, path_keys, placeholder) tuples, in order
+    """
+    parts = []
+    pos = 0
+    for match in _TEMPLATE_PATTERN.finditer(text):
+        if match.start() > pos:
+            parts.append(text[pos : match.start()])
+        var_path = match.group(1).strip()
+        parts.append((var_path, tuple(var_path.split(".")), match.group(0)))
+        pos = match.end()
+    if pos < len(text):
+        parts.append(text[pos:])
+    return tuple(parts)
+
+
 class WorkflowContext:
     """Context for storing variables during workflow execution"""
 
@@ -90,51 +145,39 @@ class WorkflowContext:
 
     def _get_builtin_variable(self, name: str) -> str | None:
         """Get built-in system variables"""
-        now = datetime.now()
-        builtins = {
-            "timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
-            "date": now.strftime("%Y-%m-%d"),
-            "time": now.strftime("%H:%M:%S"),
-            "year": now.strftime("%Y"),
-            "month": now.strftime("%m"),
-            "day": now.strftime("%d"),
-            "hour": now.strftime("%H"),
-            "minute": now.strftime("%M"),
-            "second": now.strftime("%S"),
-            "weekday": now.strftime("%A"),
-            "iso_timestamp": now.isoformat(),
-        }
-        return builtins.get(name)
+        if name not in BUILTIN_VARIABLES:
+            return None
+        return _format_builtin(name, datetime.now())
 
     def interpolate(self, text: str) -> str:
         """Replace {{variable}} patterns with actual values"""
-        if not isinstance(text, str):
+        if not isinstance(text, str) or "{{" not in text:
             return text
 
-        def replacer(match):
-            var_path = match.group(1).strip()
+        now = None
+        out = []
+        for part in compile_template(text):
+            if isinstance(part, str):
+                out.append(part)
+                continue
+
+            var_path, keys, raw = part
 
             # Check built-in variables first
-            builtin_value = self._get_builtin_variable(var_path)
-            if builtin_value is not None:
-                return builtin_value
+            if var_path in BUILTIN_VARIABLES:
+                now = now or datetime.now()
+                out.append(_format_builtin(var_path, now))
+                continue
 
             # Then check user variables
-            parts = var_path.split(".")
             value = self.variables
-
-            for part in parts:
-                if isinstance(value, dict):
-                    value = value.get(part)
-                else:
-                    return match.group(0)
-
+            for key in keys:
+                value = value.get(key) if isinstance(value, dict) else None
                 if value is None:
-                    return match.group(0)
-
-            return str(value) if value is not None else match.group(0)
+                    break
+            out.append(raw if value is None else str(value))
 
-        return re.sub(r"\{\{([^}]+)\}\}", replacer, text)
+        return "".join(out)
 
 
 class NodeExecutor:
@@ -827,9 +870,13 @@ class NodeExecutor:
             delay_ms = int(node_data.get("delayMs", 1000))
             delay_seconds = delay_ms / 1000
 
+        # The run parks on the timer wheel for delay_seconds before continuing
         self.log(f"Waiting for {delay_seconds} seconds")
-        time_module.sleep(delay_seconds)
-        return {"status": "success", "message": f"Waited {delay_seconds}s"}
+        return {
+            "status": "success",
+            "message": f"Waited {delay_seconds}s",
+            "delay_seconds": delay_seconds,
+        }
 
     def execute_wait_until(self, node_data: dict) -> dict:
         """Execute Wait Until node"""
@@ -847,8 +894,7 @@ class NodeExecutor:
 
         wait_seconds = target_seconds - now_seconds
         self.log(f"Waiting until {target_time_str} (~{wait_seconds}s)")
-        time_module.sleep(wait_seconds)
-        return {"status": "success", "waited": True}
+        return {"status": "success", "waited": True, "delay_seconds": wait_seconds}
 
     def execute_log(self, node_data: dict) -> dict:
         """Execute Log node"""
@@ -1663,144 +1709,327 @@ class NodeExecutor:
         return {"status": "success", "condition": condition_met}
 
 
-def execute_node_chain(
-    node_id: str,
-    nodes: list,
-    edge_map: dict[str, list[dict]],
-    incoming_edge_map: dict[str, list[dict]],
-    executor: NodeExecutor,
-    context: WorkflowContext,
-    visited_count: dict[str, int],
-    depth: int = 0,
-):
-    """Execute a chain of nodes"""
+# Node type -> NodeExecutor method
+NODE_METHODS = {
+    "placeOrder": "execute_place_order",
+    "smartOrder": "execute_smart_order",
+    "optionsOrder": "execute_options_order",
+    "modifyOrder": "execute_modify_order",
+    "optionsMultiOrder": "execute_options_multi_order",
+    "cancelOrder": "execute_cancel_order",
+    "cancelAllOrders": "execute_cancel_all_orders",
+    "closePositions": "execute_close_positions",
+    "basketOrder": "execute_basket_order",
+    "splitOrder": "execute_split_order",
+    "getQuote": "execute_get_quote",
+    "getDepth": "execute_get_depth",
+    "openPosition": "execute_open_position",
+    "history": "execute_history",
+    "orderBook": "execute_order_book",
+    "tradeBook": "execute_trade_book",
+    "positionBook": "execute_position_book",
+    "holdings": "execute_holdings",
+    "funds": "execute_funds",
+    "delay": "execute_delay",
+    "waitUntil": "execute_wait_until",
+    "log": "execute_log",
+    "variable": "execute_variable",
+    "telegramAlert": "execute_telegram_alert",
+    "httpRequest": "execute_http_request",
+    "positionCheck": "execute_position_check",
+    "fundCheck": "execute_fund_check",
+    "priceCondition": "execute_price_condition",
+    "timeWindow": "execute_time_window",
+    "timeCondition": "execute_time_condition",
+    "priceAlert": "execute_price_alert",
+    # Streaming Nodes
+    "subscribeLtp": "execute_subscribe_ltp",
+    "subscribeQuote": "execute_subscribe_quote",
+    "subscribeDepth": "execute_subscribe_depth",
+    "unsubscribe": "execute_unsubscribe",
+}
+
+# Logic gates also receive the condition results of their inputs
+GATE_METHODS = {
+    "andGate": "execute_and_gate",
+    "orGate": "execute_or_gate",
+    "notGate": "execute_not_gate",
+}
+
+
+@dataclass
+class WorkflowPlan:
+    """A workflow graph compiled for execution"""
+
+    start_id: str
+    nodes: dict[str, dict]
+    edges: dict[str, list[dict]]  # Outgoing edges by source node
+    inputs: dict[str, list[str]]  # Source node of each incoming edge, by target node
+    parallel: frozenset[str]  # Nodes whose outgoing branches share no nodes
+
+
+def _warm_templates(value: Any):
+    """Parse every {{variable}} template in node data ahead of the first run"""
+    if isinstance(value, str):
+        if "{{" in value:
+            compile_template(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _warm_templates(item)
+    elif isinstance(value, list):
+        for item in value:
+            _warm_templates(item)
+
+
+def compile_workflow(nodes: list[dict], edges: list[dict]) -> WorkflowPlan:
+    """Index a workflow's nodes and edges and find its independent fan-outs"""
+    start_node = next((n for n in nodes if n.get("type") in TRIGGER_TYPES), None)
+    if not start_node:
+        raise Exception("No trigger node found")
+
+    node_map = {}
+    for node in nodes:
+        node_map[node["id"]] = node
+        _warm_templates(node.get("data", {}))
+
+    edge_map: dict[str, list[dict]] = {}
+    inputs: dict[str, list[str]] = {}
+    for edge in edges:
+        edge_map.setdefault(edge["source"], []).append(edge)
+        inputs.setdefault(edge["target"], []).append(edge["source"])
+
+    reach_cache: dict[str, set[str]] = {}
+
+    def reachable(node_id: str) -> set[str]:
+        if node_id not in reach_cache:
+            seen = {node_id}
+            pending = [node_id]
+            while pending:
+                for edge in edge_map.get(pending.pop(), ()):
+                    target = edge.get("target")
+                    if target and target not in seen:
+                        seen.add(target)
+                        pending.append(target)
+            reach_cache[node_id] = seen
+        return reach_cache[node_id]
+
+    parallel = set()
+    for node_id, out_edges in edge_map.items():
+        targets = {edge.get("target") for edge in out_edges if edge.get("target")}
+        if len(targets) < 2 or len(targets) != len(out_edges):
+            continue
+        branches = [reachable(target) for target in targets]
+        union = set().union(*branches)
+        if node_id not in union and len(union) == sum(len(branch) for branch in branches):
+            parallel.add(node_id)
+
+    return WorkflowPlan(start_node["id"], node_map, edge_map, inputs, frozenset(parallel))
+
+
+_plans: dict[int, tuple[str, WorkflowPlan]] = {}
+_plans_lock = threading.Lock()
+
+
+def get_workflow_plan(workflow_id: int, nodes: list[dict], edges: list[dict]) -> WorkflowPlan:
+    """Compiled plan for a workflow, recompiled only when its graph changes"""
+    signature = hashlib.sha1(
+        json.dumps([nodes, edges], sort_keys=True, default=str).encode()
+    ).hexdigest()
+    with _plans_lock:
+        cached = _plans.get(workflow_id)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    plan = compile_workflow(nodes, edges)
+    with _plans_lock:
+        _plans[workflow_id] = (signature, plan)
+    return plan
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel running callbacks on a single thread.
+
+    A timer lands in slot (cursor + ticks) % slots with the number of full
+    revolutions left before it is due; each tick only looks at one slot.
+    Callbacks should hand their work off quickly (e.g. submit it to a pool).
+    """
+
+    def __init__(self, tick_seconds: float = TIMER_TICK_SECONDS, slots: int = TIMER_SLOTS):
+        self.tick_seconds = tick_seconds
+        self.slots: list[list[list]] = [[] for _ in range(slots)]
+        self.cursor = 0
+        self.pending = 0
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def schedule(self, delay_seconds: float, callback):
+        """Run callback after delay_seconds (rounded up to the next tick)"""
+        ticks = max(1, math.ceil(delay_seconds / self.tick_seconds))
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="flow-timer", daemon=True)
+                self._thread.start()
+            slot = (self.cursor + ticks) % len(self.slots)
+            self.slots[slot].append([(ticks - 1) // len(self.slots), callback])
+            self.pending += 1
+            self._cond.notify()
+
+    def _run(self):
+        next_tick = time_module.monotonic() + self.tick_seconds
+        while True:
+            with self._cond:
+                if not self.pending:
+                    while not self.pending:
+                        self._cond.wait()
+                    next_tick = time_module.monotonic() + self.tick_seconds
+                remaining = next_tick - time_module.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+
+                self.cursor = (self.cursor + 1) % len(self.slots)
+                due, waiting = [], []
+                for timer in self.slots[self.cursor]:
+                    if timer[0]:
+                        timer[0] -= 1
+                        waiting.append(timer)
+                    else:
+                        due.append(timer[1])
+                self.slots[self.cursor] = waiting
+                self.pending -= len(due)
+            next_tick += self.tick_seconds
+
+            for callback in due:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.exception(f"Error in flow timer callback: {e}")
+
+
+_pool: ThreadPoolExecutor | None = None
+_timer_wheel: TimerWheel | None = None
+_runtime_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _runtime_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=FLOW_WORKERS, thread_name_prefix="flow_node")
+        return _pool
+
+
+def _get_timer_wheel() -> TimerWheel:
+    global _timer_wheel
+    with _runtime_lock:
+        if _timer_wheel is None:
+            _timer_wheel = TimerWheel()
+        return _timer_wheel
+
+
+class WorkflowRun:
+    """State of one workflow execution"""
+
+    def __init__(
+        self,
+        workflow_id: int,
+        name: str,
+        nodes: list,
+        edges: list,
+        execution_id: int,
+        webhook_data: dict[str, Any] | None,
+        api_key: str | None,
+    ):
+        self.workflow_id = workflow_id
+        self.name = name
+        self.nodes = nodes
+        self.edges = edges
+        self.execution_id = execution_id
+        self.api_key = api_key
+        self.logs: list[dict] = []
+        self.context = WorkflowContext()
+        self.executor: NodeExecutor | None = None
+        self.plan: WorkflowPlan | None = None
+        self.visits = 0
+        self.finished = False
+        self.result: dict | None = None
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+
+        if webhook_data:
+            self.context.set_variable("webhook", webhook_data)
+            logger.info(f"Webhook data injected: {webhook_data}")
+
+
+class _Join:
+    """Resumes a paused task once every branch of a fan-out has finished"""
+
+    def __init__(self, branches: int, stack: list, parent: Optional["_Join"]):
+        self.remaining = branches
+        self.stack = stack
+        self.parent = parent
+        self.lock = threading.Lock()
+
+    def arrive(self) -> bool:
+        with self.lock:
+            self.remaining -= 1
+            return self.remaining == 0
+
+
+# Per-workflow run queues; the first run in a queue is the one executing
+_run_queues: dict[int, deque] = {}
+_run_queues_lock = threading.Lock()
+
+
+def _submit(fn, *args):
+    _get_pool().submit(fn, *args)
+
+
+def _execute_node(run: WorkflowRun, node_id: str, depth: int) -> dict | None:
+    """Execute a single node"""
     if depth > MAX_NODE_DEPTH:
         raise Exception(f"Maximum node depth ({MAX_NODE_DEPTH}) exceeded")
 
-    total_visits = sum(visited_count.values())
-    if total_visits >= MAX_NODE_VISITS:
-        raise Exception(f"Maximum node visits ({MAX_NODE_VISITS}) exceeded")
-
-    visited_count[node_id] = visited_count.get(node_id, 0) + 1
+    with run.lock:
+        if run.visits >= MAX_NODE_VISITS:
+            raise Exception(f"Maximum node visits ({MAX_NODE_VISITS}) exceeded")
+        run.visits += 1
 
-    node = next((n for n in nodes if n["id"] == node_id), None)
+    node = run.plan.nodes.get(node_id)
     if not node:
-        return
+        return None
 
     node_type = node.get("type")
     node_data = node.get("data", {})
-    result = None
+    executor = run.executor
 
-    # Execute node based on type
     if node_type == "start":
         executor.log("Workflow started")
-    elif node_type == "placeOrder":
-        result = executor.execute_place_order(node_data)
-    elif node_type == "smartOrder":
-        result = executor.execute_smart_order(node_data)
-    elif node_type == "optionsOrder":
-        result = executor.execute_options_order(node_data)
-    elif node_type == "modifyOrder":
-        result = executor.execute_modify_order(node_data)
-    elif node_type == "optionsMultiOrder":
-        result = executor.execute_options_multi_order(node_data)
-    elif node_type == "cancelOrder":
-        result = executor.execute_cancel_order(node_data)
-    elif node_type == "cancelAllOrders":
-        result = executor.execute_cancel_all_orders(node_data)
-    elif node_type == "closePositions":
-        result = executor.execute_close_positions(node_data)
-    elif node_type == "basketOrder":
-        result = executor.execute_basket_order(node_data)
-    elif node_type == "splitOrder":
-        result = executor.execute_split_order(node_data)
-    elif node_type == "getQuote":
-        result = executor.execute_get_quote(node_data)
-    elif node_type == "getDepth":
-        result = executor.execute_get_depth(node_data)
-    elif node_type == "openPosition":
-        result = executor.execute_open_position(node_data)
-    elif node_type == "history":
-        result = executor.execute_history(node_data)
-    elif node_type == "orderBook":
-        result = executor.execute_order_book(node_data)
-    elif node_type == "tradeBook":
-        result = executor.execute_trade_book(node_data)
-    elif node_type == "positionBook":
-        result = executor.execute_position_book(node_data)
-    elif node_type == "holdings":
-        result = executor.execute_holdings(node_data)
-    elif node_type == "funds":
-        result = executor.execute_funds(node_data)
-    elif node_type == "delay":
-        result = executor.execute_delay(node_data)
-    elif node_type == "waitUntil":
-        result = executor.execute_wait_until(node_data)
-    elif node_type == "log":
-        result = executor.execute_log(node_data)
-    elif node_type == "variable":
-        result = executor.execute_variable(node_data)
-    elif node_type == "telegramAlert":
-        result = executor.execute_telegram_alert(node_data)
-    elif node_type == "httpRequest":
-        result = executor.execute_http_request(node_data)
-    elif node_type == "positionCheck":
-        result = executor.execute_position_check(node_data)
-    elif node_type == "fundCheck":
-        result = executor.execute_fund_check(node_data)
-    elif node_type == "priceCondition":
-        result = executor.execute_price_condition(node_data)
-    elif node_type == "timeWindow":
-        result = executor.execute_time_window(node_data)
-    elif node_type == "timeCondition":
-        result = executor.execute_time_condition(node_data)
-    elif node_type == "priceAlert":
-        result = executor.execute_price_alert(node_data)
     elif node_type == "webhookTrigger":
         executor.log("Webhook trigger activated")
-    # Streaming Nodes
-    elif node_type == "subscribeLtp":
-        result = executor.execute_subscribe_ltp(node_data)
-    elif node_type == "subscribeQuote":
-        result = executor.execute_subscribe_quote(node_data)
-    elif node_type == "subscribeDepth":
-        result = executor.execute_subscribe_depth(node_data)
-    elif node_type == "unsubscribe":
-        result = executor.execute_unsubscribe(node_data)
-    elif node_type == "andGate":
-        incoming_edges = incoming_edge_map.get(node_id, [])
-        input_results = []
-        for edge in incoming_edges:
-            source_result = context.get_condition_result(edge.get("source"))
-            if source_result is not None:
-                input_results.append(source_result)
-        result = executor.execute_and_gate(node_data, input_results)
-    elif node_type == "orGate":
-        incoming_edges = incoming_edge_map.get(node_id, [])
-        input_results = []
-        for edge in incoming_edges:
-            source_result = context.get_condition_result(edge.get("source"))
-            if source_result is not None:
-                input_results.append(source_result)
-        result = executor.execute_or_gate(node_data, input_results)
-    elif node_type == "notGate":
-        incoming_edges = incoming_edge_map.get(node_id, [])
+    elif node_type in NODE_METHODS:
+        return getattr(executor, NODE_METHODS[node_type])(node_data)
+    elif node_type in GATE_METHODS:
         input_results = []
-        for edge in incoming_edges:
-            source_result = context.get_condition_result(edge.get("source"))
+        for source in run.plan.inputs.get(node_id, ()):
+            source_result = run.context.get_condition_result(source)
             if source_result is not None:
                 input_results.append(source_result)
-        result = executor.execute_not_gate(node_data, input_results)
+        return getattr(executor, GATE_METHODS[node_type])(node_data, input_results)
     else:
         executor.log(f"Unknown node type: {node_type}", "warning")
+    return None
+
 
-    # Determine which edges to follow
-    edges_to_follow = edge_map.get(node_id, [])
+def _next_nodes(run: WorkflowRun, node_id: str, result: dict | None) -> list[str]:
+    """Targets of the edges to follow after a node"""
+    edges_to_follow = run.plan.edges.get(node_id, [])
 
     # For condition nodes, filter edges based on Yes/No
     if result and "condition" in result:
         condition_met = result.get("condition", False)
-        context.set_condition_result(node_id, condition_met)
+        run.context.set_condition_result(node_id, condition_met)
         filtered_edges = []
         for edge in edges_to_follow:
             source_handle = edge.get("sourceHandle", "")
@@ -1812,117 +2041,211 @@ def execute_node_chain(
                 filtered_edges.append(edge)
         edges_to_follow = filtered_edges
 
-    # Execute connected nodes
-    for edge in edges_to_follow:
-        target_id = edge.get("target")
-        if target_id:
-            execute_node_chain(
-                target_id,
-                nodes,
-                edge_map,
-                incoming_edge_map,
-                executor,
-                context,
-                visited_count,
-                depth + 1,
-            )
+    return [edge["target"] for edge in edges_to_follow if edge.get("target")]
+
+
+def _run_task(run: WorkflowRun, stack: list, join: _Join | None):
+    """
+    Execute nodes depth first from a stack of (node_id, depth) frames.
+
+    The task parks itself on the timer wheel at delays and splits into
+    parallel tasks at independent fan-outs; either way it returns and the
+    worker is free.
+    """
+    try:
+        while stack:
+            if run.finished:
+                return
+            node_id, depth = stack.pop()
+            result = _execute_node(run, node_id, depth)
+            targets = _next_nodes(run, node_id, result)
+
+            delay = result.get("delay_seconds") if isinstance(result, dict) else None
+            if delay and delay > 0:
+                _get_timer_wheel().schedule(
+                    delay, partial(_submit, _follow, run, node_id, depth, targets, stack, join)
+                )
+                return
+            if not _follow(run, node_id, depth, targets, stack, join, resume=False):
+                return
+    except Exception as e:
+        _fail(run, e)
+        return
+
+    _task_done(run, join)
+
+
+def _follow(
+    run: WorkflowRun,
+    node_id: str,
+    depth: int,
+    targets: list[str],
+    stack: list,
+    join: _Join | None,
+    resume: bool = True,
+) -> bool:
+    """
+    Continue after a node: fork its independent branches or push its targets.
+
+    Returns:
+        True if the calling task should keep draining its stack
+    """
+    if len(targets) > 1 and node_id in run.plan.parallel:
+        fork = _Join(len(targets), stack, join)
+        for target in targets[1:]:
+            _submit(_run_task, run, [(target, depth + 1)], fork)
+        _run_task(run, [(targets[0], depth + 1)], fork)
+        return False
+
+    stack.extend((target, depth + 1) for target in reversed(targets))
+    if resume:
+        _run_task(run, stack, join)
+        return False
+    return True
+
+
+def _task_done(run: WorkflowRun, join: _Join | None):
+    if run.finished:
+        return
+    if join is None:
+        _finish(run)
+    elif join.arrive():
+        _run_task(run, join.stack, join.parent)
+
+
+def _begin(run: WorkflowRun):
+    """First task of a run: set up the executor and plan, then run from the trigger"""
+    try:
+        if not run.api_key:
+            raise Exception("API key required for workflow execution")
+
+        update_execution_status(run.execution_id, "running")
+        client = get_flow_client(run.api_key)
+        run.executor = NodeExecutor(client, run.context, run.logs)
+        logger.info(f"Starting workflow: {run.name}")
+        run.executor.log(f"Starting workflow: {run.name}")
+
+        run.plan = get_workflow_plan(run.workflow_id, run.nodes, run.edges)
+    except Exception as e:
+        _fail(run, e)
+        return
+
+    _run_task(run, [(run.plan.start_id, 0)], None)
+
+
+def _finish(run: WorkflowRun):
+    with run.lock:
+        if run.finished:
+            return
+        run.finished = True
+
+    update_execution_status(run.execution_id, "completed")
+    run.result = {
+        "status": "success",
+        "message": "Workflow executed successfully",
+        "execution_id": run.execution_id,
+        "logs": run.logs,
+    }
+    _release(run)
+
+
+def _fail(run: WorkflowRun, error: Exception):
+    with run.lock:
+        if run.finished:
+            return
+        run.finished = True
+
+    logger.exception(f"Workflow execution failed: {error}")
+    run.logs.append(
+        {
+            "time": datetime.utcnow().isoformat(),
+            "message": f"Error: {str(error)}",
+            "level": "error",
+        }
+    )
+    update_execution_status(run.execution_id, "failed", error=str(error))
+    run.result = {
+        "status": "error",
+        "message": str(error),
+        "execution_id": run.execution_id,
+        "logs": run.logs,
+    }
+    _release(run)
+
+
+def _release(run: WorkflowRun):
+    """Signal the run's waiters and start the next queued run of the workflow"""
+    run.done.set()
+    with _run_queues_lock:
+        queue = _run_queues.get(run.workflow_id)
+        if queue and queue[0] is run:
+            queue.popleft()
+        next_run = queue[0] if queue else None
+        if queue is not None and not queue:
+            del _run_queues[run.workflow_id]
+    if next_run is not None:
+        _submit(_begin, next_run)
 
 
 def execute_workflow(
-    workflow_id: int, webhook_data: dict[str, Any] | None = None, api_key: str = None
+    workflow_id: int,
+    webhook_data: dict[str, Any] | None = None,
+    api_key: str = None,
+    wait: bool = True,
 ) -> dict:
-    """Execute a workflow synchronously"""
-    lock = get_workflow_lock(workflow_id)
-
-    if lock.locked():
-        logger.warning(f"Workflow {workflow_id} is already running")
+    """
+    Execute a workflow.
+
+    A trigger arriving while the workflow runs is queued behind it (up to
+    FLOW_RUN_QUEUE_SIZE waiting runs).
+
+    Args:
+        wait: Block until the run finishes and return its result and logs;
+            otherwise return as soon as the run is started or queued
+    """
+    workflow = get_workflow(workflow_id)
+    if not workflow:
+        return {"status": "error", "message": "Workflow not found"}
+
+    with _run_queues_lock:
+        queued = len(_run_queues.get(workflow_id, ()))
+    if queued > FLOW_RUN_QUEUE_SIZE:
+        logger.warning(f"Workflow {workflow_id} run queue is full")
         return {
             "status": "error",
-            "message": "Workflow is already running",
+            "message": "Workflow is already running and its run queue is full",
             "already_running": True,
         }
 
-    with lock:
-        workflow = get_workflow(workflow_id)
-        if not workflow:
-            return {"status": "error", "message": "Workflow not found"}
-
-        execution = create_execution(workflow_id, status="running")
-        if not execution:
-            return {"status": "error", "message": "Failed to create execution record"}
-
-        logs = []
-        context = WorkflowContext()
-
-        if webhook_data:
-            context.set_variable("webhook", webhook_data)
-            logger.info(f"Webhook data injected: {webhook_data}")
-
-        try:
-            if not api_key:
-                raise Exception("API key required for workflow execution")
-
-            client = get_flow_client(api_key)
-            executor = NodeExecutor(client, context, logs)
-            logger.info(f"Starting workflow: {workflow.name}")
-            executor.log(f"Starting workflow: {workflow.name}")
-
-            nodes = workflow.nodes or []
-            edges = workflow.edges or []
-
-            # Find trigger node
-            trigger_types = ["start", "webhookTrigger", "priceAlert"]
-            start_node = next((n for n in nodes if n.get("type") in trigger_types), None)
-            if not start_node:
-                raise Exception("No trigger node found")
-
-            # Build edge maps
-            edge_map: dict[str, list[dict]] = {}
-            incoming_edge_map: dict[str, list[dict]] = {}
-            for edge in edges:
-                source = edge["source"]
-                target = edge["target"]
-                if source not in edge_map:
-                    edge_map[source] = []
-                edge_map[source].append(edge)
-                if target not in incoming_edge_map:
-                    incoming_edge_map[target] = []
-                incoming_edge_map[target].append(edge)
-
-            visited_count: dict[str, int] = {}
-
-            execute_node_chain(
-                start_node["id"],
-                nodes,
-                edge_map,
-                incoming_edge_map,
-                executor,
-                context,
-                visited_count,
-                depth=0,
-            )
+    execution = create_execution(workflow_id, status="pending")
+    if not execution:
+        return {"status": "error", "message": "Failed to create execution record"}
+
+    run = WorkflowRun(
+        workflow_id,
+        workflow.name,
+        workflow.nodes or [],
+        workflow.edges or [],
+        execution.id,
+        webhook_data,
+        api_key,
+    )
+    with _run_queues_lock:
+        queue = _run_queues.setdefault(workflow_id, deque())
+        queue.append(run)
+        start = len(queue) == 1
+    if start:
+        _submit(_begin, run)
+    else:
+        logger.info(f"Workflow {workflow_id} is running; queued execution {execution.id}")
 
-            update_execution_status(execution.id, "completed")
-            return {
-                "status": "success",
-                "message": "Workflow executed successfully",
-                "execution_id": execution.id,
-                "logs": logs,
-            }
+    if not wait:
+        return {
+            "status": "success",
+            "message": "Workflow started" if start else "Workflow queued",
+            "execution_id": execution.id,
+            "queued": not start,
+        }
 
-        except Exception as e:
-            logger.exception(f"Workflow execution failed: {e}")
-            logs.append(
-                {
-                    "time": datetime.utcnow().isoformat(),
-                    "message": f"Error: {str(e)}",
-                    "level": "error",
-                }
-            )
-            update_execution_status(execution.id, "failed", error=str(e))
-            return {
-                "status": "error",
-                "message": str(e),
-                "execution_id": execution.id,
-                "logs": logs,
-            }
+    run.done.wait()
+    return run.result
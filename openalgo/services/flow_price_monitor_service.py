@@ -2,20 +2,57 @@
 """
 Flow Price Monitor Service
 Real-time price monitoring for Price Alert triggers (Flask/sync version)
-Uses polling instead of WebSocket for simplicity in Flask context
+
+Alerts are evaluated on MarketDataService ticks. Each symbol keeps its alerts
+in sorted threshold lists, so a tick only looks at the alerts whose threshold
+it moved past:
+- rising: fire when the price rises past the threshold (greater than, crossing
+  up, the upper edge of an exit-channel alert, a channel entered from below)
+- falling: the mirror image
+- near: crossing targets, matched within a tolerance band or jumped over
+  between two ticks
+- moving: percentage moves against the previous tick, sorted by percentage
+
+The index only selects candidates; _evaluate_condition decides, and a
+candidate that does not fire is placed again from the current price.
+Triggered workflows run on a bounded thread pool. Symbols without recent
+ticks (feed down, no WebSocket) fall back to one quote per symbol per poll.
 """
 
 import logging
+import os
 import threading
 import time
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, Optional, Set
+from typing import Any, Optional
 
-from services.flow_openalgo_client import FlowOpenAlgoClient, get_flow_client
+from services.flow_openalgo_client import get_flow_client
 
 logger = logging.getLogger(__name__)
 
+ALERT_WORKERS = int(os.getenv("FLOW_ALERT_WORKERS", "4"))
+STALE_AFTER_SECONDS = 15  # No tick for this long: poll the symbol's quote
+
+RISING_CONDITIONS = {"greater_than", "crossing_up"}
+FALLING_CONDITIONS = {"less_than", "crossing_down"}
+INSIDE_CONDITIONS = {"entering_channel", "inside_channel"}
+OUTSIDE_CONDITIONS = {"exiting_channel", "outside_channel"}
+MOVING_CONDITIONS = {
+    "moving_up": "up",
+    "moving_up_percent": "up",
+    "moving_down": "down",
+    "moving_down_percent": "down",
+}
+
+# Threshold entries sort as (price, flag, workflow_id). Flags order the
+# inclusive edge of a channel against strict comparisons at the same price so
+# that a single bisect at (price, 1) splits fired from waiting entries.
+RISING_INCLUSIVE, RISING_STRICT = 0, 1
+FALLING_STRICT, FALLING_INCLUSIVE = 0, 1
+
 
 @dataclass
 class PriceAlert:
@@ -35,9 +72,114 @@ class PriceAlert:
     api_key: str | None = None
 
 
+def symbol_key(symbol: str, exchange: str) -> str:
+    """MarketDataService key for a symbol"""
+    return f"{exchange}:{symbol}"
+
+
+class SymbolAlerts:
+    """Alerts on one symbol, indexed by the price move that fires them"""
+
+    def __init__(self):
+        self.workflow_ids: set[int] = set()
+        self.rising: list[tuple[float, int, int]] = []
+        self.falling: list[tuple[float, int, int]] = []
+        self.near: list[tuple[float, int]] = []
+        self.moving: dict[str, list[tuple[float, int]]] = {"up": [], "down": []}
+        self.fresh: list[int] = []  # Waiting for their first tick
+        self.entries: dict[int, list[tuple[list, tuple]]] = {}
+        self.last_price: float | None = None
+        self.last_tick = 0.0
+
+    def __len__(self):
+        return len(self.workflow_ids)
+
+    def add(self, entries: list, entry: tuple, workflow_id: int):
+        insort(entries, entry)
+        self.entries.setdefault(workflow_id, []).append((entries, entry))
+
+    def discard(self, workflow_id: int):
+        """Drop every index entry of an alert"""
+        for entries, entry in self.entries.pop(workflow_id, ()):
+            i = bisect_left(entries, entry)
+            if i < len(entries) and entries[i] == entry:
+                del entries[i]
+        if workflow_id in self.fresh:
+            self.fresh.remove(workflow_id)
+
+    def place(self, alert: PriceAlert, price: float):
+        """Index an alert by the next price move that can fire it"""
+        condition = alert.condition
+        workflow_id = alert.workflow_id
+        target = alert.target_price
+        lower = alert.price_lower or target
+        upper = alert.price_upper or target
+
+        if condition in RISING_CONDITIONS:
+            self.add(self.rising, (target, RISING_STRICT, workflow_id), workflow_id)
+        elif condition in FALLING_CONDITIONS:
+            self.add(self.falling, (target, FALLING_STRICT, workflow_id), workflow_id)
+        elif condition == "crossing":
+            self.add(self.near, (target, workflow_id), workflow_id)
+        elif condition in INSIDE_CONDITIONS:
+            if price < lower:
+                self.add(self.rising, (lower, RISING_INCLUSIVE, workflow_id), workflow_id)
+            else:
+                self.add(self.falling, (upper, FALLING_INCLUSIVE, workflow_id), workflow_id)
+        elif condition in OUTSIDE_CONDITIONS:
+            self.add(self.rising, (upper, RISING_STRICT, workflow_id), workflow_id)
+            self.add(self.falling, (lower, FALLING_STRICT, workflow_id), workflow_id)
+        elif condition in MOVING_CONDITIONS:
+            threshold = (alert.percentage or 0) if condition.endswith("_percent") else 0
+            self.add(
+                self.moving[MOVING_CONDITIONS[condition]], (threshold, workflow_id), workflow_id
+            )
+        # Unknown conditions never fire and stay listed without an index entry
+
+    def candidates(self, price: float) -> list[tuple[int, bool]]:
+        """
+        Take the alerts this tick can fire out of the index.
+
+        Returns:
+            (workflow_id, armed) pairs; armed alerts have seen a previous tick
+        """
+        fired = []
+
+        i = bisect_left(self.rising, (price, 1))
+        fired.extend(entry[2] for entry in self.rising[:i])
+        del self.rising[:i]
+
+        i = bisect_left(self.falling, (price, 1))
+        fired.extend(entry[2] for entry in self.falling[i:])
+        del self.falling[i:]
+
+        if self.near:
+            tolerance = price * 0.001
+            low, high = price - tolerance, price + tolerance
+            if self.last_price is not None:
+                low, high = min(low, self.last_price), max(high, self.last_price)
+            lo = bisect_left(self.near, (low,))
+            hi = bisect_right(self.near, (high, float("inf")))
+            fired.extend(entry[1] for entry in self.near[lo:hi])
+            del self.near[lo:hi]
+
+        if self.last_price:
+            change = (price - self.last_price) / self.last_price * 100
+            for direction, move in (("up", change), ("down", -change)):
+                if move >= 0:
+                    entries = self.moving[direction]
+                    i = bisect_right(entries, (move, float("inf")))
+                    fired.extend(entry[1] for entry in entries[:i])
+                    del entries[:i]
+
+        armed = [(workflow_id, True) for workflow_id in dict.fromkeys(fired)]
+        fresh, self.fresh = self.fresh, []
+        return armed + [(workflow_id, False) for workflow_id in fresh]
+
+
 class FlowPriceMonitor:
     """
-    Singleton service that monitors prices using polling
+    Singleton service that evaluates price alerts on market data ticks
     and triggers workflows when price conditions are met.
     """
 
@@ -57,10 +199,19 @@ class FlowPriceMonitor:
 
         self._initialized = True
         self._alerts: dict[int, PriceAlert] = {}
+        self._books: dict[str, SymbolAlerts] = {}
+        self._symbols: set[str] = set()  # Filter shared with the market data subscription
+        self._alerts_lock = threading.RLock()
         self._running = False
+        self._subscriber_id: int | None = None
+        self._followed: set[tuple[str, str]] = set()  # (api key, symbol key) sent to the feed
+        self._executor: ThreadPoolExecutor | None = None
         self._monitor_thread: threading.Thread | None = None
-        self._poll_interval = 5  # seconds
+        self._poll_interval = 5  # seconds, fallback polling of stale symbols
         self._stop_event = threading.Event()
+        self._ticks = 0
+        self._triggered = 0
+        self._polled = 0
         logger.info("FlowPriceMonitor initialized")
 
     def add_alert(
@@ -88,7 +239,17 @@ class FlowPriceMonitor:
             api_key=api_key,
         )
 
-        self._alerts[workflow_id] = alert
+        key = symbol_key(symbol, exchange)
+        with self._alerts_lock:
+            self._discard(workflow_id)
+            self._alerts[workflow_id] = alert
+            book = self._books.get(key)
+            if book is None:
+                book = self._books[key] = SymbolAlerts()
+                self._symbols.add(key)
+            book.workflow_ids.add(workflow_id)
+            book.fresh.append(workflow_id)
+
         logger.info(
             f"Added price alert for workflow {workflow_id}: {symbol}@{exchange} {condition} {target_price}"
         )
@@ -96,17 +257,23 @@ class FlowPriceMonitor:
         if not self._running:
             self._start_monitoring()
 
+        if api_key:
+            self._follow_symbol(api_key, symbol, exchange)
+        else:
+            logger.warning(f"No API key for alert workflow {workflow_id}")
+
         return True
 
     def remove_alert(self, workflow_id: int) -> bool:
         """Remove a price alert for a workflow"""
-        if workflow_id not in self._alerts:
-            return False
+        with self._alerts_lock:
+            if not self._discard(workflow_id):
+                return False
+            empty = not self._alerts
 
-        del self._alerts[workflow_id]
         logger.info(f"Removed price alert for workflow {workflow_id}")
 
-        if not self._alerts and self._running:
+        if empty and self._running:
             self._stop_monitoring()
 
         return True
@@ -119,89 +286,194 @@ class FlowPriceMonitor:
         """Get count of active alerts"""
         return len(self._alerts)
 
+    def _discard(self, workflow_id: int) -> bool:
+        """Drop an alert from the index; call with the alerts lock held"""
+        alert = self._alerts.pop(workflow_id, None)
+        if alert is None:
+            return False
+        key = symbol_key(alert.symbol, alert.exchange)
+        book = self._books.get(key)
+        if book is not None:
+            book.discard(workflow_id)
+            book.workflow_ids.discard(workflow_id)
+            if not len(book):
+                del self._books[key]
+                self._symbols.discard(key)
+        return True
+
     def _start_monitoring(self):
-        """Start the price monitoring thread"""
+        """Subscribe to market data and start the fallback poller"""
         if self._running:
             return
 
+        from services.market_data_service import SubscriberPriority, get_market_data_service
+
         self._stop_event.clear()
         self._running = True
+        self._executor = ThreadPoolExecutor(
+            max_workers=ALERT_WORKERS, thread_name_prefix="flow_price_alert"
+        )
+        self._subscriber_id = get_market_data_service().subscribe_with_priority(
+            SubscriberPriority.HIGH, "ltp", self._on_market_data, self._symbols, "flow_price_alerts"
+        )
         self._monitor_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
         self._monitor_thread.start()
         logger.info(f"Price monitoring started with {len(self._alerts)} alerts")
 
     def _stop_monitoring(self):
-        """Stop the price monitoring thread"""
+        """Unsubscribe from market data and stop the fallback poller"""
         if not self._running:
             return
 
+        from services.market_data_service import get_market_data_service
+
         self._stop_event.set()
         self._running = False
 
+        if self._subscriber_id is not None:
+            get_market_data_service().unsubscribe_from_updates(self._subscriber_id)
+            self._subscriber_id = None
+
         if self._monitor_thread:
             self._monitor_thread.join(timeout=5)
             self._monitor_thread = None
 
+        if self._executor:
+            # Workflows already triggered still run to completion
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
         logger.info("Price monitoring stopped")
 
-    def _monitoring_loop(self):
-        """Main monitoring loop that polls prices"""
-        while not self._stop_event.is_set():
+    def _stop_if_idle(self):
+        """Stop monitoring unless an alert was added in the meantime"""
+        with self._alerts_lock:
+            if self._alerts:
+                return
+        self._stop_monitoring()
+
+    def _follow_symbol(self, api_key: str, symbol: str, exchange: str):
+        """Subscribe the symbol on the alert owner's WebSocket feed (once per key)"""
+        follow = (api_key, symbol_key(symbol, exchange))
+        with self._alerts_lock:
+            if follow in self._followed:
+                return
+            self._followed.add(follow)
+
+        def subscribe():
+            from database.auth_db import get_broker_name, get_username_by_apikey
+            from services.market_data_service import get_market_data_service
+            from services.websocket_service import subscribe_to_symbols
+
             try:
-                self._check_all_alerts()
+                username = get_username_by_apikey(api_key)
+                broker = get_broker_name(api_key)
+                if not username or not broker:
+                    return
+                if not get_market_data_service().register_user_callback(username):
+                    return
+                success, result, _ = subscribe_to_symbols(
+                    username, broker, [{"symbol": symbol, "exchange": exchange}], "LTP"
+                )
+                if not success:
+                    logger.info(f"Price alerts on {symbol} will poll: {result.get('message')}")
             except Exception as e:
-                logger.exception(f"Error in monitoring loop: {e}")
+                logger.warning(f"Could not subscribe {symbol} price alerts to the feed: {e}")
 
-            # Wait for next poll interval
-            self._stop_event.wait(timeout=self._poll_interval)
-
-    def _check_all_alerts(self):
-        """Check all active alerts against current prices"""
-        for workflow_id in list(self._alerts.keys()):
-            alert = self._alerts.get(workflow_id)
-            if alert and not alert.triggered:
-                try:
-                    self._check_alert(alert)
-                except Exception as e:
-                    logger.exception(f"Error checking alert for workflow {workflow_id}: {e}")
-
-    def _check_alert(self, alert: PriceAlert):
-        """Check a single alert against current price"""
-        if not alert.api_key:
-            logger.warning(f"No API key for alert workflow {alert.workflow_id}")
-            return
+        threading.Thread(target=subscribe, name="flow-price-feed", daemon=True).start()
 
+    def _on_market_data(self, data: dict):
+        """MarketDataService callback"""
+        symbol = data.get("symbol")
+        exchange = data.get("exchange")
+        ltp = (data.get("data") or {}).get("ltp")
+        if not symbol or not exchange or not ltp:
+            return
         try:
-            client = get_flow_client(alert.api_key)
-            result = client.get_quotes(symbol=alert.symbol, exchange=alert.exchange)
+            self.on_tick(symbol_key(symbol, exchange), float(ltp))
+        except Exception as e:
+            logger.exception(f"Error evaluating price alerts for {symbol}: {e}")
+
+    def on_tick(self, key: str, current_price: float):
+        """Evaluate the alerts a price update can fire and dispatch their workflows"""
+        if current_price <= 0:
+            return
 
-            if result.get("status") != "success":
-                logger.debug(f"Failed to get quote for {alert.symbol}: {result}")
+        fired = []
+        with self._alerts_lock:
+            book = self._books.get(key)
+            if book is None:
                 return
+            self._ticks += 1
+            book.last_tick = time.monotonic()
+
+            for workflow_id, armed in book.candidates(current_price):
+                alert = self._alerts.get(workflow_id)
+                if alert is None:
+                    continue
+                book.discard(workflow_id)
+                alert.last_price = book.last_price if armed else None
+
+                if self._evaluate_condition(alert, current_price):
+                    alert.triggered = True
+                    self._discard(workflow_id)
+                    fired.append(alert)
+                else:
+                    book.place(alert, current_price)
+                    alert.last_price = current_price
+
+            book.last_price = current_price
+            empty = not self._alerts
+
+        for alert in fired:
+            logger.info(
+                f"Price alert triggered for workflow {alert.workflow_id}: "
+                f"{alert.symbol}@{alert.exchange} {alert.condition} "
+                f"(price: {current_price}, target: {alert.target_price})"
+            )
+            self._trigger_workflow(alert.workflow_id, current_price, alert.api_key)
+
+        if fired and empty and self._running:
+            # Stopping joins the poller, which may be the thread calling us
+            threading.Thread(target=self._stop_if_idle, daemon=True).start()
 
-            data = result.get("data", {})
-            current_price = float(data.get("ltp", 0) if data else 0)
+    def _monitoring_loop(self):
+        """Fallback loop polling quotes for symbols the feed has gone quiet on"""
+        while not self._stop_event.wait(timeout=self._poll_interval):
+            try:
+                self._poll_stale_symbols()
+            except Exception as e:
+                logger.exception(f"Error in monitoring loop: {e}")
 
-            if current_price <= 0:
+    def _poll_stale_symbols(self):
+        """One quote per symbol without a recent tick, fed through on_tick"""
+        cutoff = time.monotonic() - STALE_AFTER_SECONDS
+        with self._alerts_lock:
+            stale = {}
+            for alert in self._alerts.values():
+                key = symbol_key(alert.symbol, alert.exchange)
+                book = self._books.get(key)
+                if book is not None and book.last_tick < cutoff and alert.api_key:
+                    stale.setdefault(key, alert)
+
+        for key, alert in stale.items():
+            if self._stop_event.is_set():
                 return
+            try:
+                client = get_flow_client(alert.api_key)
+                result = client.get_quotes(symbol=alert.symbol, exchange=alert.exchange)
 
-            condition_met = self._evaluate_condition(alert, current_price)
+                if result.get("status") != "success":
+                    logger.debug(f"Failed to get quote for {alert.symbol}: {result}")
+                    continue
 
-            if condition_met and not alert.triggered:
-                alert.triggered = True
-                logger.info(
-                    f"Price alert triggered for workflow {alert.workflow_id}: "
-                    f"{alert.symbol}@{alert.exchange} {alert.condition} "
-                    f"(price: {current_price}, target: {alert.target_price})"
-                )
+                data = result.get("data", {})
+                current_price = float(data.get("ltp", 0) if data else 0)
+                self._polled += 1
+                self.on_tick(key, current_price)
 
-                self._trigger_workflow(alert.workflow_id, current_price, alert.api_key)
-                self.remove_alert(alert.workflow_id)
-            else:
-                alert.last_price = current_price
-
-        except Exception as e:
-            logger.exception(f"Error checking price for {alert.symbol}: {e}")
+            except Exception as e:
+                logger.exception(f"Error checking price for {alert.symbol}: {e}")
 
     def _evaluate_condition(self, alert: PriceAlert, current_price: float) -> bool:
         """Evaluate if the price condition is met"""
@@ -218,7 +490,12 @@ class FlowPriceMonitor:
             return current_price < target
 
         elif condition == "crossing":
-            return abs(current_price - target) <= tolerance
+            if abs(current_price - target) <= tolerance:
+                return True
+            # Ticks are conflated, so a cross can fall between two updates
+            return last_price is not None and (
+                min(last_price, current_price) <= target <= max(last_price, current_price)
+            )
 
         elif condition == "crossing_up":
             if last_price is None:
@@ -265,7 +542,7 @@ class FlowPriceMonitor:
         return False
 
     def _trigger_workflow(self, workflow_id: int, trigger_price: float, api_key: str):
-        """Trigger workflow execution"""
+        """Queue the workflow on the alert executor"""
 
         def run_workflow():
             try:
@@ -277,14 +554,24 @@ class FlowPriceMonitor:
                     "triggered_at": datetime.now().isoformat(),
                 }
 
-                result = execute_workflow(workflow_id, webhook_data=webhook_data, api_key=api_key)
+                result = execute_workflow(
+                    workflow_id, webhook_data=webhook_data, api_key=api_key, wait=False
+                )
                 logger.info(f"Workflow {workflow_id} execution result: {result.get('status')}")
 
             except Exception as e:
                 logger.exception(f"Failed to execute workflow {workflow_id}: {e}")
 
-        thread = threading.Thread(target=run_workflow, daemon=True)
-        thread.start()
+        self._triggered += 1
+        executor = self._executor
+        if executor is None:
+            threading.Thread(target=run_workflow, daemon=True).start()
+            return
+        try:
+            executor.submit(run_workflow)
+        except RuntimeError:
+            # Executor shut down after the last alert fired
+            threading.Thread(target=run_workflow, daemon=True).start()
 
     def is_running(self) -> bool:
         """Check if monitoring is active"""
@@ -292,10 +579,17 @@ class FlowPriceMonitor:
 
     def get_status(self) -> dict[str, Any]:
         """Get current monitor status"""
+        with self._alerts_lock:
+            alerts = list(self._alerts.values())
+            books = {key: book.last_price for key, book in self._books.items()}
         return {
             "running": self._running,
-            "alerts_count": len(self._alerts),
+            "alerts_count": len(alerts),
+            "symbols_count": len(books),
             "poll_interval": self._poll_interval,
+            "ticks": self._ticks,
+            "polled_quotes": self._polled,
+            "triggered": self._triggered,
             "alerts": [
                 {
                     "workflow_id": alert.workflow_id,
@@ -303,17 +597,21 @@ class FlowPriceMonitor:
                     "exchange": alert.exchange,
                     "condition": alert.condition,
                     "target_price": alert.target_price,
-                    "last_price": alert.last_price,
+                    "last_price": books.get(symbol_key(alert.symbol, alert.exchange)),
                     "triggered": alert.triggered,
                 }
-                for alert in self._alerts.values()
+                for alert in alerts
             ],
         }
 
     def shutdown(self):
         """Shutdown the price monitor"""
         self._stop_monitoring()
-        self._alerts.clear()
+        with self._alerts_lock:
+            self._alerts.clear()
+            self._books.clear()
+            self._symbols.clear()
+            self._followed.clear()
         logger.info("FlowPriceMonitor shutdown")
 
 
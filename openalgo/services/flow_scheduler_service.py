@@ -243,7 +243,7 @@ def execute_workflow_scheduled(workflow_id: int, api_key: str = None):
         return
 
     try:
-        result = execute_workflow(workflow_id, api_key=api_key)
+        result = execute_workflow(workflow_id, api_key=api_key, wait=False)
         logger.info(
             f"Scheduled execution result for workflow {workflow_id}: {result.get('status')}"
         )
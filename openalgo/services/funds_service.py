@@ -3,6 +3,7 @@ import traceback
 from typing import Any, Dict, Optional, Tuple, Union
 
 from database.auth_db import get_auth_token_broker
+from utils.broker_book_cache import fetch_book
 from utils.logging import get_logger
 
 # Initialize logger
@@ -66,6 +67,11 @@ def get_funds_with_auth(
 
         return sandbox_get_funds(api_key, original_data)
 
+    return fetch_book(auth_token, broker, "funds", lambda: _fetch_funds(auth_token, broker))
+
+
+def _fetch_funds(auth_token: str, broker: str) -> tuple[bool, dict[str, Any], int]:
+    """Fetch the live funds and margin data from the broker (shared via fetch_book)"""
     broker_module = import_broker_module(broker)
     if broker_module is None:
         return False, {"status": "error", "message": "Broker-specific module not found"}, 404
@@ -1601,6 +1601,262 @@ def _process_download_job(job_id: str, api_key: str):
         _cleanup_job(job_id)
 
 
+def create_export_job(
+    symbols: list[dict[str, str]] | None,
+    intervals: list[str],
+    start_date: str = None,
+    end_date: str = None,
+    file_format: str = "zip",
+    compression: str = "zstd",
+) -> tuple[bool, dict[str, Any], int]:
+    """
+    Create an export job and start streaming it in background.
+
+    Exports run as download jobs of type 'export': one job item per symbol,
+    Socket.IO progress events, and cancel/pause/resume through the job
+    endpoints.
+
+    Args:
+        symbols: List of dicts with 'symbol' and 'exchange' keys (all symbols with data if empty)
+        intervals: Intervals to export
+        start_date: Start date (YYYY-MM-DD, optional)
+        end_date: End date (YYYY-MM-DD, inclusive, optional)
+        file_format: 'zip' (one CSV per symbol/interval) or 'parquet'/'csv'
+            (directory partitioned by exchange/symbol/interval, stored intervals only)
+        compression: Parquet compression codec
+
+    Returns:
+        Tuple of (success, response_data, status_code)
+    """
+    import tempfile
+
+    from database.historify_db import create_download_job, get_available_symbols
+
+    try:
+        if file_format not in ("zip", "parquet", "csv"):
+            return (
+                False,
+                {"status": "error", "message": f"Unsupported export format: {file_format}"},
+                400,
+            )
+
+        if not symbols:
+            symbols = get_available_symbols()
+        if not symbols:
+            return False, {"status": "error", "message": "No symbols found to export"}, 400
+
+        # Generate unique job ID
+        job_id = str(uuid.uuid4())[:8]
+
+        output_path = os.path.join(tempfile.gettempdir(), f"historify_export_{job_id}")
+        if file_format == "zip":
+            output_path += ".zip"
+
+        success, msg = create_download_job(
+            job_id=job_id,
+            job_type="export",
+            symbols=symbols,
+            interval=",".join(intervals),
+            start_date=start_date,
+            end_date=end_date,
+            config={
+                "format": file_format,
+                "intervals": intervals,
+                "compression": compression,
+                "output_path": output_path,
+            },
+        )
+
+        if not success:
+            return False, {"status": "error", "message": msg}, 500
+
+        with _job_state_lock:
+            _running_jobs[job_id] = True
+            _paused_jobs[job_id] = threading.Event()
+            _paused_jobs[job_id].set()  # Not paused initially
+
+        _job_executor.submit(_process_export_job, job_id)
+
+        return (
+            True,
+            {
+                "status": "success",
+                "message": f"Export started with {len(symbols)} symbols",
+                "job_id": job_id,
+                "total_symbols": len(symbols),
+                "format": file_format,
+            },
+            200,
+        )
+
+    except Exception as e:
+        logger.exception(f"Error creating export job: {e}")
+        return False, {"status": "error", "message": str(e)}, 500
+
+
+def _process_export_job(job_id: str):
+    """
+    Background export processor with Socket.IO progress updates.
+
+    Streams the export through historify_db, marking each symbol's job item
+    as its data is written. Pause and cancellation take effect between
+    symbols; a cancelled export's partial output is removed.
+    """
+    import json
+    import shutil
+
+    from database.historify_db import (
+        export_to_partitioned_files,
+        export_to_zip,
+        get_download_job,
+        get_job_items,
+        update_job_item_status,
+        update_job_progress,
+        update_job_status,
+    )
+
+    try:
+        job = get_download_job(job_id)
+        if not job:
+            logger.error(f"Job {job_id} not found")
+            return
+
+        update_job_status(job_id, "running")
+
+        config = json.loads(job["config"]) if isinstance(job["config"], str) else job["config"]
+        items = {(item["symbol"], item["exchange"]): item for item in get_job_items(job_id)}
+
+        # Same date range convention as the bulk export: end date inclusive
+        start_ts = (
+            int(datetime.strptime(job["start_date"], "%Y-%m-%d").timestamp())
+            if job["start_date"]
+            else None
+        )
+        end_ts = (
+            int(datetime.strptime(job["end_date"], "%Y-%m-%d").timestamp()) + 86400
+            if job["end_date"]
+            else None
+        )
+
+        def on_symbol_exported(done, total, symbol, exchange, records):
+            item = items.get((symbol, exchange))
+            if item:
+                if records:
+                    update_job_item_status(item["id"], "success", records)
+                else:
+                    update_job_item_status(item["id"], "skipped", 0, "No data in range")
+            update_job_progress(job_id, done, 0)
+            _emit_progress(job_id, done, total, symbol)
+
+            with _job_state_lock:
+                pause_event = _paused_jobs.get(job_id)
+            if pause_event:
+                # cancel_job sets the event too, so a cancel ends the wait
+                while not pause_event.is_set():
+                    _emit_job_paused(job_id, done, total)
+                    pause_event.wait(timeout=1.0)
+
+            # Returning False stops the export
+            with _job_state_lock:
+                return _running_jobs.get(job_id, False)
+
+        export_args = {
+            "symbols": [{"symbol": symbol, "exchange": exchange} for symbol, exchange in items],
+            "intervals": config["intervals"],
+            "start_timestamp": start_ts,
+            "end_timestamp": end_ts,
+            "progress_callback": on_symbol_exported,
+        }
+        if config["format"] == "zip":
+            success, message, records = export_to_zip(config["output_path"], **export_args)
+        else:
+            success, message, records = export_to_partitioned_files(
+                config["output_path"],
+                file_format=config["format"],
+                compression=config["compression"],
+                **export_args,
+            )
+
+        with _job_state_lock:
+            is_cancelled = not _running_jobs.get(job_id, False)
+
+        if is_cancelled:
+            logger.info(f"Export job {job_id} cancelled")
+            update_job_status(job_id, "cancelled")
+            if os.path.isdir(config["output_path"]):
+                shutil.rmtree(config["output_path"], ignore_errors=True)
+        elif success:
+            update_job_status(job_id, "completed")
+            _emit_job_complete(job_id, len(items), 0, len(items))
+            logger.info(f"Export job {job_id} completed: {message}")
+        else:
+            update_job_status(job_id, "failed", message)
+            logger.warning(f"Export job {job_id} failed: {message}")
+
+        _cleanup_job(job_id)
+
+    except Exception as e:
+        logger.exception(f"Error processing export job {job_id}: {e}")
+        update_job_status(job_id, "failed", str(e))
+        _cleanup_job(job_id)
+
+
+def get_export_job_file(job_id: str) -> tuple[bool, dict[str, Any], int]:
+    """
+    Get the ZIP archive of a completed export job.
+
+    Args:
+        job_id: Job identifier
+
+    Returns:
+        Tuple of (success, response_data, status_code); response_data has
+        'file_path' and 'filename' on success
+    """
+    import json
+
+    from database.historify_db import get_download_job
+
+    try:
+        job = get_download_job(job_id)
+        if not job or job["job_type"] != "export":
+            return False, {"status": "error", "message": "Export job not found"}, 404
+
+        if job["status"] != "completed":
+            return (
+                False,
+                {"status": "error", "message": f"Export is not complete (status: {job['status']})"},
+                400,
+            )
+
+        config = json.loads(job["config"]) if isinstance(job["config"], str) else job["config"]
+        if config["format"] != "zip":
+            return (
+                False,
+                {
+                    "status": "error",
+                    "message": f"Partitioned exports are written to {config['output_path']}",
+                },
+                400,
+            )
+
+        if not os.path.exists(config["output_path"]):
+            return False, {"status": "error", "message": "Export file not found"}, 404
+
+        return (
+            True,
+            {
+                "status": "success",
+                "file_path": config["output_path"],
+                "filename": os.path.basename(config["output_path"]),
+            },
+            200,
+        )
+
+    except Exception as e:
+        logger.exception(f"Error getting export file: {e}")
+        return False, {"status": "error", "message": str(e)}, 500
+
+
 def _cleanup_job(job_id: str):
     """Clean up job tracking state with thread-safe access."""
     with _job_state_lock:
@@ -1757,8 +2013,9 @@ def cancel_job(job_id: str) -> tuple[bool, dict[str, Any], int]:
             pause_event = _paused_jobs.get(job_id)
             if pause_event:
                 pause_event.set()
-            # Clean up in-memory state
-            _cleanup_job(job_id)
+            # Clean up in-memory state (inline: _cleanup_job takes the lock we hold)
+            _running_jobs.pop(job_id, None)
+            _paused_jobs.pop(job_id, None)
 
         # Emit cancellation event to frontend
         _emit_job_cancelled(job_id)
@@ -1913,6 +2170,13 @@ def retry_failed_items(job_id: str, api_key: str) -> tuple[bool, dict[str, Any],
         if job["status"] == "running":
             return False, {"status": "error", "message": "Job is already running"}, 400
 
+        if job["job_type"] == "export":
+            return (
+                False,
+                {"status": "error", "message": "Export jobs cannot be retried, start a new export"},
+                400,
+            )
+
         # Get failed items
         failed_items = get_job_items(job_id, status="error")
         if not failed_items:
@@ -11,13 +11,17 @@ Features:
 - Connection health monitoring
 - Data validation and stale data detection
 - Priority subscriber system (critical vs display)
+- Subscriber callbacks dispatched off the feed thread through per-subscriber
+  bounded, conflating mailboxes (CRITICAL subscribers get their own lane)
 - Auto-reconnection awareness
 - Health status API
 """
 
+import os
+import queue
 import threading
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from collections.abc import Callable
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -270,6 +274,228 @@ class ConnectionHealthMonitor:
         self._running = False
 
 
+# Per-subscriber mailbox bound (distinct symbol/mode entries awaiting delivery)
+MAILBOX_SIZE = int(os.getenv("MDS_MAILBOX_SIZE", "1024"))
+
+MODE_TO_EVENT = {1: "ltp", 2: "quote", 3: "depth"}
+
+# Legacy subscribers are served after every priority subscriber
+LEGACY_PRIORITY = SubscriberPriority.LOW + 1
+
+
+class SubscriberMailbox:
+    """
+    Bounded inbox for one subscriber.
+
+    Holds the latest undelivered tick per (symbol, mode): a newer tick replaces
+    a stale one in place (conflation), and when the mailbox is full the oldest
+    pending entry is dropped.
+    """
+
+    def __init__(
+        self,
+        subscriber_id: int,
+        name: str,
+        priority: int,
+        event_type: str,
+        callback: Callable,
+        filter_symbols: set[str] | None,
+        maxsize: int = MAILBOX_SIZE,
+    ):
+        self.subscriber_id = subscriber_id
+        self.name = name
+        self.priority = priority
+        self.event_type = event_type
+        self.callback = callback
+        self.filter = filter_symbols
+        self.maxsize = maxsize
+        self.lane: DispatchLane | None = None
+        self.lock = threading.Lock()
+        self.pending: OrderedDict[tuple[str, int], tuple[int, dict[str, Any]]] = OrderedDict()
+
+        self.delivered = 0
+        self.conflated = 0
+        self.dropped = 0
+        self.errors = 0
+        self.latency_ns_total = 0
+        self.latency_ns_max = 0
+        self.callback_ns_total = 0
+        self.callback_ns_max = 0
+
+    def wants(self, symbol_key: str, event_type: str) -> bool:
+        if self.event_type != "all" and self.event_type != event_type:
+            return False
+        return not self.filter or symbol_key in self.filter
+
+    def put(self, key: tuple[str, int], enqueued_ns: int, data: dict[str, Any]) -> None:
+        with self.lock:
+            if key in self.pending:
+                self.conflated += 1
+            elif len(self.pending) >= self.maxsize:
+                self.pending.popitem(last=False)
+                self.dropped += 1
+            self.pending[key] = (enqueued_ns, data)
+
+    def take(self) -> tuple[int, dict[str, Any]] | None:
+        with self.lock:
+            if not self.pending:
+                return None
+            return self.pending.popitem(last=False)[1]
+
+    def deliver(self, enqueued_ns: int, data: dict[str, Any]) -> None:
+        start = time.perf_counter_ns()
+        try:
+            self.callback(data)
+        except Exception as e:
+            self.errors += 1
+            logger.exception(f"Error in subscriber callback ({self.name}): {e}")
+        end = time.perf_counter_ns()
+
+        latency = start - enqueued_ns
+        elapsed = end - start
+        self.delivered += 1
+        self.latency_ns_total += latency
+        self.latency_ns_max = max(self.latency_ns_max, latency)
+        self.callback_ns_total += elapsed
+        self.callback_ns_max = max(self.callback_ns_max, elapsed)
+
+    def get_metrics(self) -> dict[str, Any]:
+        delivered = self.delivered or 1
+        return {
+            "id": self.subscriber_id,
+            "name": self.name,
+            "priority": self.priority,
+            "lane": self.lane.name if self.lane else None,
+            "pending": len(self.pending),
+            "delivered": self.delivered,
+            "conflated": self.conflated,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "avg_latency_ms": round(self.latency_ns_total / delivered / 1e6, 3),
+            "max_latency_ms": round(self.latency_ns_max / 1e6, 3),
+            "avg_callback_ms": round(self.callback_ns_total / delivered / 1e6, 3),
+            "max_callback_ms": round(self.callback_ns_max / 1e6, 3),
+        }
+
+
+class DispatchLane:
+    """Worker thread draining a set of mailboxes, highest priority first"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.mailboxes: tuple[SubscriberMailbox, ...] = ()
+        self.wakeup = threading.Event()
+        self.busy = False
+        self._thread = threading.Thread(target=self._run, name=f"mds-{name}", daemon=True)
+        self._thread.start()
+
+    def set_mailboxes(self, mailboxes: list[SubscriberMailbox]) -> None:
+        self.mailboxes = tuple(sorted(mailboxes, key=lambda m: (m.priority, m.subscriber_id)))
+
+    def _run(self) -> None:
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            self.busy = True
+            while True:
+                for mailbox in self.mailboxes:
+                    item = mailbox.take()
+                    if item is not None:
+                        mailbox.deliver(*item)
+                        break  # rescan so higher priorities go first
+                else:
+                    break
+            self.busy = False
+
+
+class MarketDataDispatcher:
+    """
+    Fans ticks out to subscribers off the caller's thread.
+
+    process_market_data() hands each tick to an unbounded SimpleQueue (no
+    Python-level locking on put), a router thread copies it into the mailboxes
+    of matching subscribers, and lane threads run the callbacks. CRITICAL
+    subscribers have their own lane so a slow display subscriber never delays
+    trade management.
+    """
+
+    def __init__(self):
+        self.inbound: queue.SimpleQueue = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.mailboxes: dict[int, SubscriberMailbox] = {}
+        self.routes: tuple[SubscriberMailbox, ...] = ()
+        self.critical_lane = DispatchLane("critical")
+        self.shared_lane = DispatchLane("shared")
+        self.submitted = 0
+        self.handed_off = 0
+        self._thread = threading.Thread(target=self._run, name="mds-router", daemon=True)
+        self._thread.start()
+
+    def add(self, mailbox: SubscriberMailbox) -> None:
+        with self.lock:
+            self.mailboxes[mailbox.subscriber_id] = mailbox
+            self._rebuild()
+
+    def remove(self, subscriber_id: int) -> bool:
+        with self.lock:
+            if self.mailboxes.pop(subscriber_id, None) is None:
+                return False
+            self._rebuild()
+            return True
+
+    def _rebuild(self) -> None:
+        mailboxes = list(self.mailboxes.values())
+        critical = [m for m in mailboxes if m.priority == SubscriberPriority.CRITICAL]
+        shared = [m for m in mailboxes if m.priority != SubscriberPriority.CRITICAL]
+        for mailbox in critical:
+            mailbox.lane = self.critical_lane
+        for mailbox in shared:
+            mailbox.lane = self.shared_lane
+        self.critical_lane.set_mailboxes(critical)
+        self.shared_lane.set_mailboxes(shared)
+        self.routes = tuple(sorted(mailboxes, key=lambda m: (m.priority, m.subscriber_id)))
+
+    def submit(self, symbol_key: str, mode: int, data: dict[str, Any]) -> None:
+        self.submitted += 1
+        self.inbound.put((time.perf_counter_ns(), symbol_key, mode, data))
+
+    def _run(self) -> None:
+        while True:
+            enqueued_ns, symbol_key, mode, data = self.inbound.get()
+            try:
+                event_type = MODE_TO_EVENT.get(mode, "all")
+                key = (symbol_key, mode)
+                for mailbox in self.routes:
+                    if mailbox.wants(symbol_key, event_type):
+                        mailbox.put(key, enqueued_ns, data)
+                        mailbox.lane.wakeup.set()
+            except Exception as e:
+                logger.exception(f"Error routing market data: {e}")
+            finally:
+                self.handed_off += 1
+
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """Block until every queued tick has been delivered (tests, replay)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if (
+                self.handed_off >= self.submitted
+                and not self.critical_lane.busy
+                and not self.shared_lane.busy
+                and not any(m.pending for m in self.routes)
+            ):
+                return True
+            time.sleep(0.001)
+        return False
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {
+            "queued": max(self.submitted - self.handed_off, 0),
+            "handed_off": self.handed_off,
+            "subscribers": [m.get_metrics() for m in self.routes],
+        }
+
+
 class MarketDataService:
     """
     Enhanced singleton service for managing market data across the application.
@@ -310,6 +536,9 @@ class MarketDataService:
         # Legacy subscribers (for backward compatibility)
         self.subscribers = defaultdict(dict)
 
+        # Subscriber callbacks run on dispatcher threads, never on the caller's
+        self.dispatcher = MarketDataDispatcher()
+
         # User-specific data tracking
         self.user_access_tracking = defaultdict(dict)
 
@@ -428,11 +657,9 @@ class MarketDataService:
                 cache_entry["last_update"] = timestamp
                 self.metrics["total_updates"] += 1
 
-            # Broadcast to subscribers by priority (critical first)
-            self._broadcast_update_priority(symbol_key, mode, data)
-
-            # Also broadcast using legacy system for backward compatibility
-            self._broadcast_update(symbol_key, mode, data)
+            # Hand off to the dispatcher; priority and legacy subscribers are
+            # called from their lanes (critical first)
+            self.dispatcher.submit(symbol_key, mode, data)
 
             return True
 
@@ -473,6 +700,17 @@ class MarketDataService:
                 "created_at": time.time(),
             }
 
+        self.dispatcher.add(
+            SubscriberMailbox(
+                subscriber_id,
+                name or f"subscriber_{subscriber_id}",
+                priority,
+                event_type,
+                callback,
+                filter_symbols,
+            )
+        )
+
         logger.info(
             f"Added priority subscriber {subscriber_id} ({name}) - priority={priority.name}, type={event_type}"
         )
@@ -512,6 +750,7 @@ class MarketDataService:
                 if subscriber_id in self.priority_subscribers[priority]:
                     name = self.priority_subscribers[priority][subscriber_id].get("name", "")
                     del self.priority_subscribers[priority][subscriber_id]
+                    self.dispatcher.remove(subscriber_id)
                     logger.info(f"Removed priority subscriber {subscriber_id} ({name})")
                     return True
 
@@ -541,6 +780,17 @@ class MarketDataService:
                 "filter": filter_symbols,
             }
 
+        self.dispatcher.add(
+            SubscriberMailbox(
+                subscriber_id,
+                f"legacy_{subscriber_id}",
+                LEGACY_PRIORITY,
+                event_type,
+                callback,
+                filter_symbols,
+            )
+        )
+
         logger.info(f"Added subscriber {subscriber_id} for {event_type} updates")
         return subscriber_id
 
@@ -563,6 +813,7 @@ class MarketDataService:
             for event_type in self.subscribers:
                 if subscriber_id in self.subscribers[event_type]:
                     del self.subscribers[event_type][subscriber_id]
+                    self.dispatcher.remove(subscriber_id)
                     logger.info(f"Removed subscriber {subscriber_id}")
                     return True
 
@@ -798,8 +1049,13 @@ class MarketDataService:
                 "critical_subscribers": len(
                     self.priority_subscribers.get(SubscriberPriority.CRITICAL, {})
                 ),
+                "dispatch": self.dispatcher.get_metrics(),
             }
 
+    def get_dispatch_metrics(self) -> dict[str, Any]:
+        """Per-subscriber delivery latency, conflation and drop counters"""
+        return self.dispatcher.get_metrics()
+
     def register_user_callback(self, username: str) -> bool:
         """
         Register market data callback for a specific user
@@ -850,70 +1106,6 @@ class MarketDataService:
                 self.validator.clear_price_history()
                 logger.info("Cleared entire market data cache")
 
-    def _broadcast_update_priority(self, symbol_key: str, mode: int, data: dict[str, Any]) -> None:
-        """
-        Broadcast updates to priority subscribers (critical first)
-
-        Args:
-            symbol_key: Symbol key (exchange:symbol)
-            mode: Update mode (1=LTP, 2=Quote, 3=Depth)
-            data: Full data to broadcast
-        """
-        mode_to_event = {1: "ltp", 2: "quote", 3: "depth"}
-        event_type = mode_to_event.get(mode, "all")
-
-        # Process subscribers by priority (CRITICAL first)
-        for priority in sorted(self.priority_subscribers.keys()):
-            with self.data_lock:
-                subscribers = list(self.priority_subscribers[priority].values())
-
-            for subscriber in subscribers:
-                try:
-                    # Check event type filter
-                    sub_event_type = subscriber.get("event_type", "all")
-                    if sub_event_type != "all" and sub_event_type != event_type:
-                        continue
-
-                    # Check symbol filter
-                    if subscriber["filter"] and symbol_key not in subscriber["filter"]:
-                        continue
-
-                    # Call the callback
-                    subscriber["callback"](data)
-
-                except Exception as e:
-                    logger.exception(
-                        f"Error in priority subscriber callback ({subscriber.get('name', 'unknown')}): {e}"
-                    )
-
-    def _broadcast_update(self, symbol_key: str, mode: int, data: dict[str, Any]) -> None:
-        """
-        Broadcast updates to legacy subscribers (backward compatibility)
-
-        Args:
-            symbol_key: Symbol key (exchange:symbol)
-            mode: Update mode (1=LTP, 2=Quote, 3=Depth)
-            data: Full data to broadcast
-        """
-        mode_to_event = {1: "ltp", 2: "quote", 3: "depth"}
-        event_type = mode_to_event.get(mode, "all")
-
-        # Broadcast to specific event subscribers
-        with self.data_lock:
-            subscribers = list(self.subscribers[event_type].values())
-            all_subscribers = list(self.subscribers["all"].values())
-
-        for subscriber in subscribers + all_subscribers:
-            try:
-                # Check filter
-                if subscriber["filter"] and symbol_key not in subscriber["filter"]:
-                    continue
-
-                # Call the callback
-                subscriber["callback"](data)
-            except Exception as e:
-                logger.exception(f"Error in subscriber callback: {e}")
-
     def _on_connection_lost(self):
         """Handle connection lost event"""
         logger.warning("Market data connection lost")
@@ -3,6 +3,7 @@ import traceback
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 from database.auth_db import get_auth_token_broker
+from utils.broker_book_cache import fetch_book
 from utils.logging import get_logger
 
 # Initialize logger
@@ -140,6 +141,11 @@ def get_orderbook_with_auth(
 
         return sandbox_get_orderbook(api_key, original_data)
 
+    return fetch_book(auth_token, broker, "orderbook", lambda: _fetch_orderbook(auth_token, broker))
+
+
+def _fetch_orderbook(auth_token: str, broker: str) -> tuple[bool, dict[str, Any], int]:
+    """Fetch the live order book from the broker (shared via fetch_book)"""
     broker_funcs = import_broker_module(broker)
     if broker_funcs is None:
         return False, {"status": "error", "message": "Broker-specific module not found"}, 404
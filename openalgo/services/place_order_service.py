@@ -11,6 +11,7 @@ from extensions import socketio
 from restx_api.schemas import OrderSchema
 from services.telegram_alert_service import telegram_alert_service
 from utils.api_analyzer import analyze_request, generate_order_id
+from utils.broker_book_cache import invalidate_books
 from utils.constants import (
     REQUIRED_ORDER_FIELDS,
     VALID_ACTIONS,
@@ -191,6 +192,9 @@ def place_order_with_auth(
         }
         executor.submit(async_log_order, "placeorder", original_data, error_response)
         return False, error_response, 500
+    finally:
+        # Orders changed (or may have): the next book read goes to the broker
+        invalidate_books(auth_token, broker)
 
     if res.status == 200:
         # Emit SocketIO event asynchronously (non-blocking)
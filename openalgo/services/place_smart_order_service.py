@@ -13,6 +13,7 @@ from database.token_db import get_token
 from extensions import socketio
 from services.telegram_alert_service import telegram_alert_service
 from utils.api_analyzer import analyze_request, generate_order_id
+from utils.broker_book_cache import invalidate_books
 from utils.constants import (
     REQUIRED_SMART_ORDER_FIELDS,
     VALID_ACTIONS,
@@ -243,6 +244,9 @@ def place_smart_order_with_auth(
         }
         executor.submit(async_log_order, "placesmartorder", original_data, error_response)
         return False, error_response, 500
+    finally:
+        # Orders changed (or may have): the next book read goes to the broker
+        invalidate_books(auth_token, broker)
 
     try:
         # Handle case where position size matches current position
@@ -0,0 +1,531 @@
+"""
+Incremental intraday PnL curves for the PnL tracker
+
+Keeps a minute-level mark-to-market curve per user and symbol in memory, so
+the tracker page is served from state instead of rebuilding every position
+window from a full day of broker history on each refresh:
+- Trade fills are applied once, as cash and quantity steps from the fill minute
+- Minute closes come from the WebSocket feed (MarketDataService) as ticks
+  arrive, and from 1m bars (Historify or broker history) for minutes the feed
+  did not see
+- Curves are persisted to db/pnl_curves, so a restart does not lose the day
+
+A symbol's PnL at minute m is cash(m) + qty(m) * close(m), where cash and qty
+are the running totals of its fills up to m. This is realized plus unrealized
+PnL for any lot matching, so partial exits and reversals need no bookkeeping.
+"""
+
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+IST = pytz.timezone("Asia/Kolkata")
+
+MINUTES_PER_DAY = 24 * 60
+MARKET_OPEN_MINUTE = 9 * 60 + 15  # Curves start at 09:15 at the latest
+
+PNL_CURVE_DIR = os.path.join("db", "pnl_curves")
+
+# A symbol whose latest close is older than this is topped up from 1m bars
+BACKFILL_LAG_MINUTES = 2
+# Seconds between top-ups of a symbol; longer once its bars stop advancing
+# (e.g. after the close)
+BACKFILL_RETRY_SECONDS = 60
+BACKFILL_IDLE_SECONDS = 900
+
+# Seconds between writes of a changed curve to disk
+PERSIST_INTERVAL = 30
+
+
+@dataclass(frozen=True)
+class Fill:
+    """A trade fill (or a carried position, opened at market open)"""
+
+    fill_id: str
+    symbol: str
+    exchange: str
+    action: str  # BUY or SELL
+    quantity: float
+    price: float
+    time: datetime  # timezone-aware
+
+
+def symbol_key(symbol: str, exchange: str) -> str:
+    """Key used by MarketDataService for a symbol"""
+    return f"{exchange}:{symbol}"
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Replace NaNs with the last value before them (leading NaNs stay)"""
+    index = np.where(np.isnan(values), 0, np.arange(len(values)))
+    np.maximum.accumulate(index, out=index)
+    return values[index]
+
+
+class SymbolCurve:
+    """Minute arrays for one symbol over the trading day"""
+
+    def __init__(self, symbol: str, exchange: str):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.close = np.full(MINUTES_PER_DAY, np.nan)
+        self.cash = np.zeros(MINUTES_PER_DAY)
+        self.qty = np.zeros(MINUTES_PER_DAY)
+        self.first_minute: int | None = None
+        self.last_fill_minute = -1
+        self.last_minute = -1  # Latest minute with a close
+        self.observed_minute = -1  # Latest minute with a bar or tick close
+        self.backfill_after = 0.0  # time.time() when bars may be fetched again
+
+    def apply_fill(self, minute: int, quantity: float, price: float):
+        """Apply a fill of signed quantity (negative for a sell) from minute on"""
+        self.cash[minute:] -= quantity * price
+        self.qty[minute:] += quantity
+        # The fill price stands in for the close until a bar or tick arrives
+        if np.isnan(self.close[minute]):
+            self.set_close(minute, price, observed=False)
+        if self.first_minute is None or minute < self.first_minute:
+            self.first_minute = minute
+        self.last_fill_minute = max(self.last_fill_minute, minute)
+
+    def reset_fills(self):
+        self.cash[:] = 0.0
+        self.qty[:] = 0.0
+        self.first_minute = None
+        self.last_fill_minute = -1
+
+    def set_close(self, minute: int, price: float, observed: bool = True):
+        self.close[minute] = price
+        self.last_minute = max(self.last_minute, minute)
+        if observed:
+            self.observed_minute = max(self.observed_minute, minute)
+
+    def pnl(self, start: int, end: int) -> np.ndarray:
+        """PnL for minutes start..end (inclusive)"""
+        close = forward_fill(self.close[: end + 1])[start:]
+        cash = self.cash[start : end + 1]
+        qty = self.qty[start : end + 1]
+        # No close yet means no position yet (fills seed the close)
+        return np.where(qty == 0, cash, cash + qty * np.nan_to_num(close))
+
+
+class PnLCurveEngine:
+    """
+    PnL curves of one user's trading day.
+
+    Fills are synced from the tradebook on each refresh (only new ones are
+    applied), closes arrive from the feed and bar backfills, and snapshot()
+    returns the tracker payload, cached until something changes.
+    """
+
+    def __init__(self, username: str, store_dir: str = PNL_CURVE_DIR):
+        self.username = username
+        self.store_dir = store_dir
+        self.lock = threading.RLock()
+        self.trade_date: date | None = None
+        self.curves: dict[str, SymbolCurve] = {}
+        self.fill_ids: set[str] = set()
+        self.version = 0
+        self._snapshot_version = -1
+        self._snapshot = None
+        self._saved_version = 0
+        self._saved_at = 0.0
+
+    # Day and fills
+
+    def set_trade_date(self, trade_date: date):
+        """Switch to a trading day, restoring its persisted curves if any"""
+        with self.lock:
+            if trade_date == self.trade_date:
+                return
+            self.trade_date = trade_date
+            self.curves = {}
+            self.fill_ids = set()
+            self.version += 1
+            self._saved_version = self.version
+            self.load()
+
+    def sync_fills(self, fills: list[Fill]) -> int:
+        """
+        Apply the fills not seen before.
+
+        The tradebook is the complete list of the day's fills. If a fill seen
+        earlier is gone (brokers that report one aggregated row per order
+        update it as the order fills), the fills are replayed from scratch.
+
+        Returns:
+            Number of fills applied
+        """
+        with self.lock:
+            ids = {fill.fill_id for fill in fills}
+            replay = not self.fill_ids <= ids
+            if replay:
+                logger.info(f"Tradebook changed for {self.username}, replaying fills")
+                for curve in self.curves.values():
+                    curve.reset_fills()
+                self.fill_ids = set()
+
+            applied = 0
+            for fill in fills:
+                if fill.fill_id in self.fill_ids:
+                    continue
+                self.fill_ids.add(fill.fill_id)
+                minute = self._fill_minute(fill.time)
+                if minute is None:
+                    continue
+                quantity = fill.quantity if fill.action == "BUY" else -fill.quantity
+                self._curve(fill.symbol, fill.exchange).apply_fill(minute, quantity, fill.price)
+                applied += 1
+
+            if applied or replay:
+                self.version += 1
+            return applied
+
+    # Closes
+
+    def on_tick(self, key: str, price: float, when: datetime | None = None) -> bool:
+        """Record the latest traded price as the current minute's close"""
+        if not price:
+            return False
+        with self.lock:
+            curve = self.curves.get(key)
+            minute = self._minute(when or datetime.now(IST))
+            if curve is None or minute is None:
+                return False
+            curve.set_close(minute, float(price))
+            self.version += 1
+            return True
+
+    def update_bars(self, symbol: str, exchange: str, bars: pd.DataFrame) -> int:
+        """
+        Record 1m bar closes.
+
+        Args:
+            bars: DataFrame indexed by IST bar start time, with a close column
+
+        Returns:
+            Latest minute with a bar or tick close after the update (-1 if none)
+        """
+        with self.lock:
+            curve = self._curve(symbol, exchange)
+            if bars is not None and not bars.empty and self.trade_date is not None:
+                index = bars.index
+                today = np.asarray(index.date == self.trade_date)
+                if today.any():
+                    minutes = np.asarray(index.hour * 60 + index.minute)[today]
+                    closes = bars["close"].to_numpy(dtype=float)[today]
+                    curve.close[minutes] = closes
+                    curve.last_minute = max(curve.last_minute, int(minutes.max()))
+                    curve.observed_minute = max(curve.observed_minute, int(minutes.max()))
+                    self.version += 1
+            return curve.observed_minute
+
+    def observed_minute(self, symbol: str, exchange: str) -> int:
+        """Latest minute with a bar or tick close for the symbol (-1 if none)"""
+        with self.lock:
+            curve = self.curves.get(symbol_key(symbol, exchange))
+            return -1 if curve is None else curve.observed_minute
+
+    def needs_bars(self, symbol: str, exchange: str, now: datetime | None = None) -> bool:
+        """
+        Whether the symbol's closes lag behind: today, the current minute;
+        on a past day, its last fill.
+        """
+        with self.lock:
+            curve = self.curves.get(symbol_key(symbol, exchange))
+            if curve is None:
+                return False
+            now_minute = self._minute(now or datetime.now(IST))
+            if now_minute is None:
+                return curve.observed_minute < curve.last_fill_minute
+            return curve.observed_minute < now_minute - BACKFILL_LAG_MINUTES
+
+    def stale_symbols(self, now: datetime | None = None) -> list[tuple[str, str, bool]]:
+        """
+        Symbols whose closes should be topped up from 1m bars.
+
+        Every symbol is fetched once; after that, only when the feed is not
+        keeping its closes current (and not more often than mark_backfilled
+        allows). A past day is never topped up.
+
+        Returns:
+            List of (symbol, exchange, never_fetched)
+        """
+        with self.lock:
+            now = now or datetime.now(IST)
+            current = time.time()
+            stale = []
+            for curve in self.curves.values():
+                never_fetched = curve.backfill_after == 0.0
+                if not never_fetched and (
+                    self._minute(now) is None
+                    or current < curve.backfill_after
+                    or not self.needs_bars(curve.symbol, curve.exchange, now)
+                ):
+                    continue
+                stale.append((curve.symbol, curve.exchange, never_fetched))
+            return stale
+
+    def mark_backfilled(self, symbol: str, exchange: str, advanced: bool):
+        """Schedule the symbol's next top-up; sooner if its bars advanced"""
+        with self.lock:
+            curve = self._curve(symbol, exchange)
+            delay = BACKFILL_RETRY_SECONDS if advanced else BACKFILL_IDLE_SECONDS
+            curve.backfill_after = time.time() + delay
+
+    def symbols(self) -> list[dict[str, str]]:
+        with self.lock:
+            return [
+                {"symbol": curve.symbol, "exchange": curve.exchange}
+                for curve in self.curves.values()
+            ]
+
+    # Output
+
+    def snapshot(self) -> dict:
+        """Tracker payload: current/max/min MTM, drawdown and minute series"""
+        with self.lock:
+            if self._snapshot_version != self.version:
+                self._snapshot = self._build_snapshot()
+                self._snapshot_version = self.version
+            return self._snapshot
+
+    def _build_snapshot(self) -> dict:
+        curves = [curve for curve in self.curves.values() if curve.first_minute is not None]
+        if not curves:
+            return empty_snapshot()
+
+        start = min(MARKET_OPEN_MINUTE, min(curve.first_minute for curve in curves))
+        end = max(max(curve.last_minute, curve.first_minute) for curve in curves)
+        now_minute = self._minute(datetime.now(IST))
+        if now_minute is not None:
+            end = min(end, now_minute)
+        end = max(end, start)
+
+        total = np.zeros(end - start + 1)
+        for curve in curves:
+            total += curve.pnl(start, end)
+        drawdown = total - np.maximum.accumulate(total)
+
+        midnight = IST.localize(datetime.combine(self.trade_date, datetime.min.time()))
+        times_ms = (int(midnight.timestamp()) + 60 * np.arange(start, end + 1)) * 1000
+        pnl_values = np.round(total, 2).tolist()
+        drawdown_values = np.round(drawdown, 2).tolist()
+        times = times_ms.tolist()
+
+        def minute_label(offset):
+            minute = start + int(offset)
+            return f"{minute // 60:02d}:{minute % 60:02d}"
+
+        return {
+            "current_mtm": round(float(total[-1]), 2),
+            "max_mtm": round(float(total.max()), 2),
+            "max_mtm_time": minute_label(total.argmax()),
+            "min_mtm": round(float(total.min()), 2),
+            "min_mtm_time": minute_label(total.argmin()),
+            "max_drawdown": round(float(drawdown.min()), 2),
+            "pnl_series": [{"time": t, "value": v} for t, v in zip(times, pnl_values, strict=True)],
+            "drawdown_series": [
+                {"time": t, "value": v} for t, v in zip(times, drawdown_values, strict=True)
+            ],
+        }
+
+    # Persistence
+
+    def _path(self) -> str:
+        safe_user = re.sub(r"[^A-Za-z0-9_-]", "_", self.username)
+        return os.path.join(self.store_dir, f"{safe_user}_{self.trade_date:%Y%m%d}.npz")
+
+    def save(self, force: bool = False) -> bool:
+        """Write the curves if they changed (at most every PERSIST_INTERVAL seconds)"""
+        with self.lock:
+            if self.trade_date is None or self._saved_version == self.version:
+                return False
+            if not force and time.time() - self._saved_at < PERSIST_INTERVAL:
+                return False
+            curves = list(self.curves.values())
+            state = {
+                "symbols": np.array([curve.symbol for curve in curves], dtype=str),
+                "exchanges": np.array([curve.exchange for curve in curves], dtype=str),
+                "close": np.array([curve.close for curve in curves]).reshape(-1, MINUTES_PER_DAY),
+                "cash": np.array([curve.cash for curve in curves]).reshape(-1, MINUTES_PER_DAY),
+                "qty": np.array([curve.qty for curve in curves]).reshape(-1, MINUTES_PER_DAY),
+                "minutes": np.array(
+                    [
+                        (
+                            -1 if curve.first_minute is None else curve.first_minute,
+                            curve.last_fill_minute,
+                            curve.observed_minute,
+                        )
+                        for curve in curves
+                    ]
+                ).reshape(-1, 3),
+                "fill_ids": np.array(sorted(self.fill_ids), dtype=str),
+            }
+            version = self.version
+
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            path = self._path()
+            tmp_path = f"{path}.tmp.npz"
+            np.savez_compressed(tmp_path, **state)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist PnL curves for {self.username}: {e}")
+            return False
+
+        with self.lock:
+            self._saved_version = version
+            self._saved_at = time.time()
+        return True
+
+    def load(self) -> bool:
+        """Restore the persisted curves of the current trading day"""
+        path = self._path()
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as state:
+                for i, (symbol, exchange) in enumerate(
+                    zip(state["symbols"], state["exchanges"], strict=True)
+                ):
+                    curve = self._curve(str(symbol), str(exchange))
+                    curve.close[:] = state["close"][i]
+                    curve.cash[:] = state["cash"][i]
+                    curve.qty[:] = state["qty"][i]
+                    first_minute, curve.last_fill_minute, curve.observed_minute = (
+                        int(minute) for minute in state["minutes"][i]
+                    )
+                    curve.first_minute = None if first_minute < 0 else first_minute
+                    known = np.flatnonzero(~np.isnan(curve.close))
+                    curve.last_minute = int(known[-1]) if len(known) else -1
+                self.fill_ids = {str(fill_id) for fill_id in state["fill_ids"]}
+        except Exception as e:
+            logger.warning(f"Could not restore PnL curves from {path}: {e}")
+            self.curves = {}
+            self.fill_ids = set()
+            return False
+
+        self.version += 1
+        self._saved_version = self.version
+        logger.info(f"Restored PnL curves for {self.username}: {len(self.curves)} symbols")
+        return True
+
+    # Helpers
+
+    def _curve(self, symbol: str, exchange: str) -> SymbolCurve:
+        key = symbol_key(symbol, exchange)
+        curve = self.curves.get(key)
+        if curve is None:
+            curve = self.curves[key] = SymbolCurve(symbol, exchange)
+        return curve
+
+    def _minute(self, when: datetime) -> int | None:
+        """Minute of the trading day containing `when` (None on other days)"""
+        when = when.astimezone(IST)
+        if when.date() != self.trade_date:
+            return None
+        return when.hour * 60 + when.minute
+
+    def _fill_minute(self, when: datetime) -> int | None:
+        """
+        Minute a fill is marked from. A bar's close is the price at the end of
+        its minute, so a fill at 10:05:30 is already marked by the 10:05 close.
+        """
+        when = when.astimezone(IST)
+        if when.date() < self.trade_date:
+            return 0  # Carried into the day
+        return self._minute(when)
+
+
+def empty_snapshot() -> dict:
+    return {
+        "current_mtm": 0,
+        "max_mtm": 0,
+        "max_mtm_time": None,
+        "min_mtm": 0,
+        "min_mtm_time": None,
+        "max_drawdown": 0,
+        "pnl_series": [],
+        "drawdown_series": [],
+    }
+
+
+_engines: dict[str, PnLCurveEngine] = {}
+_engines_lock = threading.Lock()
+_feed_subscriber_id: int | None = None
+_followed: set[tuple[str, str]] = set()  # (username, symbol key) sent to the feed
+_feed_users: set[str] = set()
+
+
+def get_pnl_curve_engine(username: str) -> PnLCurveEngine:
+    """Get the user's engine, subscribing the engines to the market data feed"""
+    global _feed_subscriber_id
+    with _engines_lock:
+        engine = _engines.get(username)
+        if engine is None:
+            engine = _engines[username] = PnLCurveEngine(username)
+        if _feed_subscriber_id is None:
+            from services.market_data_service import (
+                SubscriberPriority,
+                get_market_data_service,
+            )
+
+            _feed_subscriber_id = get_market_data_service().subscribe_with_priority(
+                SubscriberPriority.LOW, "ltp", _on_market_data, None, "pnl_curves"
+            )
+        return engine
+
+
+def _on_market_data(data: dict):
+    """MarketDataService callback: ticks become minute closes"""
+    symbol = data.get("symbol")
+    exchange = data.get("exchange")
+    ltp = (data.get("data") or {}).get("ltp")
+    if not symbol or not exchange or not ltp:
+        return
+    key = symbol_key(symbol, exchange)
+    now = datetime.now(IST)
+    for engine in list(_engines.values()):
+        engine.on_tick(key, ltp, now)
+
+
+def follow_symbols(username: str, broker: str, symbols: list[dict[str, str]]):
+    """
+    Subscribe the user's traded symbols on the WebSocket feed (once each), so
+    their closes arrive as ticks instead of from history calls.
+    """
+    with _engines_lock:
+        keys = {(username, symbol_key(s["symbol"], s["exchange"])): s for s in symbols}
+        new = [s for key, s in keys.items() if key not in _followed]
+        _followed.update(keys)
+        register = username not in _feed_users
+        _feed_users.add(username)
+    if not new:
+        return
+
+    def subscribe():
+        from services.market_data_service import get_market_data_service
+        from services.websocket_service import subscribe_to_symbols
+
+        try:
+            if register and not get_market_data_service().register_user_callback(username):
+                return
+            success, result, _ = subscribe_to_symbols(username, broker, new, "LTP")
+            if not success:
+                logger.info(f"PnL curves stay on bar backfill: {result.get('message')}")
+        except Exception as e:
+            logger.warning(f"Could not subscribe PnL tracker symbols to the feed: {e}")
+
+    threading.Thread(target=subscribe, name="pnl-curve-feed", daemon=True).start()
@@ -3,6 +3,7 @@ import traceback
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 from database.auth_db import get_auth_token_broker
+from utils.broker_book_cache import fetch_book
 from utils.logging import get_logger
 
 # Initialize logger
@@ -108,6 +109,13 @@ def get_positionbook_with_auth(
 
         return sandbox_get_positions(api_key, original_data)
 
+    return fetch_book(
+        auth_token, broker, "positionbook", lambda: _fetch_positionbook(auth_token, broker)
+    )
+
+
+def _fetch_positionbook(auth_token: str, broker: str) -> tuple[bool, dict[str, Any], int]:
+    """Fetch the live position book from the broker (shared via fetch_book)"""
     broker_funcs = import_broker_module(broker)
     if broker_funcs is None:
         return False, {"status": "error", "message": "Broker-specific module not found"}, 404
@@ -13,6 +13,7 @@ from database.settings_db import get_analyze_mode
 from extensions import socketio
 from services.telegram_alert_service import telegram_alert_service
 from utils.api_analyzer import analyze_request, generate_order_id
+from utils.broker_book_cache import invalidate_books
 from utils.constants import (
     REQUIRED_ORDER_FIELDS,
     VALID_ACTIONS,
@@ -95,6 +96,7 @@ def place_single_order(
     auth_token: str,
     order_num: int,
     total_orders: int,
+    broker: str,
 ) -> dict[str, Any]:
     """
     Place a single order (no per-order event emission - summary event emitted at end)
@@ -105,6 +107,7 @@ def place_single_order(
         auth_token: Authentication token
         order_num: Order number in the sequence
         total_orders: Total number of orders
+        broker: Broker name (for invalidating the cached books)
 
     Returns:
         Order result dictionary
@@ -142,6 +145,9 @@ def place_single_order(
             "status": "error",
             "message": "Failed to place order due to internal error",
         }
+    finally:
+        # Orders changed (or may have): the next book read goes to the broker
+        invalidate_books(auth_token, broker)
 
 
 def split_order_with_auth(
@@ -322,7 +328,9 @@ def split_order_with_auth(
             time.sleep(order_delay)  # Rate limit delay between orders
         order_data = copy.deepcopy(split_data)
         order_data["quantity"] = str(split_size)
-        result = place_single_order(order_data, broker_module, auth_token, i + 1, total_orders)
+        result = place_single_order(
+            order_data, broker_module, auth_token, i + 1, total_orders, broker
+        )
         results.append(result)
 
     # Place remaining quantity order if any
@@ -332,7 +340,7 @@ def split_order_with_auth(
         order_data = copy.deepcopy(split_data)
         order_data["quantity"] = str(remaining_qty)
         result = place_single_order(
-            order_data, broker_module, auth_token, total_orders, total_orders
+            order_data, broker_module, auth_token, total_orders, total_orders, broker
         )
         results.append(result)
 
@@ -21,10 +21,8 @@ from datetime import datetime, timedelta
 
 import httpx
 import pandas as pd
-import plotly.graph_objects as go
 import telegram.error
 from openalgo import api as openalgo_api
-from plotly.subplots import make_subplots
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto, Update
 from telegram.constants import ParseMode
 from telegram.ext import (
@@ -50,6 +48,7 @@ from database.telegram_db import (
     log_command,
     update_bot_config,
 )
+from services.chart_render_service import get_chart_renderer, render_chart
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -119,336 +118,64 @@ class TelegramBotService:
         self, symbol: str, exchange: str, interval: str, days: int, telegram_id: int
     ) -> bytes | None:
         """Generate intraday chart with specified interval"""
-        try:
-            client = self._get_sdk_client(telegram_id)
-            if not client:
-                logger.error("No SDK client available")
-                return None
-
-            # Calculate dates
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-
-            logger.debug(
-                f"Generating intraday chart for {symbol} on {exchange} with interval {interval}"
-            )
-
-            # Get historical data - be robust about event loops
-            history_data = None
-
-            # Try async first if we have a loop
-            if hasattr(self, "bot_loop") and self.bot_loop:
-                try:
-                    logger.debug("Using bot's event loop for intraday history")
-                    history_data = await self.bot_loop.run_in_executor(
-                        None,
-                        lambda: client.history(
-                            symbol=symbol,
-                            exchange=exchange,
-                            interval=interval,
-                            start_date=start_date.strftime("%Y-%m-%d"),
-                            end_date=end_date.strftime("%Y-%m-%d"),
-                        ),
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to fetch via bot loop: {e}")
-
-            # If that didn't work, try direct sync call
-            if history_data is None:
-                try:
-                    logger.debug("Using synchronous history fetch for intraday")
-                    history_data = client.history(
-                        symbol=symbol,
-                        exchange=exchange,
-                        interval=interval,
-                        start_date=start_date.strftime("%Y-%m-%d"),
-                        end_date=end_date.strftime("%Y-%m-%d"),
-                    )
-                except Exception as e:
-                    logger.exception(f"Synchronous history fetch failed: {e}")
-                    return None
-
-            # Check if we got data
-            if history_data is None or (
-                isinstance(history_data, pd.DataFrame) and history_data.empty
-            ):
-                logger.error("No data available for chart generation")
-                return None
-
-            # The API returns a DataFrame directly with timestamp as index
-            df = (
-                history_data
-                if isinstance(history_data, pd.DataFrame)
-                else pd.DataFrame(history_data)
-            )
-
-            # Reset index to get timestamp as a column
-            df = df.reset_index()
-            # After reset_index(), the index becomes a column named 'index'
-            # Rename it to 'timestamp' for clarity
-            if "index" in df.columns:
-                df.rename(columns={"index": "timestamp"}, inplace=True)
-
-            # Create candlestick chart with volume
-            fig = make_subplots(
-                rows=2,
-                cols=1,
-                shared_xaxes=True,
-                vertical_spacing=0.03,
-                subplot_titles=(f"{symbol} - {days} Day Intraday ({interval})", None),
-                row_heights=[0.7, 0.3],
-            )
-
-            # Add candlestick chart (following sample code exactly)
-            fig.add_trace(
-                go.Candlestick(
-                    x=df["timestamp"],  # x-axis as timestamp
-                    open=df["open"],
-                    high=df["high"],
-                    low=df["low"],
-                    close=df["close"],
-                    name="Price",
-                    increasing_line_color="green",
-                    decreasing_line_color="red",
-                ),
-                row=1,
-                col=1,
-            )
-
-            # Add volume bar chart
-            colors = [
-                "red" if close < open else "green" for close, open in zip(df["close"], df["open"])
-            ]
-
-            fig.add_trace(
-                go.Bar(
-                    x=df["timestamp"],  # x-axis as timestamp
-                    y=df["volume"],
-                    marker_color=colors,
-                    name="Volume",
-                    showlegend=False,
-                ),
-                row=2,
-                col=1,
-            )
-
-            # Update layout - simplified like the sample code
-            fig.update_layout(
-                xaxis_rangeslider_visible=False,
-                height=600,
-                template="plotly_white",
-                showlegend=False,
-                hovermode="x unified",
-            )
-
-            # Apply category type to both x-axes to avoid gaps
-            # Reduce tick density - show only every Nth tick
-            tick_spacing = max(1, len(df) // 8)  # Show approximately 8 ticks
-            # Format timestamps as "22 SEP 09:15"
-            tick_labels = []
-            for i in range(0, len(df), tick_spacing):
-                if pd.notna(df["timestamp"].iloc[i]):
-                    ts = pd.to_datetime(df["timestamp"].iloc[i])
-                    tick_labels.append(ts.strftime("%d %b %H:%M").upper())
-                else:
-                    tick_labels.append("")
-
-            fig.update_xaxes(
-                type="category",
-                row=2,
-                col=1,  # Apply to bottom subplot
-                tickmode="array",
-                tickvals=list(range(0, len(df), tick_spacing)),
-                ticktext=tick_labels,
-                tickangle=45,
-            )
-            # Hide ticks on top subplot
-            fig.update_xaxes(
-                type="category",
-                row=1,
-                col=1,  # Apply to top subplot
-                showticklabels=False,
-            )
-
-            # Clean up axes
-            fig.update_yaxes(title_text="")
-
-            # Convert to image bytes
-            img_bytes = fig.to_image(format="png", engine="kaleido")
-            return img_bytes
-
-        except Exception as e:
-            logger.exception(f"Error generating intraday chart: {e}")
-            return None
+        return await self._generate_chart("intraday", symbol, exchange, interval, days, telegram_id)
 
     async def _generate_daily_chart(
         self, symbol: str, exchange: str, interval: str, days: int, telegram_id: int
     ) -> bytes | None:
         """Generate daily chart with specified days"""
+        return await self._generate_chart("daily", symbol, exchange, interval, days, telegram_id)
+
+    async def _generate_chart(
+        self, kind: str, symbol: str, exchange: str, interval: str, days: int, telegram_id: int
+    ) -> bytes | None:
+        """
+        Render a chart through the chart render service.
+
+        Bars come from the in-process bar store (Historify plus broker top-ups)
+        and PNGs from its cache, so repeated requests skip the history fetch and
+        the render. The user's SDK client is only used if neither has bars.
+        """
         try:
-            client = self._get_sdk_client(telegram_id)
-            if not client:
+            credentials = get_user_credentials(telegram_id)
+            if not credentials or not credentials.get("api_key"):
                 logger.error("No SDK client available")
                 return None
 
-            # Calculate dates
-            end_date = datetime.now()
-            # For daily charts, add extra days to ensure we get enough trading days
-            start_date = end_date - timedelta(days=int(days * 1.5))
-
-            logger.debug(
-                f"Generating daily chart for {symbol} on {exchange} with interval {interval}"
-            )
-
-            # Get historical data - be robust about event loops
-            history_data = None
-
-            # Try async first if we have a loop
-            if hasattr(self, "bot_loop") and self.bot_loop:
-                try:
-                    logger.debug("Using bot's event loop for daily history")
-                    history_data = await self.bot_loop.run_in_executor(
-                        None,
-                        lambda: client.history(
-                            symbol=symbol,
-                            exchange=exchange,
-                            interval=interval,
-                            start_date=start_date.strftime("%Y-%m-%d"),
-                            end_date=end_date.strftime("%Y-%m-%d"),
-                        ),
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to fetch daily via bot loop: {e}")
-
-            # If that didn't work, try direct sync call
-            if history_data is None:
-                try:
-                    logger.debug("Using synchronous history fetch for daily")
-                    history_data = client.history(
-                        symbol=symbol,
-                        exchange=exchange,
-                        interval=interval,
-                        start_date=start_date.strftime("%Y-%m-%d"),
-                        end_date=end_date.strftime("%Y-%m-%d"),
-                    )
-                except Exception as e:
-                    logger.exception(f"Synchronous daily history fetch failed: {e}")
+            def sdk_history(start_date, end_date):
+                client = self._get_sdk_client(telegram_id)
+                if not client:
                     return None
+                history_data = client.history(
+                    symbol=symbol,
+                    exchange=exchange,
+                    interval=interval,
+                    start_date=start_date.strftime("%Y-%m-%d"),
+                    end_date=end_date.strftime("%Y-%m-%d"),
+                )
+                return history_data if isinstance(history_data, pd.DataFrame) else None
 
-            # Check if we got data
-            if history_data is None or (
-                isinstance(history_data, pd.DataFrame) and history_data.empty
-            ):
-                logger.error("No data available for chart generation")
-                return None
-
-            # The API returns a DataFrame directly with timestamp as index
-            df = (
-                history_data
-                if isinstance(history_data, pd.DataFrame)
-                else pd.DataFrame(history_data)
-            )
-
-            # Reset index to get timestamp as a column
-            df = df.reset_index()
-            # After reset_index(), the index becomes a column named 'index'
-            # Rename it to 'timestamp' for clarity
-            if "index" in df.columns:
-                df.rename(columns={"index": "timestamp"}, inplace=True)
-
-            # Keep last N trading days
-            df = df.tail(days)
-
-            # Create candlestick chart with volume
-            fig = make_subplots(
-                rows=2,
-                cols=1,
-                shared_xaxes=True,
-                vertical_spacing=0.03,
-                subplot_titles=(f"{symbol} - Daily Chart ({days} Days)", None),
-                row_heights=[0.7, 0.3],
-            )
-
-            # Add candlestick chart (following sample code exactly)
-            fig.add_trace(
-                go.Candlestick(
-                    x=df["timestamp"],  # x-axis as timestamp
-                    open=df["open"],
-                    high=df["high"],
-                    low=df["low"],
-                    close=df["close"],
-                    name="Price",
-                    increasing_line_color="green",
-                    decreasing_line_color="red",
-                ),
-                row=1,
-                col=1,
+            logger.debug(
+                f"Generating {kind} chart for {symbol} on {exchange} with interval {interval}"
             )
 
-            # Add volume bar chart
-            colors = [
-                "red" if close < open else "green" for close, open in zip(df["close"], df["open"])
-            ]
-
-            fig.add_trace(
-                go.Bar(
-                    x=df["timestamp"],  # x-axis as timestamp
-                    y=df["volume"],
-                    marker_color=colors,
-                    name="Volume",
-                    showlegend=False,
+            # History fetch and render block, keep them off the bot's event loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None,
+                lambda: render_chart(
+                    kind,
+                    symbol,
+                    exchange,
+                    interval,
+                    days,
+                    credentials["api_key"],
+                    fallback=sdk_history,
                 ),
-                row=2,
-                col=1,
             )
 
-            # Update layout - simplified like the sample code
-            fig.update_layout(
-                xaxis_rangeslider_visible=False,
-                height=600,
-                template="plotly_white",
-                showlegend=False,
-                hovermode="x unified",
-            )
-
-            # Apply category type to both x-axes to avoid gaps
-            # Reduce tick density for daily charts - show only every Nth tick
-            tick_spacing = max(1, len(df) // 10)  # Show approximately 10 ticks for daily
-            # Format dates for display as "22 SEP"
-            tick_labels = []
-            for i in range(0, len(df), tick_spacing):
-                if pd.notna(df["timestamp"].iloc[i]):
-                    ts = pd.to_datetime(df["timestamp"].iloc[i])
-                    tick_labels.append(ts.strftime("%d %b").upper())
-                else:
-                    tick_labels.append("")
-
-            fig.update_xaxes(
-                type="category",
-                row=2,
-                col=1,  # Apply to bottom subplot
-                tickmode="array",
-                tickvals=list(range(0, len(df), tick_spacing)),
-                ticktext=tick_labels,
-                tickangle=45,
-            )
-            # Hide ticks on top subplot
-            fig.update_xaxes(
-                type="category",
-                row=1,
-                col=1,  # Apply to top subplot
-                showticklabels=False,
-            )
-
-            # Clean up axes
-            fig.update_yaxes(title_text="")
-
-            # Convert to image bytes
-            img_bytes = fig.to_image(format="png", engine="kaleido")
-            return img_bytes
-
         except Exception as e:
-            logger.exception(f"Error generating daily chart: {e}")
+            logger.exception(f"Error generating {kind} chart: {e}")
             return None
 
     async def initialize_bot(self, token: str) -> tuple[bool, str]:
@@ -567,6 +294,12 @@ class TelegramBotService:
         self.bot_loop = loop  # Store the loop so we can schedule tasks in it
 
         try:
+            # Start the chart renderers now so the first /chart doesn't wait for a browser
+            try:
+                get_chart_renderer().warm()
+            except Exception as e:
+                logger.warning(f"Could not start chart renderers: {e}")
+
             # Create HTTP client in this thread's event loop
             self.http_client = httpx.AsyncClient(timeout=30.0)
 
@@ -204,8 +204,14 @@ fi
 # ============================================
 # WEBSOCKET PROXY SERVER
 # ============================================
-echo "[OpenAlgo] Starting WebSocket proxy server on port 8765..."
-/app/.venv/bin/python -m websocket_proxy.server &
+# WEBSOCKET_WORKERS > 1 runs the multi-process proxy (workers share the port)
+if [ "${WEBSOCKET_WORKERS:-1}" -gt 1 ]; then
+    echo "[OpenAlgo] Starting WebSocket proxy cluster ($WEBSOCKET_WORKERS workers) on port 8765..."
+    /app/.venv/bin/python -m websocket_proxy.cluster --workers "$WEBSOCKET_WORKERS" &
+else
+    echo "[OpenAlgo] Starting WebSocket proxy server on port 8765..."
+    /app/.venv/bin/python -m websocket_proxy.server &
+fi
 WEBSOCKET_PID=$!
 echo "[OpenAlgo] WebSocket proxy server started with PID $WEBSOCKET_PID"
 
@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.getcwd(), 'openalgo'))
+
+from openalgo.strategies.utils.backtest_farm import DatasetCache, FarmTask, TaskLedger, run_farm
+
+CALLS = []
+
+
+def frame_stats(payload, frame):
+    """Task run in the pool: reports what the worker saw."""
+    try:
+        frame.iloc[0, 0] = 0.0
+        writable = True
+    except ValueError:
+        writable = False
+    return {'rows': len(frame), 'close': float(frame['close'].sum()), 'tz': str(frame.index.tz),
+            'pid': os.getpid(), 'writable': writable, 'scale': payload['scale']}
+
+
+def record_call(payload, frame):
+    CALLS.append(payload['name'])
+    if payload.get('fail'):
+        raise RuntimeError('boom')
+    return {'name': payload['name']}
+
+
+def make_frame(rows=100, tz='Asia/Kolkata'):
+    index = pd.date_range('2026-01-05 09:15', periods=rows, freq='15min', tz=tz)
+    close = 100 + np.arange(rows, dtype=float)
+    return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                         'volume': np.full(rows, 10.0)}, index=index)
+
+
+class TestBacktestFarm(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.ledger_path = os.path.join(self.tmp_dir, 'ledger.jsonl')
+        CALLS.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_dataset_cache_round_trip(self):
+        cache = DatasetCache(os.path.join(self.tmp_dir, 'dataset'))
+        self.assertIsNone(cache.load('NSE_SBIN_15m'))
+        frame = make_frame()
+        cache.save('NSE_SBIN_15m', frame)
+        pd.testing.assert_frame_equal(cache.load('NSE_SBIN_15m'), frame, check_names=False, check_freq=False)
+
+    def test_workers_read_shared_frames(self):
+        frames = {'a': make_frame(50), 'b': make_frame(80, tz=None)}
+        tasks = [FarmTask(f"t{i}", key, {'scale': i}) for i, key in enumerate(['a', 'b', 'a', 'b'])]
+        results = run_farm(tasks, frames, frame_stats, TaskLedger(self.ledger_path), workers=2)
+
+        self.assertEqual([r['rows'] for r in results], [50, 80, 50, 80])
+        self.assertEqual([r['scale'] for r in results], [0, 1, 2, 3])
+        self.assertEqual(results[0]['close'], frames['a']['close'].sum())
+        self.assertEqual([r['tz'] for r in results[:2]], ['Asia/Kolkata', 'None'])
+        self.assertNotIn(os.getpid(), {r['pid'] for r in results})
+        self.assertFalse(any(r['writable'] for r in results))
+
+    def test_longest_first_and_resume(self):
+        frames = {'a': make_frame(10)}
+        tasks = [
+            FarmTask('short', 'a', {'name': 'short'}, cost=1),
+            FarmTask('long', 'a', {'name': 'long'}, cost=9),
+            FarmTask('bad', 'a', {'name': 'bad', 'fail': True}, cost=5),
+        ]
+        results = run_farm(tasks, frames, record_call, TaskLedger(self.ledger_path), workers=1)
+        self.assertEqual(CALLS, ['long', 'bad', 'short'])
+        self.assertEqual(results, [{'name': 'short'}, {'name': 'long'}, {'error': 'boom'}])
+
+        # A new run over the same ledger only retries the failure
+        CALLS.clear()
+        tasks[2].payload['fail'] = False
+        results = run_farm(tasks, frames, record_call, TaskLedger(self.ledger_path), workers=1)
+        self.assertEqual(CALLS, ['bad'])
+        self.assertEqual(results[2], {'name': 'bad'})
+
+        with open(self.ledger_path, 'a') as f:
+            f.write('{"task_id": "torn')  # Killed mid-write
+        self.assertEqual(sorted(TaskLedger(self.ledger_path).done), ['bad', 'long', 'short'])
+
+    def test_daily_backtester_runs_on_the_farm(self):
+        from openalgo.scripts import run_daily_backtest
+
+        def generate_signal(df, client=None, symbol=None, params=None):
+            every = (params or {}).get('every', 10)
+            if len(df) % every == 0:
+                return 'BUY', 1.0, {'atr': 5.0}
+            return 'HOLD', 0.0, {}
+
+        module = SimpleNamespace(generate_signal=generate_signal, TUNABLE_PARAMS={'every': [7, 13]})
+        configs = {
+            'Trend_A': {'strategy': 'fake', 'symbol': 'RELIANCE', 'exchange': 'NSE', 'params': {}},
+            'Trend_B': {'strategy': 'fake', 'symbol': 'RELIANCE', 'exchange': 'NSE', 'params': {'every': 5}},
+        }
+        with mock.patch.object(run_daily_backtest, 'FARM_DIR', self.tmp_dir), \
+                mock.patch.object(run_daily_backtest, 'repo_root', self.tmp_dir), \
+                mock.patch.object(run_daily_backtest.DailyBacktester, 'load_strategy_module', return_value=module), \
+                mock.patch.object(run_daily_backtest.DailyBacktester, 'load_configs', return_value=configs):
+            runner = run_daily_backtest.DailyBacktester(days=1, optimize=True, workers=1, run_id='test')
+            runner.run()
+            self.assertEqual(
+                sorted(r['strategy'] for r in runner.results),
+                ['Trend_A', 'Trend_A_v1', 'Trend_A_v2', 'Trend_B', 'Trend_B_v1', 'Trend_B_v2'],
+            )
+            # One dataset file for the shared symbol, generated deterministically
+            dataset = os.listdir(os.path.join(self.tmp_dir, 'test', 'dataset'))
+            self.assertEqual(dataset, ['NSE_RELIANCE_15m.npz'])
+            pd.testing.assert_frame_equal(runner.generate_mock_data('RELIANCE', 1),
+                                          runner.generate_mock_data('RELIANCE', 1))
+
+            with open(os.path.join(self.tmp_dir, 'leaderboard.json')) as f:
+                leaderboard = json.load(f)
+            self.assertEqual(len(leaderboard), 6)
+            self.assertEqual(leaderboard[0]['sharpe'], max(r['sharpe'] for r in leaderboard))
+
+            best = runner.optimize_strategy('Trend_B', configs['Trend_B'], 'RELIANCE')
+            self.assertIn(best, [{'every': 7}, {'every': 13}])
+
+
+if __name__ == '__main__':
+    unittest.main()
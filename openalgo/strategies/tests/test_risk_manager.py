@@ -1,30 +1,56 @@
 import json
 import os
 import shutil
+import tempfile
 import unittest
 from datetime import datetime, time, timedelta
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+from openalgo.strategies.utils import trade_journal
 from openalgo.strategies.utils.risk_manager import EODSquareOff, RiskManager, create_risk_manager
 
 
-class TestRiskManager(unittest.TestCase):
+class StateDirTestCase(unittest.TestCase):
+    """Keeps each test's risk state, the shared portfolio file and the trade journal in a temp dir"""
+
+    def setUp(self):
+        self.state_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.state_dir, ignore_errors=True)
+        env = patch.dict(os.environ, {'RISK_STATE_DIR': str(self.state_dir)})
+        env.start()
+        self.addCleanup(env.stop)
+        journal = trade_journal.TradeJournal(root=str(self.state_dir / "journal"))
+        self.addCleanup(journal.close)
+        shared = patch.object(trade_journal, '_journal', journal)
+        shared.start()
+        self.addCleanup(shared.stop)
+
+    def clear_state(self, prefix):
+        """Remove snapshot, journal and lock files"""
+        for path in self.state_dir.glob(f"{prefix}.*"):
+            os.remove(path)
+
+
+class TestRiskManager(StateDirTestCase):
     def setUp(self):
+        super().setUp()
         self.strategy_name = "TestStrategy"
         self.exchange = "NSE"
         self.capital = 100000
         self.rm = RiskManager(self.strategy_name, self.exchange, self.capital)
 
-        # Ensure clean state start
-        if self.rm.state_file.exists():
-            os.remove(self.rm.state_file)
-        self.rm._load_state()
-
     def tearDown(self):
-        # Clean up state file
-        if self.rm.state_file.exists():
-            os.remove(self.rm.state_file)
+        self.rm.close()
+
+    def test_state_dir_is_configurable(self):
+        self.assertEqual(self.rm.state_dir, self.state_dir)
+        other = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, other, ignore_errors=True)
+        rm = create_risk_manager("TestStateDir", state_dir=str(other))
+        rm.register_entry("SYM", 1, 100.0, "LONG")
+        rm.close()
+        self.assertTrue(list(other.glob("TestStateDir_risk_state.*")))
 
     def test_initialization(self):
         self.assertEqual(self.rm.daily_pnl, 0.0)
@@ -53,9 +79,10 @@ class TestRiskManager(unittest.TestCase):
         self.assertEqual(self.rm.daily_trades, 1)
 
         # Check persisted state
-        with open(self.rm.state_file) as f:
-            data = json.load(f)
-            self.assertIn(symbol, data['positions'])
+        restored = RiskManager(self.strategy_name, self.exchange, self.capital)
+        self.assertIn(symbol, restored.positions)
+        self.assertEqual(restored.daily_trades, 1)
+        restored.close()
 
         # Exit with profit
         exit_price = 105.0
@@ -64,6 +91,49 @@ class TestRiskManager(unittest.TestCase):
         self.assertNotIn(symbol, self.rm.positions)
         self.assertEqual(self.rm.daily_pnl, 50.0)
 
+        restored = RiskManager(self.strategy_name, self.exchange, self.capital)
+        self.assertEqual(restored.positions, {})
+        self.assertEqual(restored.daily_pnl, 50.0)
+        restored.close()
+
+    def test_state_survives_compaction(self):
+        self.rm.state_journal.compact_bytes = 2048
+        for i in range(40):
+            self.rm.register_entry(f"SYM{i % 7}", 10, 100.0 + i, "LONG")
+            if i % 3 == 0:
+                self.rm.register_exit(f"SYM{i % 7}", 101.0 + i)
+            self.rm.update_trailing_stop(f"SYM{i % 7}", 120.0 + i)
+
+        self.assertTrue(self.rm.state_file.exists())
+        restored = RiskManager(self.strategy_name, self.exchange, self.capital)
+        self.assertEqual(restored.positions, self.rm.positions)
+        self.assertEqual(restored.daily_trades, 40)
+        self.assertAlmostEqual(restored.daily_pnl, self.rm.daily_pnl)
+        restored.close()
+
+    def test_loads_legacy_state_file(self):
+        self.rm.close()
+        self.clear_state(f"{self.strategy_name}_risk_state")
+        legacy = {
+            'date': datetime.now().strftime('%Y-%m-%d'),
+            'daily_pnl': -250.0,
+            'daily_trades': 3,
+            'positions': {'OLD': {'qty': 5, 'entry_price': 50.0, 'stop_loss': 49.0, 'trailing_stop': 49.0}},
+            'circuit_breaker': False
+        }
+        with open(self.rm.state_file, 'w') as f:
+            json.dump(legacy, f, indent=2)
+
+        self.rm = RiskManager(self.strategy_name, self.exchange, self.capital)
+        self.assertEqual(self.rm.positions, legacy['positions'])
+        self.assertEqual(self.rm.daily_pnl, -250.0)
+
+        self.rm.register_exit('OLD', 51.0)
+        restored = RiskManager(self.strategy_name, self.exchange, self.capital)
+        self.assertEqual(restored.positions, {})
+        self.assertEqual(restored.daily_pnl, -245.0)
+        restored.close()
+
     def test_stop_loss_check(self):
         symbol = "TESTSL"
         self.rm.register_entry(symbol, 10, 100.0, "LONG")
@@ -151,8 +221,62 @@ class TestRiskManager(unittest.TestCase):
         self.assertFalse(can_trade)
         self.assertIn("Near market close", reason)
 
-class TestEODSquareOff(unittest.TestCase):
+class TestPortfolioLimits(StateDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.names = ["TestPortfolioA", "TestPortfolioB"]
+        config = {'max_portfolio_daily_loss': 1000, 'max_portfolio_positions': 3, 'trade_cooldown_seconds': 0}
+        self.a, self.b = (RiskManager(name, "NSE", 100000, config) for name in self.names)
+
+    def tearDown(self):
+        for rm in (self.a, self.b):
+            rm.close()
+
+    @patch('openalgo.strategies.utils.risk_manager.datetime')
+    def test_limits_are_shared(self, mock_datetime):
+        mock_datetime.now.return_value = datetime(2023, 10, 27, 10, 0, 0)
+
+        self.a.register_entry("A1", 10, 100.0, "LONG")
+        self.a.register_entry("A2", 10, 100.0, "LONG")
+        self.assertEqual(self.b.can_trade(), (True, "OK"))
+
+        self.b.register_entry("B1", 10, 100.0, "SHORT")
+        can_trade, reason = self.a.can_trade()
+        self.assertFalse(can_trade)
+        self.assertIn("PORTFOLIO POSITION LIMIT", reason)
+
+        # Losses well inside each strategy's own limit add up across strategies
+        self.a.register_exit("A1", 40.0)
+        self.b.register_exit("B1", 150.0)
+        self.assertEqual(self.b.get_portfolio_stats()['daily_pnl'], -1100.0)
+        can_trade, reason = self.b.can_trade()
+        self.assertFalse(can_trade)
+        self.assertIn("PORTFOLIO LOSS LIMIT", reason)
+
+        # Yesterday's PnL does not count, open positions still do
+        mock_datetime.now.return_value = datetime(2023, 10, 28, 10, 0, 0)
+        self.assertEqual(self.a.get_portfolio_stats()['daily_pnl'], 0.0)
+        self.assertEqual(self.a.get_portfolio_stats()['open_positions'], 1)
+
+    @patch('openalgo.strategies.utils.risk_manager.datetime')
+    def test_stale_strategy_entries_expire(self, mock_datetime):
+        mock_datetime.now.return_value = datetime(2023, 10, 27, 10, 0, 0)
+        self.a.register_entry("A1", 10, 100.0, "LONG")
+        self.b.register_entry("B1", 10, 100.0, "LONG")
+        self.b.register_exit("B1", 90.0)
+        self.assertEqual(self.a.get_portfolio_stats()['open_positions'], 1)
+
+        # A stops running with a position open; B keeps trading the next day
+        self.a.close()
+        mock_datetime.now.return_value = datetime(2023, 10, 28, 10, 0, 0)
+        stats = self.b.get_portfolio_stats()
+        self.assertEqual(stats['open_positions'], 0)
+        self.assertEqual(stats['strategies'], 1)
+
+
+class TestEODSquareOff(StateDirTestCase):
     def setUp(self):
+        super().setUp()
         self.rm = RiskManager("TestEOD", "NSE", 100000)
         # Add a position
         self.rm.register_entry("POS1", 10, 100, "LONG")
@@ -162,8 +286,7 @@ class TestEODSquareOff(unittest.TestCase):
         self.eod = EODSquareOff(self.rm, self.mock_exit)
 
     def tearDown(self):
-        if self.rm.state_file.exists():
-            os.remove(self.rm.state_file)
+        self.rm.close()
 
     @patch('openalgo.strategies.utils.risk_manager.datetime')
     def test_execute_square_off(self, mock_datetime):
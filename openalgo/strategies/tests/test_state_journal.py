@@ -0,0 +1,180 @@
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import signal
+import tempfile
+import time
+import unittest
+
+from openalgo.strategies.utils.state_journal import (
+    GENERATION_SIZE,
+    StateJournal,
+    apply_patch,
+    encode_record,
+)
+
+
+def step(name, i):
+    """Patch i of a writer: a counter plus a rolling set of keys, some deleted"""
+    return {'counters': {name: i}, name: {f'k{i % 5}': [i, 'x' * (i % 40)], f'k{(i + 2) % 5}': None}}
+
+
+def expected(name, n):
+    state = {}
+    for i in range(n + 1):
+        apply_patch(state, step(name, i))
+    return state.get(name, {})
+
+
+def run_writer(path, name, acked, compact_bytes):
+    """Append steps forever, resuming after the last one recovered"""
+    journal = StateJournal(path, compact_bytes=compact_bytes)
+    i = journal.load().get('counters', {}).get(name, -1) + 1
+    while True:
+        journal.append(step(name, i))
+        acked.value = i
+        i += 1
+
+
+def run_appender(path, name, count):
+    journal = StateJournal(path, compact_bytes=1024)
+    for i in range(count):
+        journal.append({name: {str(i): i}})
+    journal.close()
+
+
+class TestStateJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'state.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip_and_compaction(self):
+        journal = StateJournal(self.path, compact_bytes=1024)
+        for i in range(200):
+            journal.append(step('w', i))
+        journal.append({'positions': {'SBIN': {'qty': 10}}, 'daily_pnl': -12.5})
+
+        self.assertTrue(os.path.exists(self.path))
+        self.assertLess(os.path.getsize(journal.journal_path), 1024 + 200)
+        reopened = StateJournal(self.path)
+        self.assertEqual(reopened.load(), journal.state)
+        self.assertEqual(reopened.load()['w'], expected('w', 199))
+        journal.close()
+        reopened.close()
+
+    def test_other_instance_sees_appends_and_compactions(self):
+        a, b = StateJournal(self.path), StateJournal(self.path)
+        a.append({'x': 1, 'd': {'k': 1}})
+        self.assertEqual(b.load(), {'x': 1, 'd': {'k': 1}})
+
+        a.compact()
+        a.append({'d': {'k': None, 'j': 2}})
+        b.append({'y': 3})
+        self.assertEqual(a.load(), {'x': 1, 'y': 3, 'd': {'j': 2}})
+        self.assertEqual(b.load(), a.load())
+        a.close()
+        b.close()
+
+    def test_torn_tail_is_dropped_and_repaired(self):
+        journal = StateJournal(self.path)
+        for i in range(3):
+            journal.append(step('w', i))
+        journal.close()
+        with open(self.path.replace('.json', '.journal'), 'ab') as f:
+            f.write(encode_record(step('w', 3))[:-3])
+
+        journal = StateJournal(self.path)
+        self.assertEqual(journal.load()['w'], expected('w', 2))
+        journal.append(step('w', 3))
+        journal.close()
+
+        journal = StateJournal(self.path)
+        self.assertEqual(journal.load()['w'], expected('w', 3))
+        records = b''.join(encode_record(step('w', i)) for i in range(4))
+        self.assertEqual(os.path.getsize(journal.journal_path), GENERATION_SIZE + len(records))
+        journal.close()
+
+    def test_corrupt_record_stops_replay(self):
+        journal = StateJournal(self.path)
+        for i in range(3):
+            journal.append(step('w', i))
+        journal.close()
+        with open(self.path.replace('.json', '.journal'), 'r+b') as f:
+            f.seek(GENERATION_SIZE + len(encode_record(step('w', 0))) + 12)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 0xFF]))
+
+        journal = StateJournal(self.path)
+        self.assertEqual(journal.load()['counters'], {'w': 0})
+        journal.close()
+
+    def test_replaying_compacted_records_is_harmless(self):
+        # A compaction killed after writing the snapshot but before restarting the journal
+        journal = StateJournal(self.path)
+        for i in range(50):
+            journal.append(step('w', i))
+        state = journal.load()
+        with open(self.path, 'w') as f:
+            json.dump(state, f)
+        journal.close()
+
+        journal = StateJournal(self.path)
+        self.assertEqual(journal.load(), state)
+        journal.close()
+
+    def test_concurrent_writers_lose_nothing(self):
+        names = ['a', 'b', 'c']
+        writers = [multiprocessing.Process(target=run_appender, args=(self.path, name, 300)) for name in names]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+
+        journal = StateJournal(self.path)
+        state = journal.load()
+        for name in names:
+            self.assertEqual(state[name], {str(i): i for i in range(300)})
+        journal.close()
+
+    @unittest.skipUnless(hasattr(signal, 'SIGKILL'), 'needs SIGKILL')
+    def test_kill_9_fuzz(self):
+        rng = random.Random(7)
+        names = ['w0', 'w1']
+        acked = {name: multiprocessing.Value('q', -1) for name in names}
+        progress = dict.fromkeys(names, -1)
+
+        for _ in range(15):
+            writers = [
+                multiprocessing.Process(target=run_writer, args=(self.path, name, acked[name], 2048))
+                for name in names
+            ]
+            for writer in writers:
+                writer.start()
+            time.sleep(rng.uniform(0.05, 0.3))
+            for writer in writers:
+                os.kill(writer.pid, signal.SIGKILL)
+            for writer in writers:
+                writer.join()
+
+            journal = StateJournal(self.path)
+            state = journal.load()
+            journal.close()
+            for name in names:
+                n = state.get('counters', {}).get(name, -1)
+                # Every acknowledged append survives; one more may have landed before the kill
+                self.assertIn(n - acked[name].value, (0, 1))
+                self.assertGreaterEqual(n, progress[name])
+                self.assertEqual(state.get(name, {}), expected(name, n))
+                progress[name] = n
+
+        self.assertTrue(all(n > 0 for n in progress.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
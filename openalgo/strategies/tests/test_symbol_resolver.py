@@ -1,9 +1,13 @@
+import json
 import os
+import shutil
+import tempfile
+import time
 import unittest
 from datetime import datetime, timedelta
 
 import pandas as pd
-from openalgo.strategies.utils.symbol_resolver import SymbolResolver
+from openalgo.strategies.utils.symbol_resolver import SymbolResolver, build_instrument_index
 
 
 class TestSymbolResolver(unittest.TestCase):
@@ -71,5 +75,119 @@ class TestSymbolResolver(unittest.TestCase):
         # Should pick the one 10 days away (Last in Oct) not 3 days (Nearest) or Nov (Next month)
         self.assertIn('MONTHLY', res['sample_symbol'])
 
+
+class TestInstrumentIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, 'instruments.csv')
+        now = datetime.now()
+        data = [
+            {'exchange': 'NSE', 'token': '1', 'symbol': 'RELIANCE', 'name': 'RELIANCE', 'expiry': None, 'instrument_type': 'EQ'},
+            {'exchange': 'NSE', 'token': '2', 'symbol': 'SBIN-EQ', 'name': 'SBIN', 'expiry': None, 'instrument_type': 'EQ'},
+            {'exchange': 'NSE', 'token': '3', 'symbol': 'INFY', 'name': 'Infosys', 'expiry': None, 'instrument_type': 'EQ'},
+            {'exchange': 'MCX', 'token': '4', 'symbol': 'GOLD26FEBFUT', 'name': 'GOLD', 'expiry': (now - timedelta(days=3)).strftime('%Y-%m-%d'), 'instrument_type': 'FUT'},
+            {'exchange': 'MCX', 'token': '5', 'symbol': 'GOLD26MARFUT', 'name': 'GOLD', 'expiry': (now + timedelta(days=30)).strftime('%Y-%m-%d'), 'instrument_type': 'FUT'},
+            {'exchange': 'MCX', 'token': '6', 'symbol': 'GOLDM26MARFUT', 'name': 'GOLD', 'expiry': (now + timedelta(days=40)).strftime('%Y-%m-%d'), 'instrument_type': 'FUT'},
+            {'exchange': 'MCX', 'token': '7', 'symbol': 'ZINCMINI26MARFUT', 'name': 'ZINC MINI', 'expiry': (now + timedelta(days=30)).strftime('%Y-%m-%d'), 'instrument_type': 'FUT'},
+            {'exchange': 'NFO', 'token': '8', 'symbol': 'NIFTY26MARFUT', 'name': 'NIFTY', 'expiry': (now + timedelta(days=30)).strftime('%Y-%m-%d'), 'instrument_type': 'FUT'},
+        ]
+        # Option chains: expired, two weeklies and a monthly, strikes listed out of order
+        token = 100
+        for name, base, step in (('NIFTY', 22000, 50), ('BANKNIFTY', 48000, 100)):
+            for days in (-1, 2, 9, 65):
+                expiry = now + timedelta(days=days)
+                for k in (7, 0, 3, 9, 1, 5, 8, 2, 6, 4):
+                    for option_type in ('CE', 'PE'):
+                        strike = base + k * step
+                        data.append({
+                            'exchange': 'NFO', 'token': str(token),
+                            'symbol': f"{name}{expiry.strftime('%d%b%y').upper()}{strike}{option_type}",
+                            'name': name, 'expiry': expiry.strftime('%Y-%m-%d'), 'instrument_type': 'OPT',
+                        })
+                        token += 1
+        pd.DataFrame(data).to_csv(self.csv_path, index=False)
+        build_instrument_index(self.csv_path)
+
+        self.csv = SymbolResolver(self.csv_path, use_index=False)
+        self.indexed = SymbolResolver(self.csv_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_opens_index_without_reading_csv(self):
+        self.assertIsNotNone(self.indexed.index)
+        self.assertIsNone(self.indexed._df)
+        self.assertEqual(len(self.indexed.index), len(self.csv.df))
+
+    def test_index_resolves_like_csv(self):
+        configs = [
+            {'type': 'EQUITY', 'underlying': 'RELIANCE'},
+            {'type': 'EQUITY', 'underlying': 'SBIN'},
+            {'type': 'EQUITY', 'underlying': 'INFY'},
+            {'type': 'EQUITY', 'underlying': 'UNLISTED'},
+            {'type': 'FUT', 'underlying': 'GOLD', 'exchange': 'MCX'},
+            {'type': 'FUT', 'underlying': 'ZINC', 'exchange': 'MCX'},
+            {'type': 'FUT', 'underlying': 'NIFTY', 'exchange': 'NFO'},
+            {'type': 'FUT', 'underlying': 'SILVER', 'exchange': 'MCX'},
+        ]
+        for underlying in ('NIFTY', 'NIFTY 50', 'BANKNIFTY', 'NIFTY BANK', 'FINNIFTY'):
+            for option_type in ('CE', 'PE'):
+                for expiry_preference in ('WEEKLY', 'MONTHLY'):
+                    configs.append({'type': 'OPT', 'underlying': underlying, 'exchange': 'NFO',
+                                    'option_type': option_type, 'expiry_preference': expiry_preference})
+        for config in configs:
+            self.assertEqual(self.indexed.resolve(config), self.csv.resolve(config), config)
+
+    def test_strike_selection_matches_csv(self):
+        for underlying, spots in (('NIFTY', (21000, 22000, 22110, 22125, 22140, 22449.5, 23000)),
+                                  ('BANKNIFTY', (48050, 48449, 48550, 60000))):
+            for option_type in ('CE', 'PE'):
+                for criteria in ('ATM', 'ITM', 'OTM'):
+                    for spot in spots:
+                        config = {'type': 'OPT', 'underlying': underlying, 'exchange': 'NFO',
+                                  'option_type': option_type, 'strike_criteria': criteria}
+                        expected = self.csv.get_tradable_symbol(config, spot_price=spot)
+                        self.assertIsNotNone(expected)
+                        self.assertEqual(self.indexed.get_tradable_symbol(config, spot_price=spot), expected,
+                                         (config, spot))
+
+    def test_tokens_and_symbols(self):
+        self.assertEqual(self.indexed.get_token('GOLDM26MARFUT'), '6')
+        self.assertEqual(self.indexed.get_token('GOLDM26MARFUT', 'NSE'), None)
+        self.assertEqual(self.csv.get_token('GOLDM26MARFUT', 'MCX'), '6')
+        self.assertEqual(self.indexed.known_symbols(), self.csv.known_symbols())
+
+    def test_stale_index_falls_back_to_csv(self):
+        time.sleep(0.01)
+        with open(self.csv_path, 'a') as f:
+            f.write('NSE,999,TCS,TCS,,EQ\n')
+        resolver = SymbolResolver(self.csv_path)
+        self.assertIsNone(resolver.index)
+        self.assertEqual(resolver.get_token('TCS'), '999')
+
+        build_instrument_index(self.csv_path)
+        resolver = SymbolResolver(self.csv_path)
+        self.assertIsNotNone(resolver.index)
+        self.assertEqual(resolver.get_token('TCS'), '999')
+
+    def test_resolve_all(self):
+        config_path = os.path.join(self.tmp_dir, 'active_strategies.json')
+        with open(config_path, 'w') as f:
+            json.dump({
+                'gold_trend': {'type': 'FUT', 'underlying': 'GOLD', 'exchange': 'MCX'},
+                'gold_scalper': {'type': 'FUT', 'underlying': 'GOLD', 'exchange': 'MCX'},
+                'nifty_weekly': {'type': 'OPT', 'underlying': 'NIFTY', 'exchange': 'NFO', 'option_type': 'CE'},
+                'silver_trend': {'type': 'FUT', 'underlying': 'SILVER', 'exchange': 'MCX'},
+                'broken': {'type': 'OPT', 'underlying': 'NIFTY', 'exchange': 'NFO', 'expiry_preference': 5},
+            }, f)
+        results = self.indexed.resolve_all(config_path)
+        self.assertEqual({k: v['status'] for k, v in results.items()}, {
+            'gold_trend': 'valid', 'gold_scalper': 'valid', 'nifty_weekly': 'valid',
+            'silver_trend': 'invalid', 'broken': 'error',
+        })
+        self.assertEqual(results['gold_trend']['resolved'], 'GOLDM26MARFUT')
+        self.assertEqual(results['nifty_weekly']['resolved']['count'], 10)
+
+
 if __name__ == '__main__':
     unittest.main()
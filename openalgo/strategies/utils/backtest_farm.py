@@ -0,0 +1,222 @@
+"""
+Backtest Farm
+-------------
+Fans (strategy x symbol x params) backtests out to a process pool.
+
+Each (symbol, exchange, interval) frame is loaded once by the parent, kept in a
+dataset directory so the run can be repeated offline, and published in shared
+memory; workers attach to it instead of refetching or regenerating data.
+Tasks are scheduled longest-first and every finished task is appended to a JSONL
+ledger, so an interrupted run resumes where it stopped.
+"""
+import json
+import logging
+import os
+import re
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("BacktestFarm")
+
+FRAME_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def frame_key(symbol: str, exchange: str, interval: str) -> str:
+    """File-name safe key of one price series."""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', f"{exchange}_{symbol}_{interval}")
+
+
+def _to_arrays(df: pd.DataFrame):
+    index = pd.DatetimeIndex(df.index)
+    tz = str(index.tz) if index.tz is not None else None
+    if tz:
+        index = index.tz_convert('UTC').tz_localize(None)
+    values = df[list(FRAME_COLUMNS)].to_numpy(dtype=np.float64)
+    return index.asi8, values, tz
+
+
+def _from_arrays(stamps: np.ndarray, values: np.ndarray, tz: str | None) -> pd.DataFrame:
+    index = pd.DatetimeIndex(stamps.view('datetime64[ns]'), name='datetime')
+    if tz:
+        index = index.tz_localize('UTC').tz_convert(tz)
+    return pd.DataFrame(values, index=index, columns=list(FRAME_COLUMNS))
+
+
+class DatasetCache:
+    """OHLCV frames stored as .npz files under one directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.npz")
+
+    def load(self, key: str) -> pd.DataFrame | None:
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            tz = str(data['tz']) or None
+            return _from_arrays(data['stamps'], data['values'], tz)
+
+    def save(self, key: str, df: pd.DataFrame):
+        os.makedirs(self.root, exist_ok=True)
+        stamps, values, tz = _to_arrays(df)
+        tmp_path = self.path(key) + '.tmp.npz'
+        np.savez(tmp_path, stamps=stamps, values=values, tz=np.array(tz or ''))
+        os.replace(tmp_path, self.path(key))
+
+
+class SharedFrames:
+    """
+    Parent side of the shared price data: one shared memory block per frame,
+    holding the int64 timestamps followed by the float64 OHLCV matrix.
+    """
+
+    def __init__(self):
+        self.specs: dict[str, dict[str, Any]] = {}
+        self._blocks: list[shared_memory.SharedMemory] = []
+
+    def publish(self, key: str, df: pd.DataFrame) -> dict[str, Any]:
+        stamps, values, tz = _to_arrays(df)
+        rows = len(stamps)
+        block = shared_memory.SharedMemory(create=True, size=max(1, stamps.nbytes + values.nbytes))
+        self._blocks.append(block)
+        np.ndarray((rows,), dtype=np.int64, buffer=block.buf)[:] = stamps
+        np.ndarray(values.shape, dtype=np.float64, buffer=block.buf, offset=stamps.nbytes)[:] = values
+        self.specs[key] = {'name': block.name, 'rows': rows, 'tz': tz}
+        return self.specs[key]
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks.clear()
+        self.specs.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Worker side: blocks stay attached for the life of the worker process
+_attached: dict[str, shared_memory.SharedMemory] = {}
+_worker_specs: dict[str, dict[str, Any]] = {}
+
+
+def attach_frame(spec: dict[str, Any]) -> pd.DataFrame:
+    """Frame over a published block. The arrays are read-only views into shared memory."""
+    block = _attached.get(spec['name'])
+    if block is None:
+        block = shared_memory.SharedMemory(name=spec['name'])
+        _attached[spec['name']] = block
+    rows = spec['rows']
+    stamps = np.ndarray((rows,), dtype=np.int64, buffer=block.buf)
+    values = np.ndarray((rows, len(FRAME_COLUMNS)), dtype=np.float64, buffer=block.buf, offset=rows * 8)
+    values.flags.writeable = False
+    return _from_arrays(stamps, values, spec['tz'])
+
+
+def _init_worker(specs: dict[str, dict[str, Any]]):
+    _worker_specs.update(specs)
+
+
+@dataclass
+class FarmTask:
+    """One backtest: payload goes to the task function along with the named frame."""
+    task_id: str
+    frame: str
+    payload: dict[str, Any] = field(default_factory=dict)
+    cost: float = 0.0
+
+
+def _run_task(task_fn: Callable, task: FarmTask, frame: pd.DataFrame | None = None):
+    if frame is None:
+        frame = attach_frame(_worker_specs[task.frame])
+    start = time.perf_counter()
+    try:
+        result = task_fn(task.payload, frame)
+    except Exception as e:
+        logger.error(f"Task {task.task_id} failed: {e}", exc_info=True)
+        result = {'error': str(e)}
+    return task.task_id, result, time.perf_counter() - start
+
+
+class TaskLedger:
+    """Append-only JSONL of finished tasks. Failed tasks are retried on resume."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: dict[str, dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn last line of an interrupted run
+                    if 'error' not in record['result']:
+                        self.done[record['task_id']] = record
+
+    def record(self, task_id: str, result: dict[str, Any], seconds: float):
+        record = {'task_id': task_id, 'seconds': round(seconds, 4), 'result': result}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+        if 'error' not in result:
+            self.done[task_id] = json.loads(json.dumps(record, default=str))
+
+
+def run_farm(
+    tasks: list[FarmTask],
+    frames: dict[str, pd.DataFrame],
+    task_fn: Callable[[dict[str, Any], pd.DataFrame], dict[str, Any]],
+    ledger: TaskLedger,
+    workers: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Run every task not already in the ledger, longest-first.
+
+    task_fn(payload, frame) must be a module-level function (it is pickled to the
+    workers) returning a JSON-serializable dict. workers=1 runs in this process.
+    Returns the ledger result of each task, in task order.
+    """
+    pending = sorted((t for t in tasks if t.task_id not in ledger.done), key=lambda t: -t.cost)
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"{len(tasks)} tasks, {len(tasks) - len(pending)} already in {ledger.path}, "
+                f"running {len(pending)} on {workers} worker(s)")
+
+    errors = {}
+
+    def finish(task_id, result, seconds):
+        ledger.record(task_id, result, seconds)
+        if 'error' in result:
+            errors[task_id] = result
+
+    if pending and workers == 1:
+        for task in pending:
+            finish(*_run_task(task_fn, task, frames[task.frame]))
+    elif pending:
+        with SharedFrames() as shared:
+            for key in {task.frame for task in pending}:
+                shared.publish(key, frames[key])
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(shared.specs,)) as pool:
+                # Submitted longest-first; the pool hands them out in that order
+                futures = [pool.submit(_run_task, task_fn, task) for task in pending]
+                for future in as_completed(futures):
+                    finish(*future.result())
+
+    return [
+        ledger.done[task.task_id]['result'] if task.task_id in ledger.done else errors[task.task_id]
+        for task in tasks
+    ]
@@ -24,6 +24,7 @@ except Exception:
 try:
     # Try relative import first (for package mode)
     from .symbol_resolver import SymbolResolver
+    from .trade_journal import ORDER, PNL, SIGNAL, get_trade_journal, new_signal_id
     from .trading_utils import (
         APIClient,
         PositionManager,
@@ -48,6 +49,7 @@ except ImportError:
     # Fallback to absolute import or direct import (for script mode)
     try:
         from symbol_resolver import SymbolResolver
+        from trade_journal import ORDER, PNL, SIGNAL, get_trade_journal, new_signal_id
         from trading_utils import (
             APIClient,
             PositionManager,
@@ -72,6 +74,7 @@ except ImportError:
         # If running from a script that didn't set path correctly
         sys.path.append(os.path.dirname(os.path.abspath(__file__)))
         from symbol_resolver import SymbolResolver
+        from trade_journal import ORDER, PNL, SIGNAL, get_trade_journal, new_signal_id
         from trading_utils import (
             APIClient,
             PositionManager,
@@ -148,6 +151,7 @@ class BaseStrategy:
 
         self.pm = PositionManager(self.symbol) if (PositionManager and self.symbol) else None
         self.smart_order = SmartOrder(self.client) if SmartOrder else None
+        self.journal = get_trade_journal()
 
     def setup(self):
         """
@@ -286,6 +290,13 @@ class BaseStrategy:
 
         self.logger.info(f"Executing {action} {quantity} {self.symbol} @ {price or 'MKT'}")
 
+        # Journal the signal; the order event's timestamp gives placement latency
+        signal_id = new_signal_id()
+        self.journal.record(
+            SIGNAL, self.name, symbol=self.symbol, exchange=self.exchange, action=action,
+            quantity=quantity, price=price, signal_id=signal_id, source="strategy", urgency=urgency
+        )
+
         # Place order via API
         response = self.smart_order.place_adaptive_order(
             strategy=self.name,
@@ -298,6 +309,13 @@ class BaseStrategy:
             urgency=urgency
         )
 
+        order_id = response.get('orderid') if isinstance(response, dict) else None
+        self.journal.record(
+            ORDER, self.name, symbol=self.symbol, exchange=self.exchange, action=action,
+            quantity=quantity, price=price, signal_id=signal_id, order_id=order_id,
+            status="placed" if response else "failed", source="strategy"
+        )
+
         # Update local position state if API call didn't fail (optimistic update or check response)
         # Note: API might return None on failure
         if response:
@@ -310,7 +328,14 @@ class BaseStrategy:
                  if quote and 'ltp' in quote:
                      update_price = float(quote['ltp'])
 
+            realized_before = self.pm.pnl
             self.pm.update_position(quantity, update_price, action)
+            if self.pm.pnl != realized_before:
+                self.journal.record(
+                    PNL, self.name, symbol=self.symbol, exchange=self.exchange, action=action,
+                    quantity=quantity, price=update_price, pnl=self.pm.pnl - realized_before,
+                    signal_id=signal_id, order_id=order_id, source="strategy"
+                )
             return response
         else:
             self.logger.error("Trade execution failed (no response from API)")
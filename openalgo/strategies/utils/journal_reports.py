@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Journal Reports - Leaderboard, slippage and latency queries over the trade journal
+
+Each (date, strategy) partition is summarised once with DuckDB and the
+summary cached next to the journal. Part files are immutable, so a partition
+only needs recomputing when its file list changes; a refresh lists the
+journal directories and queries just the new or changed partitions.
+
+Summaries compose across partitions:
+- Trades: counts, gross profit/loss and the cumulative PnL extremes needed
+  to chain max drawdown across days
+- Slippage: |fill - signal price| sums per symbol (fills are linked to the
+  signal through the order ID)
+- Latency: signal to order placement time per strategy
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime
+
+try:
+    from .trade_journal import JOURNAL_DIR, duckdb, journal_relation, list_partitions
+except ImportError:
+    from trade_journal import JOURNAL_DIR, duckdb, journal_relation, list_partitions
+
+logger = logging.getLogger("JournalReports")
+
+CACHE_FILE = "_reports.json"
+CACHE_VERSION = 1
+
+TRADES_SQL = """
+WITH trades AS (
+    SELECT date, strategy, pnl,
+           row_number() OVER w AS n,
+           sum(pnl) OVER w AS cum
+    FROM journal
+    WHERE event = 'PNL' AND pnl IS NOT NULL
+    WINDOW w AS (PARTITION BY date, strategy ORDER BY ts ROWS UNBOUNDED PRECEDING)
+),
+peaks AS (
+    SELECT *, greatest(0, max(cum) OVER (PARTITION BY date, strategy ORDER BY n
+                                         ROWS UNBOUNDED PRECEDING)) AS peak
+    FROM trades
+)
+SELECT strftime(date, '%Y-%m-%d') AS date, strategy,
+       count(*) AS trades,
+       count(*) FILTER (WHERE pnl > 0) AS wins,
+       coalesce(sum(pnl) FILTER (WHERE pnl > 0), 0) AS gross_profit,
+       coalesce(-sum(pnl) FILTER (WHERE pnl < 0), 0) AS gross_loss,
+       sum(pnl) AS net_pnl,
+       greatest(0, max(cum)) AS high,
+       least(0, min(cum)) AS low,
+       least(0, min(cum - peak)) AS max_drawdown
+FROM peaks
+GROUP BY ALL
+"""
+
+SLIPPAGE_SQL = """
+WITH signals AS (
+    SELECT date, strategy, signal_id, price AS signal_price
+    FROM journal WHERE event = 'SIGNAL' AND signal_id IS NOT NULL AND price IS NOT NULL
+),
+orders AS (
+    SELECT date, strategy, order_id, any_value(signal_id) AS signal_id
+    FROM journal WHERE event = 'ORDER' AND order_id IS NOT NULL
+    GROUP BY ALL
+),
+fills AS (
+    SELECT date, strategy, symbol, price AS fill_price, signal_id, order_id
+    FROM journal WHERE event = 'FILL' AND price IS NOT NULL
+)
+SELECT strftime(f.date, '%Y-%m-%d') AS date, f.strategy, f.symbol,
+       sum(abs(f.fill_price - s.signal_price)) AS total,
+       count(*) AS fills
+FROM fills f
+LEFT JOIN orders o USING (date, strategy, order_id)
+JOIN signals s
+  ON s.date = f.date AND s.strategy = f.strategy
+ AND s.signal_id = coalesce(f.signal_id, o.signal_id)
+GROUP BY ALL
+"""
+
+LATENCY_SQL = """
+SELECT strftime(o.date, '%Y-%m-%d') AS date, o.strategy,
+       sum(date_diff('microsecond', s.ts, o.ts)) / 1000.0 AS total_ms,
+       max(date_diff('microsecond', s.ts, o.ts)) / 1000.0 AS max_ms,
+       count(*) AS orders
+FROM journal o
+JOIN journal s
+  ON s.date = o.date AND s.strategy = o.strategy AND s.signal_id = o.signal_id
+WHERE o.event = 'ORDER' AND s.event = 'SIGNAL'
+GROUP BY ALL
+"""
+
+
+def _signature(files: list[str]) -> str:
+    return hashlib.sha1("\n".join(os.path.basename(path) for path in files).encode()).hexdigest()
+
+
+def _in_range(day: str, start: date | None, end: date | None) -> bool:
+    return (start is None or day >= start.isoformat()) and (end is None or day <= end.isoformat())
+
+
+class JournalReports:
+    """
+    Cached per-partition summaries of the trade journal.
+
+    Call refresh() before reading; it only queries partitions whose part
+    files changed since the last refresh.
+    """
+
+    def __init__(self, root: str | None = None):
+        self.root = root or JOURNAL_DIR
+        self.cache_path = os.path.join(self.root, CACHE_FILE)
+        self.summaries: dict[str, dict] = self._load_cache()
+
+    def refresh(self, start: date | None = None, end: date | None = None) -> int:
+        """
+        Bring summaries for the date range up to date.
+
+        Returns:
+            Number of partitions that were (re)computed
+        """
+        if duckdb is None:
+            raise RuntimeError("duckdb is required for journal reports")
+
+        stale = {}
+        for (day, strategy), files in list_partitions(self.root).items():
+            if not _in_range(day, start, end):
+                continue
+            key = f"{day}/{strategy}"
+            signature = _signature(files)
+            cached = self.summaries.get(key)
+            if cached is None or cached["signature"] != signature:
+                stale[key] = (files, signature)
+
+        if not stale:
+            return 0
+
+        con = duckdb.connect()
+        try:
+            journal_relation(con, [path for files, _ in stale.values() for path in files])
+            trades = con.execute(TRADES_SQL).fetchall()
+            slippage = con.execute(SLIPPAGE_SQL).fetchall()
+            latency = con.execute(LATENCY_SQL).fetchall()
+        finally:
+            con.close()
+
+        for key, (_, signature) in stale.items():
+            self.summaries[key] = {"signature": signature, "trades": None, "slippage": {}, "latency": None}
+
+        for day, strategy, count, wins, profit, loss, net, high, low, drawdown in trades:
+            self.summaries[f"{day}/{strategy}"]["trades"] = {
+                "trades": count,
+                "wins": wins,
+                "gross_profit": profit,
+                "gross_loss": loss,
+                "net_pnl": net,
+                "high": high,
+                "low": low,
+                "max_drawdown": drawdown,
+            }
+        for day, strategy, symbol, total, fills in slippage:
+            self.summaries[f"{day}/{strategy}"]["slippage"][symbol] = [total, fills]
+        for day, strategy, total_ms, max_ms, orders in latency:
+            self.summaries[f"{day}/{strategy}"]["latency"] = [total_ms, max_ms, orders]
+
+        self._save_cache()
+        logger.info(f"Refreshed {len(stale)} journal partitions")
+        return len(stale)
+
+    def strategy_stats(self, start: date | None = None, end: date | None = None) -> list[dict]:
+        """
+        Leaderboard rows per strategy, best profit factor first.
+
+        Max drawdown is over the cumulative realized PnL of the whole range,
+        chained day by day from the partition summaries.
+        """
+        stats = {}
+        for key in sorted(self.summaries):
+            day, strategy = key.split("/", 1)
+            summary = self.summaries[key]["trades"]
+            if summary is None or not _in_range(day, start, end):
+                continue
+
+            s = stats.setdefault(
+                strategy,
+                {"trades": 0, "wins": 0, "gross_profit": 0.0, "gross_loss": 0.0,
+                 "net_pnl": 0.0, "peak": 0.0, "max_drawdown": 0.0},
+            )
+            s["max_drawdown"] = min(
+                s["max_drawdown"], summary["max_drawdown"], s["net_pnl"] + summary["low"] - s["peak"]
+            )
+            s["peak"] = max(s["peak"], s["net_pnl"] + summary["high"])
+            for field in ("trades", "wins", "gross_profit", "gross_loss", "net_pnl"):
+                s[field] += summary[field]
+
+        rows = []
+        for strategy, s in stats.items():
+            rows.append({
+                "strategy": strategy,
+                "trades": s["trades"],
+                "wins": s["wins"],
+                "win_rate": s["wins"] / s["trades"] * 100 if s["trades"] else 0.0,
+                "gross_profit": s["gross_profit"],
+                "gross_loss": s["gross_loss"],
+                "profit_factor": (
+                    s["gross_profit"] / s["gross_loss"] if s["gross_loss"] else float("inf")
+                ),
+                "net_pnl": s["net_pnl"],
+                "max_drawdown": s["max_drawdown"],
+            })
+        rows.sort(key=lambda row: row["profit_factor"], reverse=True)
+        return rows
+
+    def slippage(self, start: date | None = None, end: date | None = None) -> dict[str, dict]:
+        """Average absolute slippage per symbol: {symbol: {"avg": ..., "fills": ...}}"""
+        totals = {}
+        for key, summary in self.summaries.items():
+            if not _in_range(key.split("/", 1)[0], start, end):
+                continue
+            for symbol, (total, fills) in summary["slippage"].items():
+                acc = totals.setdefault(symbol, [0.0, 0])
+                acc[0] += total
+                acc[1] += fills
+        return {
+            symbol: {"avg": total / fills, "fills": fills}
+            for symbol, (total, fills) in sorted(totals.items())
+        }
+
+    def latency(self, start: date | None = None, end: date | None = None) -> dict[str, dict]:
+        """Signal to order latency per strategy: {strategy: {"avg_ms", "max_ms", "orders"}}"""
+        totals = {}
+        for key, summary in self.summaries.items():
+            day, strategy = key.split("/", 1)
+            if summary["latency"] is None or not _in_range(day, start, end):
+                continue
+            total_ms, max_ms, orders = summary["latency"]
+            acc = totals.setdefault(strategy, [0.0, 0.0, 0])
+            acc[0] += total_ms
+            acc[1] = max(acc[1], max_ms)
+            acc[2] += orders
+        return {
+            strategy: {"avg_ms": total / orders, "max_ms": max_ms, "orders": orders}
+            for strategy, (total, max_ms, orders) in sorted(totals.items())
+        }
+
+    def _load_cache(self) -> dict[str, dict]:
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                return data["partitions"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable report cache {self.cache_path}: {e}")
+        return {}
+
+    def _save_cache(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"version": CACHE_VERSION, "updated": datetime.now().isoformat(),
+                 "partitions": self.summaries},
+                f,
+            )
+        os.replace(tmp_path, self.cache_path)
@@ -8,6 +8,10 @@ This module provides essential risk management features that MUST be used by all
 3. Max daily loss circuit breaker
 4. Position size limits
 5. Trade cooldown periods
+6. Portfolio-level limits shared by every strategy process
+
+State is kept in an append-only journal with periodic snapshots (see
+state_journal.py), so frequent fills stay cheap and a crash cannot corrupt it.
 
 CRITICAL: All strategies MUST use this module to prevent catastrophic losses.
 
@@ -15,7 +19,6 @@ Author: OpenAlgo Risk Management
 Version: 1.0.0
 """
 
-import json
 import logging
 import os
 from collections.abc import Callable
@@ -26,6 +29,13 @@ from typing import Any, Dict, Optional
 
 import pytz
 
+try:
+    from .state_journal import StateJournal
+    from .trade_journal import FILL, PNL, get_trade_journal
+except ImportError:
+    from state_journal import StateJournal
+    from trade_journal import FILL, PNL, get_trade_journal
+
 logger = logging.getLogger("RiskManager")
 
 class RiskManager:
@@ -50,8 +60,14 @@ class RiskManager:
         'trade_cooldown_seconds': 300,       # 5 min between trades
         'trailing_stop_enabled': True,
         'trailing_stop_pct': 1.5,            # 1.5% trailing stop
+        'max_portfolio_daily_loss': None,    # Max combined daily loss (Rs) of all strategies
+        'max_portfolio_positions': None,     # Max open positions across all strategies
+        'state_fsync': False,                # fsync state writes (survive power loss, not just crashes)
+        'state_dir': None,                   # State directory (default: $RISK_STATE_DIR or strategies/state)
     }
 
+    PORTFOLIO_STATE_FILE = "portfolio_risk.json"
+
     def __init__(self, strategy_name: str, exchange: str = "NSE",
                  capital: float = 100000, config: dict | None = None):
         """
@@ -76,53 +92,81 @@ class RiskManager:
         self.is_circuit_breaker_active = False
 
         # State persistence
-        self.state_dir = Path(__file__).resolve().parent.parent / "state"
+        self.state_dir = Path(self.config['state_dir'] or os.getenv('RISK_STATE_DIR')
+                              or Path(__file__).resolve().parent.parent / "state")
         self.state_dir.mkdir(parents=True, exist_ok=True)
         self.state_file = self.state_dir / f"{strategy_name}_risk_state.json"
+        self.state_journal = StateJournal(self.state_file, fsync=self.config['state_fsync'])
+        # Shared by every strategy: per-strategy daily PnL and open positions
+        self.portfolio_journal = StateJournal(self.state_dir / self.PORTFOLIO_STATE_FILE,
+                                              fsync=self.config['state_fsync'])
+        self._portfolio_entry = None
+        self.journal = get_trade_journal()
 
         self._load_state()
+        self._publish_portfolio_entry()
         logger.info(f"RiskManager initialized for {strategy_name} on {exchange}")
 
     def _load_state(self):
-        """Load persisted state from file."""
-        if self.state_file.exists():
-            try:
-                with open(self.state_file) as f:
-                    data = json.load(f)
-
-                    # Check if state is from today
-                    last_date = data.get('date', '')
-                    today = datetime.now().strftime('%Y-%m-%d')
-
-                    if last_date == today:
-                        self.daily_pnl = data.get('daily_pnl', 0.0)
-                        self.daily_trades = data.get('daily_trades', 0)
-                        self.positions = data.get('positions', {})
-                        self.is_circuit_breaker_active = data.get('circuit_breaker', False)
-                        logger.info(f"Loaded today's state: PnL={self.daily_pnl}, Trades={self.daily_trades}")
-                    else:
-                        # New day - reset daily counters but keep positions
-                        self.positions = data.get('positions', {})
-                        logger.info(f"New trading day - reset daily counters. Carried over {len(self.positions)} positions.")
-            except Exception as e:
-                logger.error(f"Failed to load risk state: {e}")
+        """Load persisted state (snapshot plus journal)."""
+        try:
+            data = self.state_journal.load()
+        except Exception as e:
+            logger.error(f"Failed to load risk state: {e}")
+            return
+        if not data:
+            return
+
+        # Check if state is from today
+        last_date = data.get('date', '')
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        if last_date == today:
+            self.daily_pnl = data.get('daily_pnl', 0.0)
+            self.daily_trades = data.get('daily_trades', 0)
+            self.positions = data.get('positions', {})
+            self.is_circuit_breaker_active = data.get('circuit_breaker', False)
+            logger.info(f"Loaded today's state: PnL={self.daily_pnl}, Trades={self.daily_trades}")
+        else:
+            # New day - reset daily counters but keep positions
+            self.positions = data.get('positions', {})
+            logger.info(f"New trading day - reset daily counters. Carried over {len(self.positions)} positions.")
+
+    def _save_state(self, *symbols: str):
+        """
+        Persist the daily counters and the given positions.
 
-    def _save_state(self):
-        """Persist state to file."""
+        Only what changed is journaled: positions of other symbols are kept as
+        they are, and a symbol no longer in self.positions is removed.
+        """
         try:
-            data = {
+            self.state_journal.append({
                 'date': datetime.now().strftime('%Y-%m-%d'),
                 'daily_pnl': self.daily_pnl,
                 'daily_trades': self.daily_trades,
-                'positions': self.positions,
+                'positions': {symbol: self.positions.get(symbol) for symbol in symbols},
                 'circuit_breaker': self.is_circuit_breaker_active,
                 'last_updated': datetime.now().isoformat()
-            }
-            with open(self.state_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            })
+            self._publish_portfolio_entry()
         except Exception as e:
             logger.error(f"Failed to save risk state: {e}")
 
+    def _publish_portfolio_entry(self):
+        """Share this strategy's daily PnL and open positions with the other strategies."""
+        entry = {
+            'date': datetime.now().strftime('%Y-%m-%d'),
+            'daily_pnl': self.daily_pnl,
+            'open_positions': len(self.positions)
+        }
+        if entry == self._portfolio_entry:
+            return
+        try:
+            self.portfolio_journal.append({'strategies': {self.strategy_name: entry}})
+            self._portfolio_entry = entry
+        except Exception as e:
+            logger.error(f"Failed to save portfolio risk state: {e}")
+
     def can_trade(self) -> tuple[bool, str]:
         """
         Check if trading is allowed based on risk parameters.
@@ -141,6 +185,16 @@ class RiskManager:
             self._save_state()
             return False, f"CIRCUIT BREAKER TRIGGERED - Daily loss {self.daily_pnl:.2f} exceeds limit {max_daily_loss:.2f}"
 
+        # Check portfolio limits (all strategies sharing the state dir)
+        max_portfolio_loss = self.config['max_portfolio_daily_loss']
+        max_portfolio_positions = self.config['max_portfolio_positions']
+        if max_portfolio_loss is not None or max_portfolio_positions is not None:
+            portfolio = self.get_portfolio_stats()
+            if max_portfolio_loss is not None and portfolio['daily_pnl'] <= -max_portfolio_loss:
+                return False, f"PORTFOLIO LOSS LIMIT - Combined daily loss {portfolio['daily_pnl']:.2f} exceeds limit {max_portfolio_loss:.2f}"
+            if max_portfolio_positions is not None and portfolio['open_positions'] >= max_portfolio_positions:
+                return False, f"PORTFOLIO POSITION LIMIT - {portfolio['open_positions']} open positions across strategies (max {max_portfolio_positions})"
+
         # Check EOD square-off time
         if self._is_near_market_close():
             return False, "Near market close - no new positions allowed"
@@ -218,7 +272,7 @@ class RiskManager:
             new_stop = current_price * (1 - pct)
             if new_stop > pos.get('trailing_stop', 0):
                 pos['trailing_stop'] = new_stop
-                self._save_state()
+                self._save_state(symbol)
                 logger.info(f"Trailing stop updated for {symbol}: {new_stop:.2f}")
                 return new_stop
         else:  # Short position
@@ -227,7 +281,7 @@ class RiskManager:
             current_stop = pos.get('trailing_stop', float('inf'))
             if new_stop < current_stop:
                 pos['trailing_stop'] = new_stop
-                self._save_state()
+                self._save_state(symbol)
                 logger.info(f"Trailing stop updated for {symbol}: {new_stop:.2f}")
                 return new_stop
 
@@ -293,7 +347,13 @@ class RiskManager:
 
         self.last_trade_time = time.time()
         self.daily_trades += 1
-        self._save_state()
+        self._save_state(symbol)
+
+        self.journal.record(
+            FILL, self.strategy_name, symbol=symbol, exchange=self.exchange,
+            action="BUY" if side.upper() == "LONG" else "SELL", quantity=abs(qty),
+            price=entry_price, source="risk_manager", stop_loss=stop_loss
+        )
 
         logger.info(f"Position registered: {side} {qty} {symbol} @ {entry_price:.2f}, SL: {stop_loss:.2f}")
 
@@ -330,7 +390,13 @@ class RiskManager:
         else:
             pos['qty'] = pos['qty'] - exit_qty if pos['qty'] > 0 else pos['qty'] + exit_qty
 
-        self._save_state()
+        self._save_state(symbol)
+
+        self.journal.record(
+            PNL, self.strategy_name, symbol=symbol, exchange=self.exchange,
+            action="SELL" if pos['qty'] > 0 else "BUY", quantity=exit_qty,
+            price=exit_price, pnl=pnl, source="risk_manager", daily_pnl=self.daily_pnl
+        )
 
         logger.info(f"Position closed: {symbol} @ {exit_price:.2f}, PnL: {pnl:.2f}, Daily PnL: {self.daily_pnl:.2f}")
         return pnl
@@ -350,6 +416,24 @@ class RiskManager:
             'loss_remaining': (self.capital * (self.config['max_daily_loss_pct'] / 100)) + self.daily_pnl
         }
 
+    def get_portfolio_stats(self) -> dict[str, Any]:
+        """
+        Today's combined PnL and open positions of all strategies sharing the state dir.
+
+        Only entries published today count, so a stopped or renamed strategy's
+        positions drop out at the next day boundary instead of blocking forever.
+        This strategy's own positions always count, even if it has not traded today.
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        strategies = {name: s for name, s in self.portfolio_journal.load().get('strategies', {}).items()
+                      if s['date'] == today}
+        others = [s for name, s in strategies.items() if name != self.strategy_name]
+        return {
+            'daily_pnl': sum(s['daily_pnl'] for s in strategies.values()),
+            'open_positions': sum(s['open_positions'] for s in others) + len(self.positions),
+            'strategies': len(others) + 1
+        }
+
     def reset_daily_state(self):
         """Reset daily counters (call at start of new trading day)."""
         self.daily_pnl = 0.0
@@ -358,6 +442,11 @@ class RiskManager:
         self._save_state()
         logger.info("Daily state reset")
 
+    def close(self):
+        """Close the state files."""
+        self.state_journal.close()
+        self.portfolio_journal.close()
+
 
 class EODSquareOff:
     """
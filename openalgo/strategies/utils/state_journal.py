@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+State Journal - Append-only, crash-safe state files shared between processes
+
+State is a JSON snapshot plus a journal of the patches applied since the
+snapshot was written. The journal starts with a random 8-byte generation id
+and is followed by records
+
+    <length: uint32><crc32: uint32><JSON patch>
+
+so a record torn by a crash (kill -9, power loss) or corrupted on disk is
+detected and dropped on recovery instead of breaking the whole file. A patch
+sets top-level keys; dict values are merged one level deep, None deleting:
+
+    {"daily_pnl": -120.5, "positions": {"SBIN": {...}, "INFY": None}}
+
+Patches hold absolute values, so replaying a record twice is harmless. Once
+the journal grows past compact_bytes the state is written to a new snapshot
+(temp file + os.replace) and the journal restarts with a new generation id, which
+tells other processes to reload the snapshot. A crash in between only replays
+records the new snapshot already holds.
+
+Writes take an exclusive lock on <name>.lock and first catch up on records
+other processes appended, so several strategy processes can share one state
+(e.g. portfolio-level risk limits).
+
+Files for path "state/portfolio_risk.json":
+    state/portfolio_risk.json      snapshot
+    state/portfolio_risk.journal   records since the snapshot
+    state/portfolio_risk.lock      lock file
+"""
+
+import copy
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger("StateJournal")
+
+# Payload length and CRC32 of the payload
+RECORD_HEADER = struct.Struct(">II")
+GENERATION_SIZE = 8
+
+
+def encode_record(patch: dict[str, Any]) -> bytes:
+    """Journal record of a patch"""
+    payload = json.dumps(patch, separators=(",", ":"), default=str).encode("utf-8")
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(data: bytes) -> tuple[list[dict[str, Any]], int]:
+    """
+    Decode journal bytes.
+
+    Returns the patches and the offset where valid records end; anything after
+    it is a torn or corrupt tail.
+    """
+    patches = []
+    offset = 0
+    while offset + RECORD_HEADER.size <= len(data):
+        length, crc = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        try:
+            patches.append(json.loads(payload))
+        except ValueError:
+            break
+        offset = start + length
+    return patches, offset
+
+
+def apply_patch(state: dict[str, Any], patch: dict[str, Any]):
+    """Apply a patch in place: set top-level keys, merge dicts one level (None deletes)"""
+    for key, value in patch.items():
+        if isinstance(value, dict):
+            merged = state.get(key)
+            if not isinstance(merged, dict):
+                merged = state[key] = {}
+            for name, item in value.items():
+                if item is None:
+                    merged.pop(name, None)
+                else:
+                    merged[name] = item
+        else:
+            state[key] = value
+
+
+if fcntl:
+    def _lock(f, exclusive: bool):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _unlock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+else:
+    def _lock(f, exclusive: bool):
+        # No shared locks here, and LK_LOCK gives up after ~10s of contention
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _unlock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class StateJournal:
+    """
+    Snapshot + append-only journal of a JSON state dict.
+
+    Args:
+        path: Snapshot path (a plain JSON file, e.g. a legacy state file)
+        compact_bytes: Journal size that triggers compaction into the snapshot
+        fsync: fsync every record (survives power loss, not just process crashes)
+    """
+
+    def __init__(self, path, compact_bytes: int = 256 * 1024, fsync: bool = False):
+        self.path = Path(path)
+        self.journal_path = self.path.with_suffix(".journal")
+        self.lock_path = self.path.with_suffix(".lock")
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+
+        self.state: dict[str, Any] = {}
+        self._generation = None  # Journal generation self.state was loaded from
+        self._offset = 0  # Journal bytes applied to self.state
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.journal_path, "a+b", buffering=0)
+        self._lock_file = open(self.lock_path, "a+b", buffering=0)
+        self._thread_lock = threading.Lock()  # flock does not exclude threads sharing a file
+
+    @contextmanager
+    def _locked(self, exclusive: bool = True):
+        with self._thread_lock:
+            _lock(self._lock_file, exclusive)
+            try:
+                yield
+            finally:
+                _unlock(self._lock_file)
+
+    def load(self) -> dict[str, Any]:
+        """Current state, including what other processes have written"""
+        with self._locked(exclusive=False):
+            self._catch_up()
+            return copy.deepcopy(self.state)
+
+    def append(self, patch: dict[str, Any]):
+        """Journal a patch and apply it to the state"""
+        record = encode_record(patch)
+        with self._locked():
+            self._catch_up(repair=True)
+            self._file.write(record)
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._offset += len(record)
+            apply_patch(self.state, json.loads(record[RECORD_HEADER.size:]))
+            if self._offset - GENERATION_SIZE >= self.compact_bytes:
+                self._compact()
+
+    def compact(self):
+        """Fold the journal into the snapshot now"""
+        with self._locked():
+            self._catch_up(repair=True)
+            self._compact()
+
+    def close(self):
+        self._file.close()
+        self._lock_file.close()
+
+    def _read_snapshot(self) -> dict[str, Any]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            # Only legacy in-place writes can leave a torn snapshot
+            logger.error(f"Corrupt state snapshot {self.path}, recovering from the journal only: {e}")
+            return {}
+
+    def _catch_up(self, repair: bool = False):
+        """Bring self.state up to date with the files (lock held)"""
+        self._file.seek(0)
+        generation = self._file.read(GENERATION_SIZE)
+        if len(generation) < GENERATION_SIZE:
+            # New journal, or a compaction stopped before its new header: the snapshot has everything
+            self.state = self._read_snapshot()
+            self._generation = None
+            if repair:
+                os.ftruncate(self._file.fileno(), 0)
+                self._new_generation()
+            return
+        if generation != self._generation:
+            # First load, or another process compacted since we last looked
+            self.state = self._read_snapshot()
+            self._generation = generation
+            self._offset = GENERATION_SIZE
+
+        self._file.seek(self._offset)
+        data = self._file.read()
+        patches, valid = read_records(data)
+        for patch in patches:
+            apply_patch(self.state, patch)
+        self._offset += valid
+
+        if valid < len(data) and repair:
+            # Appending after the bad bytes would make every later record unreachable
+            logger.warning(f"Dropping {len(data) - valid} torn/corrupt byte(s) at the end of {self.journal_path}")
+            os.ftruncate(self._file.fileno(), self._offset)
+
+    def _new_generation(self):
+        """Start the (empty) journal with a new generation id"""
+        self._generation = os.urandom(GENERATION_SIZE)
+        self._file.write(self._generation)
+        self._offset = GENERATION_SIZE
+
+    def _compact(self):
+        """Write the state to a new snapshot and restart the journal (lock held, caught up)"""
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # A crash from here on leaves records the snapshot already holds: replaying them is a no-op
+        os.ftruncate(self._file.fileno(), 0)
+        self._new_generation()
@@ -1,36 +1,259 @@
+import json
 import logging
 import os
 import re
-from datetime import datetime, timedelta
+import shutil
+import zlib
+from datetime import date, datetime, timedelta
 
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger("SymbolResolver")
 
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data'))
+ACTIVE_STRATEGIES_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), '../active_strategies.json'))
+
+# Bump when the layout written by build_instrument_index changes
+INDEX_VERSION = 1
+INDEX_COLUMNS = ('group_keys', 'group_bounds', 'expiry', 'strike', 'row', 'symbol', 'token', 'hashes', 'hash_rows')
+NO_EXPIRY = np.iinfo(np.int32).min
+EPOCH = date(1970, 1, 1)
+
+
+def default_index_path(instruments_path):
+    """instruments.csv -> instruments_index/"""
+    return os.path.splitext(instruments_path)[0] + '_index'
+
+
+def read_instruments(path, **read_kwargs):
+    """Read an instrument master CSV with parsed expiries and an instrument_type column."""
+    df = pd.read_csv(path, **read_kwargs)
+    # Ensure expiry is datetime
+    if 'expiry' in df.columns:
+        df['expiry'] = pd.to_datetime(df['expiry'], errors='coerce')
+
+    # Normalize columns
+    if 'instrument_type' not in df.columns and 'segment' in df.columns:
+         # Map segment to instrument_type if missing (fallback)
+         df['instrument_type'] = df['segment'].apply(lambda x: 'FUT' if 'FUT' in str(x) else ('OPT' if 'OPT' in str(x) else 'EQ'))
+    return df
+
+
+def _group_key(exchange, itype, name, opt=''):
+    return f"{exchange}|{itype}|{name}|{opt}".encode()
+
+
+def _encode(values):
+    encoded = [str(v).encode() for v in values]
+    width = max((len(v) for v in encoded), default=1)
+    return np.array(encoded, dtype=f'S{max(1, width)}')
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+
+
+def build_instrument_index(instruments_path, index_path=None):
+    """
+    Write the instrument master as a directory of memory-mappable .npy columns.
+
+    Rows are sorted by (exchange|type|name|option type, expiry, strike, master row), so
+    every underlying/expiry option chain is a contiguous slice with sorted strikes.
+    group_keys/group_bounds locate those slices and hashes/hash_rows map a symbol's
+    CRC32 to its rows. Returns the index directory.
+    """
+    index_path = index_path or default_index_path(instruments_path)
+    df = read_instruments(instruments_path, dtype={'token': str})
+    n = len(df)
+
+    def column(name):
+        if name in df.columns:
+            return df[name].fillna('').astype(str)
+        return pd.Series([''] * n, index=df.index, dtype=object)
+
+    symbol = column('symbol')
+    itype = column('instrument_type')
+    opt = symbol.str[-2:].where(itype == 'OPT', '')
+    keys = _encode(column('exchange') + '|' + itype + '|' + column('name') + '|' + opt)
+
+    if 'expiry' in df.columns:
+        days = (df['expiry'].dt.normalize() - pd.Timestamp(EPOCH)).dt.days
+        expiry = days.fillna(NO_EXPIRY).astype(np.int32).to_numpy()
+    else:
+        expiry = np.full(n, NO_EXPIRY, dtype=np.int32)
+
+    if 'strike' in df.columns:
+        strike = pd.to_numeric(df['strike'], errors='coerce')
+    else:
+        strike = symbol.str.extract(r'(\d+)(?:CE|PE)$')[0].astype(float)
+    strike = strike.fillna(0).to_numpy(dtype=np.float64)
+
+    row = np.arange(n, dtype=np.int32)
+    order = np.lexsort((row, strike, expiry, keys))
+    keys = keys[order]
+    group_keys, starts = np.unique(keys, return_index=True)
+    symbols = _encode(symbol.to_numpy()[order])
+    hashes = np.array([zlib.crc32(s) for s in symbols], dtype=np.uint32)
+    hash_order = np.lexsort((np.arange(n), hashes))
+
+    columns = {
+        'group_keys': group_keys,
+        'group_bounds': np.append(starts, n).astype(np.int64),
+        'expiry': expiry[order],
+        'strike': strike[order],
+        'row': row[order],
+        'symbol': symbols,
+        'token': _encode(column('token').to_numpy()[order]),
+        'hashes': hashes[hash_order],
+        'hash_rows': hash_order.astype(np.int32),
+    }
+    meta = {
+        'version': INDEX_VERSION,
+        'rows': n,
+        'built_at': datetime.now().isoformat(),
+        **_source_stamp(instruments_path),
+    }
+
+    # Write next to the live index and swap directories, so readers never see half a build
+    tmp_path = f"{index_path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, values in columns.items():
+        np.save(os.path.join(tmp_path, f'{name}.npy'), values)
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    old_path = f"{index_path}.old{os.getpid()}"
+    if os.path.exists(index_path):
+        os.replace(index_path, old_path)
+    os.replace(tmp_path, index_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    logger.info(f"Indexed {n} instruments ({len(group_keys)} groups) into {index_path}")
+    return index_path
+
+
+class InstrumentIndex:
+    """Read side of build_instrument_index: every column is memory-mapped, nothing is parsed."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != INDEX_VERSION:
+            raise ValueError(f"index version {self.meta.get('version')}, expected {INDEX_VERSION}")
+        for name in INDEX_COLUMNS:
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def matches(self, instruments_path):
+        """True unless instruments_path changed since the index was built from it."""
+        if not os.path.exists(instruments_path):
+            return True
+        stamp = _source_stamp(instruments_path)
+        return all(self.meta.get(k) == v for k, v in stamp.items())
+
+    def rows(self, key, prefix=False):
+        """[start, stop) of the rows whose group key equals (or starts with) key."""
+        lo = int(np.searchsorted(self.group_keys, key, 'left'))
+        if prefix:
+            hi = int(np.searchsorted(self.group_keys, key + b'\xff', 'left'))
+        else:
+            hi = int(np.searchsorted(self.group_keys, key, 'right'))
+        return int(self.group_bounds[lo]), int(self.group_bounds[hi])
+
+    def live(self, start, stop, today, startswith=None):
+        """Positions in [start, stop) expiring on or after today, by expiry then master row."""
+        expiry = np.asarray(self.expiry[start:stop])
+        keep = expiry >= today
+        if startswith:
+            keep &= np.char.startswith(self.symbol[start:stop], startswith.encode())
+        positions = np.flatnonzero(keep) + start
+        return positions[np.lexsort((self.row[positions], self.expiry[positions]))]
+
+    def first(self, positions):
+        """Position that came first in the instrument master."""
+        return positions[int(np.argmin(self.row[positions]))]
+
+    def find(self, symbol, exchange=None):
+        """Positions of symbol (optionally on exchange), in master order."""
+        encoded = symbol.encode()
+        h = zlib.crc32(encoded)
+        lo = int(np.searchsorted(self.hashes, h, 'left'))
+        hi = int(np.searchsorted(self.hashes, h, 'right'))
+        prefix = f"{exchange}|".encode() if exchange else b''
+        found = []
+        for position in self.hash_rows[lo:hi]:
+            if self.symbol[position] != encoded:
+                continue
+            if prefix and not self.group_keys[self._group_of(position)].startswith(prefix):
+                continue
+            found.append(int(position))
+        return sorted(found, key=lambda p: self.row[p])
+
+    def _group_of(self, position):
+        return int(np.searchsorted(self.group_bounds, position, 'right')) - 1
+
+    def symbol_at(self, position):
+        return self.symbol[position].decode('utf-8')
+
+    def lookup_token(self, symbol, exchange=None):
+        found = self.find(symbol, exchange)
+        return self.token_at(found[0]) if found else None
+
+    def token_at(self, position):
+        return self.token[position].decode('utf-8')
+
+    def symbols(self):
+        return {s.decode('utf-8') for s in np.unique(self.symbol)}
+
+
 class SymbolResolver:
-    def __init__(self, instruments_path=None):
+    def __init__(self, instruments_path=None, index_path=None, use_index=True):
         if instruments_path is None:
             # Default to openalgo/data/instruments.csv
-            base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data'))
-            instruments_path = os.path.join(base_path, 'instruments.csv')
+            instruments_path = os.path.join(DATA_DIR, 'instruments.csv')
 
         self.instruments_path = instruments_path
-        self.df = pd.DataFrame()
-        self.load_instruments()
+        self.index_path = index_path or default_index_path(instruments_path)
+        self.index = self.load_index() if use_index else None
+        self._df = None
+        if self.index is None:
+            self.load_instruments()
+
+    @property
+    def df(self):
+        # With an index the CSV is only read if something asks for the DataFrame
+        if self._df is None:
+            self.load_instruments()
+        return self._df
+
+    @df.setter
+    def df(self, value):
+        self._df = value
+
+    def load_index(self):
+        if not os.path.isdir(self.index_path):
+            return None
+        try:
+            index = InstrumentIndex(self.index_path)
+        except Exception as e:
+            logger.warning(f"Ignoring instrument index at {self.index_path}: {e}")
+            return None
+        if not index.matches(self.instruments_path):
+            logger.warning(f"Instrument index at {self.index_path} is older than {self.instruments_path}, using the CSV")
+            return None
+        logger.info(f"Opened instrument index with {len(index)} instruments from {self.index_path}")
+        return index
 
     def load_instruments(self):
+        self.df = pd.DataFrame()
         if os.path.exists(self.instruments_path):
             try:
-                self.df = pd.read_csv(self.instruments_path)
-                # Ensure expiry is datetime
-                if 'expiry' in self.df.columns:
-                    self.df['expiry'] = pd.to_datetime(self.df['expiry'], errors='coerce')
-
-                # Normalize columns
-                if 'instrument_type' not in self.df.columns and 'segment' in self.df.columns:
-                     # Map segment to instrument_type if missing (fallback)
-                     self.df['instrument_type'] = self.df['segment'].apply(lambda x: 'FUT' if 'FUT' in str(x) else ('OPT' if 'OPT' in str(x) else 'EQ'))
-
+                self.df = read_instruments(self.instruments_path)
                 logger.info(f"Loaded {len(self.df)} instruments from {self.instruments_path}")
             except Exception as e:
                 logger.error(f"Failed to load instruments: {e}")
@@ -72,7 +295,64 @@ class SymbolResolver:
             # For Equity/Futures, resolve returns the specific symbol
             return self.resolve(config)
 
+    def resolve_all(self, configs=None):
+        """
+        Resolve every configured strategy in one pass.
+        configs is a {strategy_id: config} mapping or a path to one (default: active_strategies.json).
+        Returns {strategy_id: {'status': 'valid'|'invalid'|'error', 'resolved': ..., 'error': ...}}.
+        """
+        if configs is None:
+            configs = ACTIVE_STRATEGIES_FILE
+        if isinstance(configs, str):
+            with open(configs) as f:
+                content = f.read()
+            configs = json.loads(content) if content.strip() else {}
+
+        # Strategies share underlyings, so each distinct instrument is resolved once
+        resolved_by_key = {}
+        results = {}
+        for strat_id, config in configs.items():
+            key = tuple(str(config.get(field, '')) for field in
+                        ('type', 'underlying', 'symbol', 'exchange', 'option_type', 'expiry_preference'))
+            try:
+                if key not in resolved_by_key:
+                    resolved_by_key[key] = self.resolve(config)
+                resolved = resolved_by_key[key]
+            except Exception as e:
+                results[strat_id] = {'status': 'error', 'resolved': None, 'error': str(e)}
+                continue
+
+            if resolved is None or (isinstance(resolved, dict) and resolved.get('status') != 'valid'):
+                status = 'invalid'
+            else:
+                status = 'valid'
+            results[strat_id] = {'status': status, 'resolved': resolved, 'error': None}
+        return results
+
+    def get_token(self, symbol, exchange=None):
+        """Instrument token for an exact trading symbol, or None."""
+        if self.index is not None:
+            return self.index.lookup_token(symbol, exchange)
+        if self.df.empty or 'token' not in self.df.columns:
+            return None
+        mask = self.df['symbol'] == symbol
+        if exchange:
+            mask &= self.df['exchange'] == exchange
+        matches = self.df[mask]
+        return str(matches.iloc[0]['token']) if not matches.empty else None
+
+    def known_symbols(self):
+        """Every trading symbol in the instrument master."""
+        if self.index is not None:
+            return self.index.symbols()
+        return set(self.df['symbol'].unique()) if not self.df.empty else set()
+
+    def _today(self):
+        return (datetime.now().date() - EPOCH).days
+
     def _resolve_equity(self, symbol, exchange):
+        if self.index is not None:
+            return self._resolve_equity_indexed(symbol, exchange)
         if self.df.empty: return symbol
 
         # Simple existence check
@@ -91,7 +371,19 @@ class SymbolResolver:
         logger.warning(f"Equity {symbol} not found in master list")
         return symbol
 
+    def _resolve_equity_indexed(self, symbol, exchange):
+        start, stop = self.index.rows(_group_key(exchange, 'EQ', symbol))
+        if start < stop:
+            return self.index.symbol_at(self.index.first(np.arange(start, stop)))
+        if self.index.find(symbol, exchange):
+            return symbol
+
+        logger.warning(f"Equity {symbol} not found in master list")
+        return symbol
+
     def _resolve_future(self, underlying, exchange):
+        if self.index is not None:
+            return self._resolve_future_indexed(underlying, exchange)
         if self.df.empty: return f"{underlying}FUT"
 
         now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -139,12 +431,39 @@ class SymbolResolver:
         # Return nearest expiry
         return matches.iloc[0]['symbol']
 
+    def _resolve_future_indexed(self, underlying, exchange):
+        today = self._today()
+        positions = self.index.live(*self.index.rows(_group_key(exchange, 'FUT', underlying)), today)
+
+        if not len(positions):
+            # Try searching by symbol if name match fails
+            start, stop = self.index.rows(f"{exchange}|FUT|".encode(), prefix=True)
+            positions = self.index.live(start, stop, today, startswith=underlying)
+
+            if not len(positions):
+                logger.warning(f"No futures found for {underlying}")
+                return None
+
+        symbols = [self.index.symbol_at(p) for p in positions]
+        if exchange == 'MCX':
+            mini_pattern = re.compile(rf'(?:{underlying}M|{underlying}MINI)', re.IGNORECASE)
+            for symbol in symbols:
+                if mini_pattern.search(symbol):
+                    logger.info(f"Found MCX MINI contract for {underlying}: {symbol}")
+                    return symbol
+
+            logger.info(f"No MCX MINI contract found for {underlying}, falling back to standard.")
+
+        return symbols[0]
+
     def _resolve_option(self, config):
         underlying = config.get('underlying')
         option_type = config.get('option_type', 'CE').upper()
         expiry_pref = config.get('expiry_preference', 'WEEKLY').upper()
         exchange = config.get('exchange', 'NFO')
 
+        if self.index is not None:
+            return self._resolve_option_indexed(config, underlying, option_type, expiry_pref, exchange)
         if self.df.empty: return None
 
         now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -189,6 +508,80 @@ class SymbolResolver:
             'count': len(matches)
         }
 
+    def _resolve_option_indexed(self, config, underlying, option_type, expiry_pref, exchange):
+        positions = self.index.live(
+            *self.index.rows(_group_key(exchange, 'OPT', underlying, option_type), prefix=not option_type),
+            self._today(),
+        )
+
+        if not len(positions):
+            # Try name mapping (e.g. NIFTY 50 -> NIFTY)
+            if underlying == 'NIFTY 50':
+                return self._resolve_option({**config, 'underlying': 'NIFTY'})
+            if underlying == 'NIFTY BANK':
+                return self._resolve_option({**config, 'underlying': 'BANKNIFTY'})
+
+            logger.warning(f"No options found for {underlying} {option_type}")
+            return None
+
+        expiries = self.index.expiry[positions]
+        unique_expiries = [EPOCH + timedelta(days=int(d)) for d in np.unique(expiries)]
+        selected_expiry = self._select_expiry(unique_expiries, expiry_pref)
+        matches = positions[expiries == (selected_expiry - EPOCH).days]
+
+        return {
+            'status': 'valid',
+            'expiry': selected_expiry.strftime('%Y-%m-%d'),
+            'sample_symbol': self.index.symbol_at(self.index.first(matches)),
+            'count': len(matches)
+        }
+
+    def _option_chain_indexed(self, underlying, exchange, option_type, expiry):
+        """Positions of one expiry's options, sorted by strike."""
+        days = (expiry.date() - EPOCH).days
+        if option_type:
+            # Contiguous in the index, already ordered by strike
+            start, stop = self.index.rows(_group_key(exchange, 'OPT', underlying, option_type))
+            expiries = self.index.expiry[start:stop]
+            lo = start + int(np.searchsorted(expiries, days, 'left'))
+            hi = start + int(np.searchsorted(expiries, days, 'right'))
+            return np.arange(lo, hi)
+
+        start, stop = self.index.rows(_group_key(exchange, 'OPT', underlying), prefix=True)
+        positions = np.flatnonzero(np.asarray(self.index.expiry[start:stop]) == days) + start
+        return positions[np.lexsort((self.index.row[positions], self.index.strike[positions]))]
+
+    def _get_option_symbol_indexed(self, config, spot_price, expiry):
+        underlying = config.get('underlying')
+        exchange = config.get('exchange', 'NFO')
+        option_type = config.get('option_type', 'CE').upper()
+        strike_criteria = config.get('strike_criteria', 'ATM').upper() # ATM, ITM, OTM
+
+        chain = self._option_chain_indexed(underlying, exchange, option_type, expiry)
+        if not len(chain):
+            return None
+        strikes = self.index.strike[chain]
+
+        # ATM: the nearer neighbour of spot, the lower strike on a tie
+        i = int(np.searchsorted(strikes, spot_price))
+        if i == len(strikes) or (i > 0 and spot_price - strikes[i - 1] <= strikes[i] - spot_price):
+            i -= 1
+        selected_strike = strikes[i]
+
+        # Call ITM / Put OTM = next lower strike, Call OTM / Put ITM = next higher strike
+        if strike_criteria in ('ITM', 'OTM'):
+            lower = (strike_criteria == 'ITM') == (option_type == 'CE')
+            if lower:
+                j = int(np.searchsorted(strikes, selected_strike, 'left')) - 1
+                if j >= 0:
+                    selected_strike = strikes[j]
+            else:
+                j = int(np.searchsorted(strikes, selected_strike, 'right'))
+                if j < len(strikes):
+                    selected_strike = strikes[j]
+
+        return self.index.symbol_at(chain[int(np.searchsorted(strikes, selected_strike, 'left'))])
+
     def _select_expiry(self, unique_expiries, expiry_pref):
         if not unique_expiries: return None
 
@@ -230,6 +623,8 @@ class SymbolResolver:
             return None
 
         expiry_date = pd.to_datetime(valid_set['expiry'])
+        if self.index is not None:
+            return self._get_option_symbol_indexed(config, spot_price, expiry_date)
         underlying = config.get('underlying')
         exchange = config.get('exchange', 'NFO')
         option_type = config.get('option_type', 'CE').upper()
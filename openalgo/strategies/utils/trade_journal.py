@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Trade Journal - Columnar event store for strategies, risk and the sandbox
+
+Signal, order, fill and PnL events are buffered in memory and flushed as
+Parquet part files, partitioned by trading date and strategy:
+
+    db/journal/date=2026-02-14/strategy=SuperTrend_NIFTY/part-<ns>-<pid>-<id>.parquet
+
+A flush only ever adds new files, so every strategy process and the sandbox
+can journal into the same tree without locks. Reports read it with DuckDB
+(see journal_reports.py) instead of scraping logs.
+
+Usage:
+    journal = get_trade_journal()
+    signal_id = new_signal_id()
+    journal.record(SIGNAL, "MyStrategy", symbol="SBIN", action="BUY", quantity=1,
+                   price=812.5, signal_id=signal_id)
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytz
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+logger = logging.getLogger("TradeJournal")
+
+IST = pytz.timezone("Asia/Kolkata")
+
+JOURNAL_DIR = os.getenv(
+    "TRADE_JOURNAL_DIR", str(Path(__file__).resolve().parents[2] / "db" / "journal")
+)
+
+# Event types
+SIGNAL = "SIGNAL"  # Strategy decided to trade, price is the signal price
+ORDER = "ORDER"  # Order placed (or failed), order_id links it to fills
+FILL = "FILL"  # Execution, price is the fill price
+PNL = "PNL"  # Realized PnL of a closing trade
+
+# Columns of each part file; date and strategy come from the partition path
+COLUMNS = {
+    "ts": "TIMESTAMP",
+    "event": "VARCHAR",
+    "source": "VARCHAR",
+    "symbol": "VARCHAR",
+    "exchange": "VARCHAR",
+    "action": "VARCHAR",
+    "quantity": "BIGINT",
+    "price": "DOUBLE",
+    "pnl": "DOUBLE",
+    "signal_id": "VARCHAR",
+    "order_id": "VARCHAR",
+    "status": "VARCHAR",
+    "details": "VARCHAR",
+}
+
+PARTITION_TYPES = {"date": "DATE", "strategy": "VARCHAR"}
+
+
+def partition_name(strategy: str | None) -> str:
+    """Strategy name as used in the partition path"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", strategy or "") or "unknown"
+
+
+def new_signal_id() -> str:
+    """ID linking a signal to the order placed for it"""
+    return uuid.uuid4().hex[:16]
+
+
+def now_ist() -> datetime:
+    """Current IST time as a naive timestamp, the journal's time base"""
+    return datetime.now(IST).replace(tzinfo=None)
+
+
+def list_partitions(root: str | None = None) -> dict[tuple[str, str], list[str]]:
+    """
+    Part files by (date, strategy) partition.
+
+    Only lists directories, so it stays cheap as the journal grows.
+    """
+    root = root or JOURNAL_DIR
+    partitions = {}
+    if not os.path.isdir(root):
+        return partitions
+
+    for date_entry in os.scandir(root):
+        if not (date_entry.is_dir() and date_entry.name.startswith("date=")):
+            continue
+        for strategy_entry in os.scandir(date_entry.path):
+            if not (strategy_entry.is_dir() and strategy_entry.name.startswith("strategy=")):
+                continue
+            files = sorted(
+                entry.path
+                for entry in os.scandir(strategy_entry.path)
+                if entry.name.endswith(".parquet")
+            )
+            if files:
+                key = (date_entry.name[len("date=") :], strategy_entry.name[len("strategy=") :])
+                partitions[key] = files
+    return partitions
+
+
+def journal_relation(con, files: list[str], name: str = "journal"):
+    """
+    Create a view over the given part files with date and strategy columns.
+
+    With no files the view is empty but has the full schema, so queries over
+    it still run.
+    """
+    if files:
+        file_list = ", ".join("'" + path.replace("'", "''") + "'" for path in files)
+        hive_types = ", ".join(f"'{col}': {typ}" for col, typ in PARTITION_TYPES.items())
+        con.execute(
+            f"CREATE OR REPLACE TEMP VIEW {name} AS SELECT * FROM read_parquet("
+            f"[{file_list}], hive_partitioning = true, union_by_name = true, "
+            f"hive_types = {{{hive_types}}})"
+        )
+    else:
+        columns = ", ".join(
+            f"CAST(NULL AS {typ}) AS {col}" for col, typ in {**COLUMNS, **PARTITION_TYPES}.items()
+        )
+        con.execute(f"CREATE OR REPLACE TEMP VIEW {name} AS SELECT {columns} WHERE false")
+
+
+class TradeJournal:
+    """
+    Buffered writer for journal events.
+
+    Events are kept in memory and written by a background thread every
+    `flush_interval` seconds, or as soon as `max_buffer` events are waiting.
+    Journaling never raises into the trading path: write errors are logged
+    and the affected events dropped.
+    """
+
+    def __init__(self, root: str | None = None, flush_interval: float = 5.0, max_buffer: int = 500):
+        self.root = root or JOURNAL_DIR
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+
+        self.enabled = duckdb is not None
+        if not self.enabled:
+            logger.warning("duckdb is not installed, trade journal disabled")
+
+        self._buffer: list[dict] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._con = None
+
+    def record(
+        self,
+        event: str,
+        strategy: str,
+        symbol: str | None = None,
+        exchange: str | None = None,
+        action: str | None = None,
+        quantity: int | None = None,
+        price: float | None = None,
+        pnl: float | None = None,
+        signal_id: str | None = None,
+        order_id: str | None = None,
+        status: str | None = None,
+        source: str | None = None,
+        ts: datetime | None = None,
+        **details,
+    ):
+        """
+        Queue one event.
+
+        Args:
+            event: SIGNAL, ORDER, FILL or PNL
+            strategy: Strategy name, the partition key with the event's date
+            ts: Event time as naive IST (default: now)
+            **details: Extra fields, stored as JSON
+        """
+        if not self.enabled or self._closed:
+            return
+
+        if ts is not None and ts.tzinfo is not None:
+            ts = ts.astimezone(IST).replace(tzinfo=None)
+
+        row = {
+            "ts": ts or now_ist(),
+            "event": event,
+            "source": source,
+            "symbol": symbol,
+            "exchange": exchange,
+            "action": action.upper() if action else None,
+            "quantity": int(quantity) if quantity is not None else None,
+            "price": float(price) if price is not None else None,
+            "pnl": float(pnl) if pnl is not None else None,
+            "signal_id": signal_id,
+            "order_id": str(order_id) if order_id is not None else None,
+            "status": status,
+            "details": json.dumps(details, default=str) if details else None,
+            "strategy": partition_name(strategy),
+        }
+
+        with self._lock:
+            self._buffer.append(row)
+            pending = len(self._buffer)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="trade-journal", daemon=True
+                )
+                self._thread.start()
+
+        if pending >= self.max_buffer:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write all buffered events; returns the number of part files written"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+
+        with self._write_lock:
+            try:
+                return self._write(rows)
+            except Exception as e:
+                logger.error(f"Failed to write {len(rows)} journal events: {e}")
+                return 0
+
+    def close(self):
+        """Stop the flush thread and write what is left"""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+        with self._write_lock:
+            if self._con is not None:
+                self._con.close()
+                self._con = None
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _write(self, rows: list[dict]) -> int:
+        if self._con is None:
+            self._con = duckdb.connect()
+
+        df = pd.DataFrame(rows)
+        df["date"] = df["ts"].map(lambda ts: ts.strftime("%Y-%m-%d"))
+        select = ", ".join(f"CAST({col} AS {typ}) AS {col}" for col, typ in COLUMNS.items())
+
+        written = 0
+        for (day, strategy), group in df.groupby(["date", "strategy"], sort=False):
+            directory = os.path.join(self.root, f"date={day}", f"strategy={strategy}")
+            os.makedirs(directory, exist_ok=True)
+            name = f"part-{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+            path = os.path.join(directory, name)
+            tmp_path = f"{path}.tmp".replace("'", "''")
+
+            # Readers only glob *.parquet, so they never see a half-written file
+            self._con.register("journal_buffer", group)
+            try:
+                self._con.execute(
+                    f"COPY (SELECT {select} FROM journal_buffer ORDER BY ts) "
+                    f"TO '{tmp_path}' (FORMAT PARQUET)"
+                )
+            finally:
+                self._con.unregister("journal_buffer")
+            os.replace(f"{path}.tmp", path)
+            written += 1
+        return written
+
+
+_journal: TradeJournal | None = None
+_journal_lock = threading.Lock()
+
+
+def get_trade_journal() -> TradeJournal:
+    """Process-wide journal, flushed at interpreter exit"""
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                _journal = TradeJournal()
+                atexit.register(_journal.close)
+    return _journal
@@ -0,0 +1,213 @@
+"""
+Throughput benchmark for the broker binary feed decoders
+
+Compares the per-packet struct parser the Zerodha client used to run against
+the batch frame decoder (array output, and array expanded to legacy tick
+dicts), and measures the Dhan regular-feed parser.
+
+Frames can be supplied as a recording: a file of frames, each prefixed with a
+4-byte big-endian length. Without one, synthetic Kite frames are generated
+(full mode, 5-level depth) which matches what a full-mode option chain
+subscription receives.
+
+Usage:
+    python test/benchmark_binary_decoders.py
+    python test/benchmark_binary_decoders.py --frames recorded_frames.bin --iterations 50
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import websocket_proxy  # noqa: F401  (import first to resolve the adapter import cycle)
+from broker.dhan.streaming.dhan_websocket import DhanWebSocket
+from broker.zerodha.streaming.zerodha_decoder import decode_frame, to_tick_dicts
+
+
+def load_frames(path):
+    """Read a length-prefixed frame recording"""
+    frames = []
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(4)
+            if len(header) < 4:
+                break
+            (length,) = struct.unpack(">I", header)
+            frames.append(f.read(length))
+    return frames
+
+
+def synthetic_kite_frames(num_frames, packets_per_frame, seed=7):
+    """Full-mode Kite frames with random prices and depth"""
+    rng = random.Random(seed)
+    frames = []
+    for _ in range(num_frames):
+        packets = []
+        for _ in range(packets_per_frame):
+            packet = struct.pack(
+                ">I15i", rng.randint(1, 10**7), *[rng.randint(1, 10**6) for _ in range(15)]
+            )
+            packet += b"".join(
+                struct.pack(
+                    ">iih2x", rng.randint(1, 5000), rng.randint(1, 10**6), rng.randint(1, 50)
+                )
+                for _ in range(10)
+            )
+            packets.append(packet)
+        body = b"".join(struct.pack(">H", len(p)) + p for p in packets)
+        frames.append(struct.pack(">H", len(packets)) + body)
+    return frames
+
+
+def synthetic_dhan_frames(num_frames, packets_per_frame, seed=7):
+    """Dhan regular feed frames carrying FULL packets"""
+    rng = random.Random(seed)
+    frames = []
+    for _ in range(num_frames):
+        data = b""
+        for _ in range(packets_per_frame):
+            body = struct.pack(
+                "<fHIfIIIIIIffff",
+                rng.random() * 1000,
+                *[rng.randint(1, 1000) for _ in range(9)],
+                *[rng.random() * 1000 for _ in range(4)],
+            )
+            body += b"".join(
+                struct.pack("<IIHHff", 1, 2, 3, 4, rng.random() * 1000, rng.random() * 1000)
+                for _ in range(5)
+            )
+            data += struct.pack("<BHBI", 8, len(body) + 8, 2, rng.randint(1, 10**6)) + body
+        frames.append(data)
+    return frames
+
+
+def legacy_parse_kite_frame(data):
+    """The previous per-packet parser: slices + struct.unpack per field, dict per packet"""
+    ticks = []
+    num_packets = struct.unpack(">H", data[0:2])[0]
+    offset = 2
+    for _ in range(num_packets):
+        packet_length = struct.unpack(">H", data[offset : offset + 2])[0]
+        offset += 2
+        packet = data[offset : offset + packet_length]
+        offset += packet_length
+        tick = {
+            "instrument_token": struct.unpack(">I", packet[0:4])[0],
+            "last_price": struct.unpack(">i", packet[4:8])[0] / 100.0,
+            "timestamp": int(time.time() * 1000),
+        }
+        if len(packet) >= 44:
+            fields = struct.unpack(">11i", packet[0:44])
+            tick.update(
+                {
+                    "last_traded_quantity": fields[2],
+                    "average_price": fields[3] / 100.0,
+                    "volume": fields[4],
+                    "total_buy_quantity": fields[5],
+                    "total_sell_quantity": fields[6],
+                    "ohlc": {
+                        "open": fields[7] / 100.0,
+                        "high": fields[8] / 100.0,
+                        "low": fields[9] / 100.0,
+                        "close": fields[10] / 100.0,
+                    },
+                }
+            )
+        if len(packet) >= 64:
+            extended = struct.unpack(">iiiii", packet[44:64])
+            tick.update({"oi": extended[1], "exchange_timestamp": extended[4]})
+        if len(packet) >= 184:
+            depth = {"buy": [], "sell": []}
+            for side, base in (("buy", 64), ("sell", 124)):
+                for i in range(5):
+                    start = base + i * 12
+                    quantity, price, orders = struct.unpack(">iih", packet[start : start + 10])
+                    if price > 0:
+                        depth[side].append(
+                            {"quantity": quantity, "price": price / 100.0, "orders": orders}
+                        )
+            tick["depth"] = depth
+        ticks.append(tick)
+    return ticks
+
+
+def measure(label, func, frames, iterations, packets_per_frame):
+    """Run func over all frames `iterations` times and print packets/sec"""
+    for frame in frames[:5]:
+        func(frame)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for frame in frames:
+            func(frame)
+    elapsed = time.perf_counter() - start
+
+    total_packets = iterations * len(frames) * packets_per_frame
+    print(
+        f"{label:<40} {elapsed * 1e6 / (iterations * len(frames)):>10.1f} us/frame "
+        f"{total_packets / elapsed:>14,.0f} packets/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--frames", help="Recorded Kite frames (4-byte length prefixed)")
+    parser.add_argument("--num-frames", type=int, default=200)
+    parser.add_argument("--packets", type=int, default=100, help="Packets per synthetic frame")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.frames:
+        kite_frames = load_frames(args.frames)
+        packets_per_frame = max(
+            1, sum(struct.unpack(">H", f[:2])[0] for f in kite_frames) // len(kite_frames)
+        )
+        print(f"Loaded {len(kite_frames)} recorded frames (~{packets_per_frame} packets/frame)")
+    else:
+        kite_frames = synthetic_kite_frames(args.num_frames, args.packets)
+        packets_per_frame = args.packets
+        print(f"Generated {len(kite_frames)} full-mode frames x {packets_per_frame} packets")
+
+    print("\nZerodha")
+    measure(
+        "legacy per-packet struct parser",
+        legacy_parse_kite_frame,
+        kite_frames,
+        args.iterations,
+        packets_per_frame,
+    )
+    measure("decode_frame (array)", decode_frame, kite_frames, args.iterations, packets_per_frame)
+    measure(
+        "decode_frame + to_tick_dicts",
+        lambda f: to_tick_dicts(decode_frame(f)),
+        kite_frames,
+        args.iterations,
+        packets_per_frame,
+    )
+
+    print("\nDhan")
+    dhan_frames = synthetic_dhan_frames(args.num_frames, args.packets)
+    dhan = DhanWebSocket("client", "token")
+    dhan.on_data = lambda ws, data: None
+    measure(
+        "regular feed parser (FULL packets)",
+        dhan._parse_regular_message,
+        dhan_frames,
+        args.iterations,
+        args.packets,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Flow workflow execution against a mocked broker
+
+Builds a 200-node workflow (a trigger, a log node, then independent branches
+of quote -> variable -> order -> log chains with {{variable}} templates) and
+runs it through execute_workflow with the database calls kept in memory:
+
+  sequential    - the compiled plan with branch concurrency switched off
+  compiled      - branches of the fan-out run concurrently
+  triggers      - many runs of the same workflow, queued per workflow, plus
+                  runs of copies of it in parallel
+
+The broker answers quotes and orders after --latency-ms.
+
+    python test/benchmark_flow_executor.py --branches 11 --depth 18 --latency-ms 5
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from dataclasses import replace
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services import flow_executor_service
+from services.flow_executor_service import execute_workflow, get_workflow_plan
+
+
+class MockBroker:
+    """FlowOpenAlgoClient stand-in with a fixed round trip"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _call(self, response):
+        time.sleep(self.latency)
+        with self.lock:
+            self.calls += 1
+        return response
+
+    def get_quotes(self, symbol, exchange):
+        return self._call({"status": "success", "data": {"ltp": 100.0 + len(symbol)}})
+
+    def place_order(self, **order):
+        return self._call({"status": "success", "orderid": f"{order['symbol']}-{self.calls}"})
+
+
+def build_workflow(branches, depth):
+    nodes = [
+        {"id": "start", "type": "start", "data": {}},
+        {"id": "intro", "type": "log", "data": {"message": "run at {{timestamp}}"}},
+    ]
+    edges = [{"id": "e0", "source": "start", "target": "intro"}]
+    kinds = ["getQuote", "variable", "placeOrder", "log"]
+    for b in range(branches):
+        previous = "intro"
+        for d in range(depth):
+            node_id = f"b{b}n{d}"
+            kind = kinds[d % len(kinds)]
+            if kind == "getQuote":
+                data = {"symbol": f"SYM{b}", "exchange": "NSE", "outputVariable": f"q{b}"}
+            elif kind == "variable":
+                data = {"variableName": f"qty{b}", "value": "{{q" + str(b) + ".data.ltp}}"}
+            elif kind == "placeOrder":
+                data = {"symbol": f"SYM{b}", "action": "BUY", "quantity": "1"}
+            else:
+                data = {"message": "branch " + str(b) + " qty {{qty" + str(b) + "}} at {{time}}"}
+            nodes.append({"id": node_id, "type": kind, "data": data})
+            edges.append({"id": f"e{node_id}", "source": previous, "target": node_id})
+            previous = node_id
+    return nodes, edges
+
+
+def install_mocks(workflows, broker):
+    executions = {}
+    lock = threading.Lock()
+
+    def create_execution(workflow_id, status="pending"):
+        with lock:
+            execution = SimpleNamespace(id=len(executions) + 1, status=status)
+            executions[execution.id] = execution
+        return execution
+
+    def update_execution_status(execution_id, status, error=None):
+        executions[execution_id].status = status
+
+    flow_executor_service.get_workflow = workflows.get
+    flow_executor_service.create_execution = create_execution
+    flow_executor_service.update_execution_status = update_execution_status
+    flow_executor_service.get_flow_client = lambda api_key: broker
+
+
+def timed(label, fn, runs):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed * 1000 / runs:>9.1f} ms/run {runs / elapsed:>9.1f} runs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--branches", type=int, default=11)
+    parser.add_argument("--depth", type=int, default=18, help="Nodes per branch")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Mock broker round trip")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per workload")
+    parser.add_argument("--workflows", type=int, default=4, help="Copies for parallel triggers")
+    args = parser.parse_args()
+
+    nodes, edges = build_workflow(args.branches, args.depth)
+    workflows = {
+        i: SimpleNamespace(id=i, name=f"bench{i}", nodes=nodes, edges=edges)
+        for i in range(1, args.workflows + 1)
+    }
+    broker = MockBroker(args.latency_ms / 1000)
+    install_mocks(workflows, broker)
+    print(f"{len(nodes)} nodes, {args.branches} branches, broker latency {args.latency_ms} ms")
+
+    start = time.perf_counter()
+    plan = get_workflow_plan(1, nodes, edges)
+    print(f"{'compile':<34} {(time.perf_counter() - start) * 1000:>9.1f} ms")
+
+    result = execute_workflow(1, api_key="bench")
+    assert result["status"] == "success", result["message"]
+
+    def runs(count, workflow_id=1):
+        for _ in range(count):
+            execute_workflow(workflow_id, api_key="bench")
+
+    flow_executor_service._plans[1] = (
+        flow_executor_service._plans[1][0],
+        replace(plan, parallel=frozenset()),
+    )
+    timed("sequential branches", lambda: runs(args.runs), args.runs)
+    flow_executor_service._plans[1] = (flow_executor_service._plans[1][0], plan)
+    timed("compiled, concurrent branches", lambda: runs(args.runs), args.runs)
+
+    def triggers():
+        threads = [
+            threading.Thread(target=runs, args=(args.runs, workflow_id))
+            for workflow_id in workflows
+            for _ in range(2)  # Two callers per workflow: the second one queues
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    timed(
+        f"triggers ({len(workflows)} workflows x 2 callers)",
+        triggers,
+        args.runs * 2 * len(workflows),
+    )
+    print(f"broker calls: {broker.calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Historify export: pandas ZIP (previous implementation) vs streaming exports
+
+Exports --years of 1m bars for --symbols symbols from a synthetic Historify
+database, each export in a fresh process, reporting wall time and peak RSS:
+
+  pandas zip     - DataFrame per symbol, to_csv() string, writestr() into the ZIP
+  streaming zip  - export_to_zip: DuckDB-formatted CSV lines streamed into the entries
+  parquet        - export_to_partitioned_files: one COPY per symbol into
+                   exchange=/symbol=/interval= partitioned Parquet files
+  csv            - the same, partitioned CSV files
+
+Generating the full-size database takes a while; keep it with --db and reuse it.
+
+    python test/benchmark_historify_export.py --symbols 500 --years 5 --db /tmp/historify_bench.duckdb
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database.historify_db as historify_db
+
+# 2020-01-01 09:15 IST
+MARKET_OPEN = 1577850300
+BARS_PER_DAY = 375
+DAYS_PER_YEAR = 250
+
+
+def symbol_names(count):
+    return [{"symbol": f"SYM{i:04d}", "exchange": "NSE"} for i in range(count)]
+
+
+def generate(db_path, symbols, years):
+    historify_db.HISTORIFY_DB_PATH = db_path
+    historify_db.init_database()
+    with historify_db.get_connection() as conn:
+        if conn.execute("SELECT COUNT(*) FROM market_data").fetchone()[0]:
+            return
+        days = years * DAYS_PER_YEAR
+        for sym in symbols:
+            conn.execute(
+                f"""
+                INSERT INTO market_data (symbol, exchange, interval, timestamp,
+                                         open, high, low, close, volume, oi)
+                SELECT ?, ?, '1m',
+                       {MARKET_OPEN} + (i // {BARS_PER_DAY}) * 86400 + (i % {BARS_PER_DAY}) * 60,
+                       100 + sin(i / 500.0), 100.5 + sin(i / 500.0), 99.5 + sin(i / 500.0),
+                       100 + cos(i / 500.0), 1000 + i % 997, 0
+                FROM range({days * BARS_PER_DAY}) t(i)
+                """,
+                [sym["symbol"], sym["exchange"]],
+            )
+
+
+def pandas_zip(output, symbols):
+    """The ZIP export before streaming: a DataFrame and a CSV string per entry"""
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        with historify_db.get_connection() as conn:
+            for sym in symbols:
+                df = conn.execute(
+                    """
+                    SELECT
+                        strftime(to_timestamp(timestamp), '%Y-%m-%d') as date,
+                        strftime(to_timestamp(timestamp), '%H:%M:%S') as time,
+                        open, high, low, close, volume, oi
+                    FROM market_data
+                    WHERE symbol = ? AND exchange = ? AND interval = '1m'
+                    ORDER BY timestamp
+                    """,
+                    [sym["symbol"], sym["exchange"]],
+                ).fetchdf()
+                zf.writestr(f"{sym['symbol']}_{sym['exchange']}_1m.csv", df.to_csv(index=False))
+
+
+def run_export(mode, db_path, output, symbols, results):
+    historify_db.HISTORIFY_DB_PATH = db_path
+    start = time.perf_counter()
+    if mode == "pandas zip":
+        pandas_zip(output, symbols)
+    elif mode == "streaming zip":
+        historify_db.export_to_zip(output, symbols=symbols, intervals=["1m"])
+    else:
+        historify_db.export_to_partitioned_files(
+            output, symbols=symbols, intervals=["1m"], file_format=mode
+        )
+    results.put((time.perf_counter() - start, peak_rss()))
+
+
+def peak_rss():
+    """Peak RSS in bytes of this process"""
+    # ru_maxrss survives exec, so a spawned worker would report the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is in bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def output_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--db", help="Database to generate or reuse (default: a temp file)")
+    parser.add_argument(
+        "--modes", default="pandas zip,streaming zip,parquet,csv", help="Comma-separated exports"
+    )
+    args = parser.parse_args()
+
+    symbols = symbol_names(args.symbols)
+    rows = args.symbols * args.years * DAYS_PER_YEAR * BARS_PER_DAY
+    # Exports must be written inside the temp directory
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.abspath(args.db) if args.db else os.path.join(tmp, "historify.duckdb")
+        start = time.perf_counter()
+        generate(db_path, symbols, args.years)
+        print(f"{rows:,} 1m bars ready in {time.perf_counter() - start:.1f}s\n")
+
+        # Fresh processes: peak RSS is per export, not inherited from generation
+        ctx = multiprocessing.get_context("spawn")
+        print(f"{'export':<16} {'wall':>9} {'peak RSS':>10} {'output':>10} {'rows/s':>12}")
+        for mode in args.modes.split(","):
+            output = os.path.join(tmp, mode.replace(" ", "_") + (".zip" if "zip" in mode else ""))
+            results = ctx.Queue()
+            worker = ctx.Process(target=run_export, args=(mode, db_path, output, symbols, results))
+            worker.start()
+            elapsed, peak_rss = results.get()
+            worker.join()
+            size = output_size(output)
+            print(
+                f"{mode:<16} {elapsed:>8.1f}s {peak_rss / 2**20:>8.0f}MB "
+                f"{size / 2**20:>8.0f}MB {rows / elapsed:>12,.0f}"
+            )
+            if os.path.isdir(output):
+                shutil.rmtree(output)
+            else:
+                os.remove(output)
+
+
+if __name__ == "__main__":
+    main()
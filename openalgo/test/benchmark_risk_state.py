@@ -0,0 +1,162 @@
+"""
+Strategy RiskManager state writes: full JSON rewrite vs the state journal
+
+Replays the state writes of a strategy's fills (entry, trailing stop update,
+exit) with --positions positions open, as RiskManager persists them:
+
+  rewrite   - the whole state dict dumped to the state file on every write
+  journal   - one checksummed patch appended per write (plus compactions)
+  shared    - --processes strategies journaling at once, each also updating
+              the shared portfolio state under its file lock
+
+    python test/benchmark_risk_state.py --fills 5000 --positions 50 --processes 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from strategies.utils.state_journal import StateJournal
+
+
+def make_position(i):
+    return {
+        "qty": 10 + i % 7,
+        "entry_price": 100.0 + i,
+        "stop_loss": 98.0 + i,
+        "trailing_stop": 98.0 + i,
+        "entry_time": datetime.now().isoformat(),
+        "side": "LONG",
+    }
+
+
+def state_writes(fills, positions):
+    """(state, symbol) after each write: entry, trailing stop update, exit"""
+    state = {
+        "date": datetime.now().strftime("%Y-%m-%d"),
+        "daily_pnl": 0.0,
+        "daily_trades": 0,
+        "positions": {f"OPEN{i}": make_position(i) for i in range(positions)},
+        "circuit_breaker": False,
+    }
+    for i in range(fills):
+        symbol = f"SYM{i % 20}"
+        state["positions"][symbol] = make_position(i)
+        state["daily_trades"] += 1
+        yield state, symbol
+        state["positions"][symbol]["trailing_stop"] += 1.0
+        yield state, symbol
+        del state["positions"][symbol]
+        state["daily_pnl"] += 5.0
+        yield state, symbol
+
+
+def patch(state, symbol):
+    return {
+        "date": state["date"],
+        "daily_pnl": state["daily_pnl"],
+        "daily_trades": state["daily_trades"],
+        "positions": {symbol: state["positions"].get(symbol)},
+        "circuit_breaker": state["circuit_breaker"],
+        "last_updated": datetime.now().isoformat(),
+    }
+
+
+def rewrite(path, fills, positions, fsync):
+    for state, _ in state_writes(fills, positions):
+        with open(path, "w") as f:
+            json.dump({**state, "last_updated": datetime.now().isoformat()}, f, indent=2)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def journal(path, fills, positions, fsync, portfolio=None, name="bench"):
+    state_journal = StateJournal(path, fsync=fsync)
+    portfolio_journal = StateJournal(portfolio, fsync=fsync) if portfolio else None
+    for state, symbol in state_writes(fills, positions):
+        state_journal.append(patch(state, symbol))
+        if portfolio_journal:
+            portfolio_journal.append(
+                {
+                    "strategies": {
+                        name: {
+                            "date": state["date"],
+                            "daily_pnl": state["daily_pnl"],
+                            "open_positions": len(state["positions"]),
+                        }
+                    }
+                }
+            )
+    state_journal.close()
+
+
+def timed(label, fn, writes):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {writes / elapsed:>12,.0f} writes/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--fills", type=int, default=5000, help="Round trips per strategy")
+    parser.add_argument(
+        "--positions", type=int, default=50, help="Other open positions in the state"
+    )
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--fsync", action="store_true", help="fsync every write")
+    args = parser.parse_args()
+
+    writes = args.fills * 3
+    with tempfile.TemporaryDirectory() as tmp:
+        timed(
+            "rewrite (1 strategy)",
+            lambda: rewrite(
+                os.path.join(tmp, "rewrite.json"), args.fills, args.positions, args.fsync
+            ),
+            writes,
+        )
+        timed(
+            "journal (1 strategy)",
+            lambda: journal(
+                os.path.join(tmp, "journal.json"), args.fills, args.positions, args.fsync
+            ),
+            writes,
+        )
+
+        def shared():
+            workers = [
+                multiprocessing.Process(
+                    target=journal,
+                    args=(
+                        os.path.join(tmp, f"strategy{i}.json"),
+                        args.fills,
+                        args.positions,
+                        args.fsync,
+                        os.path.join(tmp, "portfolio.json"),
+                        f"strategy{i}",
+                    ),
+                )
+                for i in range(args.processes)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        # Strategy plus portfolio write per fill step
+        timed(f"shared ({args.processes} strategies)", shared, writes * args.processes * 2)
+
+
+if __name__ == "__main__":
+    main()
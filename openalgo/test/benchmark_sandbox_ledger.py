@@ -0,0 +1,126 @@
+"""
+Sandbox fund and position throughput (many users / strategies in parallel)
+
+Drives the public sandbox managers the way the order path and the MTM thread do:
+
+  margin ops    - block_margin + release_margin pairs (one per simulated fill)
+  position poll - get_open_positions(update_mtm=True) with canned quotes
+  mixed threads - one thread per user doing both
+
+Run against a scratch database and journal:
+
+    SANDBOX_DATABASE_URL=sqlite:////tmp/bench_sandbox.db \\
+    SANDBOX_LEDGER_JOURNAL=/tmp/bench_sandbox.journal \\
+        python test/benchmark_sandbox_ledger.py --users 50 --positions 20
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import websocket_proxy  # noqa: F401  (import first to resolve the adapter import cycle)
+from database.sandbox_db import SandboxFunds, SandboxPositions, db_session, init_db
+from sandbox.fund_manager import FundManager
+from sandbox.position_manager import PositionManager
+
+
+def setup(users, positions):
+    init_db()
+    user_ids = [f"BENCH_{i:03d}" for i in range(users)]
+    SandboxPositions.query.filter(SandboxPositions.user_id.in_(user_ids)).delete()
+    SandboxFunds.query.filter(SandboxFunds.user_id.in_(user_ids)).delete()
+    db_session.commit()
+    for user_id in user_ids:
+        FundManager(user_id).initialize_funds()
+        for j in range(positions):
+            db_session.add(
+                SandboxPositions(
+                    user_id=user_id,
+                    symbol=f"SYM{j}",
+                    exchange="NSE",
+                    product="NRML",
+                    quantity=10,
+                    average_price=Decimal("100.00"),
+                    margin_blocked=Decimal("0.00"),
+                )
+            )
+    db_session.commit()
+    db_session.remove()
+    return user_ids
+
+
+def position_manager(user_id):
+    pm = PositionManager(user_id)
+    pm._fetch_quotes_from_websocket = lambda symbols: {s: {"ltp": 101.5} for s in symbols}
+    return pm
+
+
+def margin_ops(user_id, count):
+    fm = FundManager(user_id)
+    for _ in range(count):
+        fm.block_margin(Decimal("1000"), "bench")
+        fm.release_margin(Decimal("1000"), Decimal("5"), "bench")
+
+
+def position_polls(user_id, count):
+    pm = position_manager(user_id)
+    for _ in range(count):
+        pm.get_open_positions(update_mtm=True)
+
+
+def timed(label, fn, ops):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {ops / elapsed:>12,.0f} ops/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--positions", type=int, default=20, help="Open positions per user")
+    parser.add_argument("--ops", type=int, default=100, help="Operations per user per workload")
+    args = parser.parse_args()
+
+    user_ids = setup(args.users, args.positions)
+    total = len(user_ids) * args.ops
+
+    timed("margin ops (1 thread)", lambda: [margin_ops(u, args.ops) for u in user_ids], total)
+    timed(
+        "position polls (1 thread)",
+        lambda: [position_polls(u, args.ops // 10 or 1) for u in user_ids],
+        len(user_ids) * (args.ops // 10 or 1),
+    )
+
+    def mixed():
+        def worker(user_id):
+            margin_ops(user_id, args.ops)
+            position_polls(user_id, args.ops // 10 or 1)
+            db_session.remove()
+
+        threads = [threading.Thread(target=worker, args=(u,)) for u in user_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    timed(
+        f"mixed ({len(user_ids)} threads)",
+        mixed,
+        total + len(user_ids) * (args.ops // 10 or 1),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Sandbox database throughput: legacy NullPool engine vs the shared pooled WAL engine
+
+Runs the same sandbox workloads against two fresh SQLite files:
+
+  legacy  - NullPool, default rollback journal (what every *_db.py module used)
+  pooled  - database.engine_factory.create_db_engine (QueuePool, WAL,
+            synchronous=NORMAL, mmap, larger page cache, statement cache)
+
+Workloads (session per operation, as the request handlers do):
+  order placement - insert order + trade, upsert position, update funds
+  MTM update      - load open positions, mark each to a new LTP, update funds
+  mixed threads   - order writers running alongside orderbook/positionbook readers
+
+Usage:
+    python test/benchmark_sqlite_engines.py
+    python test/benchmark_sqlite_engines.py --orders 2000 --symbols 200 --threads 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from database.engine_factory import create_db_engine
+from database.sandbox_db import (
+    Base,
+    SandboxFunds,
+    SandboxOrders,
+    SandboxPositions,
+    SandboxTrades,
+)
+
+USER = "BENCH_USER"
+
+
+def legacy_engine(url):
+    return create_engine(url, poolclass=NullPool, connect_args={"check_same_thread": False})
+
+
+def setup(engine):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as session:
+        session.add(SandboxFunds(user_id=USER))
+        session.commit()
+    return Session
+
+
+def place_order(Session, seq, symbol, rng):
+    """DB work of one filled sandbox market order"""
+    price = Decimal(str(round(rng.uniform(100, 2000), 2)))
+    quantity = rng.randint(1, 100)
+    action = rng.choice(("BUY", "SELL"))
+    orderid = f"{threading.get_ident()}-{seq}"
+    with Session() as session:
+        session.add(
+            SandboxOrders(
+                orderid=orderid,
+                user_id=USER,
+                symbol=symbol,
+                exchange="NSE",
+                action=action,
+                quantity=quantity,
+                price_type="MARKET",
+                product="MIS",
+                order_status="complete",
+                average_price=price,
+                filled_quantity=quantity,
+                pending_quantity=0,
+            )
+        )
+        session.add(
+            SandboxTrades(
+                tradeid=f"T{orderid}",
+                orderid=orderid,
+                user_id=USER,
+                symbol=symbol,
+                exchange="NSE",
+                action=action,
+                quantity=quantity,
+                price=price,
+                product="MIS",
+            )
+        )
+        signed = quantity if action == "BUY" else -quantity
+        position = (
+            session.query(SandboxPositions)
+            .filter_by(user_id=USER, symbol=symbol, exchange="NSE", product="MIS")
+            .first()
+        )
+        if position:
+            position.quantity += signed
+            position.ltp = price
+        else:
+            session.add(
+                SandboxPositions(
+                    user_id=USER,
+                    symbol=symbol,
+                    exchange="NSE",
+                    product="MIS",
+                    quantity=signed,
+                    average_price=price,
+                    ltp=price,
+                )
+            )
+        funds = session.query(SandboxFunds).filter_by(user_id=USER).first()
+        margin = price * quantity / 5
+        funds.used_margin += margin
+        funds.available_balance -= margin
+        session.commit()
+
+
+def mtm_update(Session, rng):
+    """One MTM pass over all open positions"""
+    with Session() as session:
+        total = Decimal("0")
+        for position in session.query(SandboxPositions).filter_by(user_id=USER).all():
+            ltp = Decimal(str(round(float(position.average_price) * rng.uniform(0.98, 1.02), 2)))
+            position.ltp = ltp
+            position.pnl = (ltp - position.average_price) * position.quantity
+            total += position.pnl
+        session.query(SandboxFunds).filter_by(user_id=USER).first().unrealized_pnl = total
+        session.commit()
+
+
+def read_books(Session):
+    with Session() as session:
+        session.query(SandboxOrders).filter_by(user_id=USER).order_by(
+            SandboxOrders.id.desc()
+        ).limit(50).all()
+        session.query(SandboxPositions).filter_by(user_id=USER).all()
+
+
+def run(label, engine, args):
+    rng = random.Random(11)
+    Session = setup(engine)
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+
+    start = time.perf_counter()
+    for i in range(args.orders):
+        place_order(Session, i, symbols[i % len(symbols)], rng)
+    orders_per_sec = args.orders / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(args.mtm_rounds):
+        mtm_update(Session, rng)
+    mtm_per_sec = args.mtm_rounds * len(symbols) / (time.perf_counter() - start)
+
+    counts = {"write": 0, "read": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(index):
+        local_rng = random.Random(index)
+        seq = 0
+        writer = index % 2 == 0
+        while time.perf_counter() < deadline:
+            try:
+                if writer:
+                    place_order(Session, f"m{seq}", local_rng.choice(symbols), local_rng)
+                else:
+                    read_books(Session)
+                kind = "write" if writer else "read"
+            except Exception:
+                kind = "errors"
+            seq += 1
+            with lock:
+                counts[kind] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(
+        f"{label:<8} {orders_per_sec:>12,.0f} {mtm_per_sec:>14,.0f} "
+        f"{counts['write'] / args.seconds:>12,.0f} {counts['read'] / args.seconds:>12,.0f} "
+        f"{counts['errors']:>8}"
+    )
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--mtm-rounds", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=8, help="Mixed workload threads")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Mixed workload duration")
+    args = parser.parse_args()
+
+    print(
+        f"{'engine':<8} {'orders/s':>12} {'MTM pos/s':>14} {'mixed wr/s':>12} "
+        f"{'mixed rd/s':>12} {'errors':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        run("legacy", legacy_engine(f"sqlite:///{tmp}/legacy.db"), args)
+        run("pooled", create_db_engine(f"sqlite:///{tmp}/pooled.db"), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Strategy SymbolResolver: instruments.csv through pandas vs the prebuilt index
+
+Writes a synthetic instrument master (equities, futures and weekly/monthly
+option chains for --underlyings names), builds the memory-mapped index that
+daily prep ships next to it, and times:
+
+  load          - SymbolResolver() as a strategy process starts
+  resolve       - FUT and OPT validation lookups (daily prep / resolve_all)
+  tradable      - ATM/ITM/OTM option symbol for a spot price
+
+    python test/benchmark_symbol_resolver.py --underlyings 200 --strikes 60
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from strategies.utils.symbol_resolver import SymbolResolver, build_instrument_index
+
+
+def build_master(path, underlyings, strikes):
+    now = datetime.now()
+    expiries = [now + timedelta(days=d) for d in (2, 9, 16, 30, 65)]
+    rows = []
+    for u in range(underlyings):
+        name = f"STOCK{u}"
+        base = 100 * (u + 10)
+        rows.append({"exchange": "NSE", "symbol": name, "name": name, "expiry": None,
+                     "instrument_type": "EQ", "strike": 0})
+        for expiry in expiries[3:]:
+            rows.append({"exchange": "NFO", "symbol": f"{name}{expiry:%y%b}FUT".upper(),
+                         "name": name, "expiry": f"{expiry:%Y-%m-%d}",
+                         "instrument_type": "FUT", "strike": 0})
+        for expiry in expiries:
+            for k in range(strikes):
+                strike = base + k * 10
+                for option_type in ("CE", "PE"):
+                    rows.append({"exchange": "NFO",
+                                 "symbol": f"{name}{expiry:%y%b%d}{strike}{option_type}".upper(),
+                                 "name": name, "expiry": f"{expiry:%Y-%m-%d}",
+                                 "instrument_type": "OPT", "strike": strike})
+    df = pd.DataFrame(rows)
+    df.insert(1, "token", range(len(df)))
+    df.to_csv(path, index=False)
+    return len(df)
+
+
+def timed(label, fn, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1e6 / runs:>12.1f} us/call")
+    return elapsed / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--underlyings", type=int, default=200)
+    parser.add_argument("--strikes", type=int, default=60, help="Strikes per expiry")
+    parser.add_argument("--runs", type=int, default=200, help="Resolutions per timing")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "instruments.csv")
+        rows = build_master(csv_path, args.underlyings, args.strikes)
+        start = time.perf_counter()
+        build_instrument_index(csv_path)
+        print(f"{rows} instruments, index built in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+        futures = [{"type": "FUT", "underlying": f"STOCK{u}", "exchange": "NFO"}
+                   for u in range(args.underlyings)]
+        options = [{"type": "OPT", "underlying": f"STOCK{u}", "exchange": "NFO",
+                    "option_type": rng.choice(["CE", "PE"]),
+                    "expiry_preference": rng.choice(["WEEKLY", "MONTHLY"]),
+                    "strike_criteria": rng.choice(["ATM", "ITM", "OTM"])}
+                   for u in range(args.underlyings)]
+
+        results = {}
+        for label, use_index in (("csv", False), ("index", True)):
+            print(f"[{label}]")
+            load = timed("load", lambda u=use_index: SymbolResolver(csv_path, use_index=u), 3)
+            resolver = SymbolResolver(csv_path, use_index=use_index)
+            assert (resolver.index is not None) == use_index
+            it = iter(range(10**9))
+
+            def resolve_future(r=resolver, it=it):
+                r.resolve(futures[next(it) % len(futures)])
+
+            def resolve_option(r=resolver, it=it):
+                r.resolve(options[next(it) % len(options)])
+
+            def tradable(r=resolver, it=it):
+                i = next(it) % len(options)
+                r.get_tradable_symbol(options[i], spot_price=100 * (i + 10) + rng.uniform(0, 600))
+
+            per_call = [timed(name, fn, args.runs) for name, fn in (
+                ("resolve FUT", resolve_future),
+                ("resolve OPT", resolve_option),
+                ("tradable option symbol", tradable),
+            )]
+            results[label] = (load, per_call)
+            print()
+
+        csv_load, csv_calls = results["csv"]
+        index_load, index_calls = results["index"]
+        print(f"load speedup {csv_load / index_load:.0f}x, resolution speedup "
+              + ", ".join(f"{c / i:.0f}x" for c, i in zip(csv_calls, index_calls, strict=True)))
+
+        # Same answers from both paths
+        csv_resolver = SymbolResolver(csv_path, use_index=False)
+        index_resolver = SymbolResolver(csv_path)
+        for i, config in enumerate(options):
+            spot = 100 * (i + 10) + 255
+            assert csv_resolver.resolve(config) == index_resolver.resolve(config)
+            assert (csv_resolver.get_tradable_symbol(config, spot_price=spot)
+                    == index_resolver.get_tradable_symbol(config, spot_price=spot))
+
+
+if __name__ == "__main__":
+    main()
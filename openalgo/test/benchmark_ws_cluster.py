@@ -0,0 +1,286 @@
+"""
+WebSocket proxy cluster fan-out with a few thousand simulated clients
+
+Starts ``websocket_proxy.cluster`` against a scratch auth database with a
+synthetic "bench" broker adapter in the adapter host, which publishes QUOTE
+ticks for every subscribed symbol at --rate ticks/s. Client processes open
+--clients WebSocket connections, authenticate, subscribe to --per-client
+symbols each and count what arrives:
+
+  setup      - time for all clients to connect, authenticate and subscribe
+  delivered  - market data messages received per second across all clients
+  expected   - what the adapter published times the clients subscribed to it
+  latency    - adapter publish -> client receive (p50 / p99)
+
+Each --workers value runs a fresh cluster, e.g. one worker vs one per core:
+
+    python test/benchmark_ws_cluster.py --clients 3000 --workers 1,4
+
+Speedups need as many free cores as workers plus client processes.
+"""
+
+import argparse
+import asyncio as aio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Scratch database and ports, shared with the spawned cluster and client processes
+BENCH_DIR = os.environ.setdefault("WS_BENCH_DIR", tempfile.mkdtemp(prefix="ws_bench_"))
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DIR}/auth.db"
+os.environ["ZMQ_PORT"] = os.environ.get("WS_BENCH_ZMQ_PORT", "15555")
+os.environ["WEBSOCKET_CONTROL_PORT"] = os.environ.get("WS_BENCH_CONTROL_PORT", "15554")
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import numpy as np
+import websockets
+
+from websocket_proxy.base_adapter import BaseBrokerWebSocketAdapter
+from websocket_proxy.cluster import run_cluster
+
+BENCH_USER = "bench"
+BENCH_API_KEY = "bench-api-key-0123456789abcdef0123456789abcdef0123456789abcdef"
+BENCH_BROKER = "bench"
+EXCHANGE = "NSE"
+
+
+class BenchAdapter(BaseBrokerWebSocketAdapter):
+    """Publishes synthetic QUOTE ticks for every subscribed symbol"""
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.rate = float(os.environ.get("WS_BENCH_RATE", "5"))
+        self.running = False
+
+    def initialize(self, broker_name, user_id, auth_data=None):
+        return self._create_success_response("Initialized")
+
+    def connect(self):
+        if not self.running:
+            self.running = True
+            self.connected = True
+            threading.Thread(target=self._publish_loop, daemon=True).start()
+        return self._create_success_response("Connected")
+
+    def disconnect(self):
+        self.running = False
+        self.connected = False
+
+    def subscribe(self, symbol, exchange, mode=2, depth_level=5):
+        with self.lock:
+            self.subscriptions[(symbol, exchange, mode)] = True
+        return self._create_success_response("Subscribed", actual_depth=depth_level)
+
+    def unsubscribe(self, symbol, exchange, mode=2):
+        with self.lock:
+            self.subscriptions.pop((symbol, exchange, mode), None)
+        return self._create_success_response("Unsubscribed")
+
+    def _publish_loop(self):
+        interval = 1.0 / self.rate
+        next_round = time.perf_counter()
+        while self.running:
+            with self.lock:
+                subscribed = list(self.subscriptions)
+            for symbol, exchange, mode in subscribed:
+                if mode == 2:
+                    self.publish_market_data(
+                        f"{exchange}_{symbol}_QUOTE",
+                        {"symbol": symbol, "ltp": random.uniform(100, 200), "sent": time.time()},
+                    )
+            next_round += interval
+            time.sleep(max(0.0, next_round - time.perf_counter()))
+
+
+def register_bench_adapter():
+    """Runs in the adapter host before it serves"""
+    from websocket_proxy.broker_factory import register_adapter
+
+    register_adapter(BENCH_BROKER, BenchAdapter)
+
+
+def setup_user():
+    from database.auth_db import init_db, upsert_api_key, upsert_auth
+
+    init_db()
+    upsert_api_key(BENCH_USER, BENCH_API_KEY)
+    upsert_auth(BENCH_USER, "bench-token", BENCH_BROKER)
+
+
+def wait_for_port(host, port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            if s.connect_ex((host, port)) == 0:
+                return True
+        time.sleep(0.2)
+    return False
+
+
+async def _client(url, symbols, state, ready):
+    async with websockets.connect(url, open_timeout=60, max_queue=None) as ws:
+        await ws.send(json.dumps({"action": "authenticate", "api_key": BENCH_API_KEY}))
+        reply = json.loads(await ws.recv())
+        if reply.get("status") != "success":
+            raise RuntimeError(f"Authentication failed: {reply}")
+        await ws.send(
+            json.dumps(
+                {
+                    "action": "subscribe",
+                    "symbols": [{"symbol": s, "exchange": EXCHANGE} for s in symbols],
+                    "mode": "Quote",
+                }
+            )
+        )
+        ready()
+        async for raw in ws:
+            message = json.loads(raw)
+            if message.get("type") != "market_data" or not state["measuring"]:
+                continue
+            state["received"] += 1
+            if state["received"] % 10 == 0:
+                state["latencies"].append(time.time() - message["data"]["sent"])
+
+
+def run_clients(index, url, clients, universe, per_client, duration, ready_queue, start, results):
+    """Client process: open `clients` connections and measure for `duration` seconds"""
+
+    async def main():
+        rng = random.Random(index)
+        state = {"measuring": False, "received": 0, "latencies": []}
+        connected = 0
+
+        def ready():
+            nonlocal connected
+            connected += 1
+
+        tasks = []
+        for _ in range(clients):
+            tasks.append(
+                aio.create_task(_client(url, rng.sample(universe, per_client), state, ready))
+            )
+            await aio.sleep(0)
+        while connected < clients:
+            failed = [t for t in tasks if t.done() and t.exception()]
+            if failed:
+                raise failed[0].exception()
+            await aio.sleep(0.05)
+        ready_queue.put(index)
+
+        await aio.get_running_loop().run_in_executor(None, start.wait)
+        state["measuring"] = True
+        await aio.sleep(duration)
+        state["measuring"] = False
+        results.put((state["received"], state["latencies"]))
+        for task in tasks:
+            task.cancel()
+        await aio.gather(*tasks, return_exceptions=True)
+
+    aio.run(main())
+
+
+def run(workers, args):
+    ctx = multiprocessing.get_context("spawn")
+    cluster = ctx.Process(
+        target=run_cluster,
+        kwargs={
+            "workers": workers,
+            "host": "127.0.0.1",
+            "port": args.port,
+            "init": register_bench_adapter,
+        },
+    )
+    cluster.start()
+    try:
+        if not wait_for_port("127.0.0.1", args.port):
+            raise RuntimeError("Cluster did not start")
+
+        url = f"ws://127.0.0.1:{args.port}"
+        universe = [f"SYM{i:04d}" for i in range(args.symbols)]
+        ready_queue, results, start = ctx.Queue(), ctx.Queue(), ctx.Event()
+        share = [args.clients // args.client_procs] * args.client_procs
+        share[0] += args.clients - sum(share)
+
+        setup_start = time.perf_counter()
+        procs = [
+            ctx.Process(
+                target=run_clients,
+                args=(
+                    i,
+                    url,
+                    n,
+                    universe,
+                    args.per_client,
+                    args.duration,
+                    ready_queue,
+                    start,
+                    results,
+                ),
+            )
+            for i, n in enumerate(share)
+        ]
+        for proc in procs:
+            proc.start()
+        for _ in procs:
+            ready_queue.get(timeout=300)
+        setup = time.perf_counter() - setup_start
+
+        time.sleep(1.0)  # let the first round of ticks settle
+        start.set()
+        received, latencies = 0, []
+        for _ in procs:
+            count, sample = results.get(timeout=args.duration + 120)
+            received += count
+            latencies += sample
+        for proc in procs:
+            proc.join(timeout=10)
+    finally:
+        cluster.terminate()
+        cluster.join(timeout=15)
+
+    expected = args.clients * args.per_client * args.rate
+    latencies = np.array(latencies) * 1000.0 if latencies else np.zeros(1)
+    print(
+        f"{workers:>7} {args.clients:>7} {setup:>8.1f}s {received / args.duration:>12,.0f}/s "
+        f"{expected:>10,.0f}/s {np.percentile(latencies, 50):>8.1f}ms "
+        f"{np.percentile(latencies, 99):>8.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="Comma separated")
+    parser.add_argument("--client-procs", type=int, default=4)
+    parser.add_argument("--symbols", type=int, default=200, help="Symbol universe")
+    parser.add_argument("--per-client", type=int, default=5, help="Symbols per client")
+    parser.add_argument("--rate", type=float, default=5, help="Ticks/s per symbol")
+    parser.add_argument("--duration", type=float, default=10, help="Measured seconds")
+    parser.add_argument("--port", type=int, default=18765)
+    args = parser.parse_args()
+    os.environ["WS_BENCH_RATE"] = str(args.rate)
+
+    setup_user()
+    print(
+        f"{'workers':>7} {'clients':>7} {'setup':>9} {'delivered':>14} {'expected':>12} {'p50':>10} {'p99':>10}"
+    )
+    for workers in dict.fromkeys(int(w) for w in args.workers.split(",")):
+        run(workers, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Shared pytest setup.
+
+The trade journal defaults to db/journal; tests write theirs to a temp dir
+instead. Set before any test module imports strategies.utils.trade_journal.
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("TRADE_JOURNAL_DIR", tempfile.mkdtemp(prefix="trade_journal_"))
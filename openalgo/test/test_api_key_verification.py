@@ -0,0 +1,146 @@
+"""
+Tests for indexed API key verification in database/auth_db.py
+
+A cache miss should cost one fingerprint lookup and at most one Argon2 verify,
+regardless of how many users have keys.
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from database import auth_db
+from database.auth_db import ApiKeys, api_key_fingerprint, upsert_api_key, verify_api_key
+
+
+class CountingHasher:
+    def __init__(self, hasher):
+        self.hasher = hasher
+        self.verifies = 0
+
+    def hash(self, password):
+        return self.hasher.hash(password)
+
+    def verify(self, hashed, password):
+        self.verifies += 1
+        return self.hasher.verify(hashed, password)
+
+
+@pytest.fixture
+def hasher(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/openalgo.db")
+    auth_db.Base.metadata.create_all(engine)
+    auth_db.db_session.remove()
+    auth_db.db_session.configure(bind=engine)
+    auth_db.verified_api_key_cache.clear()
+    auth_db.invalid_api_key_cache.clear()
+    counting = CountingHasher(auth_db.ph)
+    monkeypatch.setattr(auth_db, "ph", counting)
+    yield counting
+    auth_db.db_session.remove()
+    auth_db.db_session.configure(bind=auth_db.engine)
+
+
+def key(n):
+    return f"{n:064x}"
+
+
+def forget_process_caches():
+    """What another process (or a restart) starts with"""
+    auth_db.verified_api_key_cache.clear()
+    auth_db.invalid_api_key_cache.clear()
+
+
+def test_miss_costs_one_argon2_verify(hasher):
+    for n in range(8):
+        upsert_api_key(f"user{n}", key(n))
+
+    hasher.verifies = 0
+    assert verify_api_key(key(6)) == "user6"
+    assert hasher.verifies == 1
+    assert verify_api_key(key(6)) == "user6"
+    assert hasher.verifies == 1
+
+    assert verify_api_key(key(99)) is None
+    assert hasher.verifies == 1
+
+
+def test_verification_is_shared_through_the_database(hasher):
+    upsert_api_key("alice", key(1))
+    assert verify_api_key(key(1)) == "alice"
+
+    forget_process_caches()
+    hasher.verifies = 0
+    assert verify_api_key(key(1)) == "alice"
+    assert hasher.verifies == 0
+
+
+def test_regenerated_key_replaces_the_old_one(hasher):
+    upsert_api_key("alice", key(1))
+    upsert_api_key("bob", key(2))
+    assert verify_api_key(key(1)) == "alice"
+    assert verify_api_key(key(2)) == "bob"
+
+    upsert_api_key("alice", key(3))
+    assert api_key_fingerprint(key(2)) in auth_db.verified_api_key_cache
+    assert verify_api_key(key(1)) is None
+    hasher.verifies = 0
+    assert verify_api_key(key(3)) == "alice"
+    assert hasher.verifies == 1
+
+
+def test_legacy_rows_are_fingerprinted_on_first_use(hasher):
+    upsert_api_key("alice", key(1))
+    row = ApiKeys.query.filter_by(user_id="alice").first()
+    row.api_key_fingerprint = None
+    row.api_key_verified_at = None
+    auth_db.db_session.commit()
+
+    assert verify_api_key(key(1)) == "alice"
+    assert ApiKeys.query.filter_by(user_id="alice").first().api_key_fingerprint == (
+        api_key_fingerprint(key(1))
+    )
+
+
+def test_migration_backfills_existing_keys(tmp_path, monkeypatch):
+    from upgrade.migrate_api_key_fingerprint import add_columns, backfill_fingerprints
+
+    # The migration imports auth_db lazily; other tests swap a mock into sys.modules
+    monkeypatch.setitem(sys.modules, "database.auth_db", auth_db)
+
+    engine = create_engine(f"sqlite:///{tmp_path}/openalgo.db")
+    with engine.connect() as conn:
+        conn.execute(
+            text("""
+            CREATE TABLE api_keys (
+                id INTEGER PRIMARY KEY, user_id VARCHAR, api_key_hash TEXT,
+                api_key_encrypted TEXT, created_at DATETIME, order_mode VARCHAR(20)
+            )
+        """)
+        )
+        conn.execute(
+            text(
+                "INSERT INTO api_keys (user_id, api_key_hash, api_key_encrypted) VALUES (:u, :h, :e)"
+            ),
+            {"u": "alice", "h": "", "e": auth_db.encrypt_token(key(1))},
+        )
+        conn.commit()
+
+    assert add_columns(engine) and add_columns(engine)
+    assert backfill_fingerprints(engine)
+    with engine.connect() as conn:
+        stored = conn.execute(text("SELECT api_key_fingerprint FROM api_keys")).scalar()
+    assert stored == api_key_fingerprint(key(1))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,192 @@
+"""
+Tests for broker book request coalescing (utils/broker_book_cache.py)
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pytest
+
+from utils import broker_book_cache
+from utils.broker_book_cache import (
+    fetch_book,
+    get_book_cache_metrics,
+    invalidate_books,
+    reset_book_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(monkeypatch):
+    monkeypatch.setattr(broker_book_cache, "BOOK_CACHE_TTL_MS", 500.0)
+    reset_book_cache()
+    yield
+    reset_book_cache()
+
+
+def ok(data):
+    return True, {"status": "success", "data": data}, 200
+
+
+def test_concurrent_callers_share_one_broker_call():
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return ok([{"symbol": "SBIN", "quantity": 10}])
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(fetch_book("tok", "zerodha", "positionbook", fetch))
+        )
+        for _ in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    while get_book_cache_metrics()["coalesced"] < 19:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 20
+    assert all(r[1]["data"][0]["quantity"] == 10 for r in results)
+    metrics = get_book_cache_metrics()
+    assert metrics["misses"] == 1 and metrics["coalesced"] == 19
+
+
+def test_results_are_cached_per_key_and_copied():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return ok([{"quantity": 10}])
+
+    first = fetch_book("tok", "zerodha", "positionbook", fetch)
+    first[1]["data"][0]["quantity"] = 99
+    second = fetch_book("tok", "zerodha", "positionbook", fetch)
+    fetch_book("tok", "zerodha", "orderbook", fetch)
+    fetch_book("other", "zerodha", "positionbook", fetch)
+
+    assert second[1]["data"][0]["quantity"] == 10
+    assert len(calls) == 3
+    assert get_book_cache_metrics()["hits"] == 1
+
+
+def test_zero_ttl_only_coalesces(monkeypatch):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return ok([])
+
+    monkeypatch.setattr(broker_book_cache, "BOOK_CACHE_TTL_MS", 0.0)
+    fetch_book("tok", "zerodha", "funds", fetch)
+    fetch_book("tok", "zerodha", "funds", fetch)
+    assert len(calls) == 2
+
+
+def test_failures_are_not_cached():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return False, {"status": "error", "message": "rate limited"}, 500
+
+    fetch_book("tok", "zerodha", "tradebook", fetch)
+    fetch_book("tok", "zerodha", "tradebook", fetch)
+    assert len(calls) == 2
+
+    def boom():
+        raise RuntimeError("broker down")
+
+    with pytest.raises(RuntimeError):
+        fetch_book("tok", "zerodha", "tradebook", boom)
+    assert get_book_cache_metrics()["inflight"] == 0
+
+
+def test_invalidation_drops_cached_and_in_flight_results():
+    fetch_book("tok", "zerodha", "orderbook", lambda: ok(["before"]))
+    invalidate_books("tok", "zerodha")
+    assert fetch_book("tok", "zerodha", "orderbook", lambda: ok(["after"]))[1]["data"] == ["after"]
+
+    # An order placed while a read is in flight: that read is not cached
+    def stale():
+        invalidate_books("tok", "zerodha")
+        return ok(["stale"])
+
+    invalidate_books("tok", "zerodha")
+    assert fetch_book("tok", "zerodha", "orderbook", stale)[1]["data"] == ["stale"]
+    assert fetch_book("tok", "zerodha", "orderbook", lambda: ok(["fresh"]))[1]["data"] == ["fresh"]
+    assert get_book_cache_metrics()["invalidations"] == 3
+
+
+def test_positionbook_service_goes_through_the_cache(monkeypatch):
+    from database import settings_db
+    from services import positionbook_service
+
+    calls = []
+
+    def get_positions(auth_token):
+        calls.append(auth_token)
+        return [{"tradingsymbol": "SBIN"}]
+
+    broker_funcs = {
+        "get_positions": get_positions,
+        "map_position_data": lambda data: data,
+        "transform_positions_data": lambda data: [
+            {"symbol": "SBIN", "exchange": "NSE", "product": "MIS", "quantity": 5}
+        ],
+    }
+    monkeypatch.setattr(settings_db, "get_analyze_mode", lambda: False)
+    monkeypatch.setattr(positionbook_service, "import_broker_module", lambda broker: broker_funcs)
+
+    for _ in range(3):
+        success, response, status = positionbook_service.get_positionbook_with_auth(
+            "tok", "zerodha"
+        )
+        assert success and status == 200
+        assert response["data"][0]["quantity"] == 5
+    assert calls == ["tok"]
+
+
+def test_basket_and_split_orders_invalidate_the_books():
+    from types import SimpleNamespace
+
+    from services import basket_order_service, split_order_service
+
+    broker_module = SimpleNamespace(
+        place_order_api=lambda order, auth_token: (SimpleNamespace(status=200), {}, "1")
+    )
+    order = {"symbol": "SBIN", "quantity": "1"}
+
+    assert (
+        basket_order_service.place_single_order(order, broker_module, "tok", 1, 0, "zerodha")[
+            "status"
+        ]
+        == "success"
+    )
+    assert (
+        split_order_service.place_single_order(order, broker_module, "tok", 1, 1, "zerodha")[
+            "status"
+        ]
+        == "success"
+    )
+    assert get_book_cache_metrics()["invalidations"] == 2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,220 @@
+"""
+Tests for the Telegram chart render service (services/chart_render_service.py)
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from services import chart_render_service
+from services.chart_render_service import (
+    IST,
+    BarStore,
+    ChartRenderer,
+    PngCache,
+    build_chart_figure,
+    normalize_bars,
+    render_chart,
+)
+
+TODAY = datetime.now(IST).date()
+
+
+def epoch(day, hour=9, minute=15):
+    return int(IST.localize(datetime(day.year, day.month, day.day, hour, minute)).timestamp())
+
+
+def records(*timestamps, close=100.0):
+    return [
+        {"timestamp": ts, "open": close, "high": close, "low": close, "close": close, "volume": 10}
+        for ts in timestamps
+    ]
+
+
+class FakeHistory:
+    """get_history stand-in serving Historify (db) and broker (api) records"""
+
+    def __init__(self, db=(), api=()):
+        self.db, self.api = list(db), list(api)
+        self.calls = []
+
+    def __call__(self, symbol, exchange, interval, start_date, end_date, api_key, source="api"):
+        self.calls.append((source, start_date))
+        since = epoch(datetime.strptime(start_date, "%Y-%m-%d").date(), 0, 0)
+        rows = [
+            row for row in (self.db if source == "db" else self.api) if row["timestamp"] >= since
+        ]
+        if not rows:
+            return False, {"status": "error", "message": "No data"}, 404
+        return True, {"status": "success", "data": rows}, 200
+
+
+@pytest.fixture
+def history(monkeypatch):
+    fake = FakeHistory()
+    from services import history_service
+
+    monkeypatch.setattr(history_service, "get_history", fake)
+    return fake
+
+
+def test_bar_store_seeds_from_historify_and_tops_up_the_tail(history):
+    yesterday = TODAY - timedelta(days=1)
+    history.db = records(epoch(yesterday), epoch(yesterday, 15, 25))
+    history.api = records(epoch(yesterday, 15, 25), epoch(TODAY), close=101.0)
+    store = BarStore(refresh_seconds=3600)
+
+    bars = store.get_bars("SBIN", "NSE", "5m", TODAY - timedelta(days=5), "key")
+    assert list(bars["timestamp"]) == [epoch(yesterday), epoch(yesterday, 15, 25), epoch(TODAY)]
+    assert bars["close"].iloc[1] == 101.0  # Broker bar replaces the stored one
+    # Historify for the window, then the broker only from the last stored bar's day
+    assert history.calls == [("db", str(TODAY - timedelta(days=5))), ("api", str(yesterday))]
+
+    # Served from the store until the refresh interval is over
+    history.calls.clear()
+    again = store.get_bars("SBIN", "NSE", "5m", TODAY - timedelta(days=1), "key")
+    assert history.calls == []
+    assert list(again["timestamp"]) == list(bars["timestamp"])
+
+    store.refresh_seconds = 0
+    history.api.append(records(epoch(TODAY, 9, 20))[0])
+    bars = store.get_bars("SBIN", "NSE", "5m", TODAY - timedelta(days=5), "key")
+    assert history.calls == [("api", str(TODAY))]
+    assert bars["timestamp"].iloc[-1] == epoch(TODAY, 9, 20)
+
+
+def test_bar_store_falls_back_to_broker_then_sdk(history):
+    store = BarStore()
+    history.api = records(epoch(TODAY))
+    bars = store.get_bars("INFY", "NSE", "D", TODAY - timedelta(days=30), "key")
+    assert [source for source, _ in history.calls] == ["db", "api"]
+    assert len(bars) == 1
+
+    # SDK history comes as a DataFrame indexed by IST timestamps
+    index = pd.DatetimeIndex([IST.localize(datetime(2025, 1, 2, 9, 15))], name="timestamp")
+    sdk = pd.DataFrame(
+        {"open": [1.0], "high": [2.0], "low": [0.5], "close": [1.5], "volume": [7]}, index=index
+    )
+    calls = []
+    history.api = []
+
+    def fallback(start, end):
+        calls.append((start, end))
+        return sdk
+
+    bars = store.get_bars("TCS", "NSE", "D", date(2025, 1, 1), "key", fallback=fallback)
+    assert calls == [(date(2025, 1, 1), TODAY)]
+    assert bars["timestamp"].tolist() == [epoch(date(2025, 1, 2))]
+    assert store.get_bars("NONE", "NSE", "D", TODAY, "key") is None
+
+
+def test_normalize_bars_sorts_and_dedups():
+    df = pd.DataFrame(records(3, 1, 3, 2))
+    df.loc[2, "close"] = 5.0
+    bars = normalize_bars(df)
+    assert bars["timestamp"].tolist() == [1, 2, 3]
+    assert bars["close"].tolist() == [100.0, 100.0, 5.0]
+
+
+def test_png_cache_evicts_least_recently_used():
+    cache = PngCache(max_entries=2)
+    cache.get_or_render("a", lambda: b"A")
+    cache.get_or_render("b", lambda: b"B")
+    assert cache.get_or_render("a", lambda: b"stale") == b"A"
+    cache.get_or_render("c", lambda: b"C")
+    assert len(cache) == 2
+    assert cache.get_or_render("b", lambda: b"B2") == b"B2"  # Evicted, rendered again
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_png_cache_renders_concurrent_misses_once():
+    cache = PngCache()
+    renders = []
+
+    def slow_render():
+        renders.append(1)
+        time.sleep(0.2)
+        return b"PNG"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_render("k", slow_render)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [b"PNG"] * 5
+    assert len(renders) == 1
+
+
+def test_render_chart_is_cached_by_last_bar(history, monkeypatch):
+    history.api = records(epoch(TODAY - timedelta(days=1)), epoch(TODAY))
+    figures = []
+
+    class FakeRenderer:
+        def render(self, fig):
+            figures.append(fig)
+            return f"png{len(figures)}".encode()
+
+    monkeypatch.setattr(chart_render_service, "_bar_store", BarStore(refresh_seconds=0))
+    monkeypatch.setattr(chart_render_service, "_png_cache", PngCache())
+    monkeypatch.setattr(chart_render_service, "get_chart_renderer", FakeRenderer)
+
+    assert render_chart("intraday", "SBIN", "NSE", "5m", 5, "key") == b"png1"
+    assert render_chart("intraday", "SBIN", "NSE", "5m", 5, "key") == b"png1"  # Same last bar
+    assert render_chart("intraday", "SBIN", "NSE", "5m", 5, "key", theme="dark") == b"png2"
+    dark = chart_render_service.pio.templates["plotly_dark"]
+    assert figures[1].layout.template.layout.paper_bgcolor == dark.layout.paper_bgcolor
+
+    history.api.append(records(epoch(TODAY, 9, 20))[0])  # A new bar: new image
+    assert render_chart("intraday", "SBIN", "NSE", "5m", 5, "key") == b"png3"
+    assert len(figures[2].data[0].x) == 3
+
+    assert render_chart("daily", "SBIN", "NSE", "D", 1, "key") == b"png4"
+    assert len(figures[3].data[0].x) == 1  # Last `days` bars
+
+
+def test_build_chart_figure_labels():
+    timestamps = pd.to_datetime([epoch(TODAY), epoch(TODAY, 9, 20)], unit="s", utc=True)
+    df = pd.DataFrame(records(0, 0)).assign(timestamp=timestamps.tz_convert(IST))
+    fig = build_chart_figure(df, "intraday", "SBIN", "5m", 5)
+    assert fig.layout.annotations[0].text == "SBIN - 5 Day Intraday (5m)"
+    assert (
+        fig.layout.xaxis2.ticktext[0]
+        == IST.localize(datetime.combine(TODAY, datetime.min.time()).replace(hour=9, minute=15))
+        .strftime("%d %b %H:%M")
+        .upper()
+    )
+
+
+def test_renderer_pool_reuses_its_worker():
+    renderer = ChartRenderer(workers=1, timeout=60)
+    try:
+        for _ in range(2):
+            try:
+                assert renderer.render(go.Figure()).startswith(b"\x89PNG")
+            except RuntimeError:
+                pass  # No Chrome here: the worker reports the error and stays up
+        assert renderer._started == 1 and len(renderer._idle) == 1
+    finally:
+        renderer.close()
+    assert renderer._started == 0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,60 @@
+"""
+Tests for the shared SQLite engine factory
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import text
+from sqlalchemy.pool import NullPool, QueuePool
+
+from database.engine_factory import (
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_MMAP_SIZE,
+    create_db_engine,
+    create_log_write_engine,
+)
+
+
+def test_sqlite_engine_is_shared_and_tuned(tmp_path):
+    url = f"sqlite:///{tmp_path}/app.db"
+    engine = create_db_engine(url, pool_size=50, max_overflow=100, pool_timeout=10)
+
+    assert create_db_engine(url) is engine
+    assert isinstance(engine.pool, QueuePool)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -SQLITE_CACHE_SIZE_KB
+        assert conn.execute(text("PRAGMA mmap_size")).scalar() == SQLITE_MMAP_SIZE
+
+
+def test_log_write_engine_is_single_connection(tmp_path):
+    url = f"sqlite:///{tmp_path}/logs.db"
+    engine = create_db_engine(url)
+    write_engine = create_log_write_engine(url, engine)
+
+    assert write_engine is not engine
+    assert create_log_write_engine(url, engine) is write_engine
+    assert write_engine.pool.size() == 1
+    assert write_engine.pool._max_overflow == 0
+
+
+def test_memory_url_keeps_per_connection_engine():
+    engine = create_db_engine("sqlite:///:memory:")
+
+    assert isinstance(engine.pool, NullPool)
+    assert create_log_write_engine("sqlite:///:memory:", engine) is engine
+
+
+if __name__ == "__main__":
+    import pytest
+
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,108 @@
+"""
+Tests for the feed recorder segments and the replay harness
+
+The replay test runs a small recording through the real SharedZmqPublisher,
+WebSocketProxy.zmq_listener and MarketDataService at max speed.
+"""
+
+import gzip
+import json
+import os
+import struct
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import websocket_proxy  # noqa: F401  (import first to resolve the adapter import cycle)
+from websocket_proxy.feed_recorder import (
+    RECORD_FRAME,
+    RECORD_TEXT_FRAME,
+    RECORD_ZMQ,
+    FeedRecord,
+    FeedRecorder,
+    list_segments,
+    read_recording,
+)
+from websocket_proxy.feed_replay import FeedReplay, subscription_key
+
+
+def kite_ltp_frame(token, ltp):
+    packet = struct.pack(">Ii", token, ltp)
+    return struct.pack(">HH", 1, len(packet)) + packet
+
+
+def test_round_trip(tmp_path):
+    recorder = FeedRecorder(str(tmp_path))
+    recorder.record_frame("zerodha", kite_ltp_frame(1, 100))
+    recorder.record_frame("zerodha", '{"type": "order"}')
+    recorder.record_zmq("NSE_RELIANCE_LTP", b'{"ltp": 1.0}')
+    recorder.close()
+
+    records = list(read_recording(str(tmp_path)))
+
+    assert [r.kind for r in records] == [RECORD_FRAME, RECORD_TEXT_FRAME, RECORD_ZMQ]
+    assert records[0].key == "zerodha"
+    assert records[0].payload == kite_ltp_frame(1, 100)
+    assert records[1].payload == b'{"type": "order"}'
+    assert records[2].key == "NSE_RELIANCE_LTP"
+    assert records[0].timestamp_ns <= records[1].timestamp_ns <= records[2].timestamp_ns
+
+
+def test_segments_rotate_and_read_in_order(tmp_path):
+    recorder = FeedRecorder(str(tmp_path), segment_bytes=100)
+    for i in range(20):
+        recorder.record_zmq(f"NSE_SYM{i}_LTP", json.dumps({"ltp": i}).encode())
+    recorder.close()
+
+    assert len(list_segments(str(tmp_path))) > 1
+    assert [r.key for r in read_recording(str(tmp_path))] == [f"NSE_SYM{i}_LTP" for i in range(20)]
+
+
+def test_truncated_segment_stops_at_last_complete_record(tmp_path):
+    recorder = FeedRecorder(str(tmp_path))
+    for _ in range(5):
+        recorder.record_zmq("NSE_SBIN_LTP", b"x" * 50)
+    recorder.close()
+
+    path = list_segments(str(tmp_path))[0]
+    with gzip.open(path, "rb") as f:
+        raw = f.read()
+    with gzip.open(path, "wb") as f:
+        f.write(raw[:-20])
+
+    assert len(list(read_recording(path))) == 4
+
+
+def test_subscription_key_matches_proxy_topics():
+    assert subscription_key("NSE_RELIANCE_LTP") == ("RELIANCE", "NSE", 1)
+    assert subscription_key("zerodha_NFO_NIFTY24JANFUT_QUOTE") == ("NIFTY24JANFUT", "NFO", 2)
+    assert subscription_key("NSE_INDEX_NIFTY_DEPTH") == ("NIFTY", "NSE_INDEX", 3)
+    assert subscription_key("NSE_SBIN_FULL") is None
+
+
+def test_replay_delivers_every_message_to_every_client():
+    records = [FeedRecord(RECORD_FRAME, 0, "zerodha", kite_ltp_frame(1, 12345))]
+    for i in range(20):
+        payload = {"symbol": "SBIN", "exchange": "NSE", "ltp": 500.0 + i}
+        records.append(
+            FeedRecord(RECORD_ZMQ, i * 1000, "zerodha_NSE_SBIN_LTP", json.dumps(payload).encode())
+        )
+
+    report = FeedReplay(records, speed=0, clients=2, throttle=False).run()
+
+    assert report["frames"] == 1
+    assert report["published"] == 20
+    assert report["delivered"] == 40
+    assert report["latency"]["count"] == 40
+    assert report["stages"]["mds"]["count"] == 20
+
+
+if __name__ == "__main__":
+    import pytest
+
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,266 @@
+"""
+Tests for compiled Flow workflow execution (services/flow_executor_service.py)
+"""
+
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services import flow_executor_service
+from services.flow_executor_service import (
+    TimerWheel,
+    WorkflowContext,
+    compile_workflow,
+    execute_workflow,
+    get_workflow_plan,
+)
+
+
+def node(node_id, node_type, **data):
+    return {"id": node_id, "type": node_type, "data": data}
+
+
+def edge(source, target, handle=None):
+    e = {"id": f"{source}-{target}", "source": source, "target": target}
+    if handle:
+        e["sourceHandle"] = handle
+    return e
+
+
+class FakeClient:
+    """Broker client answering quotes, optionally blocking on a barrier"""
+
+    def __init__(self):
+        self.quotes = []
+        self.barrier = None
+
+    def get_quotes(self, symbol, exchange):
+        self.quotes.append(symbol)
+        if self.barrier:
+            self.barrier.wait()
+        return {"status": "success", "data": {"ltp": 100.0}}
+
+
+@pytest.fixture
+def flows(monkeypatch):
+    """In-memory workflows and executions"""
+    workflows, executions = {}, {}
+    client = FakeClient()
+
+    def create_execution(workflow_id, status="pending"):
+        execution = SimpleNamespace(id=len(executions) + 1, workflow_id=workflow_id, status=status)
+        executions[execution.id] = execution
+        return execution
+
+    def update_execution_status(execution_id, status, error=None):
+        executions[execution_id].status = status
+
+    monkeypatch.setattr(flow_executor_service, "get_workflow", workflows.get)
+    monkeypatch.setattr(flow_executor_service, "create_execution", create_execution)
+    monkeypatch.setattr(flow_executor_service, "update_execution_status", update_execution_status)
+    monkeypatch.setattr(flow_executor_service, "get_flow_client", lambda api_key: client)
+    monkeypatch.setattr(flow_executor_service, "_pool", ThreadPoolExecutor(max_workers=2))
+    monkeypatch.setattr(flow_executor_service, "_timer_wheel", TimerWheel(tick_seconds=0.01))
+
+    def add(workflow_id, nodes, edges):
+        workflows[workflow_id] = SimpleNamespace(
+            id=workflow_id, name=f"wf{workflow_id}", nodes=nodes, edges=edges
+        )
+
+    return SimpleNamespace(add=add, executions=executions, client=client)
+
+
+def messages(result):
+    return [entry["message"] for entry in result["logs"]]
+
+
+def test_interpolate_templates():
+    context = WorkflowContext()
+    context.set_variable("quote", {"data": {"ltp": 101.5}})
+    context.set_variable("name", "SBIN")
+    text = "{{name}} @ {{ quote.data.ltp }} {{missing}} {{name.x}} on {{date}}"
+    result = context.interpolate(text)
+    assert result.startswith("SBIN @ 101.5 {{missing}} {{name.x}} on 20")
+    assert context.interpolate("plain") == "plain"
+    assert context.interpolate(5) == 5
+    assert flow_executor_service.compile_template(text)[0] == ("name", ("name",), "{{name}}")
+
+
+def test_plan_marks_only_disjoint_fan_outs_parallel():
+    nodes = [node("s", "start")] + [node(n, "log") for n in "abcdef"] + [node("g", "andGate")]
+    edges = [
+        edge("s", "a"),
+        edge("s", "b"),  # a and b never meet
+        edge("a", "c"),
+        edge("b", "d"),
+        edge("c", "e"),
+        edge("c", "f"),  # e and f meet at the gate
+        edge("e", "g"),
+        edge("f", "g"),
+    ]
+    plan = compile_workflow(nodes, edges)
+    assert plan.start_id == "s"
+    assert plan.parallel == {"s"}
+    assert plan.inputs["g"] == ["e", "f"]
+
+    with pytest.raises(Exception, match="No trigger node"):
+        compile_workflow([node("a", "log")], [])
+
+
+def test_plan_cache_follows_edits():
+    nodes = [node("s", "start"), node("a", "log")]
+    first = get_workflow_plan(9001, nodes, [edge("s", "a")])
+    assert get_workflow_plan(9001, nodes, [edge("s", "a")]) is first
+    assert get_workflow_plan(9001, nodes, []) is not first
+
+
+def test_independent_branches_run_concurrently(flows):
+    # Both quote nodes wait for each other: sequential execution would time out
+    flows.client.barrier = threading.Barrier(2, timeout=5)
+    flows.add(
+        1,
+        [
+            node("s", "start"),
+            node("q1", "getQuote", symbol="SBIN", exchange="NSE", outputVariable="q1"),
+            node("q2", "getQuote", symbol="INFY", exchange="NSE", outputVariable="q2"),
+        ],
+        [edge("s", "q1"), edge("s", "q2")],
+    )
+    result = execute_workflow(1, api_key="key")
+    assert result["status"] == "success", result
+    assert sorted(flows.client.quotes) == ["INFY", "SBIN"]
+    assert flows.executions[result["execution_id"]].status == "completed"
+
+
+def test_conditions_and_gates_keep_their_order(flows):
+    flows.add(
+        2,
+        [
+            node("s", "start"),
+            node("v", "variable", variableName="n", value="{{webhook.qty}}"),
+            node("c1", "timeWindow", startTime="00:00", endTime="23:59:59"),
+            node("c2", "timeWindow", startTime="00:00", endTime="00:00"),
+            node("g", "orGate"),
+            node("yes", "log", message="yes {{n}}"),
+            node("no", "log", message="no"),
+        ],
+        [
+            edge("s", "v"),
+            edge("v", "c1"),
+            edge("v", "c2"),
+            edge("c1", "g"),
+            edge("c2", "g"),
+            edge("g", "yes", "yes"),
+            edge("g", "no", "no"),
+        ],
+    )
+    result = execute_workflow(2, webhook_data={"qty": 5}, api_key="key")
+    assert result["status"] == "success", result
+    # The gate runs once per incoming edge, as before
+    assert messages(result).count("[LOG] yes 5") == 2
+    assert "[LOG] no" not in messages(result)
+
+
+def test_delays_park_without_holding_workers(flows, monkeypatch):
+    monkeypatch.setattr(
+        flow_executor_service.time_module,
+        "sleep",
+        lambda seconds: pytest.fail("delay slept a worker"),
+    )
+    for workflow_id in range(10, 16):
+        flows.add(
+            workflow_id,
+            [node("s", "start"), node("d", "delay", delayMs=300), node("l", "log", message="done")],
+            [edge("s", "d"), edge("d", "l")],
+        )
+
+    start = time.monotonic()
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda w=workflow_id: results.append(execute_workflow(w, api_key="key"))
+        )
+        for workflow_id in range(10, 16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    assert [r["status"] for r in results] == ["success"] * 6
+    assert all(messages(r)[-1] == "[LOG] done" for r in results)
+    # Six 0.3s delays on two workers would take 0.9s if they slept
+    assert 0.3 <= elapsed < 0.8
+
+
+def test_concurrent_triggers_queue(flows, monkeypatch):
+    monkeypatch.setattr(flow_executor_service, "FLOW_RUN_QUEUE_SIZE", 1)
+    flows.add(
+        3,
+        [node("s", "start"), node("d", "delay", delayMs=200), node("l", "log", message="ran")],
+        [edge("s", "d"), edge("d", "l")],
+    )
+    first = execute_workflow(3, api_key="key", wait=False)
+    second = execute_workflow(3, api_key="key", wait=False)
+    third = execute_workflow(3, api_key="key", wait=False)
+    assert (first["queued"], second["queued"]) == (False, True)
+    assert third["already_running"]
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        statuses = [flows.executions[r["execution_id"]].status for r in (first, second)]
+        if statuses == ["completed", "completed"]:
+            break
+        time.sleep(0.02)
+    assert statuses == ["completed", "completed"]
+    assert flow_executor_service._run_queues == {}
+
+
+def test_failures_are_recorded(flows):
+    flows.add(4, [node("s", "start")], [])
+    result = execute_workflow(4)
+    assert result["status"] == "error"
+    assert result["message"] == "API key required for workflow execution"
+    assert flows.executions[result["execution_id"]].status == "failed"
+
+    flows.add(
+        5, [node("s", "start"), node("l", "log", message="loop")], [edge("s", "l"), edge("l", "l")]
+    )
+    result = execute_workflow(5, api_key="key")
+    assert result["status"] == "error"
+    assert "Maximum node" in result["message"]
+
+    assert execute_workflow(404, api_key="key") == {
+        "status": "error",
+        "message": "Workflow not found",
+    }
+
+
+def test_timer_wheel_orders_timers_across_revolutions():
+    wheel = TimerWheel(tick_seconds=0.005, slots=8)
+    fired = []
+    done = threading.Event()
+    for delay in (0.12, 0.01, 0.05, 0.03):
+        wheel.schedule(delay, lambda d=delay: fired.append(d))
+    wheel.schedule(0.15, done.set)
+    assert done.wait(2)
+    assert fired == [0.01, 0.03, 0.05, 0.12]
+    assert wheel.pending == 0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
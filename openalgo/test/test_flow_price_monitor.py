@@ -0,0 +1,205 @@
+"""
+Tests for tick-driven Flow price alerts (services/flow_price_monitor_service.py)
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pytest
+
+from services import flow_executor_service, flow_price_monitor_service
+from services.flow_price_monitor_service import PriceAlert, get_flow_price_monitor
+from services.market_data_service import get_market_data_service
+
+CONDITIONS = [
+    "greater_than",
+    "less_than",
+    "crossing",
+    "crossing_up",
+    "crossing_down",
+    "entering_channel",
+    "inside_channel",
+    "exiting_channel",
+    "outside_channel",
+    "moving_up",
+    "moving_down",
+    "moving_up_percent",
+    "moving_down_percent",
+]
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    monitor = get_flow_price_monitor()
+    monitor.shutdown()
+    monkeypatch.setattr(monitor, "_follow_symbol", lambda api_key, symbol, exchange: None)
+    yield monitor
+    monitor.shutdown()
+
+
+@pytest.fixture
+def triggered(monitor, monkeypatch):
+    fired = []
+    monkeypatch.setattr(
+        monitor, "_trigger_workflow", lambda workflow_id, price, api_key: fired.append(workflow_id)
+    )
+    return fired
+
+
+def tick(symbol, ltp):
+    return {"symbol": symbol, "exchange": "NSE", "mode": 1, "data": {"ltp": ltp}}
+
+
+def random_alert(rng, workflow_id):
+    lower = rng.uniform(90, 110)
+    return {
+        "workflow_id": workflow_id,
+        "symbol": "SBIN",
+        "exchange": "NSE",
+        "condition": rng.choice(CONDITIONS),
+        "target_price": round(rng.uniform(90, 110), 1),
+        "price_lower": round(lower, 1),
+        "price_upper": round(lower + rng.uniform(0, 5), 1),
+        "percentage": rng.choice([0.1, 0.5, 1.0]),
+        "api_key": "key",
+    }
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_index_fires_like_checking_every_alert(monitor, triggered, seed):
+    rng = random.Random(seed)
+    specs = [random_alert(rng, workflow_id) for workflow_id in range(60)]
+    for spec in specs:
+        monitor.add_alert(**spec)
+
+    # Reference: every alert evaluated on every tick, as the poller did
+    reference = {spec["workflow_id"]: PriceAlert(**spec) for spec in specs}
+    price = 100.0
+    for _ in range(200):
+        price = round(max(80.0, min(120.0, price + rng.choice([-1, 1]) * rng.uniform(0, 2))), 1)
+        if rng.random() < 0.1:
+            price = round(rng.uniform(85, 115), 1)  # Gap
+        expected = []
+        for workflow_id, alert in list(reference.items()):
+            if monitor._evaluate_condition(alert, price):
+                expected.append(workflow_id)
+                del reference[workflow_id]
+            else:
+                alert.last_price = price
+
+        before = len(triggered)
+        monitor.on_tick("NSE:SBIN", price)
+        assert sorted(triggered[before:]) == expected
+
+    assert sorted(monitor._alerts) == sorted(reference)
+
+
+def test_ticks_away_from_thresholds_evaluate_nothing(monitor, triggered, monkeypatch):
+    for workflow_id in range(5000):
+        monitor.add_alert(
+            workflow_id, "RELIANCE", "NSE", "greater_than", 2000.0 + workflow_id * 0.1, api_key="k"
+        )
+    monitor.on_tick("NSE:RELIANCE", 1500.0)  # First tick places the fresh alerts
+
+    evaluated = []
+    evaluate = monitor._evaluate_condition
+    monkeypatch.setattr(
+        monitor,
+        "_evaluate_condition",
+        lambda alert, price: evaluated.append(1) or evaluate(alert, price),
+    )
+    for i in range(1000):
+        monitor.on_tick("NSE:RELIANCE", 1500.0 + i * 0.1)
+    monitor.on_tick("NSE:OTHER", 5000.0)
+    assert evaluated == []
+
+    monitor.on_tick("NSE:RELIANCE", 2000.25)  # Crosses three thresholds
+    assert len(evaluated) == 3
+    assert sorted(triggered) == [0, 1, 2]
+    assert monitor.get_active_alerts_count() == 4997
+
+
+def test_channels_follow_the_price(monitor, triggered):
+    monitor.add_alert(1, "SBIN", "NSE", "inside_channel", 0, price_lower=100, price_upper=105)
+    monitor.add_alert(2, "SBIN", "NSE", "outside_channel", 0, price_lower=100, price_upper=105)
+    monitor.on_tick("NSE:SBIN", 110.0)
+    assert triggered == [2]
+    monitor.on_tick("NSE:SBIN", 99.0)  # Jumped over the channel
+    assert triggered == [2]
+    monitor.on_tick("NSE:SBIN", 100.0)  # Lower edge is inside
+    assert triggered == [2, 1]
+
+
+def test_alerts_fire_from_market_data_ticks(monitor, monkeypatch):
+    runs = []
+    done = threading.Event()
+
+    def execute_workflow(workflow_id, webhook_data=None, api_key=None, wait=True):
+        runs.append((workflow_id, webhook_data["trigger_price"], api_key))
+        done.set()
+        return {"status": "success"}
+
+    monkeypatch.setattr(flow_executor_service, "execute_workflow", execute_workflow)
+    service = get_market_data_service()
+
+    monitor.add_alert(7, "FLOWTICK", "NSE", "crossing_up", 250.0, api_key="secret")
+    assert monitor.is_running()
+    for ltp in (249.0, 249.5, 251.0):
+        service.process_market_data(tick("FLOWTICK", ltp))
+        assert service.dispatcher.wait_idle()
+
+    assert done.wait(5)
+    assert runs == [(7, 251.0, "secret")]
+    assert monitor.get_active_alerts_count() == 0
+
+    deadline = time.monotonic() + 5
+    while monitor.is_running() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not monitor.is_running()  # Unsubscribed with the last alert
+    assert monitor._subscriber_id is None
+
+
+def test_stale_symbols_fall_back_to_one_quote_each(monitor, triggered, monkeypatch):
+    quotes = []
+
+    class Client:
+        def get_quotes(self, symbol, exchange):
+            quotes.append(symbol)
+            return {"status": "success", "data": {"ltp": 101.0}}
+
+    monkeypatch.setattr(flow_price_monitor_service, "get_flow_client", lambda api_key: Client())
+    for workflow_id in range(10):
+        monitor.add_alert(
+            workflow_id, "SBIN", "NSE", "greater_than", 100.0 + workflow_id, api_key="k"
+        )
+    monitor.add_alert(10, "INFY", "NSE", "less_than", 50.0, api_key="k")
+    monitor.on_tick("NSE:INFY", 60.0)  # Live
+
+    monitor._poll_stale_symbols()
+    assert quotes == ["SBIN"]
+    assert sorted(triggered) == [0]
+    assert monitor.get_status()["polled_quotes"] == 1
+
+
+def test_remove_alert_clears_the_index(monitor, triggered):
+    monitor.add_alert(1, "SBIN", "NSE", "exiting_channel", 0, price_lower=90, price_upper=110)
+    monitor.on_tick("NSE:SBIN", 100.0)
+    assert monitor.remove_alert(1)
+    assert not monitor.remove_alert(1)
+    assert monitor._books == {} and monitor._symbols == set()
+    monitor.on_tick("NSE:SBIN", 200.0)
+    assert triggered == []
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
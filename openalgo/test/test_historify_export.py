@@ -0,0 +1,211 @@
+"""
+Tests for the streaming Historify exports (ZIP entries, partitioned COPY, export jobs)
+"""
+
+import os
+import sys
+import time
+import zipfile
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import database.historify_db as historify_db
+
+# 2024-01-01 09:15 IST
+MARKET_OPEN = 1704080700
+SYMBOLS = [("SBIN", "NSE"), ("M&M", "NSE"), ("CRUDEOIL", "MCX")]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Historify database with 5 days of 1m bars and 30 daily bars per symbol"""
+    monkeypatch.setattr(historify_db, "HISTORIFY_DB_PATH", str(tmp_path / "historify.duckdb"))
+    historify_db.init_database()
+    rng = np.random.default_rng(7)
+    for symbol, exchange in SYMBOLS:
+        ts = np.array([MARKET_OPEN + d * 86400 + m * 60 for d in range(5) for m in range(375)])
+        price = 100 + rng.standard_normal(len(ts)).cumsum() * 0.1
+        bars = pd.DataFrame(
+            {
+                "timestamp": ts,
+                "open": price,
+                "high": price + 0.05,
+                "low": price - 0.05,
+                "close": price + 0.01,
+                "volume": rng.integers(1, 1000, len(ts)),
+                "oi": 0,
+            }
+        )
+        historify_db.upsert_market_data(bars, symbol, exchange, "1m")
+        days = pd.DataFrame(
+            {
+                "timestamp": MARKET_OPEN - 33300 + np.arange(30) * 86400,
+                "open": 100.0,
+                "high": 101.25,
+                "low": 99.5,
+                "close": 100.1,
+                "volume": 5000,
+                "oi": 7,
+            }
+        )
+        historify_db.upsert_market_data(days, symbol, exchange, "D")
+    return tmp_path
+
+
+def read_csv(zf, name):
+    return zf.read(name).decode().splitlines()
+
+
+def test_zip_streams_stored_and_computed_intervals(db, monkeypatch):
+    # Several fetch batches per entry
+    monkeypatch.setattr(historify_db, "EXPORT_FETCH_ROWS", 100)
+    output = str(db / "export.zip")
+
+    success, message, records = historify_db.export_to_zip(
+        output,
+        symbols=[{"symbol": "SBIN", "exchange": "NSE"}],
+        intervals=["1m", "5m", "D", "W"],
+        start_timestamp=MARKET_OPEN + 86400,
+        end_timestamp=MARKET_OPEN + 2 * 86400 - 1,
+    )
+
+    assert success, message
+    with zipfile.ZipFile(output) as zf:
+        assert sorted(zf.namelist()) == [
+            "SBIN_NSE_1m.csv",
+            "SBIN_NSE_5m.csv",
+            "SBIN_NSE_D.csv",
+            "SBIN_NSE_W.csv",
+        ]
+        minutes = read_csv(zf, "SBIN_NSE_1m.csv")
+        five = read_csv(zf, "SBIN_NSE_5m.csv")
+        daily = read_csv(zf, "SBIN_NSE_D.csv")
+        weekly = read_csv(zf, "SBIN_NSE_W.csv")
+
+    assert minutes[0] == historify_db.EXPORT_CSV_HEADER.strip()
+    assert len(minutes) == 375 + 1
+    assert minutes[1].split(",")[0] == "2024-01-02"
+    assert len(five) == 75 + 1
+    assert five[1].startswith("2024-01-02,09:15:00,")
+    assert five[-1].startswith("2024-01-02,15:25:00,")
+    # Integer volume, no trailing ".0"
+    assert "." not in five[1].split(",")[6]
+    assert len(daily) == 2
+    assert daily[1].endswith(",100.0,101.25,99.5,100.1,5000,7")
+    # Daily-aggregated entries are written once
+    assert len(weekly) == 2
+    assert records == 375 + 75 + 1 + 1
+
+
+def test_zip_progress_and_cancel(db):
+    calls = []
+    output = str(db / "all.zip")
+
+    success, _, records = historify_db.export_to_zip(
+        output, intervals=["1m"], progress_callback=lambda *args: calls.append(args)
+    )
+
+    assert success
+    assert records == 3 * 5 * 375
+    assert [(done, total, records) for done, total, _, _, records in calls] == [
+        (1, 3, 1875),
+        (2, 3, 1875),
+        (3, 3, 1875),
+    ]
+    with zipfile.ZipFile(output) as zf:
+        assert "M_M_NSE_1m.csv" in zf.namelist()
+
+    success, message, records = historify_db.export_to_zip(
+        str(db / "cancelled.zip"), intervals=["1m"], progress_callback=lambda done, *_: done < 2
+    )
+
+    assert (success, message, records) == (False, "Export cancelled", 2 * 1875)
+    assert not os.path.exists(db / "cancelled.zip")
+
+
+def test_partitioned_parquet_round_trip(db):
+    output = str(db / "dataset")
+
+    success, message, records = historify_db.export_to_partitioned_files(
+        output,
+        intervals=["1m"],
+        start_timestamp=MARKET_OPEN + 3 * 86400,
+    )
+
+    assert success, message
+    assert records == 3 * 2 * 375
+    rows = duckdb.sql(f"""
+        SELECT exchange, symbol, interval, COUNT(*), MIN(timestamp)
+        FROM read_parquet('{output}/**/*.parquet', hive_partitioning = true)
+        GROUP BY ALL ORDER BY ALL
+    """).fetchall()
+    assert rows == [
+        ("MCX", "CRUDEOIL", "1m", 750, MARKET_OPEN + 3 * 86400),
+        ("NSE", "M&M", "1m", 750, MARKET_OPEN + 3 * 86400),
+        ("NSE", "SBIN", "1m", 750, MARKET_OPEN + 3 * 86400),
+    ]
+
+    success, message, _ = historify_db.export_to_partitioned_files(output, intervals=["5m"])
+    assert not success
+    assert "stored intervals" in message
+
+
+def test_copy_exports(db):
+    sbin = [{"symbol": "SBIN", "exchange": "NSE"}]
+
+    success, _, records = historify_db.export_to_parquet(
+        str(db / "sbin.parquet"), symbols=sbin, interval="D"
+    )
+    assert (success, records) == (True, 30)
+    assert duckdb.sql(f"SELECT COUNT(*) FROM '{db / 'sbin.parquet'}'").fetchone()[0] == 30
+
+    success, _, records = historify_db.export_bulk_csv(str(db / "sbin.csv"), sbin, interval="1m")
+    assert (success, records) == (True, 5 * 375)
+    with open(db / "sbin.csv") as f:
+        assert (
+            f.readline().strip()
+            == "symbol,exchange,interval,date,time,open,high,low,close,volume,oi"
+        )
+
+    success, message, records = historify_db.export_to_txt(
+        str(db / "none.txt"), symbols=sbin, start_timestamp=MARKET_OPEN + 365 * 86400
+    )
+    assert (success, message, records) == (False, "No data matching the criteria", 0)
+    assert not os.path.exists(db / "none.txt")
+
+
+def test_export_job_tracks_progress(db):
+    from services import historify_service
+
+    success, response, _ = historify_service.create_export_job(
+        symbols=None, intervals=["1m", "15m"], end_date="2024-01-03"
+    )
+    assert success, response
+    job_id = response["job_id"]
+
+    for _ in range(100):
+        job = historify_db.get_download_job(job_id)
+        if job["status"] not in ("pending", "running"):
+            break
+        time.sleep(0.05)
+
+    assert job["status"] == "completed"
+    assert job["completed_symbols"] == 3
+    items = historify_db.get_job_items(job_id)
+    # 3 days of 1m bars plus their 15m aggregates
+    assert {item["records_downloaded"] for item in items} == {3 * (375 + 25)}
+
+    success, response, _ = historify_service.get_export_job_file(job_id)
+    assert success
+    with zipfile.ZipFile(response["file_path"]) as zf:
+        assert len(zf.namelist()) == 6
+    os.remove(response["file_path"])
@@ -0,0 +1,150 @@
+"""
+Tests for MarketDataService subscriber dispatch (mailboxes, lanes, conflation)
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pytest
+
+from services.market_data_service import (
+    SubscriberMailbox,
+    SubscriberPriority,
+    get_market_data_service,
+)
+
+
+@pytest.fixture
+def mds():
+    service = get_market_data_service()
+    subscribed = []
+    yield service, subscribed
+    for subscriber_id in subscribed:
+        service.unsubscribe_from_updates(subscriber_id)
+    service.dispatcher.wait_idle()
+
+
+def tick(symbol, ltp, mode=1):
+    return {"symbol": symbol, "exchange": "NSE", "mode": mode, "data": {"ltp": ltp}}
+
+
+def subscriber_metrics(service, subscriber_id):
+    for metrics in service.get_dispatch_metrics()["subscribers"]:
+        if metrics["id"] == subscriber_id:
+            return metrics
+    return None
+
+
+def test_slow_subscriber_does_not_block_the_feed(mds):
+    service, subscribed = mds
+    release = threading.Event()
+    subscribed.append(
+        service.subscribe_with_priority(
+            SubscriberPriority.LOW, "ltp", lambda data: release.wait(5), {"NSE:DSPSLOW"}
+        )
+    )
+
+    start = time.perf_counter()
+    for i in range(50):
+        assert service.process_market_data(tick("DSPSLOW", 100 + i * 0.05))
+    elapsed = time.perf_counter() - start
+    release.set()
+
+    assert elapsed < 1.0
+    assert service.get_ltp_value("DSPSLOW", "NSE") == pytest.approx(102.45)
+    assert service.dispatcher.wait_idle()
+
+
+def test_critical_lane_is_independent_of_display_subscribers(mds):
+    service, subscribed = mds
+    release = threading.Event()
+    critical = []
+    subscribed.append(
+        service.subscribe_with_priority(
+            SubscriberPriority.NORMAL, "ltp", lambda data: release.wait(5), {"NSE:DSPCRIT"}
+        )
+    )
+    subscribed.append(service.subscribe_critical(critical.append, {"NSE:DSPCRIT"}))
+
+    service.process_market_data(tick("DSPCRIT", 500.0))
+    deadline = time.monotonic() + 2
+    while not critical and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+
+    assert critical and critical[0]["data"]["ltp"] == 500.0
+    assert service.dispatcher.wait_idle()
+
+
+def test_stale_ticks_are_conflated_per_symbol(mds):
+    service, subscribed = mds
+    entered = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def callback(data):
+        seen.append((data["symbol"], data["data"]["ltp"]))
+        entered.set()
+        release.wait(5)
+
+    subscriber_id = service.subscribe_with_priority(
+        SubscriberPriority.HIGH, "ltp", callback, {"NSE:DSPCONF", "NSE:DSPCONG"}
+    )
+    subscribed.append(subscriber_id)
+
+    service.process_market_data(tick("DSPCONF", 100.0))
+    assert entered.wait(2)  # subscriber now busy with the first tick
+    for i in range(1, 21):
+        service.process_market_data(tick("DSPCONF", 100.0 + i * 0.1))
+        service.process_market_data(tick("DSPCONG", 200.0 + i * 0.1))
+    assert service.dispatcher.wait_idle(0.2) is False
+    release.set()
+    assert service.dispatcher.wait_idle()
+
+    assert seen == [("DSPCONF", 100.0), ("DSPCONF", 102.0), ("DSPCONG", 202.0)]
+    metrics = subscriber_metrics(service, subscriber_id)
+    assert metrics["delivered"] == 3 and metrics["conflated"] == 38 and metrics["dropped"] == 0
+
+
+def test_full_mailbox_drops_oldest_entry():
+    delivered = []
+    mailbox = SubscriberMailbox(1, "bounded", SubscriberPriority.LOW, "all", None, None, 2)
+    mailbox.callback = delivered.append
+    for symbol in ("A", "B", "C"):
+        mailbox.put((symbol, 1), time.perf_counter_ns(), {"symbol": symbol})
+
+    while (item := mailbox.take()) is not None:
+        mailbox.deliver(*item)
+
+    assert [d["symbol"] for d in delivered] == ["B", "C"]
+    assert mailbox.get_metrics()["dropped"] == 1
+
+
+def test_legacy_subscribers_and_metrics(mds):
+    service, subscribed = mds
+    seen = []
+    subscriber_id = service.subscribe_to_updates("quote", seen.append, {"NSE:DSPLEG"})
+    subscribed.append(subscriber_id)
+
+    service.process_market_data(tick("DSPLEG", 50.0, mode=1))
+    service.process_market_data(tick("DSPLEG", 50.5, mode=2))
+    assert service.dispatcher.wait_idle()
+
+    assert [d["mode"] for d in seen] == [2]
+    metrics = subscriber_metrics(service, subscriber_id)
+    assert metrics["lane"] == "shared" and metrics["delivered"] == 1
+    assert metrics["max_latency_ms"] >= 0
+    assert "dispatch" in service.get_cache_metrics()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
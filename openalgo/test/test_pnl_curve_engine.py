@@ -0,0 +1,232 @@
+"""
+Tests for the incremental PnL curve engine (services/pnl_curve_service.py)
+"""
+
+import os
+import sys
+from datetime import date, datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pandas as pd
+import pytest
+import pytz
+
+from services import pnl_curve_service
+from services.pnl_curve_service import Fill, PnLCurveEngine
+
+IST = pytz.timezone("Asia/Kolkata")
+DAY = date(2025, 12, 17)
+
+
+def at(hour, minute, second=0):
+    return IST.localize(datetime(DAY.year, DAY.month, DAY.day, hour, minute, second))
+
+
+def fill(n, action, quantity, price, when, symbol="SBIN"):
+    return Fill(f"fill{n}", symbol, "NSE", action, quantity, price, when)
+
+
+def bars(closes_by_minute):
+    index = pd.DatetimeIndex([at(m // 60, m % 60) for m in closes_by_minute])
+    return pd.DataFrame({"close": list(closes_by_minute.values())}, index=index)
+
+
+def series(data):
+    """Minute label -> PnL from a snapshot"""
+    return {
+        datetime.fromtimestamp(point["time"] / 1000, IST).strftime("%H:%M"): point["value"]
+        for point in data["pnl_series"]
+    }
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = PnLCurveEngine("tester", store_dir=str(tmp_path))
+    engine.set_trade_date(DAY)
+    return engine
+
+
+def test_long_round_trip(engine):
+    # Bars from 10:00 to 10:30, close rising by 1 a minute from 100
+    engine.update_bars("SBIN", "NSE", bars({600 + i: 100.0 + i for i in range(31)}))
+    engine.sync_fills(
+        [
+            fill(1, "BUY", 10, 100.0, at(10, 0, 30)),  # Marked from the 10:00 close
+            fill(2, "SELL", 10, 110.0, at(10, 10)),
+        ]
+    )
+
+    data = engine.snapshot()
+    pnl = series(data)
+    assert pnl["09:15"] == 0 and pnl["10:00"] == 0
+    assert pnl["10:01"] == 10  # (101 - 100) * 10
+    assert pnl["10:09"] == 90
+    assert pnl["10:10"] == pnl["10:30"] == 100  # Realized
+    assert data["current_mtm"] == 100
+    assert data["max_mtm"] == 100 and data["max_mtm_time"] == "10:10"
+    assert data["max_drawdown"] == 0
+
+
+def test_partial_exit_and_reversal(engine):
+    engine.update_bars("SBIN", "NSE", bars({600: 200.0, 601: 198.0, 602: 190.0, 603: 195.0}))
+    engine.update_bars("INFY", "NSE", bars({600: 50.0, 601: 51.0, 602: 52.0, 603: 53.0}))
+    engine.sync_fills(
+        [
+            fill(1, "SELL", 10, 200.0, at(10, 0)),
+            fill(2, "BUY", 4, 198.0, at(10, 1)),  # Cover 4: realizes 8
+            fill(3, "BUY", 16, 190.0, at(10, 2)),  # Cover 6 (realizes 60), long 10
+            fill(4, "BUY", 2, 50.0, at(10, 1), symbol="INFY"),
+        ]
+    )
+
+    pnl = series(engine.snapshot())
+    assert pnl["10:00"] == 0
+    assert pnl["10:01"] == 20 + 2
+    assert pnl["10:02"] == 68 + 4  # Flat at 190, INFY +4
+    assert pnl["10:03"] == 68 + 10 * 5 + 6
+    assert engine.snapshot()["min_mtm"] == 0
+
+
+def test_fills_are_applied_once_and_replayed_when_rows_change(engine):
+    engine.update_bars("SBIN", "NSE", bars({600: 100.0, 601: 105.0}))
+    fills = [fill(1, "BUY", 10, 100.0, at(10, 0))]
+    assert engine.sync_fills(fills) == 1
+    assert engine.sync_fills(fills) == 0
+    assert engine.snapshot()["current_mtm"] == 50
+
+    # An aggregated order row updated with more quantity replaces the old row
+    assert engine.sync_fills([fill(2, "BUY", 20, 100.0, at(10, 0))]) == 1
+    assert engine.snapshot()["current_mtm"] == 100
+
+
+def test_ticks_become_minute_closes_and_snapshot_is_cached(engine):
+    engine.sync_fills([fill(1, "BUY", 10, 100.0, at(10, 0))])
+    first = engine.snapshot()
+    assert engine.snapshot() is first
+    assert first["current_mtm"] == 0  # Marked at the fill price
+
+    assert engine.on_tick("NSE:SBIN", 101.0, at(10, 5, 10))
+    assert engine.on_tick("NSE:SBIN", 102.5, at(10, 5, 40))
+    assert not engine.on_tick("NSE:OTHER", 1.0, at(10, 5))
+    assert not engine.on_tick("NSE:SBIN", 1.0, IST.localize(datetime(2025, 12, 18, 10, 0)))
+
+    data = engine.snapshot()
+    assert data is not first
+    pnl = series(data)
+    assert pnl["10:04"] == 0
+    assert pnl["10:05"] == data["current_mtm"] == 25
+
+
+def test_market_data_callback_feeds_engines(engine, monkeypatch):
+    today = PnLCurveEngine("feed", store_dir=engine.store_dir)
+    today.set_trade_date(datetime.now(IST).date())
+    today.sync_fills([Fill("f", "SBIN", "NSE", "BUY", 1, 100.0, datetime.now(IST))])
+    monkeypatch.setitem(pnl_curve_service._engines, "feed", today)
+
+    pnl_curve_service._on_market_data(
+        {"symbol": "SBIN", "exchange": "NSE", "mode": 1, "data": {"ltp": 104.0}}
+    )
+    assert today.snapshot()["current_mtm"] == 4
+
+
+def test_curves_persist_across_restarts(engine, tmp_path):
+    engine.update_bars("SBIN", "NSE", bars({600: 100.0, 601: 103.0}))
+    engine.sync_fills([fill(1, "BUY", 10, 100.0, at(10, 0))])
+    assert engine.save(force=True)
+    assert not engine.save(force=True)  # Unchanged
+
+    restored = PnLCurveEngine("tester", store_dir=str(tmp_path))
+    restored.set_trade_date(DAY)
+    assert restored.snapshot() == engine.snapshot()
+    assert restored.sync_fills([fill(1, "BUY", 10, 100.0, at(10, 0))]) == 0
+    assert restored.stale_symbols() == [("SBIN", "NSE", True)]
+
+
+def test_stale_symbols(engine, monkeypatch):
+    engine.sync_fills([fill(1, "BUY", 10, 100.0, at(10, 0))])
+    assert engine.stale_symbols(at(10, 30)) == [("SBIN", "NSE", True)]
+
+    engine.mark_backfilled("SBIN", "NSE", advanced=True)
+    assert engine.stale_symbols(at(10, 30)) == []  # Retry interval not over
+
+    monkeypatch.setattr(pnl_curve_service, "BACKFILL_RETRY_SECONDS", 0)
+    engine.mark_backfilled("SBIN", "NSE", advanced=True)
+    assert engine.stale_symbols(at(10, 30)) == [("SBIN", "NSE", False)]
+
+    engine.on_tick("NSE:SBIN", 101.0, at(10, 29))
+    assert engine.stale_symbols(at(10, 30)) == []  # The feed keeps up
+    # Past days are not topped up once fetched
+    assert engine.stale_symbols(IST.localize(datetime(2025, 12, 18, 10, 0))) == []
+
+
+def test_tradebook_fills_and_backfill(engine, monkeypatch):
+    from blueprints import pnltracker
+
+    trades = [
+        {
+            "symbol": "SBIN",
+            "exchange": "NSE",
+            "action": "BUY",
+            "quantity": 5,
+            "average_price": 100.0,
+            "orderid": "1",
+            "timestamp": "17-Dec-2025 10:00:00",
+        },
+        {
+            "symbol": "SBIN",
+            "exchange": "NSE",
+            "action": "BUY",
+            "quantity": 5,
+            "average_price": 100.0,
+            "orderid": "1",
+            "timestamp": "17-Dec-2025 10:00:00",
+        },
+        {
+            "symbol": "SBIN",
+            "exchange": "NSE",
+            "action": "SELL",
+            "quantity": 0,
+            "trade_value": 1050.0,
+            "average_price": 105.0,
+            "orderid": "2",
+            "timestamp": "17-Dec-2025 10:02:00",
+        },
+        {
+            "symbol": "SBIN",
+            "exchange": "NSE",
+            "action": "BUY",
+            "quantity": 1,
+            "average_price": 1.0,
+            "timestamp": "not a time",
+        },
+    ]
+    fills = pnltracker.tradebook_fills(trades)
+    assert [(f.action, f.quantity) for f in fills] == [("BUY", 5), ("BUY", 5), ("SELL", 10)]
+    assert len({f.fill_id for f in fills}) == 3
+    engine.sync_fills(fills)
+
+    calls = []
+
+    def fake_fetch_bars(symbol, exchange, date_str, api_key, source="api"):
+        calls.append(source)
+        if source == "db":
+            return bars({600: 100.0})  # Historify only has the open
+        return bars({600: 100.0, 601: 104.0, 602: 105.0})
+
+    monkeypatch.setattr(pnltracker, "fetch_bars", fake_fetch_bars)
+    pnltracker.backfill_bars(engine, "key", DAY.strftime("%Y-%m-%d"))
+
+    assert calls == ["db", "api"]
+    pnl = series(engine.snapshot())
+    assert pnl["10:01"] == 40
+    assert pnl["10:02"] == engine.snapshot()["current_mtm"] == 50
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
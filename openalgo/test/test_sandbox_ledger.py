@@ -0,0 +1,178 @@
+"""
+Tests for the sandbox ledger (in-memory funds/positions with write-behind journal)
+
+Each test runs against its own SQLite file and journal, with the background
+flusher effectively disabled so flushes happen only where the test asks.
+"""
+
+import os
+import sys
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pytest
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from database.engine_factory import create_db_engine
+from database.sandbox_db import Base, SandboxFunds, SandboxOrders, SandboxPositions
+from sandbox.ledger import SandboxLedger
+
+USER = "LEDGER_USER"
+
+
+@pytest.fixture
+def env(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path}/sandbox.db")
+    Base.metadata.create_all(bind=engine)
+    session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    session.add(SandboxFunds(user_id=USER, available_balance=Decimal("1000.00")))
+    session.add(
+        SandboxPositions(
+            user_id=USER,
+            symbol="SBIN",
+            exchange="NSE",
+            product="MIS",
+            quantity=10,
+            average_price=Decimal("500.00"),
+        )
+    )
+    session.commit()
+
+    journal = str(tmp_path / "ledger.journal")
+    ledger = SandboxLedger(journal_path=journal, flush_interval=3600, bind=engine)
+    ledger.attach(session)
+    yield ledger, session, engine, journal
+    ledger.close()
+    session.remove()
+
+
+def stored_balance(engine):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(
+            "SELECT available_balance FROM sandbox_funds WHERE user_id = ?", (USER,)
+        ).scalar()
+
+
+def block(ledger, amount):
+    with ledger.lock(USER):
+        funds = ledger.funds(USER)
+        funds.available_balance -= Decimal(amount)
+        funds.used_margin += Decimal(amount)
+        ledger.update_funds(funds, "available_balance", "used_margin")
+
+
+def test_fund_writes_are_written_behind(env):
+    ledger, _, engine, journal = env
+
+    block(ledger, "100.006")
+
+    assert ledger.funds(USER).available_balance == Decimal("899.99")  # column scale
+    assert stored_balance(engine) == 1000
+    assert os.path.getsize(journal) > 0
+
+    assert ledger.flush() == 1
+    assert stored_balance(engine) == 899.99
+    assert os.path.getsize(journal) == 0
+
+
+def test_journal_is_replayed_after_crash(env, tmp_path):
+    ledger, _, engine, journal = env
+
+    block(ledger, "250")
+    position = ledger.position(USER, "SBIN", "NSE", "MIS")
+    position.ltp = Decimal("510.00")
+    position.pnl = Decimal("100.00")
+    ledger.update_position(position, "ltp", "pnl")
+    with open(journal, "a") as f:
+        f.write('{"s": 99, "t": "sandbox_fu')  # torn append
+
+    # Process dies before the flusher runs; a new ledger recovers the journal
+    recovered = SandboxLedger(journal_path=journal, flush_interval=3600, bind=engine)
+    try:
+        assert stored_balance(engine) == 750
+        assert recovered.position(USER, "SBIN", "NSE", "MIS").ltp == Decimal("510.00")
+        assert recovered.funds(USER).used_margin == Decimal("250.00")
+    finally:
+        recovered.close()
+
+
+def test_session_reads_see_pending_writes(env):
+    ledger, session, _, _ = env
+
+    block(ledger, "300")
+
+    funds = session.query(SandboxFunds).filter_by(user_id=USER).first()
+    assert funds.available_balance == Decimal("700.00")
+    assert not ledger._dirty
+
+
+def test_session_commit_invalidates_cached_rows(env):
+    ledger, session, _, _ = env
+
+    assert ledger.position(USER, "SBIN", "NSE", "MIS").quantity == 10
+
+    position = session.query(SandboxPositions).filter_by(user_id=USER).first()
+    position.quantity = 25
+    session.commit()
+    session.query(SandboxFunds).filter_by(user_id=USER).update({"used_margin": Decimal("5")})
+    session.commit()
+
+    assert ledger.position(USER, "SBIN", "NSE", "MIS").quantity == 25
+    assert ledger.funds(USER).used_margin == Decimal("5.00")
+
+
+def test_writes_go_through_a_session_holding_the_write_lock(env):
+    ledger, session, engine, _ = env
+
+    session.add(
+        SandboxOrders(
+            orderid="L1",
+            user_id=USER,
+            symbol="SBIN",
+            exchange="NSE",
+            action="BUY",
+            quantity=1,
+            price_type="MARKET",
+            product="MIS",
+            pending_quantity=1,
+        )
+    )
+    session.flush()  # session now holds the SQLite write lock
+
+    block(ledger, "100")
+    session.query(SandboxFunds).filter_by(user_id=USER).first()
+    session.rollback()
+
+    # Rolled back with the caller's transaction, so the write is pending again
+    assert stored_balance(engine) == 1000
+    assert ledger._dirty
+
+    session.add(
+        SandboxOrders(
+            orderid="L2",
+            user_id=USER,
+            symbol="SBIN",
+            exchange="NSE",
+            action="BUY",
+            quantity=1,
+            price_type="MARKET",
+            product="MIS",
+            pending_quantity=1,
+        )
+    )
+    session.flush()
+    session.query(SandboxFunds).filter_by(user_id=USER).first()
+    session.commit()
+
+    assert stored_balance(engine) == 900
+    assert not ledger._dirty
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
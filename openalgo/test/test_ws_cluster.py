@@ -0,0 +1,141 @@
+"""
+Tests for the multi-process WebSocket proxy (websocket_proxy/cluster.py)
+
+Covers the adapter host's cross-worker subscription bookkeeping and topic
+prefix filtering; the benchmark exercises the processes end to end.
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pytest
+
+from websocket_proxy import cluster
+from websocket_proxy.cluster import AdapterHost, topic_prefixes
+from websocket_proxy.server import parse_topic
+
+
+class FakeAdapter:
+    def __init__(self):
+        self.calls = []
+
+    def subscribe(self, symbol, exchange, mode=2, depth_level=5):
+        self.calls.append(("subscribe", symbol, mode))
+        return {"status": "success", "actual_depth": depth_level}
+
+    def unsubscribe(self, symbol, exchange, mode=2):
+        self.calls.append(("unsubscribe", symbol, mode))
+        return {"status": "success"}
+
+    def unsubscribe_all(self):
+        self.calls.append(("unsubscribe_all",))
+
+    def disconnect(self):
+        self.calls.append(("disconnect",))
+
+
+@pytest.fixture
+def host(monkeypatch):
+    adapters = []
+
+    def connect(broker_name, user_id):
+        adapters.append(FakeAdapter())
+        return adapters[-1], None, None
+
+    monkeypatch.setattr(cluster, "connect_broker_adapter", connect)
+    return AdapterHost("inproc://unused"), adapters
+
+
+def request(host, op, worker, **fields):
+    return host.handle({"op": op, "worker": worker, "user_id": "u1", **fields})
+
+
+def sub(host, op, worker, symbol="SBIN", mode=2):
+    return request(host, op, worker, symbol=symbol, exchange="NSE", mode=mode)
+
+
+def test_upstream_subscription_is_shared_across_workers(host):
+    host, adapters = host
+    for worker in (0, 1):
+        assert request(host, "connect", worker, broker="zerodha")["status"] == "success"
+    assert len(adapters) == 1
+    adapter = adapters[0]
+
+    assert sub(host, "subscribe", 0)["status"] == "success"
+    assert sub(host, "subscribe", 1)["actual_depth"] == 5
+    assert adapter.calls == [("subscribe", "SBIN", 2)]
+
+    sub(host, "unsubscribe", 0)
+    assert adapter.calls == [("subscribe", "SBIN", 2)]
+    sub(host, "unsubscribe", 1)
+    assert adapter.calls[-1] == ("unsubscribe", "SBIN", 2)
+    assert host.get_stats()["upstream_subscriptions"] == 0
+
+
+def test_release_drops_a_workers_subscriptions_and_last_release_disconnects(host):
+    host, adapters = host
+    for worker in (0, 1):
+        request(host, "connect", worker, broker="zerodha")
+    adapter = adapters[0]
+    sub(host, "subscribe", 0, "SBIN")
+    sub(host, "subscribe", 0, "INFY")
+    sub(host, "subscribe", 1, "INFY")
+
+    request(host, "release", 0)
+    assert ("unsubscribe", "SBIN", 2) in adapter.calls
+    assert ("unsubscribe", "INFY", 2) not in adapter.calls
+    assert ("disconnect",) not in adapter.calls
+
+    request(host, "release", 1)
+    assert adapter.calls[-2:] == [("unsubscribe", "INFY", 2), ("disconnect",)]
+    assert host.get_stats()["adapters"] == 0
+
+
+def test_batch_moves_a_worker_between_modes(host):
+    host, adapters = host
+    request(host, "connect", 0, broker="zerodha")
+    request(host, "connect", 1, broker="zerodha")
+    sub(host, "subscribe", 1, mode=2)
+
+    reply = request(
+        host,
+        "batch",
+        0,
+        changes=[["SBIN", "NSE", None, 2, 5], ["INFY", "NSE", None, 3, 20]],
+    )
+    assert [r["status"] for r in reply["results"]] == ["success", "success"]
+    request(host, "batch", 0, changes=[["SBIN", "NSE", 2, 3, 5]])
+
+    assert adapters[0].calls == [
+        ("subscribe", "SBIN", 2),
+        ("subscribe", "INFY", 3),
+        ("subscribe", "SBIN", 3),
+    ]
+
+
+def test_keep_alive_brokers_unsubscribe_instead_of_disconnecting(host):
+    host, adapters = host
+    request(host, "connect", 0, broker="shoonya")
+    request(host, "release", 0)
+    assert adapters[0].calls == [("unsubscribe_all",)]
+    assert host.get_stats()["adapters"] == 1
+
+
+def test_topic_prefixes_match_published_topics():
+    prefixes = topic_prefixes("zerodha", "NIFTY", "NSE_INDEX", 1)
+    for topic in ("NSE_INDEX_NIFTY_LTP", "zerodha_NSE_INDEX_NIFTY_LTP"):
+        assert any(topic.encode().startswith(p) for p in prefixes)
+    assert parse_topic("NSE_INDEX_NIFTY_LTP")[1:] == ("NSE_INDEX", "NIFTY", "LTP")
+    assert not any(b"NSE_INDEX_NIFTY_QUOTE".startswith(p) for p in prefixes)
+    assert topic_prefixes("zerodha", "SBIN", "NSE", "Bogus") == []
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
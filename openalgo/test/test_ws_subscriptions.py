@@ -0,0 +1,218 @@
+"""
+Tests for shared, batched upstream subscriptions in the WebSocket proxy
+(websocket_proxy/subscription_manager.py)
+"""
+
+import asyncio as aio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pytest
+import zmq
+
+import websocket_proxy  # noqa: F401  (import first to resolve the adapter import cycle)
+from websocket_proxy.server import WebSocketProxy
+from websocket_proxy.subscription_manager import derive_mode_data, normalize_mode
+
+USER = "u1"
+
+
+class FakeAdapter:
+    def __init__(self, fail=()):
+        self.calls = []
+        self.threads = set()
+        self.fail = set(fail)
+
+    def subscribe(self, symbol, exchange, mode=2, depth_level=5):
+        self.threads.add(threading.get_ident())
+        self.calls.append(("subscribe", symbol, mode))
+        if symbol in self.fail:
+            return {"status": "error", "message": "Token not found"}
+        return {"status": "success", "actual_depth": depth_level}
+
+    def unsubscribe(self, symbol, exchange, mode=2):
+        self.calls.append(("unsubscribe", symbol, mode))
+        return {"status": "success"}
+
+    def disconnect(self):
+        self.calls.append(("disconnect",))
+
+
+class StandInClient:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, message):
+        self.messages.append(json.loads(message))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def proxy(monkeypatch):
+    monkeypatch.setenv("ZMQ_PORT", str(free_port()))
+    proxy = WebSocketProxy(port=free_port(), check_port=False)
+    proxy.feed_market_data_service = False
+    proxy.broker_adapters[USER] = FakeAdapter()
+    proxy.user_broker_mapping[USER] = "zerodha"
+    yield proxy
+    proxy.subscription_manager.close()
+    proxy.socket.close(linger=0)
+
+
+def connect(proxy, client_id):
+    proxy.clients[client_id] = StandInClient()
+    proxy.subscriptions[client_id] = set()
+    proxy.user_mapping[client_id] = USER
+    return proxy.clients[client_id]
+
+
+def symbols(*names):
+    return [{"symbol": name, "exchange": "NSE"} for name in names]
+
+
+async def settle(proxy):
+    while proxy.subscription_manager._flushers:
+        await aio.sleep(0.001)
+
+
+def test_chain_subscribe_is_one_batch_off_the_loop(proxy):
+    async def run():
+        client = connect(proxy, 1)
+        chain = [f"NIFTY{strike}CE" for strike in range(200)]
+        await proxy.subscribe_client(1, {"action": "subscribe", "symbols": symbols(*chain)})
+        return client
+
+    client = aio.run(run())
+    adapter = proxy.broker_adapters[USER]
+
+    assert len(adapter.calls) == 200
+    assert threading.get_ident() not in adapter.threads
+    assert proxy.subscription_manager.get_metrics()["batches"] == 1
+    assert client.messages[-1]["status"] == "success"
+    assert len(client.messages[-1]["subscriptions"]) == 200
+
+
+def test_duplicate_subscriptions_share_one_upstream(proxy):
+    async def run():
+        for client_id in (1, 2, 3):
+            connect(proxy, client_id)
+            await proxy.subscribe_client(client_id, {"symbols": symbols("SBIN"), "mode": "Quote"})
+        await proxy.cleanup_client(1)
+        await proxy.unsubscribe_client(2, {"symbol": "SBIN", "exchange": "NSE", "mode": 2})
+        await settle(proxy)
+        calls_before_last = list(proxy.broker_adapters[USER].calls)
+        await proxy.unsubscribe_client(3, {"action": "unsubscribe_all"})
+        await settle(proxy)
+        return calls_before_last
+
+    calls_before_last = aio.run(run())
+
+    assert calls_before_last == [("subscribe", "SBIN", 2)]
+    assert proxy.broker_adapters[USER].calls[-1] == ("unsubscribe", "SBIN", 2)
+    assert proxy.subscription_index == {}
+    assert proxy.subscription_manager.book.upstream == {}
+
+
+def test_highest_mode_serves_lower_modes(proxy):
+    async def run():
+        for client_id in (1, 2):
+            connect(proxy, client_id)
+        await proxy.subscribe_client(1, {"symbols": symbols("SBIN"), "mode": "LTP"})
+        await proxy.subscribe_client(2, {"symbols": symbols("SBIN"), "mode": "Depth"})
+        upgraded = proxy.subscription_manager.upstream_mode(USER, "SBIN", "NSE")
+        await proxy.cleanup_client(2)
+        await settle(proxy)
+        return upgraded
+
+    upgraded = aio.run(run())
+
+    assert upgraded == 3
+    assert proxy.subscription_manager.upstream_mode(USER, "SBIN", "NSE") == 1
+    assert proxy.broker_adapters[USER].calls == [
+        ("subscribe", "SBIN", 1),
+        ("unsubscribe", "SBIN", 1),
+        ("subscribe", "SBIN", 3),
+        ("unsubscribe", "SBIN", 3),
+        ("subscribe", "SBIN", 1),
+    ]
+
+
+def test_failed_subscription_releases_its_reference(proxy):
+    proxy.broker_adapters[USER] = FakeAdapter(fail={"BAD"})
+
+    async def run():
+        client = connect(proxy, 1)
+        await proxy.subscribe_client(1, {"symbols": symbols("SBIN", "BAD")})
+        return client
+
+    client = aio.run(run())
+
+    response = client.messages[-1]
+    assert response["status"] == "partial"
+    assert [s["status"] for s in response["subscriptions"]] == ["success", "error"]
+    assert proxy.subscriptions[1] == {("SBIN", "NSE", 2, 5)}
+    assert (USER, "BAD", "NSE") not in proxy.subscription_manager.book.refs
+
+
+def test_depth_ticks_are_cut_down_for_lower_mode_clients(proxy):
+    publisher = zmq.Context.instance().socket(zmq.PUB)
+    publisher.bind(f"tcp://127.0.0.1:{os.environ['ZMQ_PORT']}")
+    depth_tick = {"ltp": 101.5, "open": 100.0, "depth": {"buy": [], "sell": []}}
+
+    async def run():
+        clients = {mode: connect(proxy, mode) for mode in (1, 2, 3)}
+        for mode, client_mode in ((1, "LTP"), (2, "Quote"), (3, "Depth")):
+            await proxy.subscribe_client(mode, {"symbols": symbols("SBIN"), "mode": client_mode})
+        proxy.running = True
+        listener = aio.create_task(proxy.zmq_listener())
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and not clients[1].messages[1:]:
+            publisher.send_multipart([b"NSE_SBIN_DEPTH", json.dumps(depth_tick).encode()])
+            # Superseded topics are ignored while the user streams at depth
+            publisher.send_multipart([b"NSE_SBIN_QUOTE", json.dumps({"ltp": 1}).encode()])
+            await aio.sleep(0.1)
+        proxy.running = False
+        await listener
+        return clients
+
+    try:
+        clients = aio.run(run())
+    finally:
+        publisher.close(linger=0)
+
+    ticks = {
+        mode: [m for m in c.messages if m.get("type") == "market_data"]
+        for mode, c in clients.items()
+    }
+    assert ticks[1] and ticks[1][0]["mode"] == 1 and ticks[1][0]["data"] == {"ltp": 101.5}
+    assert all(t["data"]["ltp"] == 101.5 for t in ticks[2])
+    assert ticks[2] and "depth" not in ticks[2][0]["data"]
+    assert ticks[3] and ticks[3][0]["data"] == depth_tick
+
+
+def test_mode_helpers():
+    modes = ("LTP", "quote", "Depth", 3, "Full", 7)
+    assert [normalize_mode(m) for m in modes] == [1, 2, 3, 3, None, None]
+    tick = {"symbol": "SBIN", "ltp": 1.0, "volume": 10, "open": 2.0, "depth": {}}
+    assert derive_mode_data(tick, 1) == {"symbol": "SBIN", "ltp": 1.0, "volume": 10}
+    assert "depth" not in derive_mode_data(tick, 2) and derive_mode_data(tick, 2)["open"] == 2.0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,145 @@
+"""
+Tests for the batch Zerodha binary frame decoder
+
+Frames are built with struct.pack following the Kite binary layout and the
+decoded arrays / legacy tick dicts are checked field by field.
+"""
+
+import os
+import struct
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import websocket_proxy  # noqa: F401  (import first to resolve the adapter import cycle)
+from broker.zerodha.streaming.zerodha_decoder import (
+    MODE_FULL,
+    MODE_LTP,
+    MODE_QUOTE,
+    decode_frame,
+    to_tick_dicts,
+)
+
+
+def ltp_packet(token, ltp):
+    return struct.pack(">Ii", token, ltp)
+
+
+def quote_packet(token, base=1000):
+    return struct.pack(">I10i", token, *range(base, base + 10))
+
+
+def full_packet(token, base=1000, empty_depth=False):
+    packet = struct.pack(">I15i", token, *range(base, base + 15))
+    for level in range(10):
+        price = 0 if empty_depth else 50000 + level
+        packet += struct.pack(">iih2x", 10 + level, price, level)
+    return packet
+
+
+def index_packet(token, with_timestamp=False):
+    # ltp, high, low, open, close, change
+    packet = struct.pack(">I6i", token, 2210000, 2220000, 2190000, 2195000, 2200000, 1000)
+    if with_timestamp:
+        packet += struct.pack(">i", 1700000000)
+    return packet
+
+
+def frame(*packets):
+    body = b"".join(struct.pack(">H", len(p)) + p for p in packets)
+    return struct.pack(">H", len(packets)) + body
+
+
+def test_ltp_frame_uniform_fast_path():
+    ticks = decode_frame(frame(ltp_packet(1, 12345), ltp_packet(2, 100)), timestamp_ms=42)
+
+    assert len(ticks) == 2
+    assert ticks["token"].tolist() == [1, 2]
+    assert ticks["ltp"].tolist() == [123.45, 1.0]
+    assert (ticks["mode"] == MODE_LTP).all()
+    assert (ticks["timestamp"] == 42).all()
+
+
+def test_quote_packet_fields():
+    tick = to_tick_dicts(decode_frame(frame(quote_packet(738561))))[0]
+
+    assert tick["instrument_token"] == 738561
+    assert tick["mode"] == "quote"
+    assert tick["last_price"] == 10.0
+    assert tick["last_traded_quantity"] == 1001
+    assert tick["average_price"] == 10.02
+    assert tick["volume"] == 1003
+    assert tick["total_buy_quantity"] == 1004
+    assert tick["total_sell_quantity"] == 1005
+    assert tick["ohlc"] == {"open": 10.06, "high": 10.07, "low": 10.08, "close": 10.09}
+    assert "depth" not in tick
+    assert "oi" not in tick
+
+
+def test_full_packet_depth_and_extended_fields():
+    ticks = decode_frame(frame(full_packet(5)))
+    tick = to_tick_dicts(ticks)[0]
+
+    assert ticks["mode"][0] == MODE_FULL
+    assert tick["last_traded_timestamp"] == 1010
+    assert tick["oi"] == 1011
+    assert tick["exchange_timestamp"] == 1014
+    assert len(tick["depth"]["buy"]) == 5
+    assert len(tick["depth"]["sell"]) == 5
+    assert tick["depth"]["buy"][0] == {"price": 500.0, "quantity": 10, "orders": 0}
+    assert tick["depth"]["sell"][4] == {"price": 500.09, "quantity": 19, "orders": 9}
+
+
+def test_empty_depth_is_omitted():
+    ticks = decode_frame(frame(full_packet(5, empty_depth=True)))
+
+    assert not ticks["has_depth"][0]
+    assert "depth" not in to_tick_dicts(ticks)[0]
+
+
+def test_index_packets():
+    ticks = decode_frame(frame(index_packet(256265), index_packet(260105, with_timestamp=True)))
+
+    assert ticks["is_index"].all()
+    assert ticks["mode"].tolist() == [MODE_QUOTE, MODE_FULL]
+    assert ticks["ltp"][0] == 22100.0
+    assert ticks["open"][0] == 21950.0
+    assert ticks["close"][0] == 22000.0
+    assert round(float(ticks["change"][0]), 4) == round(100 * 100 / 22000, 4)
+    assert ticks["exchange_ts"].tolist() == [0, 1700000000]
+
+
+def test_mixed_frame_preserves_order():
+    ticks = decode_frame(
+        frame(ltp_packet(1, 100), full_packet(2), quote_packet(3), ltp_packet(4, 200))
+    )
+
+    assert ticks["token"].tolist() == [1, 2, 3, 4]
+    assert ticks["mode"].tolist() == [MODE_LTP, MODE_FULL, MODE_QUOTE, MODE_LTP]
+    assert ticks["ltp"].tolist()[3] == 2.0
+
+
+def test_truncated_and_tiny_frames():
+    data = frame(quote_packet(1), quote_packet(2))
+
+    assert len(decode_frame(data[:-10])) == 1
+    assert len(decode_frame(b"\x00")) == 0
+    assert len(decode_frame(struct.pack(">H", 0) + b"\x00\x00")) == 0
+
+
+def test_source_exchange_mapping():
+    ticks = decode_frame(frame(ltp_packet(7, 100)))
+
+    assert to_tick_dicts(ticks, {7: "NFO"})[0]["source_exchange"] == "NFO"
+    assert "source_exchange" not in to_tick_dicts(ticks)[0]
+
+
+if __name__ == "__main__":
+    import pytest
+
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -48,6 +48,7 @@ MIGRATIONS = [
     ("migrate_sandbox_pnl.py", "Sandbox Day-wise PnL Tracking"),
     # Performance migrations
     ("migrate_indexes.py", "Database Performance Indexes"),
+    ("migrate_api_key_fingerprint.py", "Indexed API Key Verification"),
     # Feature migrations
     ("migrate_historify.py", "Historify DuckDB Setup"),
     ("migrate_historify_scheduler.py", "Historify Scheduler Tables"),
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Migration script for indexed API key verification.
+
+This script:
+1. Adds 'api_key_fingerprint' and 'api_key_verified_at' columns to api_keys table
+2. Creates a unique index on api_key_fingerprint
+3. Backfills fingerprints for existing keys from their encrypted copy
+
+Without fingerprints, verify_api_key falls back to checking every stored
+Argon2 hash, so run this once after upgrading.
+
+Usage:
+    python migrate_api_key_fingerprint.py
+"""
+
+import os
+import sys
+
+from sqlalchemy import create_engine, inspect, text
+
+# Set UTF-8 encoding for output to handle Unicode characters on Windows
+if sys.platform == "win32":
+    import io
+
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", errors="replace")
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8", errors="replace")
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+NEW_COLUMNS = [
+    ("api_key_fingerprint", "VARCHAR(64)"),
+    ("api_key_verified_at", "DATETIME"),
+]
+
+
+def get_database_url():
+    """Get database URL from environment"""
+    from dotenv import load_dotenv
+
+    # Get the project root directory (parent of upgrade folder)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    # Load .env from project root
+    load_dotenv(os.path.join(project_root, ".env"))
+
+    database_url = os.getenv("DATABASE_URL")
+
+    # Convert relative SQLite paths to absolute paths
+    if database_url and database_url.startswith("sqlite:///"):
+        relative_path = database_url.replace("sqlite:///", "", 1)
+        if not os.path.isabs(relative_path):
+            absolute_path = os.path.join(project_root, relative_path)
+            database_url = f"sqlite:///{absolute_path}"
+
+    return database_url
+
+
+def check_column_exists(engine, table_name, column_name):
+    """Check if a column exists in a table"""
+    inspector = inspect(engine)
+    columns = [col["name"] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def add_columns(engine):
+    """Add fingerprint columns and index to api_keys table"""
+    try:
+        if "api_keys" not in inspect(engine).get_table_names():
+            logger.info("✓ api_keys table not created yet, nothing to migrate")
+            return True
+
+        with engine.connect() as conn:
+            for column_name, column_type in NEW_COLUMNS:
+                if check_column_exists(engine, "api_keys", column_name):
+                    logger.info(f"✓ {column_name} column already exists in api_keys table")
+                    continue
+                logger.info(f"Adding {column_name} column to api_keys table...")
+                conn.execute(text(f"ALTER TABLE api_keys ADD COLUMN {column_name} {column_type}"))
+
+            conn.execute(
+                text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS ix_api_keys_api_key_fingerprint
+                ON api_keys(api_key_fingerprint)
+            """)
+            )
+            conn.commit()
+
+        logger.info("✓ api_keys fingerprint columns ready")
+        return True
+
+    except Exception as e:
+        logger.error(f"✗ Error adding fingerprint columns: {e}")
+        return False
+
+
+def backfill_fingerprints(engine):
+    """Compute fingerprints for keys stored before this migration"""
+    try:
+        if "api_keys" not in inspect(engine).get_table_names():
+            return True
+
+        # auth_db derives the decryption key and fingerprint from API_KEY_PEPPER
+        from database.auth_db import api_key_fingerprint, decrypt_token
+
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text("""
+                SELECT id, user_id, api_key_encrypted FROM api_keys
+                WHERE api_key_fingerprint IS NULL
+            """)
+            ).fetchall()
+
+            updated = 0
+            for row_id, user_id, encrypted in rows:
+                api_key = decrypt_token(encrypted)
+                if not api_key:
+                    logger.warning(f"⚠ Could not decrypt API key for {user_id}, left as is")
+                    continue
+                conn.execute(
+                    text("UPDATE api_keys SET api_key_fingerprint = :fp WHERE id = :id"),
+                    {"fp": api_key_fingerprint(api_key), "id": row_id},
+                )
+                updated += 1
+            conn.commit()
+
+        logger.info(f"✓ Backfilled fingerprints for {updated} of {len(rows)} API keys")
+        return True
+
+    except Exception as e:
+        logger.error(f"✗ Error backfilling fingerprints: {e}")
+        return False
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("API Key Fingerprint Migration")
+    print("=" * 60)
+    print()
+
+    database_url = get_database_url()
+    if not database_url:
+        logger.error("DATABASE_URL not found in environment")
+        return False
+
+    os.environ["DATABASE_URL"] = database_url
+    logger.info(f"Database URL: {database_url}")
+
+    try:
+        engine = create_engine(database_url)
+        logger.info("✓ Database connection established")
+    except Exception as e:
+        logger.error(f"✗ Failed to connect to database: {e}")
+        return False
+
+    success = add_columns(engine) and backfill_fingerprints(engine)
+
+    print()
+    print("=" * 60)
+    if success:
+        print("✓ Migration completed successfully!")
+    else:
+        print("✗ Migration completed with errors")
+        print("Please check the logs above for details")
+    print("=" * 60)
+    print()
+
+    return success
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,107 @@
+"""
+Request coalescing for broker book endpoints (orderbook, tradebook, positionbook, funds)
+
+Strategies, the dashboard and the MCP server poll the same books for the same
+user many times a second. Each (user, broker, endpoint) key gets at most one
+broker call in flight; concurrent callers wait on it and share the result, and
+a successful result is served from memory for BROKER_BOOK_CACHE_TTL_MS
+(default 500 ms, 0 disables caching but keeps coalescing).
+
+Order placement, modification and cancellation call invalidate_books() so the
+next read after an order goes back to the broker.
+"""
+
+import copy
+import os
+import threading
+from concurrent.futures import Future
+
+from cachetools import TTLCache
+
+BOOK_CACHE_TTL_MS = float(os.getenv("BROKER_BOOK_CACHE_TTL_MS", "500"))
+BOOK_ENDPOINTS = ("orderbook", "tradebook", "positionbook", "funds")
+
+_lock = threading.Lock()
+_cache = TTLCache(maxsize=4096, ttl=max(BOOK_CACHE_TTL_MS, 1) / 1000.0)
+_inflight = {}
+_metrics = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0, "errors": 0}
+
+
+def fetch_book(auth_token, broker, endpoint, fetch):
+    """
+    Return fetch() for (auth_token, broker, endpoint), sharing concurrent calls.
+
+    fetch returns the service's (success, response, status_code) tuple; only
+    successful results are cached. Every caller gets its own copy.
+    """
+    key = (auth_token, broker, endpoint)
+    with _lock:
+        if BOOK_CACHE_TTL_MS > 0:
+            cached = _cache.get(key)
+            if cached is not None:
+                _metrics["hits"] += 1
+                return copy.deepcopy(cached)
+        future = _inflight.get(key)
+        if future is not None:
+            _metrics["coalesced"] += 1
+            leader = False
+        else:
+            future = Future()
+            _inflight[key] = future
+            _metrics["misses"] += 1
+            leader = True
+
+    if not leader:
+        return copy.deepcopy(future.result())
+
+    try:
+        result = fetch()
+    except BaseException as e:
+        with _lock:
+            if _inflight.get(key) is future:
+                del _inflight[key]
+            _metrics["errors"] += 1
+        future.set_exception(e)
+        raise
+
+    with _lock:
+        # An invalidation while the call was in flight drops the slot; the result
+        # still goes to the callers that were waiting but is not cached.
+        if _inflight.get(key) is future:
+            del _inflight[key]
+            if BOOK_CACHE_TTL_MS > 0 and result and result[0]:
+                _cache[key] = copy.deepcopy(result)
+    future.set_result(result)
+    return result
+
+
+def invalidate_books(auth_token, broker):
+    """Drop cached and in-flight book results for a user after an order change"""
+    with _lock:
+        for endpoint in BOOK_ENDPOINTS:
+            key = (auth_token, broker, endpoint)
+            _cache.pop(key, None)
+            _inflight.pop(key, None)
+        _metrics["invalidations"] += 1
+
+
+def get_book_cache_metrics():
+    """Counters since startup plus the derived hit rate"""
+    with _lock:
+        metrics = dict(_metrics)
+        metrics["cached"] = len(_cache)
+        metrics["inflight"] = len(_inflight)
+    requests = metrics["hits"] + metrics["misses"] + metrics["coalesced"]
+    saved = metrics["hits"] + metrics["coalesced"]
+    metrics["hit_rate"] = round(100.0 * saved / requests, 2) if requests else 0.0
+    metrics["ttl_ms"] = BOOK_CACHE_TTL_MS
+    return metrics
+
+
+def reset_book_cache():
+    """Clear cached results and counters (tests)"""
+    with _lock:
+        _cache.clear()
+        _inflight.clear()
+        for name in _metrics:
+            _metrics[name] = 0
@@ -9,6 +9,8 @@ import zmq
 
 from utils.logging import get_logger
 
+from .feed_recorder import get_feed_recorder
+
 # Initialize logger
 logger = get_logger(__name__)
 
@@ -106,6 +108,9 @@ class BaseBrokerWebSocketAdapter(ABC):
     _shared_context = None
     _context_lock = threading.Lock()
 
+    # Feed recorder (set when FEED_RECORD_DIR is configured)
+    _feed_recorder = None
+
     def __init__(self, use_shared_zmq: bool = False, shared_publisher=None):
         """
         Initialize the base broker adapter.
@@ -157,6 +162,7 @@ class BaseBrokerWebSocketAdapter(ABC):
             # Initialize instance variables
             self.subscriptions = {}
             self.connected = False
+            self._feed_recorder = get_feed_recorder()
 
         except Exception as e:
             self.logger.exception(f"Error in BaseBrokerWebSocketAdapter init: {e}")
@@ -326,9 +332,10 @@ class BaseBrokerWebSocketAdapter(ABC):
                 self._shared_publisher.publish(topic, data)
             elif self.socket:
                 # Use own socket
-                self.socket.send_multipart(
-                    [topic.encode("utf-8"), json.dumps(data).encode("utf-8")]
-                )
+                payload = json.dumps(data).encode("utf-8")
+                self.socket.send_multipart([topic.encode("utf-8"), payload])
+                if self._feed_recorder:
+                    self._feed_recorder.record_zmq(topic, payload)
             else:
                 self.logger.warning("No ZMQ socket available for publishing")
         except Exception as e:
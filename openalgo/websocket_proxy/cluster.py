@@ -0,0 +1,565 @@
+"""
+Multi-process deployment of the WebSocket proxy
+
+One adapter host process owns every broker adapter and the ZeroMQ publisher
+they stream into. N proxy worker processes share the WebSocket port through
+SO_REUSEPORT, so the kernel spreads client connections across them:
+
+    broker feeds -> adapter host (adapters, ZMQ PUB :ZMQ_PORT)
+                        ^  control (ZMQ REQ/ROUTER :WEBSOCKET_CONTROL_PORT)
+                        |  connect / batch (subscribe, unsubscribe) / release
+    clients <-> worker 0..N-1 (WebSocketProxy, ZMQ SUB with topic prefix filters)
+
+Workers forward adapter calls to the host, which reference counts upstream
+subscriptions across workers so a symbol is subscribed at the broker once no
+matter how many workers' clients want it. Each worker subscribes its SUB
+socket only to the topic prefixes its own clients need, so ZeroMQ drops
+everything else at the publisher instead of every worker decoding every tick.
+
+Workers do not feed the MarketDataService: it lives in the Flask process, which
+(as with the standalone ``websocket_proxy.server``) reads ticks over the
+WebSocket API.
+
+SO_REUSEPORT is not available on Windows; there the cluster runs one worker.
+
+Usage:
+    python -m websocket_proxy.cluster
+    python -m websocket_proxy.cluster --workers 4
+"""
+
+import argparse
+import asyncio as aio
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import socket
+import sys
+import threading
+from collections import defaultdict
+from collections.abc import Callable
+
+import zmq
+from dotenv import load_dotenv
+
+from utils.logging import get_logger
+
+from .base_adapter import ENABLE_CONNECTION_POOLING
+from .broker_factory import cleanup_all_pools
+from .connection_manager import SharedZmqPublisher
+from .port_check import is_port_in_use
+from .server import WebSocketProxy, connect_broker_adapter
+
+logger = get_logger("websocket_proxy")
+
+CONTROL_PORT = int(os.getenv("WEBSOCKET_CONTROL_PORT", "5554"))
+CONTROL_TIMEOUT_MS = int(os.getenv("WEBSOCKET_CONTROL_TIMEOUT_MS", "15000"))
+CACHE_INVALIDATION_PREFIX = "CACHE_INVALIDATE"
+MODE_NAMES = {1: "LTP", 2: "QUOTE", 3: "DEPTH"}
+
+# Brokers whose adapters stay connected when their last client leaves (see
+# WebSocketProxy.cleanup_client)
+KEEP_ALIVE_BROKERS = ("flattrade", "shoonya")
+
+
+def topic_prefixes(broker_name: str, symbol: str, exchange: str, mode) -> list[bytes]:
+    """ZeroMQ topic prefixes an adapter may publish a subscription's ticks under"""
+    mode_name = MODE_NAMES.get(mode)
+    if mode_name is None:
+        return []
+    topic = f"{exchange}_{symbol}_{mode_name}"
+    return [topic.encode(), f"{broker_name}_{topic}".encode()]
+
+
+class AdapterHost:
+    """
+    Owns the broker adapters for all workers and serves their control requests.
+
+    Requests are handled one at a time on a ZeroMQ ROUTER socket, so adapter
+    state needs no locking.
+    """
+
+    def __init__(self, control_endpoint: str, zmq_port: int | None = None):
+        self.control_endpoint = control_endpoint
+        self.zmq_port = zmq_port
+        self.adapters = {}  # user_id -> broker adapter
+        self.user_brokers = {}  # user_id -> broker_name
+        self.user_workers = defaultdict(set)  # user_id -> worker ids with clients
+        # (user_id, symbol, exchange, mode) -> worker ids subscribed
+        self.topic_workers: dict[tuple, set[int]] = {}
+        self.topic_responses: dict[tuple, dict] = {}
+        self.running = False
+
+    def serve(self):
+        """Bind the publisher and control socket and handle requests until stopped"""
+        if ENABLE_CONNECTION_POOLING:
+            bound_port = SharedZmqPublisher().bind(self.zmq_port)
+            if self.zmq_port and bound_port != self.zmq_port:
+                logger.error(
+                    f"ZMQ publisher bound to {bound_port} instead of {self.zmq_port}; "
+                    f"workers will not receive market data"
+                )
+
+        context = zmq.Context()
+        control = context.socket(zmq.ROUTER)
+        control.setsockopt(zmq.LINGER, 0)
+        control.bind(self.control_endpoint)
+        logger.info(f"Adapter host serving control requests on {self.control_endpoint}")
+
+        self.running = True
+        try:
+            while self.running:
+                if not control.poll(500):
+                    continue
+                frames = control.recv_multipart()
+                # Echo the routing envelope (identity, request id, delimiter) back
+                envelope, payload = frames[:-1], frames[-1]
+                try:
+                    reply = self.handle(json.loads(payload))
+                except Exception as e:
+                    logger.exception(f"Error handling control request: {e}")
+                    reply = {"status": "error", "code": "ADAPTER_HOST_ERROR", "message": str(e)}
+                control.send_multipart(envelope + [json.dumps(reply).encode()])
+        finally:
+            self.shutdown()
+            control.close()
+            context.term()
+
+    def stop(self, *args):
+        self.running = False
+
+    def shutdown(self):
+        """Disconnect every adapter"""
+        for user_id, adapter in list(self.adapters.items()):
+            try:
+                adapter.disconnect()
+            except Exception as e:
+                logger.exception(f"Error disconnecting adapter for user {user_id}: {e}")
+        self.adapters.clear()
+        cleanup_all_pools()
+
+    def handle(self, request: dict) -> dict:
+        """Dispatch one control request"""
+        op = request.get("op")
+        worker = request.get("worker")
+        user_id = request.get("user_id")
+
+        if op == "connect":
+            return self._connect(worker, user_id, request["broker"])
+        if op == "subscribe":
+            return self._subscribe(
+                worker,
+                user_id,
+                request["symbol"],
+                request["exchange"],
+                request["mode"],
+                request.get("depth", 5),
+            )
+        if op == "unsubscribe":
+            return self._unsubscribe(
+                worker, user_id, request["symbol"], request["exchange"], request["mode"]
+            )
+        if op == "batch":
+            return self._batch(worker, user_id, request["changes"])
+        if op == "release":
+            return self._release(worker, user_id)
+        if op == "stats":
+            return {"status": "success", "data": self.get_stats()}
+        return {
+            "status": "error",
+            "code": "INVALID_OPERATION",
+            "message": f"Unknown operation: {op}",
+        }
+
+    def _connect(self, worker, user_id, broker_name) -> dict:
+        if user_id not in self.adapters:
+            adapter, error_code, error_msg = connect_broker_adapter(broker_name, user_id)
+            if adapter is None:
+                return {"status": "error", "code": error_code, "message": error_msg}
+            self.adapters[user_id] = adapter
+            self.user_brokers[user_id] = broker_name
+        self.user_workers[user_id].add(worker)
+        return {"status": "success"}
+
+    def _subscribe(self, worker, user_id, symbol, exchange, mode, depth_level) -> dict:
+        adapter = self.adapters.get(user_id)
+        if adapter is None:
+            return {
+                "status": "error",
+                "code": "BROKER_ERROR",
+                "message": "Broker adapter not found",
+            }
+
+        key = (user_id, symbol, exchange, mode)
+        workers = self.topic_workers.get(key)
+        if workers:
+            # Already streaming for another worker
+            workers.add(worker)
+            return self.topic_responses[key]
+
+        response = adapter.subscribe(symbol, exchange, mode, depth_level)
+        if response.get("status") == "success":
+            self.topic_workers[key] = {worker}
+            self.topic_responses[key] = response
+        return response
+
+    def _unsubscribe(self, worker, user_id, symbol, exchange, mode) -> dict:
+        key = (user_id, symbol, exchange, mode)
+        workers = self.topic_workers.get(key)
+        if workers is None:
+            return {"status": "success", "message": "Not subscribed"}
+
+        workers.discard(worker)
+        if workers:
+            return {"status": "success", "message": "Still subscribed by other workers"}
+
+        del self.topic_workers[key]
+        self.topic_responses.pop(key, None)
+        adapter = self.adapters.get(user_id)
+        if adapter is None:
+            return {"status": "success", "message": "Adapter already released"}
+        return adapter.unsubscribe(symbol, exchange, mode)
+
+    def _batch(self, worker, user_id, changes) -> dict:
+        """
+        Apply a worker's subscription changes: [symbol, exchange, current_mode,
+        target_mode, depth] each, with None for no subscription
+        """
+        results = []
+        for symbol, exchange, current, target, depth_level in changes:
+            response = {"status": "success"}
+            if current is not None:
+                response = self._unsubscribe(worker, user_id, symbol, exchange, current)
+            if target is not None:
+                response = self._subscribe(worker, user_id, symbol, exchange, target, depth_level)
+            results.append(response)
+        return {"status": "success", "results": results}
+
+    def _release(self, worker, user_id) -> dict:
+        """A worker has no clients (or a stale adapter) left for this user"""
+        for key in [k for k, workers in self.topic_workers.items() if k[0] == user_id]:
+            if worker in self.topic_workers[key]:
+                self._unsubscribe(worker, *key)
+
+        workers = self.user_workers.get(user_id)
+        if workers is not None:
+            workers.discard(worker)
+            if workers:
+                return {"status": "success"}
+            del self.user_workers[user_id]
+
+        adapter = self.adapters.get(user_id)
+        if adapter is None:
+            return {"status": "success"}
+
+        broker_name = self.user_brokers.get(user_id)
+        if broker_name in KEEP_ALIVE_BROKERS and hasattr(adapter, "unsubscribe_all"):
+            logger.info(
+                f"{broker_name.title()} adapter for user {user_id}: no workers left. Unsubscribing all symbols instead of disconnecting."
+            )
+            adapter.unsubscribe_all()
+        else:
+            logger.info(
+                f"No workers left for user {user_id}. Disconnecting {broker_name or 'unknown broker'} adapter."
+            )
+            adapter.disconnect()
+            del self.adapters[user_id]
+            self.user_brokers.pop(user_id, None)
+        return {"status": "success"}
+
+    def get_stats(self) -> dict:
+        return {
+            "adapters": len(self.adapters),
+            "upstream_subscriptions": len(self.topic_workers),
+            "users": {user_id: sorted(workers) for user_id, workers in self.user_workers.items()},
+        }
+
+
+class ControlClient:
+    """Blocking request/reply channel from a worker to the adapter host"""
+
+    def __init__(self, endpoint: str, worker_id: int, timeout_ms: int = CONTROL_TIMEOUT_MS):
+        self.worker_id = worker_id
+        self.context = zmq.Context()
+        self.socket = self.context.socket(zmq.REQ)
+        # Allow a new request after a timed-out one and discard its late reply
+        self.socket.setsockopt(zmq.REQ_RELAXED, 1)
+        self.socket.setsockopt(zmq.REQ_CORRELATE, 1)
+        self.socket.setsockopt(zmq.RCVTIMEO, timeout_ms)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.connect(endpoint)
+        self.lock = threading.Lock()
+
+    def request(self, op: str, **fields) -> dict:
+        fields["op"] = op
+        fields["worker"] = self.worker_id
+        with self.lock:
+            self.socket.send(json.dumps(fields).encode())
+            try:
+                return json.loads(self.socket.recv())
+            except zmq.Again:
+                logger.error(f"Adapter host did not answer {op} request")
+                return {
+                    "status": "error",
+                    "code": "ADAPTER_HOST_TIMEOUT",
+                    "message": "Adapter host did not respond",
+                }
+
+    def close(self):
+        self.socket.close()
+        self.context.term()
+
+
+class RemoteAdapter:
+    """
+    Worker-side stand-in for a broker adapter running in the adapter host.
+
+    Takes the subscription manager's batches in one control request and keeps
+    the worker's ZMQ SUB filters in step with the symbols its clients need.
+    """
+
+    def __init__(self, worker: "ProxyWorker", broker_name: str, user_id: str):
+        self.worker = worker
+        self.broker_name = broker_name
+        self.user_id = user_id
+        self.topics = set()  # (symbol, exchange, mode) with filters installed
+
+    def apply_subscription_changes(self, changes: list) -> dict:
+        """Apply a batch of (key, current, target) upstream changes (see subscription_manager)"""
+        # Filter first so the first ticks after the upstream subscribe are not missed
+        added = [(key[1], key[2], target[0]) for key, _, target in changes if target is not None]
+        self.worker.add_topic_filters(self.broker_name, added)
+
+        response = self.worker.control.request(
+            "batch",
+            user_id=self.user_id,
+            changes=[
+                [
+                    key[1],
+                    key[2],
+                    current[0] if current else None,
+                    target[0] if target else None,
+                    target[1] if target else None,
+                ]
+                for key, current, target in changes
+            ],
+        )
+        replies = response.get("results") or [response] * len(changes)
+
+        results = {}
+        removed = []
+        for (key, current, target), reply in zip(changes, replies, strict=False):
+            results[key] = reply
+            if current is not None:
+                removed.append((key[1], key[2], current[0]))
+            if target is not None:
+                if reply.get("status") == "success":
+                    self.topics.add((key[1], key[2], target[0]))
+                else:
+                    removed.append((key[1], key[2], target[0]))
+        self.topics.difference_update(removed)
+        self.worker.remove_topic_filters(self.broker_name, removed)
+        return results
+
+    def subscribe(self, symbol, exchange, mode=2, depth_level=5) -> dict:
+        key = (self.user_id, symbol, exchange)
+        return self.apply_subscription_changes([(key, None, (mode, depth_level))])[key]
+
+    def unsubscribe(self, symbol, exchange, mode=2) -> dict:
+        key = (self.user_id, symbol, exchange)
+        return self.apply_subscription_changes([(key, (mode, 0), None)])[key]
+
+    def disconnect(self):
+        self.worker.control.request("release", user_id=self.user_id)
+        self.worker.remove_topic_filters(self.broker_name, list(self.topics))
+        self.topics.clear()
+
+
+class ProxyWorker(WebSocketProxy):
+    """WebSocketProxy whose broker adapters live in the adapter host"""
+
+    def __init__(self, host: str, port: int, control_endpoint: str, worker_id: int):
+        super().__init__(host=host, port=port, check_port=False)
+        self.worker_id = worker_id
+        self.feed_market_data_service = False
+        self.control = ControlClient(control_endpoint, worker_id)
+        self.loop = None
+        self.loop_thread = None
+
+        # Receive only the topics this worker's clients need
+        self.socket.setsockopt(zmq.UNSUBSCRIBE, b"")
+        self.socket.setsockopt(zmq.SUBSCRIBE, CACHE_INVALIDATION_PREFIX.encode())
+
+    async def start(self):
+        self.loop = aio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        await super().start()
+
+    def _connect_broker_adapter(self, broker_name, user_id):
+        response = self.control.request("connect", user_id=user_id, broker=broker_name)
+        if response.get("status") != "success":
+            return (
+                None,
+                response.get("code", "BROKER_ERROR"),
+                response.get("message", "Failed to connect broker adapter"),
+            )
+        return RemoteAdapter(self, broker_name, user_id), None, None
+
+    def add_topic_filters(self, broker_name, topics):
+        # ZeroMQ reference counts identical subscriptions on a socket
+        self._set_filters(zmq.SUBSCRIBE, broker_name, topics)
+
+    def remove_topic_filters(self, broker_name, topics):
+        self._set_filters(zmq.UNSUBSCRIBE, broker_name, topics)
+
+    def _set_filters(self, option, broker_name, topics):
+        prefixes = [p for topic in topics for p in topic_prefixes(broker_name, *topic)]
+        if not prefixes:
+            return
+
+        def apply():
+            for prefix in prefixes:
+                self.socket.setsockopt(option, prefix)
+
+        # The SUB socket belongs to the event loop thread; subscription batches
+        # run on the subscription manager's threads
+        if self.loop is None or threading.get_ident() == self.loop_thread:
+            apply()
+        else:
+
+            async def on_loop():
+                apply()
+
+            aio.run_coroutine_threadsafe(on_loop(), self.loop).result()
+
+    async def stop(self):
+        await super().stop()
+        self.control.close()
+
+
+def run_adapter_host(control_endpoint: str, zmq_port: int, init: Callable | None = None):
+    """Adapter host process entry point"""
+    load_dotenv()
+    if init:
+        init()
+    adapter_host = AdapterHost(control_endpoint, zmq_port)
+    signal.signal(signal.SIGTERM, adapter_host.stop)
+    signal.signal(signal.SIGINT, adapter_host.stop)
+    adapter_host.serve()
+
+
+def run_proxy_worker(worker_id: int, host: str, port: int, control_endpoint: str):
+    """Proxy worker process entry point"""
+    load_dotenv()
+
+    async def serve():
+        proxy = ProxyWorker(host, port, control_endpoint, worker_id)
+        try:
+            await proxy.start()
+        finally:
+            await proxy.stop()
+
+    aio.run(serve())
+
+
+def run_cluster(
+    workers: int | None = None,
+    host: str | None = None,
+    port: int | None = None,
+    init: Callable | None = None,
+) -> int:
+    """
+    Start the adapter host and proxy workers and supervise them.
+
+    If any process exits, the rest are stopped and the exit code is returned.
+
+    Args:
+        workers: Worker processes (default WEBSOCKET_WORKERS, else CPU count)
+        host: WebSocket host (default WEBSOCKET_HOST)
+        port: WebSocket port (default WEBSOCKET_PORT)
+        init: Picklable callable run in the adapter host before it serves, e.g. to
+            register extra adapters
+    """
+    load_dotenv()
+    host = host or os.getenv("WEBSOCKET_HOST", "127.0.0.1")
+    port = port or int(os.getenv("WEBSOCKET_PORT", "8765"))
+    workers = workers or int(os.getenv("WEBSOCKET_WORKERS", "0")) or os.cpu_count() or 1
+    if workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        logger.warning("SO_REUSEPORT is not supported on this platform, running one worker")
+        workers = 1
+
+    if is_port_in_use(host, port, wait_time=2.0):
+        logger.error(f"WebSocket port {port} is already in use on {host}")
+        return 1
+
+    control_endpoint = f"tcp://127.0.0.1:{CONTROL_PORT}"
+    zmq_port = int(os.getenv("ZMQ_PORT", "5555"))
+    ctx = multiprocessing.get_context("spawn")
+
+    processes = [
+        ctx.Process(
+            target=run_adapter_host,
+            args=(control_endpoint, zmq_port, init),
+            name="ws-adapter-host",
+        )
+    ]
+    processes += [
+        ctx.Process(
+            target=run_proxy_worker,
+            args=(worker_id, host, port, control_endpoint),
+            name=f"ws-worker-{worker_id}",
+        )
+        for worker_id in range(workers)
+    ]
+
+    stopping = threading.Event()
+
+    def request_stop(*args):
+        stopping.set()
+
+    previous_handlers = {
+        sig: signal.signal(sig, request_stop) for sig in (signal.SIGINT, signal.SIGTERM)
+    }
+
+    for process in processes:
+        process.start()
+    logger.info(f"WebSocket proxy cluster started: {workers} workers on {host}:{port}")
+
+    exit_code = 0
+    try:
+        while not stopping.is_set():
+            ready = multiprocessing.connection.wait([p.sentinel for p in processes], timeout=0.5)
+            if ready:
+                exited = next(p for p in processes if p.sentinel in ready)
+                logger.error(f"{exited.name} exited with code {exited.exitcode}, stopping cluster")
+                exit_code = exited.exitcode or 1
+                break
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+        for sig, handler in previous_handlers.items():
+            signal.signal(sig, handler)
+
+    logger.info("WebSocket proxy cluster stopped")
+    return exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+    sys.exit(run_cluster(args.workers, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
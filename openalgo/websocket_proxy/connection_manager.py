@@ -21,6 +21,8 @@ import zmq
 
 from utils.logging import get_logger
 
+from .feed_recorder import get_feed_recorder
+
 logger = get_logger(__name__)
 
 # Thread-local storage for pooled adapter creation context
@@ -86,6 +88,7 @@ class SharedZmqPublisher:
         self.zmq_port = None
         self._bound = False
         self._publish_lock = threading.Lock()
+        self._recorder = get_feed_recorder()
 
     def bind(self, port: int | None = None) -> int:
         """
@@ -144,14 +147,16 @@ class SharedZmqPublisher:
             self.logger.error("Cannot publish: ZMQ socket not bound")
             return
 
+        payload = json.dumps(data).encode("utf-8")
         with self._publish_lock:
             try:
-                self.socket.send_multipart(
-                    [topic.encode("utf-8"), json.dumps(data).encode("utf-8")]
-                )
+                self.socket.send_multipart([topic.encode("utf-8"), payload])
             except Exception as e:
                 self.logger.exception(f"Error publishing to ZMQ: {e}")
 
+        if self._recorder:
+            self._recorder.record_zmq(topic, payload)
+
     def cleanup(self):
         """Clean up ZeroMQ resources"""
         try:
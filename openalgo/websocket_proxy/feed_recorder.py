@@ -0,0 +1,227 @@
+"""
+Raw feed recorder for the WebSocket stack
+
+Captures the raw frames broker clients receive and the ZMQ topic/payload pairs
+adapters publish into compressed, append-only segment files so a session can
+be replayed deterministically later (see ``websocket_proxy/feed_replay.py``).
+
+Recording is off unless ``FEED_RECORD_DIR`` is set. Callers on the hot path
+only enqueue ``(kind, timestamp, key, payload)``; compression and disk I/O
+happen on a single background writer thread.
+
+Segment layout (gzip stream):
+    MAGIC
+    repeated: header ``<BqHI`` (kind, wall clock ns, key length, payload length),
+              key bytes, payload bytes
+
+For frames the key is the broker name, for ZMQ records it is the topic.
+"""
+
+import atexit
+import gzip
+import os
+import queue
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b"OAFEED1\n"
+
+RECORD_FRAME = 1  # Binary frame as received from the broker
+RECORD_TEXT_FRAME = 2  # Text (JSON) frame as received from the broker
+RECORD_ZMQ = 3  # Topic/payload pair published on the ZMQ bus
+
+SEGMENT_SUFFIX = ".seg.gz"
+
+_HEADER = struct.Struct("<BqHI")
+
+# Recording configuration
+FEED_RECORD_DIR = os.getenv("FEED_RECORD_DIR", "")
+FEED_RECORD_SEGMENT_MB = int(os.getenv("FEED_RECORD_SEGMENT_MB", "64"))
+FEED_RECORD_SEGMENT_SECONDS = int(os.getenv("FEED_RECORD_SEGMENT_SECONDS", "900"))
+
+
+class FeedRecord(NamedTuple):
+    kind: int
+    timestamp_ns: int
+    key: str
+    payload: bytes
+
+
+class FeedRecorder:
+    """
+    Append-only recorder writing rotating gzip segments from a background thread.
+
+    Segments are rotated once they exceed ``segment_bytes`` of uncompressed data
+    or ``segment_seconds`` of wall time, whichever comes first. Each segment is
+    self-contained, so a crash only loses the unflushed tail of the last one.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = FEED_RECORD_SEGMENT_MB * 1024 * 1024,
+        segment_seconds: int = FEED_RECORD_SEGMENT_SECONDS,
+        compresslevel: int = 1,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.compresslevel = compresslevel
+
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._segment_index = 0
+        self._segment_written = 0
+        self._segment_opened_at = 0.0
+        self._last_flush = 0.0
+        self.records_written = 0
+        self.segments = []
+
+        os.makedirs(directory, exist_ok=True)
+        self._running = True
+        self._writer = threading.Thread(target=self._write_loop, name="FeedRecorder", daemon=True)
+        self._writer.start()
+
+    def record_frame(self, source: str, frame) -> None:
+        """Record a raw frame received by a broker client"""
+        if isinstance(frame, str):
+            self._queue.put((RECORD_TEXT_FRAME, time.time_ns(), source, frame.encode("utf-8")))
+        else:
+            self._queue.put((RECORD_FRAME, time.time_ns(), source, bytes(frame)))
+
+    def record_zmq(self, topic: str, payload: bytes) -> None:
+        """Record a topic/payload pair published on the ZMQ bus"""
+        self._queue.put((RECORD_ZMQ, time.time_ns(), topic, payload))
+
+    def close(self) -> None:
+        """Flush pending records and close the current segment"""
+        if not self._running:
+            return
+        self._running = False
+        self._queue.put(None)
+        self._writer.join()
+
+    def _open_segment(self) -> None:
+        self._segment_index += 1
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(
+            self.directory,
+            f"feed-{stamp}-{os.getpid()}-{self._segment_index:05d}{SEGMENT_SUFFIX}",
+        )
+        self._file = gzip.open(path, "wb", compresslevel=self.compresslevel)
+        self._file.write(MAGIC)
+        self._segment_written = 0
+        self._segment_opened_at = time.monotonic()
+        self.segments.append(path)
+        logger.info(f"Feed recorder writing segment {path}")
+
+    def _close_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(item)
+                # Drain whatever else is queued before going back to sleep
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        self._close_segment()
+                        return
+                    self._write(item)
+                # Sync-flushing gzip costs ratio, so do it at most once a second
+                if time.monotonic() - self._last_flush >= 1.0:
+                    self._file.flush()
+                    self._last_flush = time.monotonic()
+            except Exception as e:
+                logger.exception(f"Feed recorder write failed: {e}")
+        self._close_segment()
+
+    def _write(self, item) -> None:
+        kind, timestamp_ns, key, payload = item
+        if (
+            self._file is None
+            or self._segment_written >= self.segment_bytes
+            or time.monotonic() - self._segment_opened_at >= self.segment_seconds
+        ):
+            self._close_segment()
+            self._open_segment()
+
+        key_bytes = key.encode("utf-8")
+        self._file.write(_HEADER.pack(kind, timestamp_ns, len(key_bytes), len(payload)))
+        self._file.write(key_bytes)
+        self._file.write(payload)
+        self._segment_written += _HEADER.size + len(key_bytes) + len(payload)
+        self.records_written += 1
+
+
+def read_segment(path: str) -> Iterator[FeedRecord]:
+    """
+    Iterate the records of one segment file.
+
+    A truncated tail (recorder killed mid-write) ends the iteration quietly.
+    """
+    with gzip.open(path, "rb") as f:
+        try:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a feed segment: {path}")
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                kind, timestamp_ns, key_length, payload_length = _HEADER.unpack(header)
+                key = f.read(key_length)
+                payload = f.read(payload_length)
+                if len(key) < key_length or len(payload) < payload_length:
+                    return
+                yield FeedRecord(kind, timestamp_ns, key.decode("utf-8"), payload)
+        except EOFError:
+            logger.warning(f"Segment {path} is truncated, stopping at last complete record")
+
+
+def list_segments(directory: str) -> list[str]:
+    """Segment files in a recording directory, in recording order"""
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+def read_recording(path: str) -> Iterator[FeedRecord]:
+    """Iterate all records of a recording directory (or a single segment file)"""
+    segments = list_segments(path) if os.path.isdir(path) else [path]
+    for segment in segments:
+        yield from read_segment(segment)
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_feed_recorder() -> FeedRecorder | None:
+    """Process-wide recorder, or None when FEED_RECORD_DIR is not configured"""
+    global _recorder
+    if not FEED_RECORD_DIR:
+        return None
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = FeedRecorder(FEED_RECORD_DIR)
+                atexit.register(_recorder.close)
+    return _recorder
@@ -0,0 +1,365 @@
+"""
+Deterministic replay of a recorded feed through the WebSocket stack
+
+Reads a recording made by ``FeedRecorder`` and pushes it back through the same
+code the live path runs:
+
+    raw frames     -> broker frame parser (decode stage)
+    ZMQ pairs      -> SharedZmqPublisher.publish (publish stage)
+                   -> WebSocketProxy.zmq_listener (proxy stage)
+                   -> MarketDataService.process_market_data (mds stage)
+                   -> local stand-in clients
+
+Records are paced by their recorded timestamps at 1x, Nx or max speed. Every
+published payload carries a ``_replay_seq`` so the stand-in clients can report
+end-to-end publish -> client latency percentiles. CPU per stage is measured
+with per-thread CPU clocks.
+
+Usage:
+    python -m websocket_proxy.feed_replay /path/to/recording
+    python -m websocket_proxy.feed_replay /path/to/recording --speed 10 --clients 50
+    python -m websocket_proxy.feed_replay /path/to/recording --speed max --no-throttle
+"""
+
+import argparse
+import asyncio as aio
+import json
+import socket
+import threading
+import time
+from collections.abc import Callable, Iterable
+
+import numpy as np
+
+from services.market_data_service import get_market_data_service
+from utils.logging import get_logger
+
+from .connection_manager import SharedZmqPublisher
+from .feed_recorder import RECORD_FRAME, RECORD_TEXT_FRAME, RECORD_ZMQ, FeedRecord, read_recording
+from .server import WebSocketProxy
+
+logger = get_logger(__name__)
+
+REPLAY_USER = "replay"
+REPLAY_SEQ_FIELD = "_replay_seq"
+MODE_MAP = {"LTP": 1, "QUOTE": 2, "DEPTH": 3}
+
+
+def _zerodha_parser() -> Callable:
+    from broker.zerodha.streaming.zerodha_decoder import decode_frame, to_tick_dicts
+
+    def parse(frame):
+        if len(frame) > 1:  # 1-byte frames are heartbeats
+            to_tick_dicts(decode_frame(frame))
+
+    return parse
+
+
+def _dhan_parser(is_20_depth: bool) -> Callable:
+    def factory():
+        from broker.dhan.streaming.dhan_websocket import DhanWebSocket
+
+        client = DhanWebSocket(REPLAY_USER, REPLAY_USER, is_20_depth=is_20_depth)
+        client.on_data = lambda ws, data: None
+        return client._parse_binary_message
+
+    return factory
+
+
+# Raw frame parsers by recorder source name
+FRAME_PARSERS = {
+    "zerodha": _zerodha_parser,
+    "dhan": _dhan_parser(False),
+    "dhan_20depth": _dhan_parser(True),
+}
+
+
+def subscription_key(topic: str) -> tuple[str, str, int] | None:
+    """(symbol, exchange, mode) for a topic, following WebSocketProxy.zmq_listener"""
+    parts = topic.split("_")
+    if len(parts) >= 4 and parts[1] == "INDEX" and parts[0] in ("NSE", "BSE"):
+        exchange, symbol, mode_str = f"{parts[0]}_INDEX", parts[2], parts[3]
+    elif len(parts) >= 5 and parts[1] == "INDEX":
+        exchange, symbol, mode_str = f"{parts[1]}_{parts[2]}", parts[3], parts[4]
+    elif len(parts) >= 4:
+        exchange, symbol, mode_str = parts[1], parts[2], parts[3]
+    elif len(parts) >= 3:
+        exchange, symbol, mode_str = parts[0], parts[1], parts[2]
+    else:
+        return None
+    mode = MODE_MAP.get(mode_str)
+    return (symbol, exchange, mode) if mode else None
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentiles(values_ns) -> dict:
+    """p50/p95/p99/max in microseconds"""
+    if not len(values_ns):
+        return {"count": 0}
+    values = np.asarray(values_ns, dtype=np.float64) / 1000.0
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(values.size),
+        "p50_us": round(float(p50), 1),
+        "p95_us": round(float(p95), 1),
+        "p99_us": round(float(p99), 1),
+        "max_us": round(float(values.max()), 1),
+    }
+
+
+class StageStats:
+    """Call count, per-call wall time and thread CPU time of one pipeline stage"""
+
+    def __init__(self):
+        self.wall_ns = []
+        self.cpu_ns = 0
+
+    def timed(self, func: Callable, *args):
+        cpu = time.thread_time_ns()
+        start = time.perf_counter_ns()
+        try:
+            return func(*args)
+        finally:
+            self.wall_ns.append(time.perf_counter_ns() - start)
+            self.cpu_ns += time.thread_time_ns() - cpu
+
+    def report(self) -> dict:
+        report = percentiles(self.wall_ns)
+        report["cpu_ms"] = round(self.cpu_ns / 1e6, 2)
+        return report
+
+
+class StandInClient:
+    """Local stand-in for a client websocket, timestamping everything sent to it"""
+
+    def __init__(self):
+        self.received = []
+
+    async def send(self, message):
+        self.received.append((time.perf_counter_ns(), message))
+
+
+class FeedReplay:
+    """
+    Replay a recording through the decode, publish, proxy and MarketDataService stages.
+
+    Args:
+        records: Recorded feed records in recording order
+        speed: Playback speed multiplier; 0 replays as fast as possible
+        clients: Number of stand-in clients, each subscribed to every recorded topic
+        throttle: Keep the proxy's 50ms LTP throttle (disable to measure raw fan-out)
+    """
+
+    def __init__(
+        self,
+        records: Iterable[FeedRecord],
+        speed: float = 1.0,
+        clients: int = 1,
+        throttle: bool = True,
+    ):
+        self.records = list(records)
+        self.speed = speed
+        self.num_clients = clients
+        self.throttle = throttle
+
+        self.decode = StageStats()
+        self.publish = StageStats()
+        self.mds = StageStats()
+        self.publish_ns = {}
+        self.clients = {}
+        self._parsers = {}
+        self._driver_done = threading.Event()
+
+    def run(self) -> dict:
+        """Run the replay and return the report"""
+        zmq_records = [r for r in self.records if r.kind == RECORD_ZMQ]
+        publisher = SharedZmqPublisher()
+        publisher.bind(_free_port())  # also points ZMQ_PORT at it for the proxy
+        proxy = WebSocketProxy(host="127.0.0.1", port=_free_port())
+        if not self.throttle:
+            proxy.message_throttle_interval = 0
+
+        keys = {subscription_key(r.key) for r in zmq_records} - {None}
+        for client_id in range(1, self.num_clients + 1):
+            client = StandInClient()
+            self.clients[client_id] = client
+            proxy.clients[client_id] = client
+            proxy.user_mapping[client_id] = REPLAY_USER
+            for key in keys:
+                proxy.subscription_index[key].add(client_id)
+
+        mds = get_market_data_service()
+        mds.process_market_data = lambda data: self.mds.timed(
+            type(mds).process_market_data, mds, data
+        )
+        try:
+            report = aio.run(self._run_async(proxy, publisher))
+        finally:
+            del mds.process_market_data
+            proxy.socket.close(linger=0)
+            publisher.cleanup()
+
+        report["topics"] = len(keys)
+        report["latency"] = self._latency_report()
+        return report
+
+    async def _run_async(self, proxy: WebSocketProxy, publisher: SharedZmqPublisher) -> dict:
+        proxy.running = True
+        listener = aio.create_task(proxy.zmq_listener())
+        await aio.sleep(0.5)  # let the SUB socket finish connecting before publishing
+
+        loop_cpu = time.thread_time_ns()
+        process_cpu = time.process_time_ns()
+        started = time.perf_counter_ns()
+        driver = threading.Thread(target=self._drive, args=(publisher,), name="FeedReplayDriver")
+        driver.start()
+
+        while not self._driver_done.is_set():
+            await aio.sleep(0.05)
+        driven = time.perf_counter_ns()
+
+        # Drain: wait until the clients stop receiving
+        delivered = -1
+        while delivered != self._delivered():
+            delivered = self._delivered()
+            await aio.sleep(0.3)
+
+        loop_cpu = time.thread_time_ns() - loop_cpu
+        process_cpu = time.process_time_ns() - process_cpu
+        last_received = max(
+            (c.received[-1][0] for c in self.clients.values() if c.received), default=driven
+        )
+        proxy.running = False
+        await listener
+        driver.join()
+
+        published = len(self.publish.wall_ns)
+        replay_seconds = (driven - started) / 1e9
+        delivery_seconds = max(last_received - started, 1) / 1e9
+        return {
+            "speed": self.speed or "max",
+            "clients": self.num_clients,
+            "frames": len(self.decode.wall_ns),
+            "published": published,
+            "delivered": delivered,
+            "replay_seconds": round(replay_seconds, 3),
+            "publish_rate": round(published / replay_seconds, 1) if replay_seconds else None,
+            "delivery_rate": round(delivered / delivery_seconds, 1),
+            "stages": {
+                "decode": self.decode.report(),
+                "publish": self.publish.report(),
+                "proxy": {"cpu_ms": round((loop_cpu - self.mds.cpu_ns) / 1e6, 2)},
+                "mds": self.mds.report(),
+            },
+            "process_cpu_ms": round(process_cpu / 1e6, 2),
+        }
+
+    def _delivered(self) -> int:
+        return sum(len(c.received) for c in self.clients.values())
+
+    def _drive(self, publisher: SharedZmqPublisher) -> None:
+        """Replay records in order, paced by their recorded timestamps"""
+        try:
+            if not self.records:
+                return
+            first_ts = self.records[0].timestamp_ns
+            start = time.perf_counter_ns()
+            for seq, record in enumerate(self.records):
+                if self.speed:
+                    delay = start + (record.timestamp_ns - first_ts) / self.speed
+                    delay -= time.perf_counter_ns()
+                    if delay > 0:
+                        time.sleep(delay / 1e9)
+
+                if record.kind == RECORD_ZMQ:
+                    data = json.loads(record.payload)
+                    if isinstance(data, dict):
+                        data[REPLAY_SEQ_FIELD] = seq
+                    self.publish_ns[seq] = time.perf_counter_ns()
+                    self.publish.timed(publisher.publish, record.key, data)
+                elif record.kind == RECORD_TEXT_FRAME:
+                    self.decode.timed(json.loads, record.payload)
+                elif record.kind == RECORD_FRAME:
+                    parser = self._parser(record.key)
+                    if parser:
+                        self.decode.timed(parser, record.payload)
+        except Exception as e:
+            logger.exception(f"Replay driver failed: {e}")
+        finally:
+            self._driver_done.set()
+
+    def _parser(self, source: str) -> Callable | None:
+        if source not in self._parsers:
+            factory = FRAME_PARSERS.get(source)
+            if factory is None:
+                logger.warning(f"No frame parser registered for source '{source}', skipping")
+            self._parsers[source] = factory() if factory else None
+        return self._parsers[source]
+
+    def _latency_report(self) -> dict:
+        latencies = []
+        for client in self.clients.values():
+            for received_ns, message in client.received:
+                seq = json.loads(message).get("data", {}).get(REPLAY_SEQ_FIELD)
+                published_ns = self.publish_ns.get(seq)
+                if published_ns is not None:
+                    latencies.append(received_ns - published_ns)
+        return percentiles(latencies)
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"speed={report['speed']} clients={report['clients']} topics={report['topics']}",
+        f"frames decoded: {report['frames']}  published: {report['published']}  "
+        f"delivered: {report['delivered']}",
+        f"replay: {report['replay_seconds']}s  publish rate: {report['publish_rate']}/s  "
+        f"delivery rate: {report['delivery_rate']}/s",
+        f"process CPU: {report['process_cpu_ms']} ms",
+        "",
+        f"{'stage':<10} {'calls':>8} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'cpu ms':>10}",
+    ]
+    rows = dict(report["stages"])
+    rows["end2end"] = report["latency"]
+    for name, stats in rows.items():
+        lines.append(
+            f"{name:<10} {stats.get('count', '-'):>8} {stats.get('p50_us', '-'):>9} "
+            f"{stats.get('p95_us', '-'):>9} {stats.get('p99_us', '-'):>9} "
+            f"{stats.get('cpu_ms', '-'):>10}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("recording", help="Recording directory or a single segment file")
+    parser.add_argument("--speed", default="1", help="Playback multiplier, or 'max'")
+    parser.add_argument("--clients", type=int, default=1, help="Number of stand-in clients")
+    parser.add_argument(
+        "--no-throttle", action="store_true", help="Disable the proxy's 50ms LTP throttle"
+    )
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    speed = 0.0 if args.speed == "max" else float(args.speed)
+    report = FeedReplay(
+        read_recording(args.recording),
+        speed=speed,
+        clients=args.clients,
+        throttle=not args.no_throttle,
+    ).run()
+
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
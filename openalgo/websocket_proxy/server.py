@@ -21,11 +21,219 @@ from utils.logging import get_logger, highlight_url
 from .base_adapter import BaseBrokerWebSocketAdapter
 from .broker_factory import create_broker_adapter
 from .port_check import find_available_port, is_port_in_use
+from .subscription_manager import SubscriptionManager, derive_mode_data, normalize_mode
 
 # Initialize logger
 logger = get_logger("websocket_proxy")
 
 
+def parse_topic(topic_str: str) -> tuple[str, str, str, str] | None:
+    """
+    Split a ZeroMQ market data topic into (broker, exchange, symbol, mode).
+
+    Returns None for topics that do not match any known format.
+    """
+    # Support both formats:
+    # New format: BROKER_EXCHANGE_SYMBOL_MODE (with broker name)
+    # Old format: EXCHANGE_SYMBOL_MODE (without broker name)
+    # Special case: NSE_INDEX_SYMBOL_MODE (exchange contains underscore)
+    parts = topic_str.split("_")
+
+    # Special case handling for NSE_INDEX and BSE_INDEX
+    if len(parts) >= 4 and parts[0] == "NSE" and parts[1] == "INDEX":
+        broker_name = "unknown"
+        exchange = "NSE_INDEX"
+        symbol = parts[2]
+        mode_str = parts[3]
+    elif len(parts) >= 4 and parts[0] == "BSE" and parts[1] == "INDEX":
+        broker_name = "unknown"
+        exchange = "BSE_INDEX"
+        symbol = parts[2]
+        mode_str = parts[3]
+    elif len(parts) >= 5 and parts[1] == "INDEX":  # BROKER_NSE_INDEX_SYMBOL_MODE format
+        broker_name = parts[0]
+        exchange = f"{parts[1]}_{parts[2]}"
+        symbol = parts[3]
+        mode_str = parts[4]
+    elif len(parts) >= 4:
+        # Standard format with broker name
+        broker_name = parts[0]
+        exchange = parts[1]
+        symbol = parts[2]
+        mode_str = parts[3]
+    elif len(parts) >= 3:
+        # Old format without broker name
+        broker_name = "unknown"
+        exchange = parts[0]
+        symbol = parts[1]
+        mode_str = parts[2]
+    else:
+        return None
+
+    return broker_name, exchange, symbol, mode_str
+
+
+def connect_broker_adapter(broker_name, user_id):
+    """
+    Create, initialize and connect a broker adapter for a user, retrying once
+    with fresh credentials on auth/connection failures (issue #765)
+
+    Args:
+        broker_name: Broker to create the adapter for
+        user_id: User the adapter streams for
+
+    Returns:
+        tuple: (adapter, None, None) on success, (None, error_code, error_message) on failure
+    """
+    try:
+        # Create broker adapter with dynamic broker selection
+        adapter = create_broker_adapter(broker_name)
+        if not adapter:
+            return None, "BROKER_ERROR", f"Failed to create adapter for broker: {broker_name}"
+
+        # Initialize adapter with broker configuration
+        # The adapter's initialize method should handle broker-specific setup
+        initialization_result = adapter.initialize(broker_name, user_id)
+        if initialization_result and initialization_result.get("status") == "error":
+            error_msg = initialization_result.get(
+                "message", initialization_result.get("error", "Failed to initialize broker adapter")
+            )
+
+            # Check if this is an auth error (403/401) - retry with fresh token
+            # This handles the stale cache issue described in GitHub issue #765
+            if adapter.is_auth_error(error_msg):
+                logger.warning(f"Auth error during initialization for user {user_id}, retrying with fresh token")
+                adapter.clear_auth_cache_for_user(user_id)
+
+                # Retry initialization with fresh credentials
+                initialization_result = adapter.initialize(broker_name, user_id)
+                if initialization_result and initialization_result.get("status") == "error":
+                    error_msg = initialization_result.get("message", "Failed to initialize after retry")
+                    return None, "BROKER_INIT_ERROR", error_msg
+            else:
+                return None, "BROKER_INIT_ERROR", error_msg
+
+        # Connect to the broker
+        connect_result = adapter.connect()
+        # Handle both response formats:
+        # - Adapter format: {"status": "error", "code": "...", "message": "..."}
+        # - ConnectionPool format: {"success": False, "error": "..."}
+        is_error = (
+            (connect_result and connect_result.get("status") == "error") or
+            (connect_result and connect_result.get("success") == False)
+        )
+        if is_error:
+            error_msg = connect_result.get("message", connect_result.get("error", "Failed to connect to broker"))
+            error_code = connect_result.get("code", "")
+
+            # Always retry connection failures with fresh token (issue #765)
+            # Connection failures after re-login are almost always due to stale cached tokens
+            # The upstox_client logs "401 Unauthorized" but returns generic "CONNECTION_FAILED"
+            should_retry = (
+                adapter.is_auth_error(error_msg) or
+                error_code in ("CONNECTION_FAILED", "CONNECTION_ERROR") or
+                "failed to connect" in error_msg.lower()
+            )
+
+            if should_retry:
+                logger.warning(f"Connection failed for user {user_id}, retrying with fresh token (error: {error_msg}, code: {error_code})")
+
+                # Clear stale cache in WebSocket process (issue #765)
+                WebSocketProxy._clear_auth_cache_for_user(user_id)
+                adapter.clear_auth_cache_for_user(user_id)
+
+                # Re-initialize with fresh credentials from database
+                # Use force=True for pooled adapters to override existing initialization
+                logger.info(f"Re-initializing adapter for user {user_id} with fresh token")
+                try:
+                    # Try with force parameter (supported by _PooledAdapterWrapper)
+                    init_retry_result = adapter.initialize(broker_name, user_id, force=True)
+                except TypeError:
+                    # Fallback for raw adapters that don't support force parameter
+                    init_retry_result = adapter.initialize(broker_name, user_id)
+                # Handle both response formats
+                init_is_error = (
+                    (init_retry_result and init_retry_result.get("status") == "error") or
+                    (init_retry_result and init_retry_result.get("success") == False)
+                )
+                if init_is_error:
+                    error_msg = init_retry_result.get("message", init_retry_result.get("error", "Failed to re-initialize"))
+                    logger.error(f"Re-initialization failed for user {user_id}: {error_msg}")
+                    return None, "BROKER_INIT_ERROR", error_msg
+
+                # Retry connection
+                logger.info(f"Retrying connection for user {user_id}")
+                connect_result = adapter.connect()
+                # Handle both response formats
+                connect_is_error = (
+                    (connect_result and connect_result.get("status") == "error") or
+                    (connect_result and connect_result.get("success") == False)
+                )
+                if connect_is_error:
+                    error_msg = connect_result.get("message", connect_result.get("error", "Failed to connect after retry"))
+                    logger.error(f"Retry connection also failed for user {user_id}: {error_msg}")
+                    return None, "BROKER_CONNECTION_ERROR", error_msg
+
+                logger.info(f"Retry successful for user {user_id}")
+            else:
+                return None, "BROKER_CONNECTION_ERROR", error_msg
+
+        logger.info(
+            f"Successfully created and connected {broker_name} adapter for user {user_id}"
+        )
+        return adapter, None, None
+
+    except Exception as e:
+        error_str = str(e)
+        logger.exception(f"Failed to create broker adapter for {broker_name}: {e}")
+
+        # Check if exception is an auth error - retry with fresh token
+        # This handles the stale cache issue described in GitHub issue #765
+        if WebSocketProxy._is_auth_error_exception(error_str):
+            logger.warning(f"Auth exception for user {user_id}, retrying with fresh token")
+            try:
+                WebSocketProxy._clear_auth_cache_for_user(user_id)
+
+                # Retry adapter creation
+                adapter = create_broker_adapter(broker_name)
+                if adapter:
+                    # Clear cache on the new adapter as well
+                    if hasattr(adapter, 'clear_auth_cache_for_user'):
+                        adapter.clear_auth_cache_for_user(user_id)
+
+                    initialization_result = adapter.initialize(broker_name, user_id)
+                    # Handle both response formats
+                    init_is_error = (
+                        (initialization_result and initialization_result.get("status") == "error") or
+                        (initialization_result and initialization_result.get("success") == False)
+                    )
+                    if not init_is_error:
+                        connect_result = adapter.connect()
+                        # Handle both response formats
+                        connect_is_error = (
+                            (connect_result and connect_result.get("status") == "error") or
+                            (connect_result and connect_result.get("success") == False)
+                        )
+                        if not connect_is_error:
+                            logger.info(f"Successfully connected {broker_name} adapter for user {user_id} after retry")
+                            return adapter, None, None
+                        else:
+                            error_msg = connect_result.get("message", connect_result.get("error", "Failed to connect after retry"))
+                            return None, "BROKER_CONNECTION_ERROR", error_msg
+                    else:
+                        error_msg = initialization_result.get("message", initialization_result.get("error", "Failed to initialize after retry"))
+                        return None, "BROKER_INIT_ERROR", error_msg
+                else:
+                    return None, "BROKER_ERROR", f"Failed to create adapter for {broker_name}"
+            except Exception as retry_error:
+                logger.exception(f"Retry also failed for {broker_name}: {retry_error}")
+                return None, "BROKER_ERROR", str(retry_error)
+        else:
+            import traceback
+            logger.exception(traceback.format_exc())
+            return None, "BROKER_ERROR", error_str
+
+
 class WebSocketProxy:
     """
     WebSocket Proxy Server that handles client connections and authentication,
@@ -33,19 +241,21 @@ class WebSocketProxy:
     Supports dynamic broker selection based on user configuration.
     """
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, check_port: bool = True):
         """
         Initialize the WebSocket Proxy
 
         Args:
             host: Hostname to bind the WebSocket server to
             port: Port number to bind the WebSocket server to
+            check_port: Refuse to start if the port is taken (cluster workers share it
+                via SO_REUSEPORT and skip this check)
         """
         self.host = host
         self.port = port
 
         # Check if the required port is already in use - wait briefly for cleanup to complete
-        if is_port_in_use(host, port, wait_time=2.0):  # Wait up to 2 seconds for port release
+        if check_port and is_port_in_use(host, port, wait_time=2.0):  # Wait up to 2 seconds for port release
             error_msg = (
                 f"WebSocket port {port} is already in use on {host}.\n"
                 f"This port is required for SDK compatibility (see strategies/ltp_example.py).\n"
@@ -59,17 +269,25 @@ class WebSocketProxy:
             raise RuntimeError(error_msg)
 
         self.clients = {}  # Maps client_id to websocket connection
-        self.subscriptions = {}  # Maps client_id to set of subscriptions
+        self.subscriptions = {}  # Maps client_id to set of (symbol, exchange, mode, depth_level)
         self.broker_adapters = {}  # Maps user_id to broker adapter
         self.user_mapping = {}  # Maps client_id to user_id
         self.user_broker_mapping = {}  # Maps user_id to broker_name
         self.running = False
 
+        # Feed ticks to this process's MarketDataService (off in cluster workers,
+        # which have no backend consumers)
+        self.feed_market_data_service = True
+
         # PERFORMANCE OPTIMIZATION: Subscription index for O(1) lookup
         # Maps (symbol, exchange, mode) -> set of client_ids
         # This eliminates the need for nested loops in zmq_listener
         self.subscription_index: dict[tuple[str, str, int], set[int]] = defaultdict(set)
 
+        # Upstream subscriptions shared between clients, one per (user, symbol,
+        # exchange) at the highest mode needed, applied in batches off the loop
+        self.subscription_manager = SubscriptionManager()
+
         # PERFORMANCE OPTIMIZATION 2: Message throttling to avoid excessive updates
         # Maps (symbol, exchange, mode) -> last message timestamp
         # Prevents sending duplicate LTP updates faster than 50ms
@@ -229,6 +447,8 @@ class WebSocketProxy:
                 except Exception as e:
                     logger.exception(f"Error disconnecting adapter for user {user_id}: {e}")
 
+            self.subscription_manager.close()
+
             # Close ZeroMQ socket with linger=0 for immediate close
             if hasattr(self, "socket") and self.socket:
                 try:
@@ -299,47 +519,14 @@ class WebSocketProxy:
 
         # Clean up subscriptions
         if client_id in self.subscriptions:
-            subscriptions = self.subscriptions[client_id]
-            # Unsubscribe from all subscriptions
-            for sub_json in subscriptions:
+            user_id = self.user_mapping.get(client_id)
+            # Upstream unsubscribes happen in the subscription manager once the
+            # last client needing a symbol is gone
+            for subscription in self.subscriptions.pop(client_id):
                 try:
-                    # Parse the JSON string to get the subscription info
-                    sub_info = json.loads(sub_json)
-                    symbol = sub_info.get("symbol")
-                    exchange = sub_info.get("exchange")
-                    mode = sub_info.get("mode")
-
-                    # OPTIMIZATION: Remove from subscription index
-                    sub_key = (symbol, exchange, mode)
-                    should_unsubscribe_from_adapter = False
-                    if sub_key in self.subscription_index:
-                        self.subscription_index[sub_key].discard(client_id)
-                        # Clean up empty entries and mark for adapter unsubscription
-                        if not self.subscription_index[sub_key]:
-                            del self.subscription_index[sub_key]
-                            # Only unsubscribe from adapter when last client unsubscribes
-                            should_unsubscribe_from_adapter = True
-
-                    # Get the user's broker adapter
-                    # Only unsubscribe from adapter if this was the last client for this symbol
-                    user_id = self.user_mapping.get(client_id)
-                    if (
-                        should_unsubscribe_from_adapter
-                        and user_id
-                        and user_id in self.broker_adapters
-                    ):
-                        adapter = self.broker_adapters[user_id]
-                        adapter.unsubscribe(symbol, exchange, mode)
-                        logger.debug(
-                            f"Last client unsubscribed from {symbol}:{exchange}, unsubscribing from adapter"
-                        )
-                except json.JSONDecodeError as e:
-                    logger.exception(f"Error parsing subscription: {sub_json}, Error: {e}")
+                    self._release_subscription(client_id, user_id, subscription)
                 except Exception as e:
                     logger.exception(f"Error processing subscription: {e}")
-                    continue
-
-            del self.subscriptions[client_id]
 
         # Remove from user mapping
         if client_id in self.user_mapping:
@@ -357,6 +544,9 @@ class WebSocketProxy:
                 adapter = self.broker_adapters[user_id]
                 broker_name = self.user_broker_mapping.get(user_id)
 
+                # The adapter-wide calls below supersede any queued upstream changes
+                self.subscription_manager.forget_user(user_id)
+
                 # For Flattrade and Shoonya, keep the connection alive and just unsubscribe from data
                 if broker_name in ["flattrade", "shoonya"] and hasattr(adapter, "unsubscribe_all"):
                     logger.info(
@@ -489,6 +679,10 @@ class WebSocketProxy:
             logger.exception(f"Error getting broker configuration for user {user_id}: {e}")
             return None
 
+    def _connect_broker_adapter(self, broker_name, user_id):
+        """Create and connect the broker adapter for a newly authenticated user"""
+        return connect_broker_adapter(broker_name, user_id)
+
     async def authenticate_client(self, client_id, data):
         """
         Authenticate a client using their API key and determine their broker
@@ -528,171 +722,11 @@ class WebSocketProxy:
 
         # Create or reuse broker adapter
         if user_id not in self.broker_adapters:
-            try:
-                # Create broker adapter with dynamic broker selection
-                adapter = create_broker_adapter(broker_name)
-                if not adapter:
-                    await self.send_error(
-                        client_id,
-                        "BROKER_ERROR",
-                        f"Failed to create adapter for broker: {broker_name}",
-                    )
-                    return
-
-                # Initialize adapter with broker configuration
-                # The adapter's initialize method should handle broker-specific setup
-                initialization_result = adapter.initialize(broker_name, user_id)
-                if initialization_result and initialization_result.get("status") == "error":
-                    error_msg = initialization_result.get(
-                        "message", initialization_result.get("error", "Failed to initialize broker adapter")
-                    )
-
-                    # Check if this is an auth error (403/401) - retry with fresh token
-                    # This handles the stale cache issue described in GitHub issue #765
-                    if adapter.is_auth_error(error_msg):
-                        logger.warning(f"Auth error during initialization for user {user_id}, retrying with fresh token")
-                        adapter.clear_auth_cache_for_user(user_id)
-
-                        # Retry initialization with fresh credentials
-                        initialization_result = adapter.initialize(broker_name, user_id)
-                        if initialization_result and initialization_result.get("status") == "error":
-                            error_msg = initialization_result.get("message", "Failed to initialize after retry")
-                            await self.send_error(client_id, "BROKER_INIT_ERROR", error_msg)
-                            return
-                    else:
-                        await self.send_error(client_id, "BROKER_INIT_ERROR", error_msg)
-                        return
-
-                # Connect to the broker
-                connect_result = adapter.connect()
-                # Handle both response formats:
-                # - Adapter format: {"status": "error", "code": "...", "message": "..."}
-                # - ConnectionPool format: {"success": False, "error": "..."}
-                is_error = (
-                    (connect_result and connect_result.get("status") == "error") or
-                    (connect_result and connect_result.get("success") == False)
-                )
-                if is_error:
-                    error_msg = connect_result.get("message", connect_result.get("error", "Failed to connect to broker"))
-                    error_code = connect_result.get("code", "")
-
-                    # Always retry connection failures with fresh token (issue #765)
-                    # Connection failures after re-login are almost always due to stale cached tokens
-                    # The upstox_client logs "401 Unauthorized" but returns generic "CONNECTION_FAILED"
-                    should_retry = (
-                        adapter.is_auth_error(error_msg) or
-                        error_code in ("CONNECTION_FAILED", "CONNECTION_ERROR") or
-                        "failed to connect" in error_msg.lower()
-                    )
-
-                    if should_retry:
-                        logger.warning(f"Connection failed for user {user_id}, retrying with fresh token (error: {error_msg}, code: {error_code})")
-
-                        # Clear stale cache in WebSocket process (issue #765)
-                        self._clear_auth_cache_for_user(user_id)
-                        adapter.clear_auth_cache_for_user(user_id)
-
-                        # Re-initialize with fresh credentials from database
-                        # Use force=True for pooled adapters to override existing initialization
-                        logger.info(f"Re-initializing adapter for user {user_id} with fresh token")
-                        try:
-                            # Try with force parameter (supported by _PooledAdapterWrapper)
-                            init_retry_result = adapter.initialize(broker_name, user_id, force=True)
-                        except TypeError:
-                            # Fallback for raw adapters that don't support force parameter
-                            init_retry_result = adapter.initialize(broker_name, user_id)
-                        # Handle both response formats
-                        init_is_error = (
-                            (init_retry_result and init_retry_result.get("status") == "error") or
-                            (init_retry_result and init_retry_result.get("success") == False)
-                        )
-                        if init_is_error:
-                            error_msg = init_retry_result.get("message", init_retry_result.get("error", "Failed to re-initialize"))
-                            logger.error(f"Re-initialization failed for user {user_id}: {error_msg}")
-                            await self.send_error(client_id, "BROKER_INIT_ERROR", error_msg)
-                            return
-
-                        # Retry connection
-                        logger.info(f"Retrying connection for user {user_id}")
-                        connect_result = adapter.connect()
-                        # Handle both response formats
-                        connect_is_error = (
-                            (connect_result and connect_result.get("status") == "error") or
-                            (connect_result and connect_result.get("success") == False)
-                        )
-                        if connect_is_error:
-                            error_msg = connect_result.get("message", connect_result.get("error", "Failed to connect after retry"))
-                            logger.error(f"Retry connection also failed for user {user_id}: {error_msg}")
-                            await self.send_error(client_id, "BROKER_CONNECTION_ERROR", error_msg)
-                            return
-
-                        logger.info(f"Retry successful for user {user_id}")
-                    else:
-                        await self.send_error(client_id, "BROKER_CONNECTION_ERROR", error_msg)
-                        return
-
-                # Store the adapter
-                self.broker_adapters[user_id] = adapter
-
-                logger.info(
-                    f"Successfully created and connected {broker_name} adapter for user {user_id}"
-                )
-
-            except Exception as e:
-                error_str = str(e)
-                logger.exception(f"Failed to create broker adapter for {broker_name}: {e}")
-
-                # Check if exception is an auth error - retry with fresh token
-                # This handles the stale cache issue described in GitHub issue #765
-                if self._is_auth_error_exception(error_str):
-                    logger.warning(f"Auth exception for user {user_id}, retrying with fresh token")
-                    try:
-                        self._clear_auth_cache_for_user(user_id)
-
-                        # Retry adapter creation
-                        adapter = create_broker_adapter(broker_name)
-                        if adapter:
-                            # Clear cache on the new adapter as well
-                            if hasattr(adapter, 'clear_auth_cache_for_user'):
-                                adapter.clear_auth_cache_for_user(user_id)
-
-                            initialization_result = adapter.initialize(broker_name, user_id)
-                            # Handle both response formats
-                            init_is_error = (
-                                (initialization_result and initialization_result.get("status") == "error") or
-                                (initialization_result and initialization_result.get("success") == False)
-                            )
-                            if not init_is_error:
-                                connect_result = adapter.connect()
-                                # Handle both response formats
-                                connect_is_error = (
-                                    (connect_result and connect_result.get("status") == "error") or
-                                    (connect_result and connect_result.get("success") == False)
-                                )
-                                if not connect_is_error:
-                                    self.broker_adapters[user_id] = adapter
-                                    logger.info(f"Successfully connected {broker_name} adapter for user {user_id} after retry")
-                                    # Fall through to success response
-                                else:
-                                    error_msg = connect_result.get("message", connect_result.get("error", "Failed to connect after retry"))
-                                    await self.send_error(client_id, "BROKER_CONNECTION_ERROR", error_msg)
-                                    return
-                            else:
-                                error_msg = initialization_result.get("message", initialization_result.get("error", "Failed to initialize after retry"))
-                                await self.send_error(client_id, "BROKER_INIT_ERROR", error_msg)
-                                return
-                        else:
-                            await self.send_error(client_id, "BROKER_ERROR", f"Failed to create adapter for {broker_name}")
-                            return
-                    except Exception as retry_error:
-                        logger.exception(f"Retry also failed for {broker_name}: {retry_error}")
-                        await self.send_error(client_id, "BROKER_ERROR", str(retry_error))
-                        return
-                else:
-                    import traceback
-                    logger.exception(traceback.format_exc())
-                    await self.send_error(client_id, "BROKER_ERROR", error_str)
-                    return
+            adapter, error_code, error_msg = self._connect_broker_adapter(broker_name, user_id)
+            if adapter is None:
+                await self.send_error(client_id, error_code, error_msg)
+                return
+            self.broker_adapters[user_id] = adapter
 
         # Send success response with broker information
         await self.send_message(
@@ -812,11 +846,11 @@ class WebSocketProxy:
         mode_str = data.get("mode", "Quote")  # Get mode as string (LTP, Quote, Depth)
         depth_level = data.get("depth", 5)  # Default to 5 levels
 
-        # Map string mode to numeric mode
-        mode_mapping = {"LTP": 1, "Quote": 2, "Depth": 3}
-
-        # Convert string mode to numeric if needed
-        mode = mode_mapping.get(mode_str, mode_str) if isinstance(mode_str, str) else mode_str
+        # Map string mode (LTP, Quote, Depth) to numeric mode
+        mode = normalize_mode(mode_str)
+        if mode is None:
+            await self.send_error(client_id, "INVALID_PARAMETERS", f"Invalid mode: {mode_str}")
+            return
 
         # Handle case where a single symbol is passed directly instead of as an array
         if not symbols and (data.get("symbol") and data.get("exchange")):
@@ -837,39 +871,31 @@ class WebSocketProxy:
         adapter = self.broker_adapters[user_id]
         broker_name = self.user_broker_mapping.get(user_id, "unknown")
 
-        # Process each symbol in the subscription request
-        subscription_responses = []
-        subscription_success = True
-
+        requested = []
         for symbol_info in symbols:
             symbol = symbol_info.get("symbol")
             exchange = symbol_info.get("exchange")
 
             if not symbol or not exchange:
                 continue  # Skip invalid symbols
+            requested.append((symbol, exchange))
+
+        # Hand every symbol to the subscription manager at once so the whole
+        # request goes upstream as one batch, off the event loop
+        responses = await aio.gather(
+            *(
+                self._subscribe_symbol(
+                    client_id, user_id, adapter, symbol, exchange, mode, depth_level
+                )
+                for symbol, exchange in requested
+            )
+        )
 
-            # Subscribe to market data
-            response = adapter.subscribe(symbol, exchange, mode, depth_level)
+        subscription_responses = []
+        subscription_success = True
 
+        for (symbol, exchange), response in zip(requested, responses, strict=True):
             if response.get("status") == "success":
-                # Store the subscription
-                subscription_info = {
-                    "symbol": symbol,
-                    "exchange": exchange,
-                    "mode": mode,
-                    "depth_level": depth_level,
-                    "broker": broker_name,
-                }
-
-                if client_id in self.subscriptions:
-                    self.subscriptions[client_id].add(json.dumps(subscription_info))
-                else:
-                    self.subscriptions[client_id] = {json.dumps(subscription_info)}
-
-                # OPTIMIZATION: Update subscription index for O(1) lookup
-                sub_key = (symbol, exchange, mode)
-                self.subscription_index[sub_key].add(client_id)
-
                 # Add to successful subscriptions
                 subscription_responses.append(
                     {
@@ -906,6 +932,60 @@ class WebSocketProxy:
             },
         )
 
+    async def _subscribe_symbol(
+        self, client_id, user_id, adapter, symbol, exchange, mode, depth_level
+    ):
+        """
+        Take a reference on the user's upstream subscription for one symbol and
+        index the client once it is streaming
+
+        Returns:
+            dict: Adapter response for the upstream subscription
+        """
+        subscription = (symbol, exchange, mode, depth_level)
+        client_subscriptions = self.subscriptions.setdefault(client_id, set())
+        if subscription in client_subscriptions:
+            # Repeated request from the same client, already counted
+            return self.subscription_manager.book.responses.get(
+                (user_id, symbol, exchange)
+            ) or {"status": "success"}
+
+        client_subscriptions.add(subscription)
+        response = await self.subscription_manager.subscribe(
+            user_id, adapter, symbol, exchange, mode, depth_level
+        )
+
+        # The client may have disconnected (and released its subscriptions) meanwhile
+        if subscription not in self.subscriptions.get(client_id, ()):
+            return response
+        if response.get("status") == "success":
+            self.subscription_index[(symbol, exchange, mode)].add(client_id)
+        else:
+            client_subscriptions.discard(subscription)
+            self.subscription_manager.unsubscribe(
+                user_id, adapter, symbol, exchange, mode, depth_level
+            )
+        return response
+
+    def _release_subscription(self, client_id, user_id, subscription):
+        """
+        Remove one of a client's (symbol, exchange, mode, depth_level) subscriptions
+        from the index and drop its reference on the upstream subscription
+        """
+        symbol, exchange, mode, depth_level = subscription
+        sub_key = (symbol, exchange, mode)
+        client_ids = self.subscription_index.get(sub_key)
+        if client_ids is not None:
+            client_ids.discard(client_id)
+            if not client_ids:
+                del self.subscription_index[sub_key]
+
+        adapter = self.broker_adapters.get(user_id)
+        if adapter is not None:
+            self.subscription_manager.unsubscribe(
+                user_id, adapter, symbol, exchange, mode, depth_level
+            )
+
     async def unsubscribe_client(self, client_id, data):
         """
         Unsubscribe a client from market data
@@ -950,155 +1030,50 @@ class WebSocketProxy:
             await self.send_error(client_id, "BROKER_ERROR", "Broker adapter not found")
             return
 
-        adapter = self.broker_adapters[user_id]
         broker_name = self.user_broker_mapping.get(user_id, "unknown")
 
-        # Process unsubscribe request
-        successful_unsubscriptions = []
-        failed_unsubscriptions = []
+        client_subscriptions = self.subscriptions.get(client_id, set())
 
         # Handle unsubscribe_all case
         if is_unsubscribe_all:
-            # Get all current subscriptions
-            if client_id in self.subscriptions:
-                # Convert all stored subscription strings back to dictionaries
-                all_subscriptions = []
-                for sub_json in self.subscriptions[client_id]:
-                    try:
-                        sub_dict = json.loads(sub_json)
-                        all_subscriptions.append(sub_dict)
-                    except json.JSONDecodeError:
-                        logger.error(f"Failed to parse subscription: {sub_json}")
-
-                # Unsubscribe from each subscription
-                for sub in all_subscriptions:
-                    symbol = sub.get("symbol")
-                    exchange = sub.get("exchange")
-                    mode = sub.get("mode")
-
-                    if symbol and exchange:
-                        # Remove from subscription index and check if we should unsubscribe from adapter
-                        sub_key = (symbol, exchange, mode)
-                        should_unsubscribe_from_adapter = False
-                        if sub_key in self.subscription_index:
-                            self.subscription_index[sub_key].discard(client_id)
-                            # Only unsubscribe from adapter when last client unsubscribes
-                            if not self.subscription_index[sub_key]:
-                                del self.subscription_index[sub_key]
-                                should_unsubscribe_from_adapter = True
-
-                        # Only call adapter.unsubscribe if this was the last client for this symbol
-                        if should_unsubscribe_from_adapter:
-                            response = adapter.unsubscribe(symbol, exchange, mode)
-                            logger.debug(
-                                f"Last client unsubscribed from {symbol}:{exchange}, unsubscribing from adapter"
-                            )
-
-                            if response.get("status") != "success":
-                                failed_unsubscriptions.append(
-                                    {
-                                        "symbol": symbol,
-                                        "exchange": exchange,
-                                        "status": "error",
-                                        "message": response.get("message", "Unsubscription failed"),
-                                        "broker": broker_name,
-                                    }
-                                )
-                                continue
-
-                        successful_unsubscriptions.append(
-                            {
-                                "symbol": symbol,
-                                "exchange": exchange,
-                                "status": "success",
-                                "broker": broker_name,
-                            }
-                        )
-
-                # Clear all subscriptions for this client
-                self.subscriptions[client_id].clear()
+            removed = list(client_subscriptions)
+            released = [(symbol, exchange) for symbol, exchange, _, _ in removed]
         else:
             # Process specific symbols
+            removed = []
+            released = []
             for symbol_info in symbols:
                 symbol = symbol_info.get("symbol")
                 exchange = symbol_info.get("exchange")
-                mode = symbol_info.get("mode", 2)  # Default to Quote mode
+                mode = normalize_mode(symbol_info.get("mode", 2))  # Default to Quote mode
 
                 if not symbol or not exchange:
                     continue  # Skip invalid symbols
 
-                # Remove from subscription index and check if we should unsubscribe from adapter
-                sub_key = (symbol, exchange, mode)
-                should_unsubscribe_from_adapter = False
-                if sub_key in self.subscription_index:
-                    self.subscription_index[sub_key].discard(client_id)
-                    # Only unsubscribe from adapter when last client unsubscribes
-                    if not self.subscription_index[sub_key]:
-                        del self.subscription_index[sub_key]
-                        should_unsubscribe_from_adapter = True
-
-                # Remove from client's subscription list
-                if client_id in self.subscriptions:
-                    # Remove any matching subscription (with or without broker info)
-                    subscriptions_to_remove = []
-                    for sub_json in self.subscriptions[client_id]:
-                        try:
-                            sub_data = json.loads(sub_json)
-                            if (
-                                sub_data.get("symbol") == symbol
-                                and sub_data.get("exchange") == exchange
-                                and sub_data.get("mode") == mode
-                            ):
-                                subscriptions_to_remove.append(sub_json)
-                        except json.JSONDecodeError:
-                            continue
-
-                    for sub_json in subscriptions_to_remove:
-                        self.subscriptions[client_id].discard(sub_json)
-
-                # Only call adapter.unsubscribe if this was the last client for this symbol
-                if should_unsubscribe_from_adapter:
-                    response = adapter.unsubscribe(symbol, exchange, mode)
-                    logger.debug(
-                        f"Last client unsubscribed from {symbol}:{exchange}, unsubscribing from adapter"
-                    )
-
-                    if response.get("status") != "success":
-                        failed_unsubscriptions.append(
-                            {
-                                "symbol": symbol,
-                                "exchange": exchange,
-                                "status": "error",
-                                "message": response.get("message", "Unsubscription failed"),
-                                "broker": broker_name,
-                            }
-                        )
-                        continue
-
-                successful_unsubscriptions.append(
-                    {
-                        "symbol": symbol,
-                        "exchange": exchange,
-                        "status": "success",
-                        "broker": broker_name,
-                    }
+                removed.extend(
+                    sub for sub in client_subscriptions if sub[:3] == (symbol, exchange, mode)
                 )
+                released.append((symbol, exchange))
 
-        # Send combined response
-        status = "success"
-        if len(failed_unsubscriptions) > 0 and len(successful_unsubscriptions) > 0:
-            status = "partial"
-        elif len(failed_unsubscriptions) > 0 and len(successful_unsubscriptions) == 0:
-            status = "error"
+        # Upstream unsubscribes are applied in the background by the subscription
+        # manager once no client of the user needs the symbol
+        for subscription in removed:
+            client_subscriptions.discard(subscription)
+            self._release_subscription(client_id, user_id, subscription)
+
+        successful_unsubscriptions = [
+            {"symbol": symbol, "exchange": exchange, "status": "success", "broker": broker_name}
+            for symbol, exchange in released
+        ]
 
         await self.send_message(
             client_id,
             {
                 "type": "unsubscribe",
-                "status": status,
+                "status": "success",
                 "message": "Unsubscription processing complete",
                 "successful": successful_unsubscriptions,
-                "failed": failed_unsubscriptions,
+                "failed": [],
                 "broker": broker_name,
             },
         )
@@ -1149,8 +1124,7 @@ class WebSocketProxy:
                 auth_cache,
                 broker_cache,
                 feed_token_cache,
-                invalid_api_key_cache,
-                verified_api_key_cache,
+                invalidate_api_key_cache,
             )
 
             # Parse the invalidation message
@@ -1186,12 +1160,8 @@ class WebSocketProxy:
                     del broker_cache[cache_key_auth]
                     caches_cleared.append("broker_cache")
 
-                # Clear any cached API key verifications for this user
-                # We can't easily identify which API key hashes belong to this user,
-                # so we clear all API key caches as a safety measure
-                # This is acceptable since the cache will repopulate on next request
-                verified_api_key_cache.clear()
-                invalid_api_key_cache.clear()
+                # Drop this user's verified API keys (the key may have been regenerated)
+                invalidate_api_key_cache(user_id)
                 caches_cleared.append("verified_api_key_cache")
                 caches_cleared.append("invalid_api_key_cache")
 
@@ -1205,6 +1175,7 @@ class WebSocketProxy:
             if user_id in self.broker_adapters:
                 try:
                     adapter = self.broker_adapters[user_id]
+                    self.subscription_manager.forget_user(user_id)
                     adapter.disconnect()
                     del self.broker_adapters[user_id]
                     logger.info(f"Disconnected stale broker adapter for user {user_id}")
@@ -1216,7 +1187,8 @@ class WebSocketProxy:
         except Exception as e:
             logger.exception(f"Error processing cache invalidation: {e}")
 
-    def _is_auth_error_exception(self, error_message: str) -> bool:
+    @staticmethod
+    def _is_auth_error_exception(error_message: str) -> bool:
         """
         Check if an error message indicates an authentication failure.
 
@@ -1247,7 +1219,8 @@ class WebSocketProxy:
         ]
         return any(indicator in error_lower for indicator in auth_error_indicators)
 
-    def _clear_auth_cache_for_user(self, user_id: str):
+    @staticmethod
+    def _clear_auth_cache_for_user(user_id: str):
         """
         Clear all cached authentication data for a user.
 
@@ -1286,6 +1259,21 @@ class WebSocketProxy:
         except Exception as e:
             logger.exception(f"Error clearing auth cache for user {user_id}: {e}")
 
+    def _feed_market_data_service(self, symbol, exchange, mode, market_data):
+        """Hand a tick to this process's MarketDataService"""
+        try:
+            mds_data = {
+                "symbol": symbol,
+                "exchange": exchange,
+                "mode": mode,
+                "data": market_data,
+            }
+            market_data_service = get_market_data_service()
+            market_data_service.process_market_data(mds_data)
+        except Exception as mds_error:
+            # Don't block WebSocket delivery if MarketDataService has issues
+            logger.debug(f"MarketDataService processing error: {mds_error}")
+
     async def zmq_listener(self):
         """
         OPTIMIZED: Listen for messages from broker adapters via ZeroMQ and forward to clients
@@ -1333,43 +1321,11 @@ class WebSocketProxy:
                 market_data = json.loads(data_str)
 
                 # Extract topic components
-                # Support both formats:
-                # New format: BROKER_EXCHANGE_SYMBOL_MODE (with broker name)
-                # Old format: EXCHANGE_SYMBOL_MODE (without broker name)
-                # Special case: NSE_INDEX_SYMBOL_MODE (exchange contains underscore)
-                parts = topic_str.split("_")
-
-                # Special case handling for NSE_INDEX and BSE_INDEX
-                if len(parts) >= 4 and parts[0] == "NSE" and parts[1] == "INDEX":
-                    broker_name = "unknown"
-                    exchange = "NSE_INDEX"
-                    symbol = parts[2]
-                    mode_str = parts[3]
-                elif len(parts) >= 4 and parts[0] == "BSE" and parts[1] == "INDEX":
-                    broker_name = "unknown"
-                    exchange = "BSE_INDEX"
-                    symbol = parts[2]
-                    mode_str = parts[3]
-                elif len(parts) >= 5 and parts[1] == "INDEX":  # BROKER_NSE_INDEX_SYMBOL_MODE format
-                    broker_name = parts[0]
-                    exchange = f"{parts[1]}_{parts[2]}"
-                    symbol = parts[3]
-                    mode_str = parts[4]
-                elif len(parts) >= 4:
-                    # Standard format with broker name
-                    broker_name = parts[0]
-                    exchange = parts[1]
-                    symbol = parts[2]
-                    mode_str = parts[3]
-                elif len(parts) >= 3:
-                    # Old format without broker name
-                    broker_name = "unknown"
-                    exchange = parts[0]
-                    symbol = parts[1]
-                    mode_str = parts[2]
-                else:
+                parsed = parse_topic(topic_str)
+                if parsed is None:
                     logger.warning(f"Invalid topic format: {topic_str}")
                     continue
+                broker_name, exchange, symbol, mode_str = parsed
 
                 # OPTIMIZATION: Use pre-computed mode map
                 mode = self.MODE_MAP.get(mode_str)
@@ -1392,66 +1348,84 @@ class WebSocketProxy:
 
                 # Feed market data to MarketDataService for backend consumers
                 # (sandbox execution engine, position MTM, RMS, etc.)
-                # This runs regardless of whether WebSocket clients are subscribed
-                try:
-                    mds_data = {
-                        "symbol": symbol,
-                        "exchange": exchange,
-                        "mode": mode,
-                        "data": market_data,
-                    }
-                    market_data_service = get_market_data_service()
-                    market_data_service.process_market_data(mds_data)
-                except Exception as mds_error:
-                    # Don't block WebSocket delivery if MarketDataService has issues
-                    logger.debug(f"MarketDataService processing error: {mds_error}")
+                # This runs regardless of whether WebSocket clients are subscribed;
+                # it only updates the cache and queues the tick, subscriber
+                # callbacks run on the service's dispatcher threads
+                if self.feed_market_data_service:
+                    self._feed_market_data_service(symbol, exchange, mode, market_data)
 
                 # OPTIMIZATION 2: O(1) lookup using subscription index
                 # Instead of iterating through ALL clients and ALL subscriptions (O(n²)),
-                # directly lookup clients subscribed to this specific (symbol, exchange, mode)
-                client_ids = self.subscription_index.get(sub_key, set()).copy()
-
-                if not client_ids:
-                    continue  # No WebSocket clients subscribed, skip delivery
+                # directly lookup clients subscribed to this (symbol, exchange) at this
+                # mode or below: the subscription manager subscribes upstream once, at
+                # the highest mode any of a user's clients needs, and lower-mode clients
+                # get their ticks cut from it
+                upstream = self.subscription_manager.book.upstream
 
                 # OPTIMIZATION 3: Batch message sends for parallel delivery
                 send_tasks = []
 
-                # OPTIMIZATION 4: Pre-create base message (reused for all clients)
-                # This avoids creating the same dict 1000 times
-                base_message = {
-                    "type": "market_data",
-                    "symbol": symbol,
-                    "exchange": exchange,
-                    "mode": mode,
-                    "data": market_data,
-                }
+                for client_mode in range(mode, 0, -1):
+                    client_ids = self.subscription_index.get((symbol, exchange, client_mode))
+                    if not client_ids:
+                        continue
 
-                # OPTIMIZATION 5: Pre-serialize JSON once (not per-client)
-                # Most clients get the same message, so serialize once
-                base_message_str = None
+                    derived = client_mode != mode
+                    if derived and client_mode == 1:
+                        # Same LTP throttle as ticks published on the LTP topic
+                        ltp_key = (symbol, exchange, 1)
+                        last_time = self.last_message_time.get(ltp_key, 0)
+                        if current_time - last_time < self.message_throttle_interval:
+                            continue
+                        self.last_message_time[ltp_key] = current_time
+                    client_data = derive_mode_data(market_data, client_mode) if derived else market_data
 
-                for client_id in client_ids:
-                    # Verify client still exists
-                    if client_id not in self.clients:
-                        continue
+                    # OPTIMIZATION 4: Pre-create base message (reused for all clients)
+                    # This avoids creating the same dict 1000 times
+                    base_message = {
+                        "type": "market_data",
+                        "symbol": symbol,
+                        "exchange": exchange,
+                        "mode": client_mode,
+                        "data": client_data,
+                    }
+                    delivered = False
 
-                    # Verify user mapping exists
-                    user_id = self.user_mapping.get(client_id)
-                    if not user_id:
-                        continue
+                    for client_id in client_ids.copy():
+                        # Verify client still exists
+                        if client_id not in self.clients:
+                            continue
 
-                    # Check broker match (important for multi-broker setups)
-                    client_broker = self.user_broker_mapping.get(user_id)
-                    if broker_name != "unknown" and client_broker and client_broker != broker_name:
-                        continue
+                        # Verify user mapping exists
+                        user_id = self.user_mapping.get(client_id)
+                        if not user_id:
+                            continue
+
+                        # Deliver only from the topic of the user's upstream mode, so a
+                        # client never gets the same tick twice
+                        user_upstream = upstream.get((user_id, symbol, exchange))
+                        if user_upstream is None:
+                            if derived:
+                                continue
+                        elif user_upstream[0] != mode:
+                            continue
+
+                        # Check broker match (important for multi-broker setups)
+                        client_broker = self.user_broker_mapping.get(user_id)
+                        if broker_name != "unknown" and client_broker and client_broker != broker_name:
+                            continue
+
+                        # Add broker to message
+                        message = base_message.copy()
+                        message["broker"] = broker_name if broker_name != "unknown" else client_broker
 
-                    # Add broker to message
-                    message = base_message.copy()
-                    message["broker"] = broker_name if broker_name != "unknown" else client_broker
+                        # Add to batch
+                        send_tasks.append(self.send_message(client_id, message))
+                        delivered = True
 
-                    # Add to batch
-                    send_tasks.append(self.send_message(client_id, message))
+                    # Backend consumers of the lower mode see the derived ticks too
+                    if derived and delivered and self.feed_market_data_service:
+                        self._feed_market_data_service(symbol, exchange, client_mode, client_data)
 
                 # Send all messages in parallel (non-blocking)
                 if send_tasks:
@@ -0,0 +1,269 @@
+"""
+Reference counted, batched upstream subscriptions for the WebSocket proxy
+
+Clients subscribe per (symbol, exchange, mode). The broker adapter is asked for
+at most one subscription per (user, symbol, exchange), at the highest mode any
+of that user's clients needs; the proxy cuts lower modes out of the higher-mode
+ticks (see derive_mode_data), so several tabs watching the same symbol cost the
+broker one subscription.
+
+Subscribe and unsubscribe requests only change reference counts on the event
+loop. Changes are collected for WEBSOCKET_SUBSCRIBE_BATCH_MS (default 5 ms) and
+applied as one batch per user on a worker thread, so a client subscribing to a
+200-strike option chain never blocks market data delivery to other clients.
+"""
+
+import asyncio as aio
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from utils.logging import get_logger
+
+logger = get_logger("websocket_proxy")
+
+SUBSCRIBE_BATCH_MS = float(os.getenv("WEBSOCKET_SUBSCRIBE_BATCH_MS", "5"))
+
+MODE_LTP = 1
+MODE_QUOTE = 2
+MODE_DEPTH = 3
+MODE_NAMES = {"ltp": MODE_LTP, "quote": MODE_QUOTE, "depth": MODE_DEPTH}
+
+# Fields an LTP client gets when its ticks are cut from a Quote/Depth tick
+LTP_FIELDS = ("symbol", "exchange", "token", "ltp", "ltt", "timestamp", "volume")
+
+SubscriptionKey = tuple[str, str, str]  # (user_id, symbol, exchange)
+Upstream = tuple[int, int]  # (mode, depth_level) subscribed at the adapter
+
+
+def normalize_mode(mode) -> int | None:
+    """Map a client mode (1-3 or LTP/Quote/Depth in any case) to 1-3, None if invalid"""
+    if isinstance(mode, str):
+        return MODE_NAMES.get(mode.lower())
+    if mode in (MODE_LTP, MODE_QUOTE, MODE_DEPTH):
+        return mode
+    return None
+
+
+def derive_mode_data(data: dict, mode: int) -> dict:
+    """Cut a higher-mode tick down to what a client of `mode` expects"""
+    if mode == MODE_QUOTE:
+        return {k: v for k, v in data.items() if k != "depth"}
+    if mode == MODE_LTP:
+        return {k: data[k] for k in LTP_FIELDS if k in data}
+    return data
+
+
+class SubscriptionBook:
+    """
+    Client reference counts per (user, symbol, exchange) and the upstream
+    subscription each key needs. Only touched from the event loop.
+    """
+
+    def __init__(self):
+        self.refs: dict[SubscriptionKey, Counter] = {}  # key -> Counter[(mode, depth_level)]
+        self.upstream: dict[SubscriptionKey, Upstream] = {}  # confirmed at the adapter
+        self.responses: dict[SubscriptionKey, dict] = {}  # adapter reply for the upstream
+
+    def add(self, user_id, symbol, exchange, mode, depth_level) -> SubscriptionKey:
+        key = (user_id, symbol, exchange)
+        self.refs.setdefault(key, Counter())[(mode, depth_level)] += 1
+        return key
+
+    def remove(self, user_id, symbol, exchange, mode, depth_level) -> SubscriptionKey | None:
+        """Drop one reference; returns None if there was none"""
+        key = (user_id, symbol, exchange)
+        refs = self.refs.get(key)
+        if not refs or not refs[(mode, depth_level)]:
+            return None
+        refs[(mode, depth_level)] -= 1
+        if not refs[(mode, depth_level)]:
+            del refs[(mode, depth_level)]
+        if not refs:
+            del self.refs[key]
+        return key
+
+    def target(self, key: SubscriptionKey) -> Upstream | None:
+        """Highest mode (and deepest depth at that mode) any client needs"""
+        refs = self.refs.get(key)
+        if not refs:
+            return None
+        mode = max(m for m, _ in refs)
+        return mode, max(d for m, d in refs if m == mode)
+
+    def covers(self, key: SubscriptionKey, mode: int, depth_level: int) -> bool:
+        """Whether the current upstream subscription already serves this request"""
+        upstream = self.upstream.get(key)
+        if upstream is None or upstream[0] < mode:
+            return False
+        return upstream[0] != MODE_DEPTH or mode != MODE_DEPTH or upstream[1] >= depth_level
+
+    def clear_user(self, user_id):
+        for table in (self.refs, self.upstream, self.responses):
+            for key in [k for k in table if k[0] == user_id]:
+                del table[key]
+
+
+def apply_changes(adapter, changes: list) -> dict:
+    """
+    Apply (key, current, target) upstream changes for one user's adapter and
+    return the adapter reply per key. Runs on a worker thread.
+
+    Adapters may implement apply_subscription_changes(changes) to take the whole
+    batch in one call.
+    """
+    batch = getattr(adapter, "apply_subscription_changes", None)
+    if batch is not None:
+        return batch(changes)
+
+    results = {}
+    for key, current, target in changes:
+        _, symbol, exchange = key
+        response = {"status": "success"}
+        try:
+            if current is not None:
+                # Drop the old mode first: some adapters key subscriptions by symbol only
+                response = adapter.unsubscribe(symbol, exchange, current[0])
+            if target is not None:
+                response = adapter.subscribe(symbol, exchange, target[0], target[1])
+        except Exception as e:
+            logger.exception(f"Error changing subscription for {exchange}:{symbol}: {e}")
+            response = {"status": "error", "message": str(e)}
+        results[key] = response
+    return results
+
+
+class SubscriptionManager:
+    """
+    Shares upstream subscriptions between a proxy's clients and applies
+    changes in batches off the event loop
+    """
+
+    def __init__(self, batch_ms: float = SUBSCRIBE_BATCH_MS, max_workers: int = 4):
+        self.book = SubscriptionBook()
+        self.batch_delay = max(batch_ms, 0) / 1000.0
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ws_subscribe"
+        )
+        # user_id -> key -> futures of clients waiting on that key's next batch
+        self._pending: dict[str, dict[SubscriptionKey, list[aio.Future]]] = {}
+        self._adapters: dict[str, Any] = {}
+        self._flushers: dict[str, aio.Task] = {}
+        self._generations: Counter = Counter()  # bumped by forget_user
+        self.metrics = {"requests": 0, "shared": 0, "batches": 0, "changes": 0, "failed": 0}
+
+    def upstream_mode(self, user_id, symbol, exchange) -> int | None:
+        upstream = self.book.upstream.get((user_id, symbol, exchange))
+        return upstream[0] if upstream else None
+
+    async def subscribe(self, user_id, adapter, symbol, exchange, mode, depth_level=5) -> dict:
+        """
+        Add a client reference and wait until the upstream subscription covers it.
+
+        The reference is kept even if the adapter reports an error; the caller
+        drops it with unsubscribe().
+        """
+        self.metrics["requests"] += 1
+        key = self.book.add(user_id, symbol, exchange, mode, depth_level)
+        if self.book.covers(key, mode, depth_level) and key not in self._pending.get(user_id, ()):
+            self.metrics["shared"] += 1
+            return self.book.responses.get(key) or {"status": "success"}
+
+        future = aio.get_running_loop().create_future()
+        self._enqueue(user_id, adapter, key, future)
+        return await future
+
+    def unsubscribe(self, user_id, adapter, symbol, exchange, mode, depth_level=5) -> bool:
+        """Drop a client reference; any upstream change is applied in the background"""
+        key = self.book.remove(user_id, symbol, exchange, mode, depth_level)
+        if key is None:
+            return False
+        if self.book.target(key) != self.book.upstream.get(key):
+            self._enqueue(user_id, adapter, key, None)
+        return True
+
+    def forget_user(self, user_id):
+        """Drop all state for a user whose adapter is being disconnected or reset"""
+        self._generations[user_id] += 1
+        for waiters in self._pending.pop(user_id, {}).values():
+            for future in waiters:
+                if not future.done():
+                    future.set_result(
+                        {"status": "error", "message": "Broker adapter was disconnected"}
+                    )
+        self._adapters.pop(user_id, None)
+        self.book.clear_user(user_id)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_metrics(self) -> dict:
+        metrics = dict(self.metrics)
+        metrics["upstream"] = len(self.book.upstream)
+        metrics["keys"] = len(self.book.refs)
+        return metrics
+
+    def _enqueue(self, user_id, adapter, key, future):
+        waiters = self._pending.setdefault(user_id, {}).setdefault(key, [])
+        if future is not None:
+            waiters.append(future)
+        self._adapters[user_id] = adapter
+        if user_id not in self._flushers:
+            self._flushers[user_id] = aio.get_running_loop().create_task(self._flush(user_id))
+
+    async def _flush(self, user_id):
+        """Apply a user's pending changes, one batch at a time"""
+        loop = aio.get_running_loop()
+        try:
+            while self._pending.get(user_id):
+                await aio.sleep(self.batch_delay)  # let the rest of the burst arrive
+                batch = self._pending.pop(user_id, {})
+                adapter = self._adapters.get(user_id)
+                generation = self._generations[user_id]
+
+                changes = []
+                for key in batch:
+                    current, target = self.book.upstream.get(key), self.book.target(key)
+                    if current != target:
+                        changes.append((key, current, target))
+
+                results = {}
+                if changes and adapter is not None:
+                    self.metrics["batches"] += 1
+                    self.metrics["changes"] += len(changes)
+                    try:
+                        results = await loop.run_in_executor(
+                            self.executor, apply_changes, adapter, changes
+                        )
+                    except Exception as e:
+                        logger.exception(f"Error applying subscription batch for {user_id}: {e}")
+                        results = {
+                            key: {"status": "error", "message": str(e)} for key, _, _ in changes
+                        }
+
+                    if generation == self._generations[user_id]:
+                        self._record(changes, results)
+
+                for key, waiters in batch.items():
+                    response = results.get(key) or self.book.responses.get(key)
+                    if response is None:
+                        response = {"status": "error", "message": "Subscription failed"}
+                    for future in waiters:
+                        if not future.done():
+                            future.set_result(response)
+        finally:
+            self._flushers.pop(user_id, None)
+
+    def _record(self, changes, results):
+        for key, _, target in changes:
+            response = results.get(key) or {"status": "error", "message": "Subscription failed"}
+            if target is not None and response.get("status") == "success":
+                self.book.upstream[key] = target
+                self.book.responses[key] = response
+            else:
+                # Unsubscribed, or the old mode was dropped and the new one failed
+                if target is not None:
+                    self.metrics["failed"] += 1
+                self.book.upstream.pop(key, None)
+                self.book.responses.pop(key, None)
@@ -1,39 +1,24 @@
-import re
-from datetime import datetime
+import os
+import sys
 
-log_file = "logs/openalgo.log"
+# Reports query the trade journal written by the strategies and the sandbox
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "openalgo"))
 
-def parse_logs():
-    latencies = []
-    last_signal_time = None
-
-    try:
-        with open(log_file, "r") as f:
-            for line in f:
-                # Extract timestamp
-                match = re.search(r"\[(.*?)\]", line)
-                if not match:
-                    continue
+from strategies.utils.journal_reports import JournalReports
 
-                timestamp_str = match.group(1)
-                try:
-                    timestamp = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S,%f")
-                except ValueError:
-                    continue
+def parse_logs():
+    # Signal to order placement latency, from SIGNAL/ORDER journal event pairs
+    reports = JournalReports()
+    reports.refresh()
+    latencies = reports.latency()
 
-                if "Signal Generated" in line:
-                    last_signal_time = timestamp
-                elif "Order Placed" in line and last_signal_time:
-                    latency = (timestamp - last_signal_time).total_seconds() * 1000
-                    latencies.append(latency)
-                    print(f"Latency: {latency:.2f}ms")
-                    last_signal_time = None # Reset
-    except FileNotFoundError:
-        print(f"Log file {log_file} not found.")
-        return
+    for strategy, stats in latencies.items():
+        print(f"{strategy}: Avg {stats['avg_ms']:.2f}ms, Max {stats['max_ms']:.2f}ms ({stats['orders']} orders)")
 
-    if latencies:
-        avg_latency = sum(latencies) / len(latencies)
+    orders = sum(stats['orders'] for stats in latencies.values())
+    if orders:
+        avg_latency = sum(stats['avg_ms'] * stats['orders'] for stats in latencies.values()) / orders
         print(f"\nAverage Latency: {avg_latency:.2f}ms")
         if avg_latency > 500:
             print("❌ Latency exceeds 500ms!")
@@ -42,5 +27,7 @@ def parse_logs():
     else:
         print("No signal/order pairs found.")
 
+    return latencies
+
 if __name__ == "__main__":
     parse_logs()
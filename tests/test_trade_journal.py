@@ -0,0 +1,199 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import time
+from datetime import date, datetime
+from unittest.mock import MagicMock
+
+# Add openalgo directory to path
+sys.path.append(os.path.join(os.getcwd(), 'openalgo'))
+
+import duckdb
+
+from strategies.utils import trade_journal
+from strategies.utils.journal_reports import JournalReports
+from strategies.utils.trade_journal import FILL, ORDER, PNL, SIGNAL, TradeJournal, list_partitions
+
+DAY = date(2026, 2, 16)
+
+
+def at(hour, minute, second=0, microsecond=0):
+    return datetime(DAY.year, DAY.month, DAY.day, hour, minute, second, microsecond)
+
+
+class TestTradeJournal(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.journal = TradeJournal(root=self.root, flush_interval=3600)
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def trade(self, strategy, pnl, ts):
+        self.journal.record(PNL, strategy, symbol="SBIN", action="SELL", quantity=1, pnl=pnl, ts=ts)
+
+    def test_events_are_partitioned_by_date_and_strategy(self):
+        self.journal.record(SIGNAL, "ORB Nifty", symbol="NIFTY", action="buy", quantity=50,
+                            price=22100.0, signal_id="s1", ts=at(10, 0), urgency="HIGH")
+        self.journal.record(PNL, "Gap/Fade", symbol="SBIN", pnl=-12.5, ts=datetime(2026, 2, 17, 9, 30))
+        self.assertEqual(self.journal.flush(), 2)
+        self.assertEqual(self.journal.flush(), 0)
+
+        partitions = list_partitions(self.root)
+        self.assertEqual(sorted(partitions), [("2026-02-16", "ORB_Nifty"), ("2026-02-17", "Gap_Fade")])
+
+        con = duckdb.connect()
+        trade_journal.journal_relation(con, [f for files in partitions.values() for f in files])
+        rows = con.execute(
+            "SELECT date, strategy, event, action, quantity, price, details FROM journal ORDER BY ts"
+        ).fetchall()
+        self.assertEqual(rows[0][:6], (DAY, "ORB_Nifty", SIGNAL, "BUY", 50, 22100.0))
+        self.assertIn('"urgency": "HIGH"', rows[0][6])
+        self.assertEqual(rows[1][2], PNL)
+
+        # An empty journal still has the full schema
+        trade_journal.journal_relation(con, [])
+        self.assertEqual(con.execute("SELECT count(*) FROM journal WHERE event = 'PNL'").fetchone(), (0,))
+
+    def test_flush_thread_writes_when_buffer_fills(self):
+        journal = TradeJournal(root=self.root, flush_interval=3600, max_buffer=3)
+        for i in range(3):
+            journal.record(SIGNAL, "S", symbol="SBIN", ts=at(10, i))
+        for _ in range(100):
+            if list_partitions(self.root):
+                break
+            time.sleep(0.05)
+        self.assertEqual(len(list_partitions(self.root)[("2026-02-16", "S")]), 1)
+        journal.close()
+
+    def test_leaderboard_stats_and_incremental_refresh(self):
+        for i, pnl in enumerate([10.0, -30.0, 5.0]):
+            self.trade("A", pnl, at(10, i))
+        self.trade("B", 4.0, at(10, 0))
+        self.journal.flush()
+
+        reports = JournalReports(self.root)
+        self.assertEqual(reports.refresh(), 2)
+        self.assertEqual(reports.refresh(), 0)  # Nothing new
+
+        stats = {row["strategy"]: row for row in reports.strategy_stats(DAY, DAY)}
+        self.assertEqual(stats["A"]["trades"], 3)
+        self.assertEqual(stats["A"]["wins"], 2)
+        self.assertAlmostEqual(stats["A"]["win_rate"], 200 / 3)
+        self.assertAlmostEqual(stats["A"]["profit_factor"], 0.5)
+        self.assertEqual(stats["A"]["max_drawdown"], -30.0)
+        self.assertEqual(stats["B"]["profit_factor"], float("inf"))
+
+        # New events for one partition: only that one is recomputed, and the
+        # cached summaries survive a restart
+        self.trade("A", 50.0, at(11, 0))
+        self.journal.flush()
+        reports = JournalReports(self.root)
+        self.assertEqual(reports.refresh(), 1)
+        stats = {row["strategy"]: row for row in reports.strategy_stats()}
+        self.assertEqual(stats["A"]["net_pnl"], 35.0)
+        self.assertEqual(stats["B"]["trades"], 1)
+
+    def test_drawdown_chains_across_days(self):
+        # Day 1: +20 then -5 (cumulative 15), day 2: -25 then +40
+        self.trade("A", 20.0, datetime(2026, 2, 16, 10, 0))
+        self.trade("A", -5.0, datetime(2026, 2, 16, 11, 0))
+        self.trade("A", -25.0, datetime(2026, 2, 17, 10, 0))
+        self.trade("A", 40.0, datetime(2026, 2, 17, 11, 0))
+        self.journal.flush()
+
+        reports = JournalReports(self.root)
+        reports.refresh()
+        (row,) = reports.strategy_stats()
+        self.assertEqual(row["max_drawdown"], -30.0)  # Peak 20 -> trough -10
+        self.assertEqual(row["net_pnl"], 30.0)
+
+        (day2,) = reports.strategy_stats(date(2026, 2, 17), date(2026, 2, 17))
+        self.assertEqual(day2["max_drawdown"], -25.0)
+
+    def test_slippage_and_latency(self):
+        self.journal.record(SIGNAL, "A", symbol="NIFTY", action="BUY", price=100.0,
+                            signal_id="s1", ts=at(10, 0))
+        self.journal.record(ORDER, "A", symbol="NIFTY", signal_id="s1", order_id="o1",
+                            ts=at(10, 0, 0, 250000))
+        self.journal.record(FILL, "A", symbol="NIFTY", price=101.5, order_id="o1",
+                            source="sandbox", ts=at(10, 0, 5))
+        self.journal.record(SIGNAL, "A", symbol="NIFTY", action="SELL", price=110.0,
+                            signal_id="s2", ts=at(10, 5))
+        self.journal.record(ORDER, "A", symbol="NIFTY", signal_id="s2", order_id="o2",
+                            ts=at(10, 5, 0, 750000))
+        self.journal.record(FILL, "A", symbol="NIFTY", price=109.0, order_id="o2", ts=at(10, 5, 1))
+        # Fills without a journaled signal are not counted
+        self.journal.record(FILL, "A", symbol="NIFTY", price=1.0, order_id="other", ts=at(10, 6))
+        self.journal.flush()
+
+        reports = JournalReports(self.root)
+        reports.refresh()
+        self.assertEqual(reports.slippage(), {"NIFTY": {"avg": 1.25, "fills": 2}})
+        self.assertEqual(reports.latency(), {"A": {"avg_ms": 500.0, "max_ms": 750.0, "orders": 2}})
+        self.assertEqual(reports.slippage(date(2026, 2, 17)), {})
+
+
+class TestJournalHooks(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.journal = TradeJournal(root=self.root, flush_interval=3600)
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def events(self):
+        self.journal.flush()
+        con = duckdb.connect()
+        trade_journal.journal_relation(
+            con, [f for files in list_partitions(self.root).values() for f in files]
+        )
+        return con.execute(
+            "SELECT event, action, quantity, price, pnl, order_id, signal_id FROM journal ORDER BY ts"
+        ).fetchall()
+
+    def test_base_strategy_journals_signal_order_and_pnl(self):
+        from strategies.utils.base_strategy import BaseStrategy
+
+        client = MagicMock()
+        client.placesmartorder.return_value = {"status": "success", "orderid": "42"}
+        strategy = BaseStrategy(name="JournalTest", symbol="SBIN", api_key="key", client=client)
+        strategy.pm = MagicMock(pnl=0.0)
+        strategy.journal = self.journal
+
+        def close(quantity, price, action):
+            strategy.pm.pnl = 15.0
+        strategy.pm.update_position.side_effect = close
+
+        strategy.sell(5, 103.0)
+
+        (signal, order, pnl) = self.events()
+        self.assertEqual(signal[:4], (SIGNAL, "SELL", 5, 103.0))
+        self.assertEqual(order[0], ORDER)
+        self.assertEqual(order[5], "42")
+        self.assertEqual(signal[6], order[6])
+        self.assertEqual(pnl[0], PNL)
+        self.assertEqual(pnl[4], 15.0)
+
+    def test_risk_manager_journals_entry_and_exit(self):
+        from strategies.utils.risk_manager import RiskManager
+
+        rm = RiskManager("JournalTestRisk")
+        rm.journal = self.journal
+        try:
+            rm.register_entry("SBIN", 10, 100.0, "SHORT")
+            rm.register_exit("SBIN", 95.0)
+        finally:
+            rm.state_file.unlink(missing_ok=True)
+
+        (fill, pnl) = self.events()
+        self.assertEqual(fill[:4], (FILL, "SELL", 10, 100.0))
+        self.assertEqual(pnl[:5], (PNL, "BUY", 10, 95.0, 50.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
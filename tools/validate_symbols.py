@@ -44,31 +44,21 @@ def validate_config_symbols(resolver):
                 return issues
             configs = json.loads(content)
 
-        for strat_id, config in configs.items():
-            try:
-                resolved = resolver.resolve(config)
-                if resolved is None:
-                    issues.append({
-                        "source": "active_strategies.json",
-                        "id": strat_id,
-                        "error": "Failed to resolve symbol",
-                        "status": "INVALID"
-                    })
-                elif isinstance(resolved, dict):
-                    if resolved.get('status') != 'valid':
-                        issues.append({
-                            "source": "active_strategies.json",
-                            "id": strat_id,
-                            "error": "Invalid option configuration",
-                            "status": "INVALID"
-                        })
-            except Exception as e:
+        for strat_id, result in resolver.resolve_all(configs).items():
+            if result['status'] == 'error':
                 issues.append({
                     "source": "active_strategies.json",
                     "id": strat_id,
-                    "error": str(e),
+                    "error": result['error'],
                     "status": "ERROR"
                 })
+            elif result['status'] == 'invalid':
+                issues.append({
+                    "source": "active_strategies.json",
+                    "id": strat_id,
+                    "error": "Invalid option configuration" if isinstance(result['resolved'], dict) else "Failed to resolve symbol",
+                    "status": "INVALID"
+                })
     except Exception as e:
         issues.append({
             "source": "active_strategies.json",
@@ -160,7 +150,7 @@ def main():
             from strategies.utils.symbol_resolver import SymbolResolver
 
         resolver = SymbolResolver(INSTRUMENTS_FILE)
-        instruments = set(resolver.df['symbol'].unique()) if not resolver.df.empty else set()
+        instruments = resolver.known_symbols()
     except Exception as e:
         print(f"Error loading SymbolResolver: {e}")
         if args.strict: